@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+AirTouch 文件传输基准
+在本进程内启动 PCController（空注入后端 + 延迟统计 + 文件接收），子进程中的合成客户端在同一个
+WebSocket 上以 240Hz 发送批量移动帧并每 20ms 发一次心跳，同时上传一个随机内容的文件
+（按服务端进度回复控制在途数据量）。分别测量不上传与上传时的心跳往返、注入延迟，
+以及上传吞吐，检查大文件上传期间光标是否仍然跟手。
+
+用法:
+    python benchmarks/file_transfer.py
+    python benchmarks/file_transfer.py --size-mb 500 --chunk-kb 128 --window-kb 1024
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import multiprocessing
+import os
+import shutil
+import statistics
+import struct
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import protocol  # noqa: E402
+from file_transfer import WINDOW  # noqa: E402
+from loopback import LoopbackServer  # noqa: E402
+
+MOTION_HZ = 240
+PING_INTERVAL = 0.02
+
+# ==================== 合成客户端 ====================
+
+def _payload(size: int) -> bytes:
+    """随机内容（重复 1MB 随机块，避免生成时间过长）"""
+    block = os.urandom(1024 * 1024)
+    return (block * (size // len(block) + 1))[:size]
+
+async def _motion(ws, stop: asyncio.Event):
+    """240Hz 移动帧（每帧 1 个样本）"""
+    interval = 1.0 / MOTION_HZ
+    deadline = time.perf_counter()
+    tick = 0
+    while not stop.is_set():
+        await ws.send(protocol.encode_motion_batch([(3, 2, int(tick * 1000 / MOTION_HZ))]))
+        tick += 1
+        deadline += interval
+        await asyncio.sleep(max(0.0, deadline - time.perf_counter()))
+
+async def _pings(ws, stop: asyncio.Event, sent: dict):
+    """定时心跳，负载为序号（往返时间由接收协程计算）"""
+    seq = 0
+    while not stop.is_set():
+        sent[seq] = time.perf_counter()
+        await ws.send(protocol.encode_ping(struct.pack('>I', seq)))
+        seq += 1
+        await asyncio.sleep(PING_INTERVAL)
+
+async def _client_main(port: int, upload: bool, size: int, chunk: int, window: int, duration: float) -> dict:
+    import websockets
+    sent, rtts = {}, []
+    acked = {'offset': 0}
+    progress = asyncio.Event()
+    result = {'uploaded': 0, 'elapsed': 0.0, 'done': False}
+    async with websockets.connect(f'ws://127.0.0.1:{port}', compression=None) as ws:
+        async def reader():
+            async for message in ws:
+                if isinstance(message, bytes):
+                    if message[0] == protocol.MSG_PONG and len(message) == 5:
+                        seq, = struct.unpack('>I', message[1:])
+                        rtts.append(time.perf_counter() - sent.pop(seq))
+                    continue
+                data = json.loads(message)
+                if data.get('type') == 'file':
+                    if 'offset' in data:
+                        acked['offset'] = data['offset']
+                    if data.get('done') or 'error' in data:
+                        result['done'] = data.get('done', False)
+                        acked['offset'] = size
+                    if 'handle' in data:
+                        acked['handle'] = data['handle']
+                    progress.set()
+
+        read_task = asyncio.ensure_future(reader())
+        stop = asyncio.Event()
+        tasks = [asyncio.ensure_future(_motion(ws, stop)), asyncio.ensure_future(_pings(ws, stop, sent))]
+        start = time.perf_counter()
+        if upload:
+            payload = _payload(size)
+            view = memoryview(payload)
+            digest = hashlib.sha256(payload).hexdigest()
+            await ws.send(json.dumps({'type': 'file_begin', 'name': 'bench.bin', 'size': size, 'hash': digest}))
+            while 'handle' not in acked:
+                progress.clear()
+                await progress.wait()
+            start = time.perf_counter()
+            offset = acked['offset']
+            while offset < size:
+                # 发送后在途数据会超过窗口时等待进度回复（服务端拒绝超出 WINDOW 的分块）
+                n = min(chunk, size - offset)
+                while offset + n - acked['offset'] > window:
+                    progress.clear()
+                    await progress.wait()
+                await ws.send(protocol.encode_file_chunk(acked['handle'], offset, view[offset:offset + n]))
+                offset += n
+            while acked['offset'] < size:
+                progress.clear()
+                await progress.wait()
+            result['uploaded'] = size
+        else:
+            await asyncio.sleep(duration)
+        result['elapsed'] = time.perf_counter() - start
+        stop.set()
+        await asyncio.gather(*tasks)
+        await asyncio.sleep(0.1)
+        read_task.cancel()
+    result['rtts'] = rtts
+    return result
+
+def _client_process(port, upload, size, chunk, window, duration, result_queue):
+    result_queue.put(asyncio.run(_client_main(port, upload, size, chunk, window, duration)))
+
+# ==================== 报告 ====================
+
+def _quantile(values, q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))] if values else 0.0
+
+def run(args, upload: bool) -> dict:
+    directory = tempfile.mkdtemp(prefix='airtouch-bench-')
+    server = LoopbackServer(args.motion_hz, file_transfer=True, file_dir=directory,
+                            file_max=args.size_mb * 1024 * 1024 + 1)
+    server.start()
+    ctx = multiprocessing.get_context('spawn')
+    result_queue = ctx.Queue()
+    client = ctx.Process(target=_client_process, args=(
+        server.port, upload, args.size_mb * 1024 * 1024, args.chunk_kb * 1024, args.window_kb * 1024,
+        args.duration, result_queue))
+    client.start()
+    result = result_queue.get(timeout=600)
+    client.join()
+    time.sleep(0.2)
+    server.stop()
+    shutil.rmtree(directory, ignore_errors=True)
+    snap = server.metrics.snapshot()
+    result['inject'] = snap['stages']['inject']
+    result['drops'] = snap['drops']
+    return result
+
+def print_report(name: str, result: dict):
+    rtts = result['rtts']
+    inject = result['inject']
+    line = (f"  {name:<8}心跳 p50 {_quantile(rtts, 0.5) * 1000:6.2f}ms  p95 {_quantile(rtts, 0.95) * 1000:6.2f}ms  "
+            f"p99 {_quantile(rtts, 0.99) * 1000:6.2f}ms  最大 {max(rtts, default=0) * 1000:6.2f}ms  "
+            f"注入 p95 {inject['p95'] * 1000:6.2f}ms  p99 {inject['p99'] * 1000:6.2f}ms")
+    if result['uploaded']:
+        rate = result['uploaded'] / 1048576 / result['elapsed']
+        line += f"  上传 {rate:6.1f}MB/s{'' if result['done'] else '（未完成）'}"
+    print(line)
+    if result['drops']:
+        print(f"           丢弃: {result['drops']}")
+    if len(rtts) > 1:
+        print(f"           心跳 {len(rtts)} 次  平均 {statistics.fmean(rtts) * 1000:.2f}ms")
+
+def main():
+    parser = argparse.ArgumentParser(description="AirTouch 文件传输基准")
+    parser.add_argument('--size-mb', type=int, default=200, help="上传文件大小（MB）")
+    parser.add_argument('--chunk-kb', type=int, default=64, help="分块大小（KB）")
+    parser.add_argument('--window-kb', type=int, default=512, help="客户端在途数据上限（KB）")
+    parser.add_argument('--duration', type=float, default=3.0, help="不上传时的测量时长（秒）")
+    parser.add_argument('--motion-hz', type=float, default=None, help="运动引擎频率")
+    args = parser.parse_args()
+    if args.window_kb * 1024 > WINDOW:
+        parser.error(f"--window-kb 不能超过服务端在途窗口 {WINDOW // 1024}KB")
+
+    print(f"AirTouch 文件传输基准  {args.size_mb}MB  分块 {args.chunk_kb}KB  窗口 {args.window_kb}KB  "
+          f"移动 {MOTION_HZ}Hz  心跳 {PING_INTERVAL * 1000:.0f}ms")
+    print_report('空闲', run(args, upload=False))
+    print_report('上传中', run(args, upload=True))
+
+if __name__ == '__main__':
+    main()
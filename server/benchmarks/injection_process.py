@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+AirTouch 注入进程基准测试
+同样的合成滑动输入分别送入单进程布局（运动线程与事件循环共用 GIL）和注入进程布局
+（运动引擎在独立进程中，事件经共享内存环传递），同时在网络进程中模拟界面重绘与 JSON 解析突发
+（周期性持有 GIL 的纯 Python 计算），对比运动帧间隔抖动与注入延迟。
+
+用法:
+    python benchmarks/injection_process.py
+    python benchmarks/injection_process.py --duration 5 --load-ms 12 --load-period-ms 40
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from input_backend import NullBackend  # noqa: E402
+from loopback import LoopbackServer, _client_process  # noqa: E402
+
+MODES = ('thread', 'process')
+
+# 模拟负载：一次 JSON 往返的文档（数百个字段，与界面刷新 / 解析突发的开销量级相当）
+_DOCUMENT = json.dumps({'items': [{'id': i, 'name': f'item-{i}', 'value': i * 0.5} for i in range(200)]})
+
+def _gil_load(stop: threading.Event, busy_ms: float, period_ms: float):
+    """每 period_ms 毫秒持有 GIL 连续计算 busy_ms 毫秒"""
+    while not stop.is_set():
+        start = time.perf_counter()
+        end = start + busy_ms / 1000
+        while time.perf_counter() < end:
+            json.dumps(json.loads(_DOCUMENT))
+        stop.wait(max(period_ms / 1000 - (time.perf_counter() - start), 0.0))
+
+def run_mode(args, mode: str) -> dict:
+    server = LoopbackServer(args.motion_hz, backend=NullBackend(), injection_process=mode == 'process')
+    server.start()
+
+    stop = threading.Event()
+    load = threading.Thread(target=_gil_load, args=(stop, args.load_ms, args.load_period_ms), daemon=True)
+    if args.load_ms > 0:
+        load.start()
+
+    ctx = multiprocessing.get_context('spawn')
+    result_queue = ctx.Queue()
+    client = ctx.Process(target=_client_process, args=(
+        server.port, 'swipe', args.rate, args.duration, 1, False, result_queue))
+    client.start()
+    sent = result_queue.get(timeout=args.duration + 30)
+    client.join()
+    stop.set()
+    if load.is_alive():
+        load.join()
+    server.stop()
+
+    snap = server.metrics.snapshot()
+    return {
+        'mode': mode,
+        'sent': sent,
+        'ticks': server.controller.motion.tick_count,
+        'late_ticks': server.controller.motion.late_ticks,
+        'dropped': sum(snap['drops'].values()),
+        'tick_jitter': snap['stages']['tick_jitter'],
+        'inject': snap['stages']['inject'],
+    }
+
+def _ms(seconds: float) -> str:
+    return f"{seconds * 1000:7.2f}ms"
+
+def main():
+    parser = argparse.ArgumentParser(description="AirTouch 注入进程基准测试")
+    parser.add_argument('--duration', type=float, default=4.0, help="每种布局持续秒数")
+    parser.add_argument('--rate', type=float, default=240, help="客户端采样频率 Hz")
+    parser.add_argument('--motion-hz', type=float, default=120, help="运动引擎频率")
+    parser.add_argument('--load-ms', type=float, default=8.0, help="每次模拟负载持有 GIL 的毫秒数（0 关闭）")
+    parser.add_argument('--load-period-ms', type=float, default=33.0, help="模拟负载周期（毫秒）")
+    parser.add_argument('--mode', choices=MODES + ('both',), default='both')
+    args = parser.parse_args()
+
+    modes = MODES if args.mode == 'both' else (args.mode,)
+    print(f"AirTouch 注入进程基准  rate={args.rate:g}Hz  motion={args.motion_hz:g}Hz  "
+          f"负载 {args.load_ms:g}ms / {args.load_period_ms:g}ms  duration={args.duration:g}s")
+    print(f"  {'布局':<10}{'运动帧':>8}{'落后':>6}{'抖动 p50':>11}{'p95':>11}{'p99':>11}{'注入 p99':>11}")
+    for mode in modes:
+        r = run_mode(args, mode)
+        jitter, inject = r['tick_jitter'], r['inject']
+        print(f"  {r['mode']:<10}{r['ticks']:>8}{r['late_ticks']:>6}{_ms(jitter['p50']):>11}"
+              f"{_ms(jitter['p95']):>11}{_ms(jitter['p99']):>11}{_ms(inject['p99']):>11}")
+        if r['dropped']:
+            print(f"  ⚠️  丢弃 {r['dropped']}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+AirTouch 抖动缓冲基准
+合成客户端以固定频率匀速滑动（每个样本带设备时间戳），发送前模拟 WiFi 省电造成的突发：
+每个周期的前 gap 毫秒内产生的样本被扣住，到 gap 结束时一次性送出。
+分别在关闭 / 开启抖动缓冲时运行，比较光标输出的平稳程度：
+
+- 到达抖动:   服务端测得的消息到达抖动（RFC 3550）
+- 速度波动:   每个运动帧输出位移的变异系数（标准差 / 均值），匀速输入理想值为 0
+- 停顿帧:     滑动过程中没有任何输出的运动帧比例
+- 最大间隔:   相邻两次光标输出之间的最长时间
+- 缓冲延迟:   抖动缓冲为平滑付出的额外延迟 (p50 / p95)
+
+用法:
+    python benchmarks/jitter.py --gap 0.03 --period 0.1 --rate 120 --duration 5
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from typing import List
+
+from loopback import LoopbackServer
+
+import protocol  # noqa: E402  (loopback 已把服务端目录加入 sys.path)
+from input_backend import RecordingBackend  # noqa: E402
+
+MODES = ('off', 'on')
+# 统计时跳过开头与结尾（秒），排除缓冲收敛与收尾
+WARMUP = 0.5
+TAIL = 0.2
+
+def send_schedule(args, rng: random.Random) -> List[tuple]:
+    """生成 (发送时间, 设备时间戳 ms) 列表：突发窗口内的样本推迟到窗口结束（保持顺序，同 TCP）"""
+    schedule = []
+    last = 0.0
+    for i in range(int(args.rate * args.duration)):
+        t = i / args.rate
+        phase = t % args.period
+        send = t - phase + args.gap if phase < args.gap else t
+        last = max(last, send + rng.uniform(0, args.noise))
+        schedule.append((last, int(t * 1000)))
+    return schedule
+
+async def run_client(args, port: int):
+    import websockets
+    rng = random.Random(args.seed)
+    schedule = send_schedule(args, rng)
+    async with websockets.connect(f'ws://127.0.0.1:{port}', compression=None) as ws:
+        start = time.perf_counter()
+        for at, ts in schedule:
+            delay = start + at - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            await ws.send(protocol.encode_motion_batch([(args.step, 0, ts)]))
+        await ws.send(protocol.encode_ping(b'done'))
+        await ws.recv()
+        # 等待缓冲中剩余的样本播放完
+        await asyncio.sleep(0.2)
+
+def run_mode(args, mode: str) -> dict:
+    backend = RecordingBackend()
+    server = LoopbackServer(args.motion_hz, backend=backend, filters=args.filters,
+                            jitter_buffer=(mode == 'on'))
+    server.start()
+    try:
+        asyncio.run(run_client(args, server.port))
+    finally:
+        server.stop()
+
+    moves = [(t, dx) for t, name, *rest in backend.events if name == 'move' for dx in rest[:1]]
+    interval = 1.0 / server.controller.motion.rate_hz
+    begin = moves[0][0] + WARMUP
+    end = moves[0][0] + args.duration - TAIL
+    bins = [0] * max(int((end - begin) / interval), 1)
+    for t, dx in moves:
+        if begin <= t < end:
+            bins[min(int((t - begin) / interval), len(bins) - 1)] += dx
+    steady = [t for t, _ in moves if begin <= t < end]
+    gaps = [b - a for a, b in zip(steady, steady[1:])]
+    mean = statistics.fmean(bins)
+    snapshot = server.metrics.snapshot()
+    playout = snapshot['stages']['playout']
+    return {
+        'mode': mode,
+        'jitter': snapshot['jitter'],
+        'cv': statistics.pstdev(bins) / mean if mean else 0.0,
+        'stalls': sum(1 for b in bins if b == 0) / len(bins),
+        'max_gap': max(gaps) if gaps else 0.0,
+        'p50': playout['p50'] if playout['count'] else 0.0,
+        'p95': playout['p95'] if playout['count'] else 0.0,
+        'total': sum(dx for _, dx in moves),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="AirTouch 抖动缓冲基准")
+    parser.add_argument('--mode', choices=MODES + ('both',), default='both')
+    parser.add_argument('--rate', type=float, default=120, help="移动样本频率 Hz")
+    parser.add_argument('--duration', type=float, default=5.0, help="持续秒数")
+    parser.add_argument('--gap', type=float, default=0.03, help="每个周期内扣住样本的时长（秒）")
+    parser.add_argument('--period', type=float, default=0.1, help="突发周期（秒）")
+    parser.add_argument('--noise', type=float, default=0.002, help="附加随机发送延迟上限（秒）")
+    parser.add_argument('--step', type=int, default=3, help="每个样本的位移（像素）")
+    parser.add_argument('--filters', default='raw', help="指针滤波预设（默认 raw，只比较抖动缓冲本身）")
+    parser.add_argument('--motion-hz', type=float, default=100, help="运动引擎频率")
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    modes = MODES if args.mode == 'both' else (args.mode,)
+    print(f"AirTouch 抖动缓冲基准  gap={args.gap * 1000:g}ms / {args.period * 1000:g}ms  "
+          f"rate={args.rate:g}Hz  filters={args.filters}")
+    print(f"  {'缓冲':<6}{'到达抖动':>10}{'速度波动':>10}{'停顿帧':>9}{'最大间隔':>10}"
+          f"{'延迟p50':>10}{'p95':>9}{'总位移':>8}")
+    for mode in modes:
+        r = run_mode(args, mode)
+        print(f"  {r['mode']:<6}{r['jitter'] * 1000:>8.1f}ms{r['cv']:>10.2f}{r['stalls']:>9.0%}"
+              f"{r['max_gap'] * 1000:>8.1f}ms{r['p50'] * 1000:>8.1f}ms{r['p95'] * 1000:>7.1f}ms{r['total']:>8}")
+
+if __name__ == '__main__':
+    main()
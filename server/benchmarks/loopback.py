@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+AirTouch 回环基准测试
+在本进程内启动 PCController（空注入后端 + 延迟统计），由子进程中的合成手机客户端
+通过本机 WebSocket 按指定频率回放滑动、快速甩动、连续打字、点击/滚动混合等场景，
+输出吞吐、注入延迟、抖动以及每秒输入消耗的服务器 CPU 时间。
+
+用法:
+    python benchmarks/loopback.py --scenario all --rate 240 --duration 5
+    python benchmarks/loopback.py --scenario swipe --rate 1000 --batch 8 --protocol binary
+"""
+
+import argparse
+import asyncio
+import math
+import multiprocessing
+import os
+import socket
+import sys
+import threading
+import time
+from typing import Iterator, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import protocol  # noqa: E402
+from input_backend import NullBackend  # noqa: E402
+from metrics import Metrics  # noqa: E402
+from pc_controller import PCController  # noqa: E402
+
+SCENARIOS = ('swipe', 'flick', 'typing', 'mixed')
+
+# ==================== 合成客户端 ====================
+
+def _json(data: dict) -> str:
+    import json
+    return json.dumps(data)
+
+def _motion_frames(samples: List[tuple], batch: int) -> List[bytes]:
+    """把 (dx, dy, ts) 样本按批量大小编码为帧"""
+    if batch <= 1:
+        return [protocol.encode_mouse_move(dx, dy) for dx, dy, _ in samples]
+    return [protocol.encode_motion_batch(samples)]
+
+def scenario_ticks(name: str, rate: float, batch: int, use_json: bool) -> Iterator[list]:
+    """按 tick 生成要发送的消息列表；每 batch 个 tick 合并发送一次移动样本"""
+    tick = 0
+    pending: List[tuple] = []
+    while True:
+        t_ms = int(tick * 1000 / rate)
+        messages = []
+        sample = None
+
+        if name == 'swipe':
+            # 匀速画圆
+            phase = tick * 2 * math.pi / rate
+            sample = (round(8 * math.cos(phase)), round(8 * math.sin(phase)), t_ms)
+        elif name == 'flick':
+            # 80ms 快速甩动 + 150ms 停顿
+            cycle_ms = t_ms % 230
+            if cycle_ms < 80:
+                sample = (40, -25, t_ms)
+        elif name == 'typing':
+            if use_json:
+                messages.append(_json({'type': 'keydown', 'key': 'SPACE'}))
+            else:
+                messages.append(protocol.encode_key(chr(ord('a') + tick % 26)))
+        elif name == 'mixed':
+            sample = (3, 2, t_ms)
+            if tick % 10 == 0:
+                messages.append(_json({'type': 'click', 'button': 'left'}) if use_json
+                                else protocol.encode_button('left', protocol.ACTION_CLICK))
+            if tick % 5 == 0:
+                messages.append(_json({'type': 'scroll', 'dy': -3}) if use_json
+                                else protocol.encode_scroll(0, -360))
+
+        if sample is not None:
+            pending.append(sample)
+        if pending and (len(pending) >= batch or sample is None):
+            messages[:0] = _motion_frames(pending, batch)
+            pending = []
+        yield messages
+        tick += 1
+
+async def _client_main(port: int, scenario: str, rate: float, duration: float, batch: int, use_json: bool):
+    import websockets
+    sent = 0
+    async with websockets.connect(f'ws://127.0.0.1:{port}', compression=None) as ws:
+        interval = 1.0 / rate
+        ticks = scenario_ticks(scenario, rate, batch, use_json)
+        start = time.perf_counter()
+        deadline = start
+        while deadline - start < duration:
+            for message in next(ticks):
+                await ws.send(message)
+                sent += 1
+            deadline += interval
+            delay = deadline - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        # 心跳往返，确保之前的消息都已被服务器处理
+        await ws.send(protocol.encode_ping(b'done'))
+        await ws.recv()
+    return sent
+
+def _client_process(port, scenario, rate, duration, batch, use_json, result_queue):
+    sent = asyncio.run(_client_main(port, scenario, rate, duration, batch, use_json))
+    result_queue.put(sent)
+
+# ==================== 服务器 ====================
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+class LoopbackServer:
+    """在后台线程的事件循环中运行 PCController"""
+
+    def __init__(self, motion_hz: float, backend=None, **options):
+        self.port = _free_port()
+        self.metrics = Metrics()
+        self.backend = backend or NullBackend()
+        self.controller = PCController(
+            host='127.0.0.1', port=self.port, backend=self.backend,
+            motion_hz=motion_hz, metrics=self.metrics, log_callback=lambda message: None,
+            **options,
+        )
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_until_complete(self.controller.start_server())
+
+    def start(self):
+        self.thread.start()
+        # 等待端口可连接
+        for _ in range(100):
+            try:
+                with socket.create_connection(('127.0.0.1', self.port), timeout=0.1):
+                    return
+            except OSError:
+                time.sleep(0.02)
+        raise RuntimeError("服务器启动超时")
+
+    def stop(self):
+        self.controller.stop_server()
+        self.thread.join(timeout=3)
+
+# ==================== 报告 ====================
+
+def _ms(seconds: float) -> str:
+    return f"{seconds * 1000:7.2f}ms"
+
+def run_scenario(args, scenario: str) -> dict:
+    server = LoopbackServer(args.motion_hz)
+    server.start()
+
+    ctx = multiprocessing.get_context('spawn')
+    result_queue = ctx.Queue()
+    client = ctx.Process(target=_client_process, args=(
+        server.port, scenario, args.rate, args.duration, args.batch, args.protocol == 'json', result_queue))
+
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    client.start()
+    sent = result_queue.get(timeout=args.duration + 30)
+    client.join()
+    # 等待运动引擎把剩余位移输出完
+    time.sleep(0.3)
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+    server.stop()
+
+    snap = server.metrics.snapshot()
+    received = sum(snap['messages'].values())
+    return {
+        'scenario': scenario,
+        'sent': sent,
+        'received': received,
+        'wall': wall,
+        'throughput': received / args.duration,
+        'cpu_per_input_second': cpu / args.duration,
+        'cpu_percent': 100 * cpu / wall,
+        'injected': server.backend.event_count,
+        'ticks': server.controller.motion.tick_count,
+        'late_ticks': server.controller.motion.late_ticks,
+        'jitter': snap['jitter'],
+        'inbox_peak': snap['inbox_peak'],
+        'coalesced': snap['coalesced'],
+        'drops': snap['drops'],
+        'stages': snap['stages'],
+    }
+
+def print_report(result: dict):
+    stages = result['stages']
+    print(f"\n▶ 场景: {result['scenario']}")
+    print(f"  消息: 发送 {result['sent']} / 接收 {result['received']}  "
+          f"吞吐 {result['throughput']:.0f} msg/s  注入事件 {result['injected']}")
+    print(f"  运动帧: {result['ticks']} (落后 {result['late_ticks']})  到达抖动 {_ms(result['jitter'])}")
+    print(f"  入站缓冲: 峰值 {result['inbox_peak']} 帧  合并移动帧 {result['coalesced']}")
+    print(f"  CPU: 每秒输入 {result['cpu_per_input_second'] * 1000:.1f}ms  ({result['cpu_percent']:.1f}%)")
+    if result['drops']:
+        print(f"  丢弃: {result['drops']}")
+    print(f"  {'阶段':<12}{'次数':>8}{'p50':>11}{'p95':>11}{'p99':>11}")
+    for name in ('decode', 'accumulate', 'handle', 'inject', 'tick_jitter'):
+        s = stages[name]
+        print(f"  {name:<12}{s['count']:>8}{_ms(s['p50']):>11}{_ms(s['p95']):>11}{_ms(s['p99']):>11}")
+
+def main():
+    parser = argparse.ArgumentParser(description="AirTouch 回环基准测试")
+    parser.add_argument('--scenario', choices=SCENARIOS + ('all',), default='all')
+    parser.add_argument('--rate', type=float, default=120, help="客户端采样频率 Hz (60-1000)")
+    parser.add_argument('--duration', type=float, default=5.0, help="每个场景持续秒数")
+    parser.add_argument('--batch', type=int, default=1, help="每帧移动样本数，1 为旧版单包")
+    parser.add_argument('--protocol', choices=('binary', 'json'), default='binary', help="离散事件使用的协议")
+    parser.add_argument('--motion-hz', type=float, default=None, help="运动引擎频率")
+    args = parser.parse_args()
+
+    if not 1 <= args.rate <= 1000:
+        parser.error("--rate 需在 1-1000 之间")
+
+    scenarios = SCENARIOS if args.scenario == 'all' else (args.scenario,)
+    print(f"AirTouch 回环基准  rate={args.rate:g}Hz  duration={args.duration:g}s  "
+          f"batch={args.batch}  protocol={args.protocol}")
+    for scenario in scenarios:
+        print_report(run_scenario(args, scenario))
+
+if __name__ == '__main__':
+    main()
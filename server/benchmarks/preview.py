@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+AirTouch 屏幕预览基准
+不需要显示器：用合成的 1920x1080 桌面画面模拟几种典型变化，测量预览编码每帧的耗时、
+CPU 时间、矩形数与字节数，并与每帧发送整幅缩略图 JPEG 对比：
+
+- static:  画面不变
+- cursor:  只有 20px 的光标在移动
+- typing:  一行文字逐字增加
+- scroll:  一个窗口的内容持续向上滚动
+- video:   640x360 区域每帧全部变化
+- full:    整幅画面每帧变化
+
+用法:
+    python benchmarks/preview.py
+    python benchmarks/preview.py --frames 60 --width 640 --quality 50 --scenario scroll
+"""
+
+import argparse
+import io
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np  # noqa: E402
+from PIL import Image  # noqa: E402
+
+from preview import PreviewEncoder  # noqa: E402
+
+SCENARIOS = ('static', 'cursor', 'typing', 'scroll', 'video', 'full')
+WIDTH, HEIGHT = 1920, 1080
+# 滚动窗口区域 (x, y, 宽, 高)
+SCROLL_WINDOW = (200, 150, 1200, 800)
+
+def synthetic_desktop(rng: np.random.Generator) -> np.ndarray:
+    """渐变背景 + 几个带标题栏的窗口 + 类似文字的细条纹"""
+    y, x = np.mgrid[0:HEIGHT, 0:WIDTH]
+    frame = np.empty((HEIGHT, WIDTH, 3), dtype=np.uint8)
+    frame[..., 0] = x * 255 // (WIDTH - 1)
+    frame[..., 1] = y * 255 // (HEIGHT - 1)
+    frame[..., 2] = 96
+    for _ in range(6):
+        w, h = int(rng.integers(WIDTH // 6, WIDTH // 2)), int(rng.integers(HEIGHT // 6, HEIGHT // 2))
+        left, top = int(rng.integers(0, WIDTH - w)), int(rng.integers(0, HEIGHT - h))
+        frame[top:top + h, left:left + w] = 240
+        frame[top:top + 24, left:left + w] = rng.integers(0, 255, 3, dtype=np.uint8)
+        _text(frame[top + 32:top + h - 8, left + 8:left + w - 8], rng)
+    return frame
+
+def _text(region: np.ndarray, rng: np.random.Generator):
+    """每 12 行画一行"文字"（随机的深色短块）"""
+    lines = region[::12]
+    lines[...] = np.where(rng.random(lines.shape[:2])[..., None] < 0.4, 30, 240)
+
+def scenario_frames(name: str, count: int, rng: np.random.Generator):
+    """逐帧生成合成画面（生成开销不计入编码耗时）"""
+    base = synthetic_desktop(rng)
+    sx, sy, sw, sh = SCROLL_WINDOW
+    content = np.full((sh * 4, sw, 3), 240, dtype=np.uint8)
+    _text(content, rng)
+    for i in range(count):
+        frame = base.copy()
+        if name == 'cursor':
+            x = 300 + i * 17 % 1200
+            y = 200 + i * 11 % 600
+            frame[y:y + 20, x:x + 20] = 0
+        elif name == 'typing':
+            frame[600:612, 400:400 + 8 * (i + 1)] = 30
+        elif name == 'scroll':
+            offset = i * 12 % (content.shape[0] - sh)
+            frame[sy:sy + sh, sx:sx + sw] = content[offset:offset + sh]
+        elif name == 'video':
+            frame[500:860, 1100:1740] = rng.integers(0, 255, (360, 640, 3), dtype=np.uint8)
+        elif name == 'full':
+            frame = np.roll(base, i * 8, axis=1)
+        yield Image.fromarray(frame)
+
+def run_scenario(args, name: str) -> dict:
+    rng = np.random.default_rng(args.seed)
+    encoder = PreviewEncoder(width=args.width, quality=args.quality)
+    baseline = PreviewEncoder(width=args.width, quality=args.quality)
+    times, cpu, sizes, rects = [], [], [], []
+    full_times, full_sizes = [], []
+    for index, image in enumerate(scenario_frames(name, args.frames + 1, rng)):
+        start, start_cpu = time.perf_counter(), time.process_time()
+        message = encoder.encode(image)
+        elapsed, elapsed_cpu = time.perf_counter() - start, time.process_time() - start_cpu
+
+        # 对照：每帧整幅缩略图编码为一个 JPEG
+        start = time.perf_counter()
+        buf = io.BytesIO()
+        Image.fromarray(baseline.scale(image)).save(buf, 'JPEG', quality=args.quality)
+        full_elapsed = time.perf_counter() - start
+        if index == 0:
+            continue   # 第一帧是关键帧，不计入
+        times.append(elapsed)
+        cpu.append(elapsed_cpu)
+        sizes.append(len(message) if message is not None else 0)
+        rects.append(encoder.last_rects if message is not None else 0)
+        full_times.append(full_elapsed)
+        full_sizes.append(len(buf.getvalue()))
+    times.sort()
+    return {
+        'name': name,
+        'mean': statistics.fmean(times),
+        'p95': times[int(len(times) * 0.95) - 1],
+        'cpu': statistics.fmean(cpu),
+        'rects': statistics.fmean(rects),
+        'bytes': statistics.fmean(sizes),
+        'sent': sum(1 for size in sizes if size) / len(sizes),
+        'full_mean': statistics.fmean(full_times),
+        'full_bytes': statistics.fmean(full_sizes),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="AirTouch 屏幕预览基准")
+    parser.add_argument('--scenario', choices=SCENARIOS + ('all',), default='all')
+    parser.add_argument('--frames', type=int, default=40, help="每个场景的帧数")
+    parser.add_argument('--width', type=int, default=480, help="预览宽度")
+    parser.add_argument('--quality', type=int, default=60, help="JPEG 质量")
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    scenarios = SCENARIOS if args.scenario == 'all' else (args.scenario,)
+    print(f"AirTouch 屏幕预览基准  {WIDTH}x{HEIGHT} -> 宽 {args.width}  quality={args.quality}  "
+          f"frames={args.frames}")
+    print(f"  {'场景':<8}{'耗时':>9}{'p95':>9}{'CPU':>9}{'矩形':>6}{'发送帧':>8}{'字节/帧':>10}"
+          f"{'整帧耗时':>10}{'整帧字节':>10}")
+    for name in scenarios:
+        r = run_scenario(args, name)
+        print(f"  {r['name']:<8}{r['mean'] * 1000:>7.2f}ms{r['p95'] * 1000:>7.2f}ms{r['cpu'] * 1000:>7.2f}ms"
+              f"{r['rects']:>6.1f}{r['sent']:>8.0%}{r['bytes']:>10.0f}"
+              f"{r['full_mean'] * 1000:>8.2f}ms{r['full_bytes']:>10.0f}")
+
+if __name__ == '__main__':
+    main()
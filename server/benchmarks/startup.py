@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+AirTouch 启动时间基准
+以子进程方式启动 headless 服务器，测量从进程创建到第一次 WebSocket 握手成功的时间，
+并列出服务路径实际导入了哪些界面 / 剪贴板模块（应为空）。
+
+用法:
+    python benchmarks/startup.py --runs 5
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 服务路径不应加载的模块
+GUI_MODULES = ('tkinter', 'PIL', 'qrcode', 'pyperclip', 'pyautogui')
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+async def _wait_for_handshake(port: int, timeout: float) -> bool:
+    import websockets
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            async with websockets.connect(f'ws://127.0.0.1:{port}', open_timeout=1):
+                return True
+        except (OSError, asyncio.TimeoutError):
+            await asyncio.sleep(0.002)
+    return False
+
+def time_to_first_connection(backend: str, timeout: float) -> float:
+    """启动 headless 服务器，返回首次握手成功所需秒数"""
+    port = _free_port()
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, 'pc_controller.py', '--headless', '--host', '127.0.0.1',
+         '--port', str(port), '--backend', backend],
+        cwd=SERVER_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        if not asyncio.run(_wait_for_handshake(port, timeout)):
+            raise RuntimeError("服务器启动超时")
+        return time.perf_counter() - start
+    finally:
+        proc.terminate()
+        proc.wait(timeout=5)
+
+def import_report(module: str):
+    """返回 (导入耗时秒数, 已加载的界面模块)"""
+    code = ("import sys, time; t = time.perf_counter(); import {0}; t = time.perf_counter() - t; "
+            "print(t); print(','.join(m for m in {1!r} if m in sys.modules))").format(module, GUI_MODULES)
+    out = subprocess.run([sys.executable, '-c', code], cwd=SERVER_DIR,
+                         capture_output=True, text=True, check=True).stdout.splitlines()
+    return float(out[0]), [m for m in out[1].split(',') if m] if len(out) > 1 else []
+
+def main():
+    parser = argparse.ArgumentParser(description="AirTouch 启动时间基准")
+    parser.add_argument('--runs', type=int, default=5, help="重复次数")
+    parser.add_argument('--backend', default='null', help="输入后端")
+    parser.add_argument('--timeout', type=float, default=15.0, help="单次启动超时秒数")
+    args = parser.parse_args()
+
+    seconds, loaded = import_report('pc_controller')
+    print(f"import pc_controller: {seconds * 1000:.1f}ms  界面模块: {', '.join(loaded) or '无'}")
+    try:
+        seconds, loaded = import_report('gui')
+        print(f"import gui:           {seconds * 1000:.1f}ms  界面模块: {', '.join(loaded) or '无'}")
+    except subprocess.CalledProcessError:
+        print("import gui:           不可用（缺少 tkinter / PIL）")
+
+    samples = [time_to_first_connection(args.backend, args.timeout) for _ in range(args.runs)]
+    print(f"\n启动到首次接受连接 (headless, {args.runs} 次):")
+    print(f"  最小 {min(samples) * 1000:.1f}ms  中位数 {statistics.median(samples) * 1000:.1f}ms  "
+          f"最大 {max(samples) * 1000:.1f}ms")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+AirTouch 丢包 / 延迟对比基准
+在本机回环上通过人为丢包、延迟抖动的中继，对比两种移动传输：
+- ws:  WebSocket 批量帧。中继模拟 TCP 行为：丢失的数据段在重传超时 (RTO) 后才送达，
+       其后的所有数据都要排在它后面（队头阻塞）
+- udp: UDP 移动报文。丢失即丢失，抖动造成的乱序 / 迟到报文由服务端按序号丢弃
+
+输出每种传输送达的样本比例、服务端丢弃数，以及移动样本从客户端发出到服务端接受时的"年龄"分布。
+
+用法:
+    python benchmarks/udp_loss.py --loss 0.05 --jitter 0.01 --rate 120 --duration 5
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import socket
+import statistics
+import time
+from typing import List
+
+from loopback import LoopbackServer
+
+import protocol  # noqa: E402  (loopback 已把服务端目录加入 sys.path)
+
+TRANSPORTS = ('ws', 'udp')
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+# ==================== 有损中继 ====================
+
+class UdpRelay(asyncio.DatagramProtocol):
+    """按概率丢弃报文，其余报文加上随机延迟后转发（延迟不同会导致乱序）"""
+
+    def __init__(self, target, loss: float, delay: float, jitter: float, rng: random.Random):
+        self.target = target
+        self.loss = loss
+        self.delay = delay
+        self.jitter = jitter
+        self.rng = rng
+        self.transport = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        if self.rng.random() < self.loss:
+            return
+        loop = asyncio.get_running_loop()
+        loop.call_later(self.delay + self.rng.uniform(0, self.jitter), self.transport.sendto, data, self.target)
+
+async def start_tcp_relay(target_port: int, loss: float, delay: float, jitter: float, rto: float,
+                          rng: random.Random) -> asyncio.AbstractServer:
+    """TCP 中继：客户端到服务端方向按概率模拟丢段重传，数据始终按序送达"""
+    loop = asyncio.get_running_loop()
+
+    async def pipe(reader, writer, lossy: bool):
+        queue: asyncio.Queue = asyncio.Queue()
+
+        async def deliver():
+            while True:
+                at, data = await queue.get()
+                if data is None:
+                    writer.close()
+                    return
+                wait = at - loop.time()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                writer.write(data)
+                await writer.drain()
+
+        task = asyncio.ensure_future(deliver())
+        release = 0.0
+        while True:
+            data = await reader.read(65536)
+            if not data:
+                queue.put_nowait((0.0, None))
+                break
+            at = loop.time() + delay + rng.uniform(0, jitter)
+            if lossy and rng.random() < loss:
+                at += rto
+            # 按序交付：后到的数据不能早于前面的数据
+            release = max(release, at)
+            queue.put_nowait((release, data))
+        await task
+
+    async def handle(reader, writer):
+        up_reader, up_writer = await asyncio.open_connection('127.0.0.1', target_port)
+        await asyncio.gather(pipe(reader, up_writer, True), pipe(up_reader, writer, False),
+                             return_exceptions=True)
+
+    return await asyncio.start_server(handle, '127.0.0.1', 0)
+
+# ==================== 客户端 ====================
+
+async def run_client(args, transport: str, server_port: int, t0: float) -> int:
+    import websockets
+    rng = random.Random(args.seed)
+    loop = asyncio.get_running_loop()
+    interval = 1.0 / args.rate
+    count = int(args.rate * args.duration)
+
+    def ts_ms() -> int:
+        return int((time.perf_counter() - t0) * 1000)
+
+    async def pace(send):
+        deadline = time.perf_counter()
+        for seq in range(count):
+            await send(seq)
+            deadline += interval
+            delay = deadline - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+    if transport == 'ws':
+        relay = await start_tcp_relay(server_port, args.loss, args.delay, args.jitter, args.rto, rng)
+        relay_port = relay.sockets[0].getsockname()[1]
+        async with websockets.connect(f'ws://127.0.0.1:{relay_port}', compression=None) as ws:
+            await pace(lambda seq: ws.send(protocol.encode_motion_batch([(1, 0, ts_ms())])))
+            await ws.send(protocol.encode_ping(b'done'))
+            await ws.recv()
+        relay.close()
+        return count
+
+    async with websockets.connect(f'ws://127.0.0.1:{server_port}', compression=None) as ws:
+        await ws.send(json.dumps({'type': 'udp_open'}))
+        reply = json.loads(await ws.recv())
+        session_id, key = reply['session'], int(reply['key'], 16)
+        relay_transport, _ = await loop.create_datagram_endpoint(
+            lambda: UdpRelay(('127.0.0.1', reply['port']), args.loss, args.delay, args.jitter, rng),
+            local_addr=('127.0.0.1', 0))
+        relay_addr = relay_transport.get_extra_info('sockname')
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+        async def send(seq):
+            sock.sendto(protocol.encode_udp_motion(session_id, key, seq, [(1, 0, ts_ms())]), relay_addr)
+
+        await pace(send)
+        # 等待中继中延迟的报文送达
+        await asyncio.sleep(args.delay + args.jitter + 0.05)
+        sock.close()
+        relay_transport.close()
+    return count
+
+# ==================== 报告 ====================
+
+def run_transport(args, transport: str) -> dict:
+    server = LoopbackServer(args.motion_hz)
+    controller = server.controller
+    ages: List[float] = []
+    delivered = [0]
+    t0 = time.perf_counter()
+
+    # 观测每批被接受样本的年龄（客户端发出 -> 服务端接受）
+    apply_samples = controller._apply_motion_samples
+
+    def probe(samples):
+        if samples:
+            now_ms = (time.perf_counter() - t0) * 1000
+            ages.append(now_ms - samples[-1][2])
+            delivered[0] += len(samples)
+        apply_samples(samples)
+
+    controller._apply_motion_samples = probe
+    server.start()
+    try:
+        sent = asyncio.run(run_client(args, transport, server.port, t0))
+    finally:
+        server.stop()
+
+    drops = server.metrics.snapshot()['drops']
+    ages.sort()
+
+    def pct(q: float) -> float:
+        return ages[min(int(q * len(ages)), len(ages) - 1)] if ages else 0.0
+
+    return {
+        'transport': transport,
+        'sent': sent,
+        'delivered': delivered[0],
+        'stale': drops.get('udp_stale', 0),
+        'p50': pct(0.50), 'p95': pct(0.95), 'p99': pct(0.99),
+        'max': ages[-1] if ages else 0.0,
+        'mean': statistics.fmean(ages) if ages else 0.0,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="AirTouch 丢包 / 延迟对比基准")
+    parser.add_argument('--transport', choices=TRANSPORTS + ('both',), default='both')
+    parser.add_argument('--rate', type=float, default=120, help="移动样本频率 Hz")
+    parser.add_argument('--duration', type=float, default=5.0, help="持续秒数")
+    parser.add_argument('--loss', type=float, default=0.05, help="丢包率")
+    parser.add_argument('--delay', type=float, default=0.003, help="单向基础延迟（秒）")
+    parser.add_argument('--jitter', type=float, default=0.01, help="附加随机延迟上限（秒）")
+    parser.add_argument('--rto', type=float, default=0.2, help="TCP 重传超时（秒）")
+    parser.add_argument('--motion-hz', type=float, default=100, help="运动引擎频率")
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    transports = TRANSPORTS if args.transport == 'both' else (args.transport,)
+    print(f"AirTouch 丢包基准  loss={args.loss:.0%}  delay={args.delay * 1000:g}ms  "
+          f"jitter={args.jitter * 1000:g}ms  rto={args.rto * 1000:g}ms  rate={args.rate:g}Hz")
+    print(f"  {'传输':<6}{'发送':>7}{'送达':>7}{'过时丢弃':>10}{'年龄p50':>10}{'p95':>9}{'p99':>9}{'max':>9}")
+    for transport in transports:
+        r = run_transport(args, transport)
+        print(f"  {r['transport']:<6}{r['sent']:>7}{r['delivered']:>7}{r['stale']:>10}"
+              f"{r['p50']:>8.1f}ms{r['p95']:>7.1f}ms{r['p99']:>7.1f}ms{r['max']:>7.1f}ms")
+
+if __name__ == '__main__':
+    main()
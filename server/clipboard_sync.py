@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+AirTouch 剪贴板同步
+手机与电脑之间双向同步文本剪贴板：
+- 内容以 UTF-8 分块传输（二进制 0x0D 帧，每块都带完整内容的 BLAKE2b 摘要），
+  大段文本不会占住连接，块之间照常处理移动、点击等输入帧
+- 变化检测只比较摘要：电脑剪贴板与手机已有的内容相同就不发送，手机发来电脑已有的内容时
+  第一块即可判定并忽略其余块
+- 电脑剪贴板由监视线程定时检查；Windows 先比较剪贴板序号，没有变化时不读取内容
+- 写入电脑剪贴板经注入分发队列执行，与之后的 Ctrl+V 等按键严格有序，粘贴不会早于内容到达
+- 超过大小上限的内容不收不发
+"""
+
+import hashlib
+import itertools
+import sys
+import threading
+import time
+from typing import Callable, Optional
+
+from text_input import RESTORE_DELAY
+
+CLIPBOARD_CHUNK = 16 * 1024
+# 默认大小上限（字节）；注入进程模式下内容经共享内存环传递，上限应明显小于环的容量
+DEFAULT_CLIPBOARD_MAX = 256 * 1024
+# 电脑剪贴板的检查间隔（秒）
+POLL_INTERVAL = 0.5
+# 文本注入走剪贴板粘贴时会临时改写剪贴板并在 RESTORE_DELAY 后恢复，这段时间内不检查
+TEXT_HOLD = RESTORE_DELAY + 2 * POLL_INTERVAL
+
+_transfer_ids = itertools.count(1)
+
+def content_hash(data: bytes) -> bytes:
+    """剪贴板内容摘要（16 字节）"""
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+def next_transfer_id() -> int:
+    return next(_transfer_ids) & 0xFFFFFFFF
+
+class ClipboardError(ValueError):
+    """剪贴板分块无效（超过上限、乱序、摘要不符）"""
+
+class InboundClipboard:
+    """正在接收的一次剪贴板内容（预先按总长度分配缓冲，按偏移写入）"""
+
+    __slots__ = ('id', 'digest', 'total', 'received', 'buffer')
+
+    def __init__(self, transfer_id: int, digest: bytes, total: int, keep: bool):
+        self.id = transfer_id
+        self.digest = digest
+        self.total = total
+        self.received = 0
+        # 电脑已有相同内容时不保存，只跟踪进度
+        self.buffer: Optional[bytearray] = bytearray(total) if keep else None
+
+class ClipboardSync:
+    """剪贴板同步状态：电脑剪贴板的当前摘要、监视线程与分块组装"""
+
+    def __init__(self, max_bytes: int = DEFAULT_CLIPBOARD_MAX, log: Optional[Callable[[str], None]] = None):
+        self.max_bytes = max_bytes
+        self.log = log or print
+        self.current: Optional[bytes] = None   # 最近一次看到的电脑剪贴板内容摘要
+        self.written: Optional[bytes] = None   # 最近一次收齐、排队写入电脑剪贴板的内容摘要
+        self._clipboard = None
+        self._hold_until = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._sequence = self._sequence_reader()
+        self._last_sequence: Optional[int] = None
+
+    # ==================== 电脑剪贴板 ====================
+
+    def _pyperclip(self):
+        clipboard = self._clipboard
+        if clipboard is None:
+            import pyperclip
+            clipboard = self._clipboard = pyperclip
+        return clipboard
+
+    @staticmethod
+    def _sequence_reader() -> Optional[Callable[[], int]]:
+        """Windows 剪贴板序号（内容每次变化加一，读取不需要打开剪贴板）"""
+        if sys.platform != 'win32':
+            return None
+        try:
+            import ctypes
+            return ctypes.windll.user32.GetClipboardSequenceNumber
+        except (AttributeError, OSError):
+            return None
+
+    def write(self, content: str):
+        """写入电脑剪贴板（在注入分发线程中执行）"""
+        self._pyperclip().copy(content)
+
+    def hold(self, seconds: float = TEXT_HOLD):
+        """暂停检查（文本注入可能正借用剪贴板粘贴）"""
+        self._hold_until = max(self._hold_until, time.monotonic() + seconds)
+
+    def poll(self) -> Optional[bytes]:
+        """检查电脑剪贴板；内容变化且不超过上限时返回新内容（UTF-8）"""
+        if time.monotonic() < self._hold_until:
+            return None
+        if self._sequence is not None:
+            sequence = self._sequence()
+            if sequence == self._last_sequence:
+                return None
+            self._last_sequence = sequence
+        data = (self._pyperclip().paste() or '').encode('utf-8')
+        digest = content_hash(data)
+        if digest == self.current:
+            return None
+        first = self.current is None
+        self.current = digest
+        if digest != self.written:
+            self.written = None   # 电脑上又复制了别的内容
+        if first:
+            return None   # 启动时的内容只作为基准，不推送
+        if len(data) > self.max_bytes:
+            self.log(f"⚠️  剪贴板内容过大，不同步 ({len(data) // 1024}KB)")
+            return None
+        return data
+
+    def start(self, changed: Callable[[bytes, bytes], None]):
+        """启动监视线程，电脑剪贴板变化时调用 changed(内容, 摘要)（在监视线程中调用）"""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(changed,), name='AirTouch-clipboard', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(2)
+            self._thread = None
+
+    def _run(self, changed: Callable[[bytes, bytes], None]):
+        while not self._stop.wait(POLL_INTERVAL):
+            try:
+                data = self.poll()
+            except Exception as e:
+                self.log(f"❌ 剪贴板读取失败，停止同步: {e}")
+                return
+            if data is not None:
+                changed(data, self.current)
+
+    # ==================== 分块 ====================
+
+    def receive(self, pending: Optional[InboundClipboard], transfer_id: int, total: int, offset: int,
+                digest: bytes, chunk: bytes):
+        """接收一块，返回 (仍在接收的传输或 None, 收齐且需要写入的文本或 None)
+
+        电脑已有相同内容时返回的内容为 None；无效的块或内容不是 UTF-8 时抛出 ClipboardError（放弃整次传输）。
+        """
+        if total > self.max_bytes:
+            raise ClipboardError(f"剪贴板内容超过上限: {total} > {self.max_bytes}")
+        if offset == 0:
+            pending = InboundClipboard(transfer_id, digest, total, keep=digest not in (self.current, self.written))
+        elif pending is None or pending.id != transfer_id or pending.digest != digest:
+            raise ClipboardError(f"剪贴板分块不属于当前传输: {transfer_id}")
+        if offset != pending.received or offset + len(chunk) > total:
+            raise ClipboardError(f"剪贴板分块偏移错误: {offset}")
+        if pending.buffer is not None:
+            memoryview(pending.buffer)[offset:offset + len(chunk)] = chunk
+        pending.received += len(chunk)
+        if pending.received < total:
+            return pending, None
+        if pending.buffer is None:
+            return None, None
+        if content_hash(pending.buffer) != digest:
+            raise ClipboardError("剪贴板内容摘要不符")
+        try:
+            content = pending.buffer.decode('utf-8')
+        except UnicodeDecodeError as e:
+            raise ClipboardError(f"剪贴板内容不是有效的 UTF-8: {e.reason}")
+        self.written = digest
+        return None, content
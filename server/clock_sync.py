@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+AirTouch 时钟同步
+NTP 风格的四时间戳交换（毫秒）：
+    t0 服务端发送  t1 设备接收  t2 设备回复  t3 服务端接收
+    RTT    = (t3 - t0) - (t2 - t1)
+    offset = ((t1 - t0) + (t2 - t3)) / 2     （设备时钟 - 服务端时钟）
+
+每个会话独立估计：
+- offset 取最近 WINDOW 次交换中 RTT 最小的一次（NTP 时钟过滤，排队延迟大的样本不可信）
+- RTT 按 TCP 方式平滑 (SRTT / RTTVAR)，超过 SRTT + 4 × RTTVAR 的样本视为异常，不参与平滑；
+  连续 MAX_OUTLIER_RUN 次异常说明网络状况已改变，重新以当前样本为起点
+
+服务端时钟为 time.perf_counter_ns() / 1e6，与消息接收时间同源。
+"""
+
+import collections
+import time
+from typing import Optional
+
+WINDOW = 8
+MAX_OUTLIER_RUN = 3
+# 主动同步间隔（秒）
+SYNC_INTERVAL = 2.0
+
+def now_ms() -> float:
+    """服务端时钟（毫秒）"""
+    return time.perf_counter_ns() / 1e6
+
+class ClockSync:
+    """单个设备的 RTT 与时钟偏移估计"""
+
+    def __init__(self):
+        self._samples = collections.deque(maxlen=WINDOW)   # (rtt, offset)
+        self.rtt: Optional[float] = None        # 平滑 RTT (ms)
+        self.rtt_var = 0.0
+        self.offset: Optional[float] = None     # 设备时钟 - 服务端时钟 (ms)
+        self.count = 0
+        self.outliers = 0
+        self._outlier_run = 0
+
+    @property
+    def synced(self) -> bool:
+        return self.offset is not None
+
+    def update(self, t0: float, t1: float, t2: float, t3: float) -> float:
+        """加入一次交换，返回本次 RTT"""
+        rtt = max((t3 - t0) - (t2 - t1), 0.0)
+        offset = ((t1 - t0) + (t2 - t3)) / 2
+        self.count += 1
+        self._samples.append((rtt, offset))
+        self.offset = min(self._samples)[1]
+
+        if self.rtt is None or self._outlier_run >= MAX_OUTLIER_RUN:
+            self.rtt = rtt
+            self.rtt_var = rtt / 2
+            self._outlier_run = 0
+        elif rtt > self.rtt + 4 * self.rtt_var:
+            self.outliers += 1
+            self._outlier_run += 1
+        else:
+            self._outlier_run = 0
+            self.rtt_var += (abs(rtt - self.rtt) - self.rtt_var) / 4
+            self.rtt += (rtt - self.rtt) / 8
+        return rtt
+
+    def latency_ms(self, device_ts: int, server_ms: float) -> Optional[float]:
+        """设备采样（32 位回绕的毫秒时间戳）到服务端 server_ms 时刻经过的时间"""
+        if self.offset is None:
+            return None
+        elapsed = (int(server_ms + self.offset) - device_ts) & 0xFFFFFFFF
+        if elapsed >= 0x80000000:
+            elapsed -= 0x100000000
+        return float(elapsed)
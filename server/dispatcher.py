@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+AirTouch 注入分发线程
+事件循环只负责把事件放进有界队列，所有可能阻塞的注入（点击、按键、剪贴板粘贴）
+都在独立线程中按到达顺序执行：
+- 连续的移动事件在队尾合并为一项，队列长度与移动频率无关
+- 执行离散事件前先让运动引擎输出已到达的全部位移，保证"先移动后点击"
+- 队列空闲时移动直接进入运动引擎，不经过额外线程切换
+- 短时间内连续到达的文本合并为一次注入
+"""
+
+import collections
+import threading
+import time
+from typing import Callable, Optional
+
+from jitter_buffer import JitterBuffer
+from metrics import Metrics
+from motion import MotionEngine
+
+DEFAULT_MAX_EVENTS = 256
+# 文本合并窗口（秒）：文本位于队首且没有后续事件时最多等待这么久
+TEXT_COALESCE_WINDOW = 0.01
+
+class _Motion:
+    """队列中的合并移动项"""
+
+    __slots__ = ('dx', 'dy', 'recv_ns')
+
+    def __init__(self, dx: float, dy: float, recv_ns: Optional[int]):
+        self.dx = dx
+        self.dy = dy
+        self.recv_ns = recv_ns
+
+class _Samples:
+    """队列中等待进入抖动缓冲的样本（保留设备时间戳，按批次排队）
+
+    合并的各批样本保留各自的接收时间，抖动缓冲按每个网络包的真实到达时间安排播放。
+    """
+
+    __slots__ = ('buffer', 'batches')
+
+    def __init__(self, buffer: JitterBuffer, samples: list, recv_ns: Optional[int]):
+        self.buffer = buffer
+        self.batches = [(list(samples), recv_ns)]
+
+    def add(self, samples: list, recv_ns: Optional[int]):
+        last, last_ns = self.batches[-1]
+        if recv_ns is not None and recv_ns == last_ns:
+            last.extend(samples)      # 同一个包拆分后的后续部分
+        else:
+            self.batches.append((list(samples), recv_ns))
+
+class _Scroll:
+    """队列中的合并滚动项（不触发运动同步，保持滚动平滑）"""
+
+    __slots__ = ('dx', 'dy', 'phase')
+
+    def __init__(self, dx: float, dy: float, phase: int):
+        self.dx = dx
+        self.dy = dy
+        self.phase = phase
+
+class _Text:
+    """队列中的合并文本项"""
+
+    __slots__ = ('func', 'parts', 'created')
+
+    def __init__(self, func: Callable[[str], None], content: str):
+        self.func = func
+        self.parts = [content]
+        self.created = time.perf_counter()
+
+class InjectionDispatcher:
+    """严格有序的注入分发器（单消费者线程）"""
+
+    def __init__(self, motion: MotionEngine, max_events: int = DEFAULT_MAX_EVENTS,
+                 log: Optional[Callable[[str], None]] = None, metrics: Optional[Metrics] = None):
+        self.motion = motion
+        self.max_events = max_events
+        self.log = log or print
+        self.metrics = metrics
+
+        self._queue = collections.deque()
+        self._cond = threading.Condition(threading.Lock())
+        self._discrete = 0   # 队列中的离散事件数（有界）
+        self._busy = False   # 分发线程正在执行事件
+        self.running = False
+        self.thread: Optional[threading.Thread] = None
+        self.dropped = 0
+
+    @property
+    def depth(self) -> int:
+        """当前队列长度"""
+        return len(self._queue)
+
+    def submit(self, func: Callable, *args) -> bool:
+        """提交离散事件；队列已满时丢弃并返回 False"""
+        with self._cond:
+            if self._discrete >= self.max_events:
+                self.dropped += 1
+                if self.metrics is not None:
+                    self.metrics.drop('dispatch_queue_full')
+                return False
+            self._queue.append((func, args))
+            self._discrete += 1
+            self._cond.notify()
+        return True
+
+    def submit_text(self, func: Callable[[str], None], content: str) -> bool:
+        """提交文本；与队尾尚未执行的文本合并"""
+        with self._cond:
+            tail = self._queue[-1] if self._queue else None
+            if isinstance(tail, _Text) and tail.func == func:
+                tail.parts.append(content)
+                return True
+            if self._discrete >= self.max_events:
+                self.dropped += 1
+                if self.metrics is not None:
+                    self.metrics.drop('dispatch_queue_full')
+                return False
+            self._queue.append(_Text(func, content))
+            self._discrete += 1
+            self._cond.notify()
+        return True
+
+    def submit_scroll(self, dx: float, dy: float, phase: int = 0) -> bool:
+        """提交滚动；队列空闲时直接交给运动引擎，否则与队尾滚动合并"""
+        with self._cond:
+            if not self._queue and not self._busy:
+                self.motion.add_scroll(dx, dy, phase)
+                return True
+            tail = self._queue[-1] if self._queue else None
+            if isinstance(tail, _Scroll) and tail.phase == 0:
+                tail.dx += dx
+                tail.dy += dy
+                tail.phase = phase
+                return True
+            if self._discrete >= self.max_events:
+                self.dropped += 1
+                if self.metrics is not None:
+                    self.metrics.drop('dispatch_queue_full')
+                return False
+            self._queue.append(_Scroll(dx, dy, phase))
+            self._discrete += 1
+            self._cond.notify()
+        return True
+
+    def submit_motion(self, dx: float, dy: float, recv_ns: Optional[int] = None):
+        """提交移动；没有排队中的离散事件时直接累加进运动引擎"""
+        with self._cond:
+            if not self._queue and not self._busy:
+                self.motion.add(dx, dy, recv_ns)
+                return
+            tail = self._queue[-1] if self._queue else None
+            if isinstance(tail, _Motion):
+                tail.dx += dx
+                tail.dy += dy
+            else:
+                # 移动项总会在相邻离散事件之间合并，不计入容量
+                self._queue.append(_Motion(dx, dy, recv_ns))
+                self._cond.notify()
+
+    def submit_samples(self, buffer: JitterBuffer, samples: list, recv_ns: Optional[int] = None):
+        """提交带设备时间戳的移动样本（抖动缓冲开启时使用）；队列空闲时直接进入运动引擎"""
+        with self._cond:
+            if not self._queue and not self._busy:
+                self.motion.add_samples(buffer, samples, recv_ns)
+                return
+            tail = self._queue[-1] if self._queue else None
+            if isinstance(tail, _Samples) and tail.buffer is buffer:
+                tail.add(samples, recv_ns)
+            else:
+                self._queue.append(_Samples(buffer, samples, recv_ns))
+                self._cond.notify()
+
+    def run(self):
+        """分发线程主循环"""
+        while True:
+            with self._cond:
+                while self.running and not self._queue:
+                    self._busy = False
+                    self._cond.wait()
+                if not self.running and not self._queue:
+                    self._busy = False
+                    break
+                # 文本是唯一的待执行项时稍等片刻，让同一轮输入合并
+                while self.running and len(self._queue) == 1 and isinstance(self._queue[0], _Text):
+                    wait = self._queue[0].created + TEXT_COALESCE_WINDOW - time.perf_counter()
+                    if wait <= 0:
+                        break
+                    self._cond.wait(wait)
+                item = self._queue.popleft()
+                self._busy = True
+                if not isinstance(item, (_Motion, _Samples)):
+                    self._discrete -= 1
+
+            try:
+                if isinstance(item, _Motion):
+                    self.motion.add(item.dx, item.dy, item.recv_ns)
+                elif isinstance(item, _Samples):
+                    for samples, recv_ns in item.batches:
+                        self.motion.add_samples(item.buffer, samples, recv_ns)
+                elif isinstance(item, _Scroll):
+                    self.motion.add_scroll(item.dx, item.dy, item.phase)
+                elif isinstance(item, _Text):
+                    self.motion.sync()
+                    item.func(''.join(item.parts))
+                else:
+                    func, args = item
+                    # 先输出之前到达的移动，再执行离散事件
+                    self.motion.sync()
+                    func(*args)
+            except Exception as e:
+                self.log(f"❌ 注入错误: {e}")
+
+    def start(self):
+        """启动分发线程"""
+        if self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def stop(self, timeout: float = 2):
+        """停止分发线程（已排队的事件会先执行完）"""
+        with self._cond:
+            self.running = False
+            self._cond.notify_all()
+        if self.thread and self.thread.is_alive():
+            self.thread.join(timeout=timeout)
@@ -0,0 +1,480 @@
+#!/usr/bin/env python3
+"""
+AirTouch 显示器布局
+- DisplayLayout 第一次使用时查询一次全部显示器的位置、尺寸与缩放比例并缓存，
+  之后的绝对定位 / DPI 换算只读缓存；收到系统的显示器变化事件时作废缓存，下次使用时重新查询
+  （Windows: 隐藏窗口接收 WM_DISPLAYCHANGE / WM_DPICHANGED / WM_SETTINGCHANGE；
+  X11: XRandR 屏幕变化事件）
+- TabletMapping 把手机触摸区的归一化坐标（0-65535）映射到某个显示器或虚拟桌面区域（平板模式）
+- DpiMotion 按光标所在显示器的缩放比例换算相对移动，同一次滑动在不同缩放的显示器上移动相同的物理距离
+
+坐标均为虚拟桌面像素（主显示器左上角为原点，其他显示器可为负数），缩放比例 1.0 = 96 DPI。
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import sys
+import threading
+import time
+from typing import Callable, List, Optional, Sequence, Tuple
+
+# 光标位置的查询间隔（秒）：DpiMotion 只用它判断光标在哪个显示器上
+POSITION_REFRESH = 0.05
+# 缩放比例按 1/4 取整，并限制在合理区间（X11 按物理尺寸估算时可能有误差）
+MIN_SCALE = 1.0
+MAX_SCALE = 4.0
+
+Rect = Tuple[int, int, int, int]   # (x, y, 宽, 高)
+
+class Monitor:
+    """单个显示器（虚拟桌面像素坐标）"""
+
+    __slots__ = ('index', 'x', 'y', 'width', 'height', 'scale', 'primary', 'name')
+
+    def __init__(self, index: int, x: int, y: int, width: int, height: int,
+                 scale: float = 1.0, primary: bool = False, name: str = ''):
+        self.index = index
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+        self.scale = scale
+        self.primary = primary
+        self.name = name
+
+    @property
+    def rect(self) -> Rect:
+        return self.x, self.y, self.width, self.height
+
+    def contains(self, x: int, y: int) -> bool:
+        return self.x <= x < self.x + self.width and self.y <= y < self.y + self.height
+
+    def distance(self, x: int, y: int) -> int:
+        """点到显示器矩形的曼哈顿距离（在显示器内为 0）"""
+        dx = max(self.x - x, 0, x - (self.x + self.width - 1))
+        dy = max(self.y - y, 0, y - (self.y + self.height - 1))
+        return dx + dy
+
+    def to_dict(self) -> dict:
+        return {'index': self.index, 'x': self.x, 'y': self.y, 'width': self.width,
+                'height': self.height, 'scale': self.scale, 'primary': self.primary, 'name': self.name}
+
+def _round_scale(scale: float) -> float:
+    return min(max(round(scale * 4) / 4, MIN_SCALE), MAX_SCALE)
+
+class DisplayLayout:
+    """缓存的显示器布局（线程安全，变化事件或 invalidate() 后重新查询）"""
+
+    def __init__(self, query: Optional[Callable[[], List[Monitor]]] = None,
+                 log: Optional[Callable[[str], None]] = None):
+        self._query = query or query_monitors
+        self.log = log or print
+        self._lock = threading.Lock()
+        self._monitors: Optional[Tuple[Monitor, ...]] = None
+        self.version = 0           # 每次作废缓存加一，映射据此判断是否需要重新计算
+        self.query_count = 0
+        # 布局变化时的回调（例如后端缓存的虚拟桌面尺寸），在变化事件所在线程中调用
+        self.listeners: List[Callable[[], None]] = []
+        self._watcher = None
+
+    @property
+    def monitors(self) -> Tuple[Monitor, ...]:
+        monitors = self._monitors
+        if monitors is None:
+            with self._lock:
+                if self._monitors is None:
+                    try:
+                        found = self._query()
+                    except Exception as e:
+                        self.log(f"⚠️  显示器布局查询失败: {e}")
+                        found = []
+                    self._monitors = tuple(found)
+                    self.query_count += 1
+                monitors = self._monitors
+        return monitors
+
+    def invalidate(self):
+        """作废缓存（显示器变化事件、或客户端请求刷新时调用）"""
+        with self._lock:
+            self._monitors = None
+            self.version += 1
+        for listener in list(self.listeners):
+            try:
+                listener()
+            except Exception as e:
+                self.log(f"❌ 显示器变化回调错误: {e}")
+
+    @property
+    def primary(self) -> Optional[Monitor]:
+        monitors = self.monitors
+        for monitor in monitors:
+            if monitor.primary:
+                return monitor
+        return monitors[0] if monitors else None
+
+    def monitor(self, index: int) -> Monitor:
+        """按序号取显示器；序号无效时抛出 ValueError"""
+        monitors = self.monitors
+        if not 0 <= index < len(monitors):
+            raise ValueError(f"显示器序号无效: {index}（共 {len(monitors)} 个）")
+        return monitors[index]
+
+    def monitor_at(self, x: int, y: int) -> Optional[Monitor]:
+        """包含该点的显示器；在所有显示器之外时取最近的一个"""
+        monitors = self.monitors
+        for monitor in monitors:
+            if monitor.contains(x, y):
+                return monitor
+        return min(monitors, key=lambda m: m.distance(x, y)) if monitors else None
+
+    def bounds(self) -> Optional[Rect]:
+        """虚拟桌面（全部显示器的外接矩形）"""
+        monitors = self.monitors
+        if not monitors:
+            return None
+        left = min(m.x for m in monitors)
+        top = min(m.y for m in monitors)
+        right = max(m.x + m.width for m in monitors)
+        bottom = max(m.y + m.height for m in monitors)
+        return left, top, right - left, bottom - top
+
+    def to_list(self) -> List[dict]:
+        return [monitor.to_dict() for monitor in self.monitors]
+
+    def start(self):
+        """开始监听系统的显示器变化事件（平台不支持时只能通过 invalidate() 刷新）"""
+        if self._watcher is not None:
+            return
+        if sys.platform == 'win32':
+            self._watcher = _WindowsWatcher(self.invalidate)
+        elif os.environ.get('DISPLAY') and ctypes.util.find_library('Xrandr'):
+            self._watcher = _X11Watcher(self.invalidate)
+        if self._watcher is not None:
+            self._watcher.start()
+
+    def stop(self):
+        if self._watcher is not None:
+            self._watcher.stop()
+            self._watcher = None
+
+class TabletMapping:
+    """平板模式：手机触摸区的归一化坐标 -> 某个显示器（默认主显示器）或虚拟桌面区域"""
+
+    def __init__(self, layout: DisplayLayout, monitor: Optional[int] = None,
+                 region: Optional[Sequence[int]] = None):
+        self.layout = layout
+        self.monitor = monitor
+        self.region: Optional[Rect] = None
+        if region is not None:
+            x, y, width, height = (int(v) for v in region)
+            if width <= 0 or height <= 0:
+                raise ValueError(f"映射区域无效: {region}")
+            self.region = (x, y, width, height)
+        self._version = -1
+        self._target: Optional[Rect] = None
+        # 指定的显示器被拔出后改用主显示器；notice 表示还没有告知客户端
+        self.fallback = False
+        self.notice = False
+        # 先校验一次，序号无效时立即报错
+        self.target()
+
+    def target(self) -> Optional[Rect]:
+        """映射的目标矩形；布局变化后重新计算，没有可用显示器时为 None"""
+        layout = self.layout
+        if self._version != layout.version:
+            if self.region is not None:
+                target = self.region
+            elif self.monitor is None:
+                target = self._primary()
+            elif self.monitor < len(layout.monitors) or self._version < 0:
+                target = layout.monitor(self.monitor).rect
+                self.fallback = False
+            else:
+                # 布局变化后序号失效：改用主显示器（重新接上后自动恢复），只提示一次
+                target = self._primary()
+                if not self.fallback:
+                    self.fallback = self.notice = True
+            self._target = target
+            self._version = layout.version
+        return self._target
+
+    def _primary(self) -> Optional[Rect]:
+        primary = self.layout.primary
+        return primary.rect if primary is not None else None
+
+    def map(self, nx: int, ny: int) -> Optional[Tuple[int, int]]:
+        """归一化坐标（0-65535）-> 虚拟桌面像素坐标"""
+        target = self.target()
+        if target is None:
+            return None
+        x, y, width, height = target
+        return x + (nx * (width - 1) + 32767) // 65535, y + (ny * (height - 1) + 32767) // 65535
+
+class DpiMotion:
+    """相对移动的 DPI 换算系数（由运动引擎每帧调用一次）
+
+    光标位置最多每 POSITION_REFRESH 秒查询一次；后端不能读取光标位置时使用主显示器的缩放比例。
+    """
+
+    def __init__(self, layout: DisplayLayout, cursor_position: Callable[[], Tuple[int, int]],
+                 refresh: float = POSITION_REFRESH):
+        self.layout = layout
+        self.cursor_position: Optional[Callable[[], Tuple[int, int]]] = cursor_position
+        self.refresh = refresh
+        self._checked = float('-inf')
+        self._version = -1
+        self._scale = 1.0
+
+    def __call__(self) -> float:
+        now = time.perf_counter()
+        if now - self._checked < self.refresh and self._version == self.layout.version:
+            return self._scale
+        self._checked = now
+        self._version = self.layout.version
+        monitor = None
+        if self.cursor_position is not None:
+            try:
+                monitor = self.layout.monitor_at(*self.cursor_position())
+            except NotImplementedError:
+                self.cursor_position = None
+        if monitor is None:
+            monitor = self.layout.primary
+        self._scale = monitor.scale if monitor is not None else 1.0
+        return self._scale
+
+# ==================== 查询 ====================
+
+def query_monitors() -> List[Monitor]:
+    """查询当前全部显示器（主显示器在前）"""
+    if sys.platform == 'win32':
+        monitors = _windows_monitors()
+    elif os.environ.get('DISPLAY') and ctypes.util.find_library('X11'):
+        monitors = _x11_monitors()
+    else:
+        monitors = []
+    monitors.sort(key=lambda m: (not m.primary, m.x, m.y))
+    for index, monitor in enumerate(monitors):
+        monitor.index = index
+    return monitors
+
+def _windows_monitors() -> List[Monitor]:
+    from ctypes import wintypes
+
+    class MONITORINFOEXW(ctypes.Structure):
+        _fields_ = [('cbSize', wintypes.DWORD), ('rcMonitor', wintypes.RECT), ('rcWork', wintypes.RECT),
+                    ('dwFlags', wintypes.DWORD), ('szDevice', wintypes.WCHAR * 32)]
+
+    user32 = ctypes.windll.user32
+    try:
+        get_dpi = ctypes.windll.shcore.GetDpiForMonitor
+    except (AttributeError, OSError):
+        get_dpi = None   # Windows 8.1 之前只有系统 DPI
+    monitors: List[Monitor] = []
+
+    def callback(hmonitor, hdc, rect, data):
+        info = MONITORINFOEXW()
+        info.cbSize = ctypes.sizeof(MONITORINFOEXW)
+        if user32.GetMonitorInfoW(hmonitor, ctypes.byref(info)):
+            r = info.rcMonitor
+            scale = 1.0
+            if get_dpi is not None:
+                dpi_x, dpi_y = wintypes.UINT(), wintypes.UINT()
+                if get_dpi(hmonitor, 0, ctypes.byref(dpi_x), ctypes.byref(dpi_y)) == 0:
+                    scale = dpi_x.value / 96
+            monitors.append(Monitor(len(monitors), r.left, r.top, r.right - r.left, r.bottom - r.top,
+                                    _round_scale(scale), bool(info.dwFlags & 1), info.szDevice))
+        return True
+
+    enum_proc = ctypes.WINFUNCTYPE(wintypes.BOOL, wintypes.HMONITOR, wintypes.HDC,
+                                   ctypes.POINTER(wintypes.RECT), wintypes.LPARAM)(callback)
+    user32.EnumDisplayMonitors(None, None, enum_proc, 0)
+    return monitors
+
+class _XRRMonitorInfo(ctypes.Structure):
+    _fields_ = [('name', ctypes.c_ulong), ('primary', ctypes.c_int), ('automatic', ctypes.c_int),
+                ('noutput', ctypes.c_int), ('x', ctypes.c_int), ('y', ctypes.c_int),
+                ('width', ctypes.c_int), ('height', ctypes.c_int),
+                ('mwidth', ctypes.c_int), ('mheight', ctypes.c_int), ('outputs', ctypes.c_void_p)]
+
+def _load_x11():
+    x11 = ctypes.cdll.LoadLibrary(ctypes.util.find_library('X11'))
+    x11.XOpenDisplay.argtypes = [ctypes.c_char_p]
+    x11.XOpenDisplay.restype = ctypes.c_void_p
+    x11.XCloseDisplay.argtypes = [ctypes.c_void_p]
+    x11.XDefaultRootWindow.argtypes = [ctypes.c_void_p]
+    x11.XDefaultRootWindow.restype = ctypes.c_ulong
+    x11.XDefaultScreen.argtypes = [ctypes.c_void_p]
+    x11.XDisplayWidth.argtypes = [ctypes.c_void_p, ctypes.c_int]
+    x11.XDisplayHeight.argtypes = [ctypes.c_void_p, ctypes.c_int]
+    x11.XDisplayWidthMM.argtypes = [ctypes.c_void_p, ctypes.c_int]
+    x11.XGetAtomName.argtypes = [ctypes.c_void_p, ctypes.c_ulong]
+    x11.XGetAtomName.restype = ctypes.c_void_p
+    x11.XFree.argtypes = [ctypes.c_void_p]
+    return x11
+
+def _load_xrandr():
+    path = ctypes.util.find_library('Xrandr')
+    if not path:
+        return None
+    xrandr = ctypes.cdll.LoadLibrary(path)
+    xrandr.XRRGetMonitors.argtypes = [ctypes.c_void_p, ctypes.c_ulong, ctypes.c_int, ctypes.POINTER(ctypes.c_int)]
+    xrandr.XRRGetMonitors.restype = ctypes.POINTER(_XRRMonitorInfo)
+    xrandr.XRRFreeMonitors.argtypes = [ctypes.POINTER(_XRRMonitorInfo)]
+    xrandr.XRRSelectInput.argtypes = [ctypes.c_void_p, ctypes.c_ulong, ctypes.c_int]
+    return xrandr
+
+def _x11_scale(pixels: int, millimeters: int) -> float:
+    """按物理尺寸估算缩放比例（未知尺寸时为 1.0）"""
+    if millimeters <= 0:
+        return 1.0
+    return _round_scale(pixels / (millimeters / 25.4) / 96)
+
+def _x11_monitors() -> List[Monitor]:
+    x11 = _load_x11()
+    display = x11.XOpenDisplay(None)
+    if not display:
+        return []
+    try:
+        xrandr = _load_xrandr()
+        if xrandr is not None:
+            count = ctypes.c_int()
+            infos = xrandr.XRRGetMonitors(display, x11.XDefaultRootWindow(display), 1, ctypes.byref(count))
+            if infos:
+                monitors = []
+                try:
+                    for i in range(count.value):
+                        info = infos[i]
+                        name = ''
+                        atom = x11.XGetAtomName(display, info.name) if info.name else None
+                        if atom:
+                            name = ctypes.string_at(atom).decode(errors='replace')
+                            x11.XFree(atom)
+                        monitors.append(Monitor(i, info.x, info.y, info.width, info.height,
+                                                _x11_scale(info.width, info.mwidth), bool(info.primary), name))
+                finally:
+                    xrandr.XRRFreeMonitors(infos)
+                if monitors:
+                    return monitors
+        # 没有 RandR 1.5：整个根窗口作为一个显示器
+        screen = x11.XDefaultScreen(display)
+        width = x11.XDisplayWidth(display, screen)
+        return [Monitor(0, 0, 0, width, x11.XDisplayHeight(display, screen),
+                        _x11_scale(width, x11.XDisplayWidthMM(display, screen)), True)]
+    finally:
+        x11.XCloseDisplay(display)
+
+# ==================== 显示器变化事件 ====================
+
+class _WindowsWatcher:
+    """隐藏的顶层窗口（仅用于接收广播消息），显示器或缩放变化时回调"""
+
+    WM_DESTROY = 0x0002
+    WM_CLOSE = 0x0010
+    WM_SETTINGCHANGE = 0x001A
+    WM_DISPLAYCHANGE = 0x007E
+    WM_DPICHANGED = 0x02E0
+
+    def __init__(self, changed: Callable[[], None]):
+        self.changed = changed
+        self._hwnd = None
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        self._ready.wait(2)
+
+    def stop(self):
+        if self._hwnd:
+            ctypes.windll.user32.PostMessageW(self._hwnd, self.WM_CLOSE, 0, 0)
+        self._thread.join(2)
+
+    def _run(self):
+        from ctypes import wintypes
+
+        user32 = ctypes.windll.user32
+        lresult = ctypes.c_ssize_t
+        wndproc_type = ctypes.WINFUNCTYPE(lresult, wintypes.HWND, wintypes.UINT, wintypes.WPARAM, wintypes.LPARAM)
+        user32.DefWindowProcW.argtypes = [wintypes.HWND, wintypes.UINT, wintypes.WPARAM, wintypes.LPARAM]
+        user32.DefWindowProcW.restype = lresult
+        user32.CreateWindowExW.restype = wintypes.HWND
+
+        class WNDCLASSW(ctypes.Structure):
+            _fields_ = [('style', wintypes.UINT), ('lpfnWndProc', wndproc_type),
+                        ('cbClsExtra', ctypes.c_int), ('cbWndExtra', ctypes.c_int),
+                        ('hInstance', wintypes.HINSTANCE), ('hIcon', wintypes.HICON),
+                        ('hCursor', wintypes.HANDLE), ('hbrBackground', wintypes.HBRUSH),
+                        ('lpszMenuName', wintypes.LPCWSTR), ('lpszClassName', wintypes.LPCWSTR)]
+
+        def wndproc(hwnd, msg, wparam, lparam):
+            if msg in (self.WM_DISPLAYCHANGE, self.WM_DPICHANGED, self.WM_SETTINGCHANGE):
+                self.changed()
+            elif msg == self.WM_DESTROY:
+                user32.PostQuitMessage(0)
+                return 0
+            return user32.DefWindowProcW(hwnd, msg, wparam, lparam)
+
+        callback = wndproc_type(wndproc)
+        wc = WNDCLASSW()
+        wc.lpfnWndProc = callback
+        wc.hInstance = ctypes.windll.kernel32.GetModuleHandleW(None)
+        wc.lpszClassName = f'AirTouchDisplayWatcher{os.getpid()}'
+        try:
+            if not user32.RegisterClassW(ctypes.byref(wc)):
+                return
+            self._hwnd = user32.CreateWindowExW(0, wc.lpszClassName, 'AirTouch', 0, 0, 0, 0, 0,
+                                                None, None, wc.hInstance, None)
+            if not self._hwnd:
+                return
+        finally:
+            self._ready.set()
+        msg = wintypes.MSG()
+        while user32.GetMessageW(ctypes.byref(msg), None, 0, 0) > 0:
+            user32.TranslateMessage(ctypes.byref(msg))
+            user32.DispatchMessageW(ctypes.byref(msg))
+        self._hwnd = None
+        user32.UnregisterClassW(wc.lpszClassName, wc.hInstance)
+
+class _X11Watcher:
+    """独立的 X 连接上订阅 XRandR 屏幕变化事件"""
+
+    # RRScreenChangeNotifyMask | RRCrtcChangeNotifyMask | RROutputChangeNotifyMask
+    EVENT_MASK = 0x1 | 0x2 | 0x4
+
+    def __init__(self, changed: Callable[[], None]):
+        self.changed = changed
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join(2)
+
+    def _run(self):
+        x11 = _load_x11()
+        xrandr = _load_xrandr()
+        x11.XConnectionNumber.argtypes = [ctypes.c_void_p]
+        x11.XPending.argtypes = [ctypes.c_void_p]
+        x11.XNextEvent.argtypes = [ctypes.c_void_p, ctypes.c_void_p]
+        display = x11.XOpenDisplay(None)
+        if not display or xrandr is None:
+            return
+        try:
+            xrandr.XRRSelectInput(display, x11.XDefaultRootWindow(display), self.EVENT_MASK)
+            fd = x11.XConnectionNumber(display)
+            event = ctypes.create_string_buffer(192)   # sizeof(XEvent)
+            while not self._stop.is_set():
+                changed = False
+                while x11.XPending(display):
+                    x11.XNextEvent(display, event)
+                    changed = True
+                if changed:
+                    self.changed()
+                select.select([fd], [], [], 0.5)
+        finally:
+            x11.XCloseDisplay(display)
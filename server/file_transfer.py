@@ -0,0 +1,383 @@
+#!/usr/bin/env python3
+"""
+AirTouch 文件接收
+手机经已有的 WebSocket 连接把文件发到电脑：
+- 客户端先发 JSON file_begin（文件名、大小、SHA-256），服务端回复传输句柄与续传偏移，
+  随后按偏移连续发送二进制 0x0E 分块
+- 分块不进入输入处理队列：读取协程只校验偏移后交给写入线程，移动、点击等输入帧不会排在文件数据之后；
+  读取协程从不等待磁盘，超出在途窗口或写入队列已满的分块直接拒绝，并回复正确偏移
+- 写入线程以较低优先级运行：预先分配整个文件，消息负载以 memoryview 切片直接写入磁盘并增量计算摘要，
+  不在内存中拼接整个文件
+- 每写入 ACK_INTERVAL 字节回复一次进度，作为信用窗口：客户端已发送但未被进度回复确认的数据
+  不超过 WINDOW 字节；每 PROGRESS_INTERVAL 字节把进度记入旁路文件。息屏断线后重新连接，以同样的 file_begin 即可从已写入的位置续传
+  （服务端重启后从旁路文件记录的位置续传，已写入部分重新计算一次摘要）
+- 写完后校验 SHA-256，一致才改名为最终文件名（重名时加序号），不一致则删除重传
+"""
+
+import hashlib
+import os
+import queue
+import re
+import shutil
+import sys
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+# 写入线程的队列长度（分块数），满时拒绝新的分块
+QUEUE_CHUNKS = 64
+# 单个分块的上限（WebSocket 单条消息默认上限 1MB）
+MAX_CHUNK = 512 * 1024
+# 每写入多少字节回复一次进度 / 记录一次续传位置
+ACK_INTERVAL = 256 * 1024
+# 在途窗口：已接受但尚未写入磁盘的字节数上限，超出的分块拒绝（客户端应等待进度回复再发送）
+WINDOW = 2 * 1024 * 1024
+PROGRESS_INTERVAL = 8 * 1024 * 1024
+DEFAULT_MAX_BYTES = 4 * 1024 * 1024 * 1024
+# 空闲多久的传输关闭文件句柄（部分文件保留在磁盘上，之后仍可续传）
+IDLE_TIMEOUT = 3600.0
+# 重新计算已写入部分摘要时的读取块大小
+REHASH_BLOCK = 1024 * 1024
+
+_UNSAFE_NAME = re.compile(r'[\x00-\x1f<>:"/\\|?*]')
+_RESERVED_NAMES = {'CON', 'PRN', 'AUX', 'NUL', *(f'COM{i}' for i in range(1, 10)), *(f'LPT{i}' for i in range(1, 10))}
+
+def default_directory() -> str:
+    """默认保存位置：用户下载目录下的 AirTouch 文件夹"""
+    return os.path.join(os.path.expanduser('~'), 'Downloads', 'AirTouch')
+
+def safe_name(name: str) -> str:
+    """只保留文件名部分，替换各平台不允许的字符"""
+    name = _UNSAFE_NAME.sub('_', os.path.basename(str(name).replace('\\', '/'))).strip(' .')
+    if not name or name.split('.')[0].upper() in _RESERVED_NAMES:
+        name = f'file_{name}' if name else 'file'
+    return name[:200]
+
+def unique_path(directory: str, name: str) -> str:
+    """目标文件名已存在时追加序号: photo.jpg -> photo (1).jpg"""
+    path = os.path.join(directory, name)
+    stem, ext = os.path.splitext(name)
+    index = 1
+    while os.path.exists(path):
+        path = os.path.join(directory, f'{stem} ({index}){ext}')
+        index += 1
+    return path
+
+class FileTransferError(ValueError):
+    """文件传输请求或分块无效"""
+
+class Transfer:
+    """一次文件接收（按 摘要 + 大小 识别，断线重连后继续使用）"""
+
+    def __init__(self, handle: int, digest: str, size: int, name: str, part: str):
+        self.handle = handle
+        self.digest = digest
+        self.size = size
+        self.name = name
+        self.part = part              # 部分文件路径
+        self.progress = part + '.progress'
+        self.hasher = hashlib.sha256()
+        self.file = None
+        self.queued = 0               # 已接受（排队或已写入）的字节数，下一个分块的偏移
+        self.written = 0              # 已写入磁盘并计入摘要的字节数
+        self.session = None           # 最近一次 file_begin 的会话（进度回复发给它）
+        self.active = time.monotonic()
+        self.failed = False
+        self.resync = False           # 已告知客户端正确偏移，避免对在途的每个分块重复回复
+
+    @property
+    def key(self) -> Tuple[str, int]:
+        return self.digest, self.size
+
+class FileReceiver:
+    """文件接收：传输表、分块校验与低优先级写入线程"""
+
+    def __init__(self, directory: Optional[str] = None, max_bytes: int = DEFAULT_MAX_BYTES,
+                 notify: Optional[Callable[[Transfer, dict], None]] = None,
+                 log: Optional[Callable[[str], None]] = None):
+        self.directory = directory or default_directory()
+        self.max_bytes = max_bytes
+        # 写入线程中的进度 / 完成 / 失败通知（由控制器转发到事件循环）
+        self.notify = notify or (lambda transfer, reply: None)
+        self.log = log or print
+        self._lock = threading.Lock()
+        self._transfers: Dict[Tuple[str, int], Transfer] = {}
+        self._handles: Dict[int, Transfer] = {}
+        self._next_handle = 1
+        self._queue: queue.Queue = queue.Queue(QUEUE_CHUNKS)
+        self._thread: Optional[threading.Thread] = None
+        self.completed = 0
+
+    # ==================== 控制（事件循环 / 线程池） ====================
+
+    def begin(self, name: str, size: int, digest: str, session=None) -> Transfer:
+        """开始或续传一个文件，返回传输（其 queued 即续传偏移）；可能读取磁盘，应在线程池中调用"""
+        digest = str(digest).lower()
+        if not re.fullmatch(r'[0-9a-f]{64}', digest):
+            raise FileTransferError("file_begin 需要 SHA-256 摘要（64 位十六进制）")
+        size = int(size)
+        if not 0 <= size <= self.max_bytes:
+            raise FileTransferError(f"文件大小超出上限: {size} > {self.max_bytes}")
+        self._expire()
+        with self._lock:
+            previous = self._transfers.get((digest, size))
+        if previous is not None and previous.failed:
+            # 已放弃或超时的同一文件：等写入线程处理完它排队的分块与关闭 / 删除，再重新打开部分文件
+            self._sync()
+        with self._lock:
+            transfer = self._transfers.get((digest, size))
+            if transfer is None or transfer.failed:
+                os.makedirs(self.directory, exist_ok=True)
+                part = os.path.join(self.directory, f'.airtouch-{digest[:16]}-{size}.part')
+                # 续传时部分文件已经预分配，只需要剩余的空间
+                existing = min(os.path.getsize(part), size) if os.path.exists(part) else 0
+                if shutil.disk_usage(self.directory).free < size - existing:
+                    raise FileTransferError("磁盘空间不足")
+                transfer = Transfer(self._next_handle, digest, size, safe_name(name), part)
+                self._next_handle += 1
+                self._open(transfer)
+                self._transfers[transfer.key] = transfer
+                self._handles[transfer.handle] = transfer
+            transfer.name = safe_name(name)
+            transfer.session = session
+            transfer.resync = False
+            transfer.active = time.monotonic()
+        self.start()
+        if transfer.size == 0:
+            self._queue.put((transfer, 0, memoryview(b'')))
+        return transfer
+
+    def _open(self, transfer: Transfer):
+        """打开（必要时预分配）部分文件；有续传记录时重新计算已写入部分的摘要"""
+        resume = 0
+        if os.path.exists(transfer.part):
+            try:
+                with open(transfer.progress) as f:
+                    resume = min(int(f.read().strip() or 0), transfer.size)
+            except (OSError, ValueError):
+                resume = 0
+        f = open(transfer.part, 'r+b' if os.path.exists(transfer.part) else 'w+b', buffering=0)
+        try:
+            if os.fstat(f.fileno()).st_size != transfer.size:
+                f.truncate(transfer.size)
+                if hasattr(os, 'posix_fallocate') and transfer.size:
+                    try:
+                        os.posix_fallocate(f.fileno(), 0, transfer.size)
+                    except OSError:
+                        pass   # 文件系统不支持时保留稀疏文件
+            remaining = resume
+            while remaining:
+                block = f.read(min(REHASH_BLOCK, remaining))
+                if not block:
+                    break
+                transfer.hasher.update(block)
+                remaining -= len(block)
+            resume -= remaining
+            f.seek(resume)
+        except BaseException:
+            f.close()
+            raise
+        transfer.file = f
+        transfer.queued = transfer.written = resume
+
+    def _sync(self):
+        """等待写入线程处理完此前排队的全部项目"""
+        if self._thread is not None:
+            done = threading.Event()
+            self._queue.put((None, -3, done))
+            done.wait(10)
+
+    def cancel(self, digest: str, size: int):
+        """放弃传输并删除部分文件；写入队列满时会等待，应在线程池中调用"""
+        with self._lock:
+            transfer = self._transfers.get((str(digest).lower(), int(size)))
+            if transfer is not None:
+                transfer.failed = True
+        if transfer is not None:
+            # 由写入线程在之前排队的分块之后关闭并删除
+            self._queue.put((transfer, -1, None))
+
+    def _expire(self):
+        """关闭长时间空闲的传输（部分文件与续传记录保留）"""
+        now = time.monotonic()
+        with self._lock:
+            idle = [t for t in self._transfers.values() if now - t.active > IDLE_TIMEOUT]
+            for transfer in idle:
+                transfer.failed = True
+        for transfer in idle:
+            self._queue.put((transfer, -2, None))
+
+    # ==================== 分块（事件循环） ====================
+
+    def transfer(self, handle: int) -> Optional[Transfer]:
+        return self._handles.get(handle)
+
+    def accept(self, handle: int, offset: int, data: memoryview) -> bool:
+        """校验一个分块并放入写入队列（从不等待）
+
+        偏移不连续、超出在途窗口或写入队列已满时抛出 FileTransferError，调用方回复正确偏移；
+        返回 False 表示该分块属于已放弃的传输（或已告知客户端正确偏移后的在途分块），直接丢弃。
+        """
+        transfer = self._handles.get(handle)
+        if transfer is None:
+            raise FileTransferError(f"未知的传输句柄: {handle}")
+        if transfer.failed:
+            return False
+        if offset != transfer.queued or len(data) > MAX_CHUNK or offset + len(data) > transfer.size:
+            if transfer.resync:
+                return False
+            transfer.resync = True
+            if offset != transfer.queued:
+                raise FileTransferError(f"分块偏移错误: {offset}（应为 {transfer.queued}）")
+            raise FileTransferError(f"分块过大或超出文件末尾: {offset}+{len(data)}")
+        # written 由写入线程更新，这里读到的值只会偏小，判断偏保守
+        if offset + len(data) - transfer.written > WINDOW:
+            transfer.resync = True
+            raise FileTransferError(f"超出在途窗口: {offset}+{len(data)}（已写入 {transfer.written}）")
+        try:
+            self._queue.put_nowait((transfer, offset, data))
+        except queue.Full:
+            transfer.resync = True
+            raise FileTransferError("写入队列已满") from None
+        transfer.resync = False
+        transfer.queued += len(data)
+        transfer.active = time.monotonic()
+        return True
+
+    # ==================== 写入线程 ====================
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='AirTouch-files', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """写完已排队的分块，记录续传位置并关闭全部文件"""
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(10)
+            self._thread = None
+        with self._lock:
+            transfers = list(self._transfers.values())
+            self._transfers.clear()
+            self._handles.clear()
+        for transfer in transfers:
+            self._close(transfer)
+
+    def _run(self):
+        _lower_thread_priority()
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            transfer, offset, data = item
+            if offset == -3:
+                data.set()
+                continue
+            try:
+                if offset == -1:
+                    self._discard(transfer)
+                elif offset == -2:
+                    self._close(transfer)
+                else:
+                    self._write(transfer, data)
+            except OSError as e:
+                self._fail(transfer, f"写入失败: {e}")
+
+    def _write(self, transfer: Transfer, data: memoryview):
+        f = transfer.file
+        if f is None:
+            return
+        view = data
+        while view:
+            n = f.write(view)
+            view = view[n:]
+        transfer.hasher.update(data)
+        before = transfer.written
+        transfer.written += len(data)
+        if transfer.written == transfer.size:
+            self._finish(transfer)
+            return
+        if before // PROGRESS_INTERVAL != transfer.written // PROGRESS_INTERVAL:
+            self._save_progress(transfer)
+        if before // ACK_INTERVAL != transfer.written // ACK_INTERVAL:
+            self.notify(transfer, {'offset': transfer.written})
+
+    def _save_progress(self, transfer: Transfer):
+        tmp = transfer.progress + '.tmp'
+        with open(tmp, 'w') as f:
+            f.write(str(transfer.written))
+        os.replace(tmp, transfer.progress)
+
+    def _finish(self, transfer: Transfer):
+        """校验摘要并改为最终文件名"""
+        transfer.file.close()
+        transfer.file = None
+        self._forget(transfer)
+        if transfer.hasher.hexdigest() != transfer.digest:
+            self._remove(transfer)
+            self.log(f"❌ 文件摘要不符，已删除: {transfer.name}")
+            self.notify(transfer, {'error': 'hash_mismatch'})
+            return
+        with self._lock:
+            path = unique_path(self.directory, transfer.name)
+            os.replace(transfer.part, path)
+        try:
+            os.remove(transfer.progress)
+        except OSError:
+            pass
+        self.completed += 1
+        self.log(f"📥 已接收文件: {path} ({transfer.size / 1048576:.1f}MB)")
+        self.notify(transfer, {'done': True, 'name': os.path.basename(path)})
+
+    def _fail(self, transfer: Transfer, reason: str):
+        self.log(f"❌ 文件接收错误 ({transfer.name}): {reason}")
+        transfer.failed = True
+        self._close(transfer)
+        self.notify(transfer, {'error': reason})
+
+    def _close(self, transfer: Transfer):
+        """关闭文件句柄并记录续传位置（传输从表中移除，之后的 file_begin 从磁盘续传）"""
+        self._forget(transfer)
+        if transfer.file is not None:
+            try:
+                transfer.file.close()
+                self._save_progress(transfer)
+            except OSError:
+                pass
+            transfer.file = None
+
+    def _discard(self, transfer: Transfer):
+        self._forget(transfer)
+        if transfer.file is not None:
+            transfer.file.close()
+            transfer.file = None
+        self._remove(transfer)
+
+    def _forget(self, transfer: Transfer):
+        with self._lock:
+            if self._transfers.get(transfer.key) is transfer:
+                del self._transfers[transfer.key]
+            self._handles.pop(transfer.handle, None)
+
+    @staticmethod
+    def _remove(transfer: Transfer):
+        for path in (transfer.part, transfer.progress):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+def _lower_thread_priority():
+    """降低当前线程的调度优先级（失败时忽略），磁盘写入与摘要计算让位于运动线程"""
+    try:
+        if sys.platform == 'win32':
+            import ctypes
+            THREAD_PRIORITY_BELOW_NORMAL = -1
+            kernel32 = ctypes.windll.kernel32
+            kernel32.SetThreadPriority(kernel32.GetCurrentThread(), THREAD_PRIORITY_BELOW_NORMAL)
+        elif sys.platform.startswith('linux'):
+            # Linux 的 nice 值按线程生效
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 10)
+    except (AttributeError, OSError):
+        pass
@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""
+AirTouch 指针滤波管线
+每个滤波阶段在运动引擎的每一帧被调用一次，输入为本帧累计的原始位移 (dx, dy)
+和距上一帧的时间 dt（秒）。无论一帧内到达多少个触摸样本（批量帧会先合并
+为一次累加），每个阶段每帧只执行一次 Python 调用，开销与样本数无关。
+
+平滑类阶段按"欠账"方式实现：未输出的位移保存在阶段内部，静止后一次性结算，
+保证总位移与输入一致（不会因滤波丢失或漂移）。
+"""
+
+import math
+import os
+from typing import Any, Dict, List, Sequence, Tuple, Union
+
+# 欠账低于该值时一次性结算
+SETTLE_THRESHOLD = 0.5
+
+class FilterStage:
+    """滤波阶段基类"""
+
+    name = 'identity'
+
+    def process(self, dx: float, dy: float, dt: float) -> Tuple[float, float]:
+        """处理一帧位移，返回输出位移"""
+        return dx, dy
+
+    @property
+    def settled(self) -> bool:
+        """没有待输出的内部状态时为 True（引擎据此进入空闲）"""
+        return True
+
+    def flush(self) -> Tuple[float, float]:
+        """立即交出全部欠账并复位"""
+        self.reset()
+        return 0.0, 0.0
+
+    def reset(self):
+        """清空内部状态"""
+        pass
+
+class _LowPassStage(FilterStage):
+    """按欠账方式实现的一阶低通（对光标位置做 EMA）"""
+
+    def __init__(self):
+        self.owed_x = 0.0
+        self.owed_y = 0.0
+
+    def _alpha(self, dx: float, dy: float, dt: float) -> float:
+        raise NotImplementedError
+
+    def process(self, dx, dy, dt):
+        alpha = self._alpha(dx, dy, dt)
+        owed_x = self.owed_x + dx
+        owed_y = self.owed_y + dy
+        out_x = owed_x * alpha
+        out_y = owed_y * alpha
+        rest_x = owed_x - out_x
+        rest_y = owed_y - out_y
+        if abs(rest_x) < SETTLE_THRESHOLD and abs(rest_y) < SETTLE_THRESHOLD:
+            # 尾部一次性结算，避免无限逼近
+            out_x, out_y, rest_x, rest_y = owed_x, owed_y, 0.0, 0.0
+        self.owed_x = rest_x
+        self.owed_y = rest_y
+        return out_x, out_y
+
+    @property
+    def settled(self):
+        return self.owed_x == 0.0 and self.owed_y == 0.0
+
+    def flush(self):
+        owed = (self.owed_x, self.owed_y)
+        self.reset()
+        return owed
+
+    def reset(self):
+        self.owed_x = 0.0
+        self.owed_y = 0.0
+
+class EmaStage(_LowPassStage):
+    """固定系数 EMA 平滑（原插值循环的行为），系数以 base_hz 为基准按 dt 换算"""
+
+    name = 'ema'
+
+    def __init__(self, factor: float = 0.3, base_hz: float = 100):
+        super().__init__()
+        if not 0 < factor <= 1:
+            raise ValueError(f"EMA 系数应在 (0, 1] 内: {factor}")
+        if not base_hz > 0:
+            raise ValueError(f"base_hz 应大于 0: {base_hz}")
+        self.factor = factor
+        self.base_hz = base_hz
+
+    def _alpha(self, dx, dy, dt):
+        return 1.0 - (1.0 - self.factor) ** (dt * self.base_hz)
+
+class OneEuroStage(_LowPassStage):
+    """1€ 滤波：低速时强平滑（精确定位），高速时提高截止频率（降低延迟）
+
+    参考 Casiez et al., "1€ Filter", CHI 2012。速度单位为像素/秒。
+    """
+
+    name = 'one_euro'
+
+    def __init__(self, min_cutoff: float = 3.0, beta: float = 0.01, d_cutoff: float = 1.0):
+        super().__init__()
+        if not (min_cutoff > 0 and d_cutoff > 0):
+            raise ValueError(f"截止频率应大于 0: min_cutoff={min_cutoff}, d_cutoff={d_cutoff}")
+        if not beta >= 0:
+            raise ValueError(f"beta 不能为负: {beta}")
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.speed = 0.0
+
+    @staticmethod
+    def _smoothing(cutoff: float, dt: float) -> float:
+        tau = 1.0 / (2 * math.pi * cutoff)
+        return 1.0 / (1.0 + tau / dt)
+
+    def _alpha(self, dx, dy, dt):
+        raw_speed = math.hypot(dx, dy) / dt
+        self.speed += self._smoothing(self.d_cutoff, dt) * (raw_speed - self.speed)
+        return self._smoothing(self.min_cutoff + self.beta * self.speed, dt)
+
+    def reset(self):
+        super().reset()
+        self.speed = 0.0
+
+class AccelStage(FilterStage):
+    """速度相关的加速曲线（无状态）
+
+    curve:
+    - 'flat':   增益恒为 sensitivity
+    - 'linear': 超过阈值后增益线性增长
+    - 'power':  超过阈值后增益按 (v / threshold) ** exponent 增长
+    """
+
+    name = 'accel'
+
+    CURVES = ('flat', 'linear', 'power')
+
+    def __init__(self, curve: str = 'linear', sensitivity: float = 1.0, threshold: float = 200.0,
+                 slope: float = 0.002, exponent: float = 0.5, max_gain: float = 3.0):
+        if curve not in self.CURVES:
+            raise ValueError(f"未知的加速曲线: {curve}")
+        if not threshold > 0:
+            raise ValueError(f"加速阈值应大于 0: {threshold}")
+        self.curve = curve
+        self.sensitivity = sensitivity
+        self.threshold = threshold
+        self.slope = slope
+        self.exponent = exponent
+        self.max_gain = max_gain
+
+    def gain(self, speed: float) -> float:
+        """给定速度（像素/秒）下的增益"""
+        gain = 1.0
+        if speed > self.threshold:
+            if self.curve == 'linear':
+                gain = 1.0 + self.slope * (speed - self.threshold)
+            elif self.curve == 'power':
+                gain = (speed / self.threshold) ** self.exponent
+        return self.sensitivity * min(gain, self.max_gain)
+
+    def process(self, dx, dy, dt):
+        if self.curve == 'flat':
+            return dx * self.sensitivity, dy * self.sensitivity
+        gain = self.gain(math.hypot(dx, dy) / dt)
+        return dx * gain, dy * gain
+
+class PredictStage(FilterStage):
+    """短时预测：按估计速度把光标提前 horizon 秒，用来掩盖网络延迟
+
+    输出 = 输入 + (本帧提前量 - 上帧提前量)，提前量随速度衰减归零，
+    因此静止后总位移仍与输入一致。
+    mode='linear' 使用 EMA 速度估计，mode='kalman' 使用匀速模型卡尔曼滤波。
+    """
+
+    name = 'predict'
+
+    def __init__(self, mode: str = 'linear', horizon: float = 0.03, smoothing: float = 0.5,
+                 process_noise: float = 5000.0, measurement_noise: float = 1.0):
+        if mode not in ('linear', 'kalman'):
+            raise ValueError(f"未知的预测模式: {mode}")
+        if not horizon >= 0:
+            raise ValueError(f"预测时长不能为负: {horizon}")
+        if not 0 < smoothing <= 1:
+            raise ValueError(f"速度平滑系数应在 (0, 1] 内: {smoothing}")
+        if not (process_noise >= 0 and measurement_noise > 0):
+            raise ValueError(f"噪声参数无效: process_noise={process_noise}, measurement_noise={measurement_noise}")
+        self.mode = mode
+        self.horizon = horizon
+        self.smoothing = smoothing
+        self.q = process_noise
+        self.r = measurement_noise
+        self.reset()
+
+    def reset(self):
+        self.lead_x = 0.0
+        self.lead_y = 0.0
+        self.vx = 0.0
+        self.vy = 0.0
+        # 卡尔曼状态：每个轴 [位置, 速度] 与 2x2 协方差 (p00, p01, p11)
+        self._kx = [0.0, 0.0, 1.0, 0.0, 1.0]
+        self._ky = [0.0, 0.0, 1.0, 0.0, 1.0]
+        self._pos_x = 0.0
+        self._pos_y = 0.0
+
+    def _kalman(self, state: List[float], measured: float, dt: float) -> float:
+        """匀速模型单轴卡尔曼更新，返回速度估计"""
+        p, v, p00, p01, p11 = state
+        # 预测
+        p += v * dt
+        q = self.q
+        p00 += dt * (2 * p01 + dt * p11) + q * dt ** 3 / 3
+        p01 += dt * p11 + q * dt ** 2 / 2
+        p11 += q * dt
+        # 更新（只观测位置）
+        s = p00 + self.r
+        k0 = p00 / s
+        k1 = p01 / s
+        y = measured - p
+        p += k0 * y
+        v += k1 * y
+        p11 -= k1 * p01
+        p01 -= k0 * p01
+        p00 -= k0 * p00
+        state[:] = [p, v, p00, p01, p11]
+        return v
+
+    def process(self, dx, dy, dt):
+        if self.mode == 'kalman':
+            self._pos_x += dx
+            self._pos_y += dy
+            self.vx = self._kalman(self._kx, self._pos_x, dt)
+            self.vy = self._kalman(self._ky, self._pos_y, dt)
+        else:
+            a = self.smoothing
+            self.vx += a * (dx / dt - self.vx)
+            self.vy += a * (dy / dt - self.vy)
+
+        lead_x = self.vx * self.horizon
+        lead_y = self.vy * self.horizon
+        if dx == 0.0 and dy == 0.0 and abs(lead_x) < SETTLE_THRESHOLD and abs(lead_y) < SETTLE_THRESHOLD:
+            # 已静止：收回剩余提前量并复位速度估计
+            out = (-self.lead_x, -self.lead_y)
+            self.reset()
+            return out
+        out_x = dx + lead_x - self.lead_x
+        out_y = dy + lead_y - self.lead_y
+        self.lead_x = lead_x
+        self.lead_y = lead_y
+        return out_x, out_y
+
+    @property
+    def settled(self):
+        return self.lead_x == 0.0 and self.lead_y == 0.0
+
+    def flush(self):
+        out = (-self.lead_x, -self.lead_y)
+        self.reset()
+        return out
+
+class FilterPipeline:
+    """按顺序串联的滤波阶段"""
+
+    def __init__(self, stages: Sequence[FilterStage] = ()):
+        self.stages = list(stages)
+
+    def process(self, dx: float, dy: float, dt: float) -> Tuple[float, float]:
+        for stage in self.stages:
+            dx, dy = stage.process(dx, dy, dt)
+        return dx, dy
+
+    @property
+    def settled(self) -> bool:
+        return all(stage.settled for stage in self.stages)
+
+    def flush(self, dt: float) -> Tuple[float, float]:
+        """交出所有阶段的欠账（切换管线或离散事件之前调用）
+
+        前面阶段交出的欠账按一帧 dt 继续经过后面的阶段（例如加速增益），
+        与正常输出时一样，因此中途切换管线不改变总位移的换算。
+        """
+        total_x = total_y = 0.0
+        for index, stage in enumerate(self.stages):
+            fx, fy = stage.flush()
+            if fx or fy:
+                for later in self.stages[index + 1:]:
+                    fx, fy = later.process(fx, fy, dt)
+            total_x += fx
+            total_y += fy
+        return total_x, total_y
+
+    def describe(self) -> str:
+        return ' → '.join(stage.name for stage in self.stages) or 'identity'
+
+STAGES = {
+    'identity': FilterStage,
+    'ema': EmaStage,
+    'one_euro': OneEuroStage,
+    'accel': AccelStage,
+    'predict': PredictStage,
+}
+
+# 预设管线
+PRESETS: Dict[str, List[Dict[str, Any]]] = {
+    'ema': [{'type': 'ema'}],
+    'raw': [],
+    'one_euro': [{'type': 'one_euro'}],
+    'precision': [{'type': 'one_euro'}, {'type': 'accel', 'curve': 'power'}],
+    'predictive': [{'type': 'one_euro'}, {'type': 'accel', 'curve': 'linear'}, {'type': 'predict', 'mode': 'kalman'}],
+}
+
+DEFAULT_PRESET = 'ema'
+
+FilterSpec = Union[str, Sequence[Dict[str, Any]], None]
+
+def build_pipeline(spec: FilterSpec = None) -> FilterPipeline:
+    """根据预设名或阶段配置列表构建管线
+
+    spec 示例: 'one_euro' 或 [{'type': 'one_euro', 'beta': 0.02}, {'type': 'accel', 'curve': 'power'}]
+    为空时读取环境变量 AIRTOUCH_FILTERS，默认 'ema'。
+    """
+    if spec is None:
+        spec = os.environ.get('AIRTOUCH_FILTERS') or DEFAULT_PRESET
+    if isinstance(spec, str):
+        if spec not in PRESETS:
+            raise ValueError(f"未知的滤波预设: {spec}")
+        spec = PRESETS[spec]
+
+    stages = []
+    for item in spec:
+        params = dict(item)
+        stage_type = params.pop('type', None)
+        if stage_type not in STAGES:
+            raise ValueError(f"未知的滤波阶段: {stage_type}")
+        stages.append(STAGES[stage_type](**params))
+    return FilterPipeline(stages)
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+AirTouch 触摸手势识别
+把客户端发来的原始触摸帧（见 protocol.MSG_TOUCH）逐帧转换为输入动作：
+
+- 单指移动:        移动光标
+- 单指 / 双指 / 三指轻点:  左键 / 右键 / 中键单击
+- 轻点后再按下:    按住左键拖动（不移动直接抬起即为双击）；开启拖动锁定时抬手仍保持按住，
+                   下一次轻点才松开
+- 双指平移:        高精度滚动（自然滚动方向），抬手后由运动引擎惯性滚动
+- 双指捏合:        缩放（Ctrl + 滚轮）
+- 三指左右滑动:    切换虚拟桌面
+
+识别器只依赖帧内的设备时间戳，不读取本机时钟，也不直接注入输入，
+因此录制的触摸帧可以离线重放并断言输出（见 recognize 与 input_trace.py gestures）。
+每帧的开销与触点数成正比，触点数上限为 MAX_POINTERS。
+"""
+
+import math
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import protocol
+
+# 同时跟踪的触点上限，多余的触点忽略
+MAX_POINTERS = 5
+# 轻点：按下到抬起不超过 TAP_TIME 毫秒，且任一手指移动不超过 TAP_SLOP dp
+TAP_TIME = 200
+TAP_SLOP = 8.0
+# 轻点后 DOUBLE_TAP_WINDOW 毫秒内再次按下开始拖动
+DOUBLE_TAP_WINDOW = 250
+# 双指手势在平移 / 捏合累计超过该距离 (dp) 后确定类型
+CLASSIFY_DISTANCE = 12.0
+# 每 dp 双指平移对应的滚动量（1/120 格）
+SCROLL_UNITS_PER_DP = 4.0
+# 双指间距每变化 e 倍对应的缩放量（1/120 格），按整格输出
+ZOOM_UNITS_PER_E = 360.0
+ZOOM_STEP = 120
+# 三指水平滑动超过该距离 (dp) 切换一次桌面
+SWIPE_DISTANCE = 80.0
+# 双指滚动抬手后多久内可能仍在惯性滚动（毫秒）；期间的下一次触摸只停止惯性，轻点不单击
+INERTIA_WINDOW = 1000
+
+# 识别出的动作:
+#   ('move', dx, dy)                     光标相对移动（像素）
+#   ('scroll', dx, dy, phase)            高精度滚动（1/120 格，phase 见 protocol.SCROLL_*）
+#   ('zoom', units)                      Ctrl + 滚轮（1/120 格，正数放大）
+#   ('button', button, action)           鼠标按键（action 见 protocol.ACTION_*）
+#   ('desktop', direction)               切换虚拟桌面（1 右侧 / -1 左侧）
+Action = tuple
+
+TAP_BUTTONS = {1: 'left', 2: 'right', 3: 'middle'}
+
+def _elapsed(start: int, end: int) -> int:
+    """32 位回绕的毫秒时间戳之差"""
+    return (end - start) & 0xFFFFFFFF
+
+class _Pointer:
+    __slots__ = ('x', 'y', 'start_x', 'start_y')
+
+    def __init__(self, x: float, y: float):
+        self.x = self.start_x = x
+        self.y = self.start_y = y
+
+class GestureRecognizer:
+    """单个设备的增量手势识别器"""
+
+    def __init__(self, pointer_scale: float = 1.0, drag_lock: bool = True):
+        self.pointer_scale = pointer_scale
+        self.drag_lock = drag_lock
+        self._pointers: Dict[int, _Pointer] = {}
+        self.reset()
+
+    def reset(self):
+        """丢弃全部触摸状态（设备断开或失去控制权时，按住的键由调用方松开）"""
+        self._pointers.clear()
+        self._mode = None                  # None / pointer / drag / scroll / zoom / swipe
+        self._fingers = 0                  # 本次手势中同时按下的最多手指数
+        self._start_ts = 0
+        self._moved = False
+        self._changed = False              # 本帧触点集合有变化
+        self._cx = self._cy = 0.0          # 上一帧的触点重心与双指间距
+        self._distance = 0.0
+        self._zoom = 0.0                   # 尚未输出的缩放量
+        self._swipe_x = self._swipe_y = 0.0
+        self._swiped = False
+        self._last_tap: Optional[int] = None
+        self._dragging = False             # 左键被拖动手势按住
+        self._locked = False               # 抬手后仍保持拖动（等待轻点松开）
+        self._scroll_end: Optional[int] = None   # 最近一次滚动抬手的时间
+        self._stopped_fling = False        # 本次触摸停止了惯性滚动
+
+    @property
+    def dragging(self) -> bool:
+        return self._dragging
+
+    def feed(self, points: Iterable[Tuple[int, int, int, int, int]]) -> List[Action]:
+        """处理一帧触点 (触点号, 阶段, x, y, 时间戳 ms)，返回识别出的动作"""
+        out: List[Action] = []
+        pointers = self._pointers
+        self._changed = False
+        for pid, phase, x, y, ts in points:
+            if phase == protocol.TOUCH_DOWN:
+                if pid not in pointers and len(pointers) < MAX_POINTERS:
+                    self._touch_down(pid, x, y, ts, out)
+            elif pid in pointers:
+                pointer = pointers[pid]
+                pointer.x = x
+                pointer.y = y
+                if phase != protocol.TOUCH_MOVE:
+                    self._touch_up(pid, ts, phase == protocol.TOUCH_CANCEL, out)
+        if pointers:
+            if self._changed:
+                self._rebase()
+            else:
+                self._track(out)
+        return out
+
+    # ==================== 触点增减 ====================
+
+    def _touch_down(self, pid: int, x: int, y: int, ts: int, out: List[Action]):
+        if not self._pointers:
+            # 新手势开始
+            self._start_ts = ts
+            self._fingers = 0
+            self._moved = False
+            self._mode = None
+            self._zoom = 0.0
+            self._swipe_x = self._swipe_y = 0.0
+            self._swiped = False
+            self._stopped_fling = (self._scroll_end is not None
+                                   and _elapsed(self._scroll_end, ts) <= INERTIA_WINDOW)
+            if self._stopped_fling:
+                out.append(('scroll', 0, 0, protocol.SCROLL_CANCEL))
+            self._scroll_end = None
+            if self._locked:
+                self._mode = 'drag'
+            elif self._last_tap is not None and _elapsed(self._last_tap, ts) <= DOUBLE_TAP_WINDOW:
+                out.append(('button', 'left', protocol.ACTION_DOWN))
+                self._dragging = True
+                self._mode = 'drag'
+            self._last_tap = None
+        elif self._mode in ('pointer', 'drag') and not self._dragging:
+            # 单指移动中落下第二根手指，重新按多指手势分类
+            self._mode = None
+        self._pointers[pid] = _Pointer(x, y)
+        self._fingers = max(self._fingers, len(self._pointers))
+        self._changed = True
+
+    def _touch_up(self, pid: int, ts: int, cancel: bool, out: List[Action]):
+        del self._pointers[pid]
+        self._changed = True
+        if self._pointers:
+            return
+        # 全部手指抬起，手势结束
+        tap = not cancel and not self._moved and _elapsed(self._start_ts, ts) <= TAP_TIME
+        mode = self._mode
+        if self._dragging:
+            if not cancel and not tap and (self._locked or (self.drag_lock and self._moved)):
+                self._locked = True   # 拖动后抬手：保持按住，等待轻点松开
+            else:
+                # 轻点松开锁定、双击的第二次抬起或取消
+                out.append(('button', 'left', protocol.ACTION_UP))
+                self._dragging = self._locked = False
+        elif tap and self._stopped_fling:
+            pass
+        elif tap and self._fingers in TAP_BUTTONS:
+            out.append(('button', TAP_BUTTONS[self._fingers], protocol.ACTION_CLICK))
+            if self._fingers == 1:
+                self._last_tap = ts
+        elif mode == 'scroll':
+            out.append(('scroll', 0, 0, protocol.SCROLL_CANCEL if cancel else protocol.SCROLL_END))
+            self._scroll_end = None if cancel else ts
+        self._mode = None
+
+    # ==================== 逐帧跟踪 ====================
+
+    def _centroid(self) -> Tuple[float, float]:
+        pointers = self._pointers.values()
+        n = len(self._pointers)
+        return sum(p.x for p in pointers) / n, sum(p.y for p in pointers) / n
+
+    def _spread(self) -> float:
+        a, b = list(self._pointers.values())[:2]
+        return math.hypot(a.x - b.x, a.y - b.y)
+
+    def _rebase(self):
+        """触点集合变化后重置参考位置，避免位移跳变"""
+        self._cx, self._cy = self._centroid()
+        if len(self._pointers) >= 2:
+            self._distance = self._spread()
+
+    def _track(self, out: List[Action]):
+        n = len(self._pointers)
+        if not self._moved:
+            self._moved = any(math.hypot(p.x - p.start_x, p.y - p.start_y) > TAP_SLOP
+                              for p in self._pointers.values())
+        cx, cy = self._centroid()
+        dx, dy = cx - self._cx, cy - self._cy
+
+        mode = self._mode
+        if mode == 'drag' or (n == 1 and mode in (None, 'pointer')):
+            # 超出轻点范围之前不移动光标（轻点时手指的微小抖动不影响点击位置），
+            # 超出后一次补上累计位移
+            if not self._moved:
+                return
+            self._cx, self._cy = cx, cy
+            if mode is None:
+                self._mode = 'pointer'
+            if dx or dy:
+                out.append(('move', dx * self.pointer_scale, dy * self.pointer_scale))
+            return
+        if n == 2 and mode in (None, 'scroll', 'zoom'):
+            distance = self._spread()
+            if mode is None:
+                # 分类前保持参考位置不变，确定类型后一次补上分类期间的平移 / 缩放
+                pan = math.hypot(dx, dy)
+                pinch = abs(distance - self._distance)
+                if max(pan, pinch) < CLASSIFY_DISTANCE:
+                    return
+                mode = self._mode = 'zoom' if pinch > pan else 'scroll'
+            ratio = distance / self._distance if self._distance > 0 and distance > 0 else 1.0
+            self._cx, self._cy = cx, cy
+            self._distance = distance
+            if mode == 'scroll':
+                # 自然滚动：手指上移内容上移（向下滚动），手指左移内容左移（向右滚动）
+                if dx or dy:
+                    out.append(('scroll', -dx * SCROLL_UNITS_PER_DP, dy * SCROLL_UNITS_PER_DP,
+                                protocol.SCROLL_MOVE))
+            else:
+                self._zoom += math.log(ratio) * ZOOM_UNITS_PER_E
+                steps = int(self._zoom / ZOOM_STEP)
+                if steps:
+                    self._zoom -= steps * ZOOM_STEP
+                    out.append(('zoom', steps * ZOOM_STEP))
+            return
+        self._cx, self._cy = cx, cy
+        if n == 3 and mode in (None, 'swipe'):
+            self._mode = 'swipe'
+            self._swipe_x += dx
+            self._swipe_y += dy
+            if (not self._swiped and abs(self._swipe_x) >= SWIPE_DISTANCE
+                    and abs(self._swipe_x) > 2 * abs(self._swipe_y)):
+                self._swiped = True
+                # 手指左滑显示右侧的桌面
+                out.append(('desktop', 1 if self._swipe_x < 0 else -1))
+
+def recognize(frames: Iterable[Iterable[Tuple[int, int, int, int, int]]],
+              recognizer: Optional[GestureRecognizer] = None) -> List[Action]:
+    """离线识别一串触摸帧（用于录制回放与测试），返回全部动作"""
+    recognizer = recognizer or GestureRecognizer()
+    actions: List[Action] = []
+    for points in frames:
+        actions.extend(recognizer.feed(points))
+    return actions
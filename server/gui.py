@@ -0,0 +1,529 @@
+#!/usr/bin/env python3
+"""
+AirTouch 图形界面
+由 pc_controller.main() 在非 headless 模式下按需导入，服务模式不加载 tkinter / PIL。
+控制器类与资源路径函数由 main() 传入：以 `python pc_controller.py` 启动时该文件是 __main__ 模块，
+在这里再 import pc_controller 会把整个模块重新加载一遍。
+"""
+
+import asyncio
+import collections
+import os
+import threading
+import tkinter as tk
+from tkinter import ttk, scrolledtext
+
+from PIL import Image, ImageTk
+
+from log_sink import LogSink
+from metrics import Metrics
+
+# 日志刷新间隔（毫秒）与每次最多处理的条数
+LOG_DRAIN_INTERVAL_MS = 100
+LOG_DRAIN_BATCH = 500
+# 日志窗口最多保留的行数
+LOG_MAX_LINES = 2000
+
+class AirTouchGUI:
+    def __init__(self, controller_class, resource_path):
+        self.controller_class = controller_class
+        self.root = tk.Tk()
+        self.root.title("AirTouch PC Controller")
+        self.root.geometry("700x750")
+        self.root.resizable(False, False)
+        
+        # 设置窗口图标
+        try:
+            icon_path = resource_path('icon.ico')
+            icon_img = Image.open(icon_path)
+            icon_photo = ImageTk.PhotoImage(icon_img)
+            self.root.iconphoto(True, icon_photo)
+        except Exception as e:
+            pass  # 如果图标加载失败，继续运行
+        
+        self.controller = None
+        self.metrics_job = None
+        self.server_thread = None
+        self.loop = None
+        self.client_ips = []  # 已连接客户端的 IP（按连接顺序）
+        
+        # 服务器线程只写入日志缓冲，由界面线程定时批量显示
+        self.log_sink = LogSink()
+        self.log_dropped = 0
+        # 客户端连接状态消息单独排队，不会被丢弃
+        self.status_events = collections.deque()
+        
+        # 配置样式
+        self.setup_styles()
+        self.setup_ui()
+        self.drain_log()
+        
+    def setup_styles(self):
+        """配置样式"""
+        style = ttk.Style()
+        style.theme_use('clam')
+        
+    def setup_ui(self):
+        """设置UI界面"""
+        # 标题栏
+        title_frame = tk.Frame(self.root, bg="#1976D2", height=70)
+        title_frame.pack(fill=tk.X)
+        title_frame.pack_propagate(False)
+        
+        title_label = tk.Label(
+            title_frame, 
+            text="🚀 AirTouch PC Controller", 
+            font=("Segoe UI", 20, "bold"),
+            bg="#1976D2",
+            fg="white"
+        ) 
+        title_label.pack(pady=18)
+        
+        # 主容器
+        main_frame = tk.Frame(self.root, padx=25, pady=20, bg="#f8f9fa")
+        main_frame.pack(fill=tk.BOTH, expand=True)
+        self.root.configure(bg="#f8f9fa")
+        
+        # 服务器信息卡片（单行显示）
+        info_card = tk.Frame(main_frame, bg="white", relief=tk.FLAT, bd=0)
+        info_card.pack(fill=tk.X, pady=(0, 15))
+        
+        info_inner = tk.Frame(info_card, bg="white", padx=20, pady=12)
+        info_inner.pack(fill=tk.BOTH, expand=True)
+        
+        # 单行状态显示
+        status_row = tk.Frame(info_inner, bg="white")
+        status_row.pack(fill=tk.X)
+        
+        # IP地址
+        tk.Label(
+            status_row, 
+            text="📡 IP:", 
+            font=("Segoe UI", 10),
+            bg="white",
+            fg="#666"
+        ).pack(side=tk.LEFT, padx=(0, 5))
+        
+        self.ip_label = tk.Label(
+            status_row, 
+            text="未启动", 
+            font=("Segoe UI", 10, "bold"),
+            bg="white",
+            fg="#333"
+        )
+        self.ip_label.pack(side=tk.LEFT, padx=(0, 20))
+        
+        # 分隔符
+        tk.Label(
+            status_row, 
+            text="|", 
+            font=("Segoe UI", 10),
+            bg="white",
+            fg="#ddd"
+        ).pack(side=tk.LEFT, padx=(0, 20))
+        
+        # 状态
+        tk.Label(
+            status_row, 
+            text="状态:", 
+            font=("Segoe UI", 10),
+            bg="white",
+            fg="#666"
+        ).pack(side=tk.LEFT, padx=(0, 5))
+        
+        self.status_label = tk.Label(
+            status_row, 
+            text="● 未运行", 
+            font=("Segoe UI", 10, "bold"),
+            bg="white",
+            fg="#dc3545"
+        )
+        self.status_label.pack(side=tk.LEFT, padx=(0, 20))
+        
+        # 分隔符
+        tk.Label(
+            status_row, 
+            text="|", 
+            font=("Segoe UI", 10),
+            bg="white",
+            fg="#ddd"
+        ).pack(side=tk.LEFT, padx=(0, 20))
+        
+        # 客户端连接状态
+        tk.Label(
+            status_row, 
+            text="客户端:", 
+            font=("Segoe UI", 10),
+            bg="white",
+            fg="#666"
+        ).pack(side=tk.LEFT, padx=(0, 5))
+        
+        self.client_label = tk.Label(
+            status_row, 
+            text="未连接", 
+            font=("Segoe UI", 10),
+            bg="white",
+            fg="#999"
+        )
+        self.client_label.pack(side=tk.LEFT)
+        
+        # 客户端往返延迟（时钟同步估计）
+        self.rtt_label = tk.Label(
+            status_row, 
+            text="", 
+            font=("Segoe UI", 10),
+            bg="white",
+            fg="#666"
+        )
+        self.rtt_label.pack(side=tk.LEFT, padx=(8, 0))
+        
+        # 延迟统计摘要
+        self.metrics_label = tk.Label(
+            info_inner, 
+            text="📊 暂无统计", 
+            font=("Segoe UI", 9),
+            bg="white",
+            fg="#999",
+            anchor=tk.W
+        )
+        self.metrics_label.pack(fill=tk.X, pady=(8, 0))
+        
+        # 二维码和按钮组合区域
+        qr_button_card = tk.Frame(main_frame, bg="white", relief=tk.FLAT, bd=0)
+        qr_button_card.pack(fill=tk.X, pady=(0, 15))
+        
+        qr_button_inner = tk.Frame(qr_button_card, bg="white", padx=20, pady=15)
+        qr_button_inner.pack(fill=tk.BOTH, expand=True)
+        
+        # 左侧：二维码区域
+        qr_left = tk.Frame(qr_button_inner, bg="white")
+        qr_left.pack(side=tk.LEFT, padx=(0, 20))
+        
+        qr_title = tk.Label(
+            qr_left, 
+            text="📱 扫描连接", 
+            font=("Segoe UI", 11, "bold"),
+            bg="white",
+            fg="#333"
+        )
+        qr_title.pack(anchor=tk.W, pady=(0, 10))
+        
+        # 二维码容器（带边框）
+        qr_container = tk.Frame(qr_left, bg="white", relief=tk.SOLID, bd=1, highlightbackground="#e0e0e0", highlightthickness=1)
+        qr_container.pack()
+        
+        self.qr_label = tk.Label(
+            qr_container, 
+            text="启动服务器后\n显示二维码", 
+            font=("Segoe UI", 9),
+            fg="#999",
+            bg="white",
+            width=24,
+            height=12,
+            justify=tk.CENTER
+        )
+        self.qr_label.pack(padx=15, pady=15)
+        
+        # 右侧：控制按钮和提示
+        qr_right = tk.Frame(qr_button_inner, bg="white")
+        qr_right.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        
+        # 控制按钮标题
+        btn_title = tk.Label(
+            qr_right, 
+            text="⚙️ 服务器控制", 
+            font=("Segoe UI", 11, "bold"),
+            bg="white",
+            fg="#333"
+        )
+        btn_title.pack(anchor=tk.W, pady=(0, 10))
+        
+        # 启动按钮
+        self.start_button = tk.Button(
+            qr_right,
+            text="▶  启动服务器",
+            command=self.start_server,
+            bg="#28a745",
+            fg="white",
+            font=("Segoe UI", 11, "bold"),
+            height=2,
+            cursor="hand2",
+            relief=tk.FLAT,
+            activebackground="#218838",
+            activeforeground="white",
+            bd=0
+        )
+        self.start_button.pack(fill=tk.X, pady=(0, 10))
+        
+        # 停止按钮
+        self.stop_button = tk.Button(
+            qr_right,
+            text="⏹  停止服务器",
+            command=self.stop_server,
+            bg="#dc3545",
+            fg="white",
+            font=("Segoe UI", 11, "bold"),
+            height=2,
+            state=tk.DISABLED,
+            cursor="hand2",
+            relief=tk.FLAT,
+            activebackground="#c82333",
+            activeforeground="white",
+            bd=0
+        )
+        self.stop_button.pack(fill=tk.X, pady=(0, 15))
+        
+        # 使用提示
+        tips_frame = tk.Frame(qr_right, bg="#f0f8ff", relief=tk.FLAT, bd=0)
+        tips_frame.pack(fill=tk.X)
+        
+        tips_inner = tk.Frame(tips_frame, bg="#f0f8ff", padx=12, pady=10)
+        tips_inner.pack(fill=tk.X)
+        
+        tk.Label(
+            tips_inner,
+            text="💡 使用提示",
+            font=("Segoe UI", 9, "bold"),
+            bg="#f0f8ff",
+            fg="#0066cc"
+        ).pack(anchor=tk.W)
+        
+        tips_text = [
+            "• 手机和电脑需在同一WiFi",
+            "• 使用手机扫描二维码连接",
+            "• 仅支持一个客户端连接"
+        ]
+        
+        for tip in tips_text:
+            tk.Label(
+                tips_inner,
+                text=tip,
+                font=("Segoe UI", 8),
+                bg="#f0f8ff",
+                fg="#555",
+                anchor=tk.W
+            ).pack(anchor=tk.W, pady=1)
+        
+
+        
+        # 日志卡片
+        log_card = tk.Frame(main_frame, bg="white", relief=tk.FLAT, bd=0)
+        log_card.pack(fill=tk.BOTH, expand=True)
+        
+        log_inner = tk.Frame(log_card, bg="white", padx=20, pady=15)
+        log_inner.pack(fill=tk.BOTH, expand=True)
+        
+        log_title = tk.Label(
+            log_inner, 
+            text="📋 运行日志", 
+            font=("Segoe UI", 11, "bold"),
+            bg="white",
+            fg="#333"
+        )
+        log_title.pack(anchor=tk.W, pady=(0, 10))
+        
+        self.log_text = scrolledtext.ScrolledText(
+            log_inner,
+            height=16,
+            font=("Consolas", 9),
+            bg="#f8f9fa",
+            fg="#333",
+            wrap=tk.WORD,
+            relief=tk.FLAT,
+            bd=1,
+            padx=10,
+            pady=10
+        )
+        self.log_text.pack(fill=tk.BOTH, expand=True)
+        
+        # 底部信息
+        footer_frame = tk.Frame(self.root, bg="#f8f9fa", height=35)
+        footer_frame.pack(fill=tk.X)
+        footer_frame.pack_propagate(False)
+        
+        footer = tk.Label(
+            footer_frame,
+            text="AirTouch v1.0  |  确保手机和电脑在同一局域网  |  默认端口: 8765",
+            font=("Segoe UI", 8),
+            fg="#999",
+            bg="#f8f9fa"
+        )
+        footer.pack(pady=10)
+        
+        self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
+    
+    def log(self, message: str):
+        """添加日志（任意线程调用，只写入缓冲）"""
+        if message.startswith("CLIENT_"):
+            self.status_events.append(message)
+        else:
+            self.log_sink.push(message)
+    
+    def drain_log(self):
+        """在界面线程中批量显示缓冲中的日志"""
+        # 处理特殊消息（客户端连接状态）
+        status_events = self.status_events
+        while status_events:
+            message = status_events.popleft()
+            ip = message.split(":", 1)[1]
+            if message.startswith("CLIENT_CONNECTED:"):
+                self.client_ips.append(ip)
+            elif ip in self.client_ips:
+                self.client_ips.remove(ip)
+            self.update_client_label()
+        
+        lines = self.log_sink.drain(LOG_DRAIN_BATCH)
+        dropped = self.log_sink.dropped
+        if dropped != self.log_dropped:
+            lines.append(f"⚠️  日志过多，已丢弃 {dropped - self.log_dropped} 条")
+            self.log_dropped = dropped
+        
+        if lines:
+            # 一次插入整批日志，并裁剪超出上限的旧行
+            self.log_text.insert(tk.END, "\n".join(lines) + "\n")
+            excess = int(self.log_text.index('end-1c').split('.')[0]) - 1 - LOG_MAX_LINES
+            if excess > 0:
+                self.log_text.delete('1.0', f'{excess + 1}.0')
+            self.log_text.see(tk.END)
+        
+        self.root.after(LOG_DRAIN_INTERVAL_MS, self.drain_log)
+    
+    def update_client_label(self):
+        """刷新客户端连接状态"""
+        if not self.client_ips:
+            self.client_label.config(text="未连接", fg="#999")
+        elif len(self.client_ips) == 1:
+            self.client_label.config(text=f"✓ 已连接 ({self.client_ips[0]})", fg="#28a745")
+        else:
+            self.client_label.config(text=f"✓ 已连接 {len(self.client_ips)} 台 ({self.client_ips[-1]} 等)", fg="#28a745")
+    
+    def start_server(self):
+        """启动服务器"""
+        self.start_button.config(state=tk.DISABLED, bg="#6c757d")
+        self.stop_button.config(state=tk.NORMAL, bg="#dc3545")
+        self.status_label.config(text="● 运行中", fg="#28a745")
+        
+        # 创建控制器（与命令行一致：设置 AIRTOUCH_METRICS_PORT 时才开启延迟统计和本地 HTTP 端点）
+        metrics_port = os.environ.get('AIRTOUCH_METRICS_PORT')
+        self.controller = self.controller_class(
+            log_callback=self.log,
+            metrics=Metrics() if metrics_port else None,
+            metrics_port=int(metrics_port) if metrics_port else None,
+            trace_path=os.environ.get('AIRTOUCH_TRACE') or None,
+        )
+        ip = self.controller.get_local_ip()
+        self.ip_label.config(text=f"{ip}:8765")
+        
+        # 生成并显示二维码
+        try:
+            qr_img = self.controller.generate_qrcode(ip)
+            qr_img = qr_img.resize((200, 200), Image.Resampling.LANCZOS)
+            qr_photo = ImageTk.PhotoImage(qr_img)
+            self.qr_label.config(
+                image=qr_photo, 
+                text="",
+                bg="white",
+                width=200,
+                height=200
+            )
+            self.qr_label.image = qr_photo
+        except Exception as e:
+            self.log(f"❌ 二维码生成失败: {e}")
+        
+        # 清空日志
+        self.log_text.delete(1.0, tk.END)
+        
+        # 在新线程中启动服务器
+        self.server_thread = threading.Thread(target=self.run_server, daemon=True)
+        self.server_thread.start()
+        
+        # 定时刷新统计摘要
+        self.update_metrics()
+    
+    def update_metrics(self):
+        """刷新延迟统计摘要（每秒一次）"""
+        if self.controller and self.controller.metrics is not None:
+            self.metrics_label.config(text="📊 " + self.controller.metrics.summary_line(), fg="#555")
+        if self.controller:
+            self.rtt_label.config(text=self.controller.rtt_summary())
+        self.metrics_job = self.root.after(1000, self.update_metrics)
+    
+    def run_server(self):
+        """在线程中运行服务器"""
+        try:
+            self.loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self.loop)
+            self.loop.run_until_complete(self.controller.start_server())
+        except asyncio.CancelledError:
+            pass  # 正常取消，不报错
+        except Exception as e:
+            # 忽略事件循环停止的错误
+            if "Event loop stopped" not in str(e):
+                self.log(f"❌ 服务器错误: {e}")
+        finally:
+            # 清理所有待处理的任务
+            try:
+                if not self.loop.is_closed():
+                    pending = asyncio.all_tasks(self.loop)
+                    for task in pending:
+                        task.cancel()
+                    if pending:
+                        self.loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+                    self.loop.close()
+            except:
+                pass
+    
+    def stop_server(self):
+        """停止服务器"""
+        # 先停止控制器
+        if self.controller:
+            self.controller.stop_server()
+        
+        # 停止事件循环
+        if self.loop and not self.loop.is_closed():
+            try:
+                # 使用线程安全的方式停止循环
+                if self.loop.is_running():
+                    self.loop.call_soon_threadsafe(self.loop.stop)
+            except:
+                pass
+        
+        # 等待服务器线程结束
+        if self.server_thread and self.server_thread.is_alive():
+            self.server_thread.join(timeout=3)
+        
+        # 停止统计刷新
+        if self.metrics_job:
+            self.root.after_cancel(self.metrics_job)
+            self.metrics_job = None
+        self.metrics_label.config(text="📊 暂无统计", fg="#999")
+        self.rtt_label.config(text="")
+        
+        # 更新UI状态
+        self.start_button.config(state=tk.NORMAL, bg="#28a745")
+        self.stop_button.config(state=tk.DISABLED, bg="#6c757d")
+        self.status_label.config(text="● 已停止", fg="#dc3545")
+        self.client_ips = []
+        self.client_label.config(text="未连接", fg="#999")
+        self.ip_label.config(text="未启动")
+        
+        # 清除二维码
+        self.qr_label.config(
+            image="",
+            text="启动服务器后\n显示二维码",
+            bg="white",
+            width=24,
+            height=12
+        )
+        
+        self.log("👋 服务器已停止")
+    
+    def on_closing(self):
+        """关闭窗口"""
+        if self.stop_button['state'] == tk.NORMAL:
+            self.stop_server()
+        self.root.destroy()
+    
+    def run(self):
+        """运行GUI"""
+        self.root.mainloop()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+AirTouch 入站缓冲与移动合并
+每个连接由读取协程尽快收取帧放入缓冲，处理协程一次取走全部就绪帧：
+- 事件循环短暂繁忙后积压的移动帧合并为一次累加，光标直接追上手指，不再逐帧重放
+- 点击、按键等离散事件保持原有顺序（移动只与相邻的移动合并，不跨越离散事件）
+- 缓冲有上限，满时读取协程暂停，由 TCP 流控把压力传回客户端
+"""
+
+import asyncio
+import collections
+from typing import List, Optional, Tuple
+
+import protocol
+
+DEFAULT_INBOX_LIMIT = 1024
+
+# 缓冲中的一项: (接收时间 perf_counter_ns 或 None, 原始消息)
+Frame = Tuple[Optional[int], object]
+
+class InboundQueue:
+    """单连接入站缓冲（单生产者、单消费者，均在事件循环线程）"""
+
+    def __init__(self, limit: int = DEFAULT_INBOX_LIMIT):
+        self.limit = limit
+        self._items = collections.deque()
+        self._ready = asyncio.Event()
+        self._space = asyncio.Event()
+        self._space.set()
+        self.closed = False
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    async def put(self, frame: Frame):
+        """放入一帧；缓冲已满时等待处理协程取走"""
+        while len(self._items) >= self.limit and not self.closed:
+            self._space.clear()
+            await self._space.wait()
+        self._items.append(frame)
+        self._ready.set()
+
+    async def drain(self) -> List[Frame]:
+        """取走全部就绪帧；缓冲关闭且为空时返回空列表"""
+        while not self._items and not self.closed:
+            self._ready.clear()
+            await self._ready.wait()
+        items = list(self._items)
+        self._items.clear()
+        self._space.set()
+        return items
+
+    def close(self):
+        self.closed = True
+        self._ready.set()
+        self._space.set()
+
+class MotionRun:
+    """一段连续移动帧合并后的结果"""
+
+    __slots__ = ('samples', 'recv_ns', 'frames')
+
+    def __init__(self, recv_ns: Optional[int]):
+        self.samples: List[Tuple[int, int, Optional[int]]] = []
+        self.recv_ns = recv_ns   # 第一帧的接收时间
+        self.frames = 0
+
+def coalesce(frames: List[Frame]) -> list:
+    """把连续的移动帧合并为 MotionRun，其余帧原样保留并保持顺序
+
+    无法解析的移动帧原样保留，由正常处理路径计入解码错误。
+    """
+    out = []
+    run: Optional[MotionRun] = None
+    for recv_ns, message in frames:
+        samples = None
+        if isinstance(message, bytes) and message:
+            kind = message[0]
+            try:
+                if kind == protocol.MSG_MOTION_BATCH:
+                    samples = protocol.decode_motion_batch(message)
+                elif kind == protocol.MSG_MOUSE_MOVE and len(message) == protocol.MOUSE_MOVE.size:
+                    _, dx, dy = protocol.MOUSE_MOVE.unpack(message)
+                    samples = [(dx, dy, None)]
+            except protocol.ProtocolError:
+                samples = None
+        if samples is None:
+            run = None
+            out.append((recv_ns, message))
+            continue
+        if run is None:
+            run = MotionRun(recv_ns)
+            out.append(run)
+        run.samples.extend(samples)
+        run.frames += 1
+    return out
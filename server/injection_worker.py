@@ -0,0 +1,445 @@
+#!/usr/bin/env python3
+"""
+AirTouch 注入进程
+可选的多进程模式：asyncio 服务器、JSON 解析和 Tk 界面留在网络进程，运动引擎、注入分发线程
+和输入后端放到独立的注入进程。两个进程各有解释器和 GIL，界面重绘或解析突发不会推迟运动帧。
+
+- 网络进程中的 InjectionProcess 提供与 InjectionDispatcher 相同的提交接口。已解码的事件编码为
+  定长记录写入共享内存环（见 shm_ring.py），不经过 pickle；环满时丢弃并计数，不阻塞事件循环
+- 注入进程运行 worker_main：构建一个只做注入的 PCController（与 input_trace 回放的做法相同），
+  取出记录后交给它的分发器。抖动缓冲按会话保存在注入进程中
+- 注入进程定期把运动线程记录的统计（inject / tick_jitter / playout 阶段、帧数）写入共享内存的
+  统计区，网络进程的 Metrics 在读取时合并
+- 控制管道只传递启动结果和日志，不在热路径上
+"""
+
+import collections
+import itertools
+import json
+import multiprocessing
+import signal
+import struct
+import threading
+import time
+import weakref
+from multiprocessing import shared_memory
+from typing import Callable, Dict, Optional
+
+import protocol
+from filters import FilterPipeline, FilterSpec, build_pipeline
+from input_backend import InputBackend
+from metrics import BUCKET_COUNT, Metrics
+from motion import resolve_rate
+from shm_ring import MAX_PAYLOAD, SharedRing, ring_size
+
+# 环形缓冲容量（字节）：约 2 万条移动记录，注入进程停顿数百毫秒也不会写满
+DEFAULT_CAPACITY = 1 << 20
+# 等待注入进程就绪的时间（秒），包括导入模块和打开输入设备
+START_TIMEOUT = 10.0
+# 注入进程发布统计的间隔，以及空闲时检查网络进程是否存活的间隔（秒）
+STATS_INTERVAL = 0.25
+IDLE_CHECK = 1.0
+
+# 记录类型与负载格式（小端）
+REC_MOTION = 1        # <ddq   dx dy recv_ns（-1 表示无）
+REC_SAMPLES = 2       # <Iq    缓冲号 recv_ns，随后 n × <iiq（dx dy 设备时间戳，-1 表示无）
+REC_DROP_BUFFER = 3   # <I     会话结束，丢弃该缓冲
+REC_SCROLL = 4        # <ddB   dx dy phase（1/120 格）
+REC_BUTTON = 5        # <BB    鼠标按键序号（protocol.BUTTONS）动作
+REC_KEYS = 6          # n × (<BB 是否按下 名称长度 + ASCII 按键名)
+REC_ZOOM = 7          # <i     缩放量（1/120 格）
+REC_TEXT = 8          # UTF-8 文本
+REC_FILTERS = 9       # JSON 滤波配置
+REC_STOP = 10
+REC_ABS = 11          # <ii    虚拟桌面坐标（平板模式）
+REC_CLIPBOARD = 12    # <B     标志（1 第一段 / 2 最后一段）+ UTF-8 剪贴板内容的一段
+
+_MOTION = struct.Struct('<ddq')
+_SAMPLES = struct.Struct('<Iq')
+_SAMPLE = struct.Struct('<iiq')
+_BUFFER = struct.Struct('<I')
+_SCROLL = struct.Struct('<ddB')
+_BUTTON = struct.Struct('<BB')
+_KEY = struct.Struct('<BB')
+_ZOOM = struct.Struct('<i')
+_ABS = struct.Struct('<ii')
+_CLIP = struct.Struct('<B')
+CLIP_FIRST = 1
+CLIP_LAST = 2
+
+# 单条记录最多携带的样本数、文本字符数（UTF-8 每字符最多 4 字节）与剪贴板字节数
+MAX_SAMPLES = (MAX_PAYLOAD - _SAMPLES.size) // _SAMPLE.size
+TEXT_CHUNK = MAX_PAYLOAD // 4
+CLIP_CHUNK = MAX_PAYLOAD - _CLIP.size
+
+# 统计区：帧数、落后帧数，随后每个阶段 (次数, 总纳秒, 各桶计数)
+WORKER_STAGES = ('inject', 'tick_jitter', 'playout')
+_STATS_HEAD = struct.Struct('<QQ')
+_STATS_HIST = struct.Struct(f'<QQ{BUCKET_COUNT + 1}Q')
+STATS_SIZE = _STATS_HEAD.size + _STATS_HIST.size * len(WORKER_STAGES)
+
+class WorkerBackend(InputBackend):
+    """网络进程中代表注入进程后端的占位对象：只提供名称与滚轮单位，事件都经共享内存转发"""
+
+    absolute_motion = False   # 由注入进程启动时报告
+
+    def __init__(self, name: str):
+        self.name = name
+
+class InjectionProcess:
+    """网络进程一侧的注入进程句柄
+
+    提供 InjectionDispatcher 的提交接口，以及控制器用到的 MotionEngine 属性
+    （rate_hz、pipeline、set_filters、tick_count 等），控制器同时把它当作 dispatcher 和 motion。
+    """
+
+    def __init__(self, backend: Optional[str] = None, motion_hz: Optional[float] = None,
+                 filters: FilterSpec = None, log: Optional[Callable[[str], None]] = None,
+                 metrics: Optional[Metrics] = None, capacity: int = DEFAULT_CAPACITY,
+                 dpi_motion: bool = False):
+        self.backend_spec = backend
+        self.backend = WorkerBackend(backend or 'auto')
+        self.rate_hz = resolve_rate(motion_hz)
+        self.filters = filters
+        self.dpi_motion = dpi_motion
+        self.pipeline: FilterPipeline = build_pipeline(filters)
+        self.log = log or print
+        self.metrics = metrics
+        self.capacity = capacity
+
+        self.process = None
+        self.ring: Optional[SharedRing] = None
+        self._shm: Optional[shared_memory.SharedMemory] = None
+        self._stats: Optional[memoryview] = None
+        self._conn = None
+        self._reader: Optional[threading.Thread] = None
+        # 生产者互斥（事件循环、UDP 回调、界面线程都可能提交）
+        self._lock = threading.Lock()
+        # 抖动缓冲对象 -> 注入进程中的缓冲号；缓冲被回收后通知注入进程丢弃
+        self._buffer_keys = weakref.WeakKeyDictionary()
+        self._next_key = itertools.count(1)
+        self._released = collections.deque()
+        self.running = False
+        self.dropped = 0
+        self.tick_count = 0
+        self.late_ticks = 0
+        if metrics is not None:
+            metrics.collectors.append(self.collect)
+
+    # ==================== 生命周期 ====================
+
+    def start(self):
+        """启动注入进程并等待其就绪；失败时抛出 RuntimeError"""
+        if self.running:
+            return
+        ctx = multiprocessing.get_context('spawn')
+        self._shm = shared_memory.SharedMemory(create=True, size=ring_size(self.capacity) + STATS_SIZE)
+        wakeup = ctx.Event()
+        self.ring = SharedRing(self._shm.buf, self.capacity, wakeup)
+        self._stats = self._shm.buf[ring_size(self.capacity):]
+        conn, child = ctx.Pipe()
+        self.process = ctx.Process(
+            target=worker_main, name='AirTouch-injector', daemon=True,
+            args=(self._shm.name, self.capacity, wakeup, child, self.backend_spec,
+                  self.rate_hz, self.filters, self.metrics is not None, self.dpi_motion))
+        self.process.start()
+        child.close()
+        status = self._wait_ready(conn)
+        if status[0] != 'ready':
+            conn.close()
+            self.process.terminate()
+            self._close_shm()
+            raise RuntimeError(f"注入进程启动失败: {status[1]}")
+        _, self.backend.name, self.backend.WHEEL_UNITS_PER_CLICK, self.backend.absolute_motion = status
+        self._conn = conn
+        self.running = True
+        self._reader = threading.Thread(target=self._read_control, daemon=True)
+        self._reader.start()
+        self.log(f"🧵 注入进程已启动 (pid {self.process.pid})")
+
+    def _wait_ready(self, conn) -> tuple:
+        """等待注入进程的启动结果，期间转发其日志"""
+        deadline = time.monotonic() + START_TIMEOUT
+        while conn.poll(max(deadline - time.monotonic(), 0.0)):
+            try:
+                status = conn.recv()
+            except EOFError:
+                return ('error', "进程已退出")
+            if status[0] != 'log':
+                return status
+            self.log(status[1])
+        return ('error', "启动超时")
+
+    def stop(self, timeout: float = 2):
+        """通知注入进程执行完已写入的事件后退出，并释放共享内存"""
+        if not self.running:
+            return
+        with self._lock:
+            self.running = False
+            deadline = time.monotonic() + timeout
+            while not self.ring.put(REC_STOP) and time.monotonic() < deadline:
+                time.sleep(0.01)
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join(timeout)
+        if self._reader is not None:
+            self._reader.join(timeout)
+        self._conn.close()
+        self.collect()
+        self._close_shm()
+
+    def _close_shm(self):
+        if self.ring is not None:
+            self.ring.release()
+            self.ring = None
+        if self._stats is not None:
+            self._stats.release()
+            self._stats = None
+        self._shm.close()
+        self._shm.unlink()
+
+    def _read_control(self):
+        """转发注入进程的日志；管道断开说明注入进程已退出"""
+        while True:
+            try:
+                kind, message = self._conn.recv()
+            except (EOFError, OSError):
+                if self.running:
+                    self.log("❌ 注入进程意外退出")
+                return
+            if kind == 'log':
+                self.log(message)
+
+    def collect(self):
+        """从统计区读取注入进程的帧数与阶段直方图（Metrics 读取统计前调用）"""
+        stats = self._stats
+        if stats is None:
+            return
+        self.tick_count, self.late_ticks = _STATS_HEAD.unpack_from(stats, 0)
+        if self.metrics is None:
+            return
+        offset = _STATS_HEAD.size
+        for name in WORKER_STAGES:
+            count, total_ns, *buckets = _STATS_HIST.unpack_from(stats, offset)
+            hist = self.metrics.stages[name]
+            hist.buckets = buckets
+            hist.count = count
+            hist.total_ns = total_ns
+            offset += _STATS_HIST.size
+
+    # ==================== 提交接口（同 InjectionDispatcher） ====================
+
+    def _put(self, kind: int, fmt: Optional[struct.Struct], *values) -> bool:
+        with self._lock:
+            if self.running and self.ring.put_struct(kind, fmt, *values):
+                return True
+        self.dropped += 1
+        if self.metrics is not None:
+            self.metrics.drop('worker_ring_full')
+        return False
+
+    def submit_motion(self, dx: float, dy: float, recv_ns: Optional[int] = None):
+        self._put(REC_MOTION, _MOTION, dx, dy, -1 if recv_ns is None else recv_ns)
+
+    def submit_samples(self, buffer, samples: list, recv_ns: Optional[int] = None):
+        """带设备时间戳的样本：按缓冲号转发，由注入进程中对应的抖动缓冲播放"""
+        while self._released:
+            self._put(REC_DROP_BUFFER, _BUFFER, self._released.popleft())
+        key = self._buffer_keys.get(buffer)
+        if key is None:
+            key = self._buffer_keys[buffer] = next(self._next_key)
+            weakref.finalize(buffer, self._released.append, key)
+        head = _SAMPLES.pack(key, -1 if recv_ns is None else recv_ns)
+        for start in range(0, len(samples), MAX_SAMPLES):
+            payload = head + b''.join(_SAMPLE.pack(dx, dy, -1 if ts is None else ts)
+                                      for dx, dy, ts in samples[start:start + MAX_SAMPLES])
+            self._put(REC_SAMPLES, None, payload)
+
+    def submit_scroll(self, dx: float, dy: float, phase: int = 0) -> bool:
+        return self._put(REC_SCROLL, _SCROLL, dx, dy, phase)
+
+    def submit_text(self, func: Callable[[str], None], content: str) -> bool:
+        """文本在注入进程中由控制器的 handle_text 输入（func 只用于校验）"""
+        if func.__name__ != 'handle_text':
+            raise ValueError(f"注入进程不支持的操作: {func.__name__}")
+        ok = True
+        for start in range(0, len(content), TEXT_CHUNK):
+            ok = self._put(REC_TEXT, None, content[start:start + TEXT_CHUNK].encode('utf-8')) and ok
+        return ok
+
+    def submit(self, func: Callable, *args) -> bool:
+        """离散事件：只支持控制器的注入方法，按方法名编码为对应记录"""
+        name = getattr(func, '__name__', '')
+        if name == '_inject_button':
+            button, action = args
+            if button not in protocol.BUTTONS:
+                raise ValueError(f"未知鼠标按键: {button}")
+            return self._put(REC_BUTTON, _BUTTON, protocol.BUTTONS.index(button), action)
+        if name == '_inject_keys':
+            payload = bytearray()
+            for key, down in args[0]:
+                encoded = key.encode('ascii')
+                payload += _KEY.pack(1 if down else 0, len(encoded)) + encoded
+            return self._put(REC_KEYS, None, bytes(payload))
+        if name == '_inject_zoom':
+            return self._put(REC_ZOOM, _ZOOM, args[0])
+        if name == '_inject_abs':
+            return self._put(REC_ABS, _ABS, *args)
+        if name == '_set_clipboard':
+            # 分段写入；注入进程收到最后一段才写剪贴板，中途环满时整段内容作废
+            data = args[0].encode('utf-8')
+            for start in range(0, max(len(data), 1), CLIP_CHUNK):
+                end = start + CLIP_CHUNK
+                flags = (CLIP_FIRST if start == 0 else 0) | (CLIP_LAST if end >= len(data) else 0)
+                if not self._put(REC_CLIPBOARD, None, _CLIP.pack(flags) + data[start:end]):
+                    return False
+            return True
+        raise ValueError(f"注入进程不支持的操作: {name}")
+
+    def set_filters(self, spec: FilterSpec) -> FilterPipeline:
+        """运行时切换滤波管线（本进程先构建一次用于校验与描述）"""
+        pipeline = build_pipeline(spec)
+        self._put(REC_FILTERS, None, json.dumps(spec).encode('utf-8'))
+        self.pipeline = pipeline
+        return pipeline
+
+# ==================== 注入进程 ====================
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """打开网络进程创建的共享内存（由网络进程负责 unlink）"""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python 3.13 之前没有 track 参数；spawn 子进程与网络进程共用资源跟踪器，重复登记无害
+        return shared_memory.SharedMemory(name=name)
+
+def _publish_stats(stats: memoryview, motion, metrics: Optional[Metrics]):
+    _STATS_HEAD.pack_into(stats, 0, motion.tick_count, motion.late_ticks)
+    if metrics is None:
+        return
+    offset = _STATS_HEAD.size
+    for name in WORKER_STAGES:
+        hist = metrics.stages[name]
+        _STATS_HIST.pack_into(stats, offset, hist.count, hist.total_ns, *hist.buckets)
+        offset += _STATS_HIST.size
+
+def _consume(ring: SharedRing, controller):
+    """逐条取出记录交给控制器的分发器，收到 REC_STOP 或网络进程退出时返回"""
+    from jitter_buffer import JitterBuffer
+
+    dispatcher = controller.dispatcher
+    buffers: Dict[int, JitterBuffer] = {}
+    clipboard: Optional[bytearray] = None
+    parent = multiprocessing.parent_process()
+    while True:
+        if not ring.wait(IDLE_CHECK):
+            if parent is not None and not parent.is_alive():
+                return
+            continue
+        for kind, payload in ring.read():
+            try:
+                if kind == REC_MOTION:
+                    dx, dy, recv_ns = _MOTION.unpack(payload)
+                    dispatcher.submit_motion(dx, dy, None if recv_ns < 0 else recv_ns)
+                elif kind == REC_SAMPLES:
+                    key, recv_ns = _SAMPLES.unpack_from(payload)
+                    samples = [(dx, dy, None if ts < 0 else ts)
+                               for dx, dy, ts in _SAMPLE.iter_unpack(payload[_SAMPLES.size:])]
+                    buffer = buffers.get(key)
+                    if buffer is None:
+                        buffer = buffers[key] = JitterBuffer()
+                    dispatcher.submit_samples(buffer, samples, None if recv_ns < 0 else recv_ns)
+                elif kind == REC_DROP_BUFFER:
+                    buffers.pop(_BUFFER.unpack(payload)[0], None)
+                elif kind == REC_SCROLL:
+                    dispatcher.submit_scroll(*_SCROLL.unpack(payload))
+                elif kind == REC_BUTTON:
+                    button, action = _BUTTON.unpack(payload)
+                    dispatcher.submit(controller._inject_button, protocol.BUTTONS[button], action)
+                elif kind == REC_KEYS:
+                    events = []
+                    offset = 0
+                    while offset < len(payload):
+                        down, length = _KEY.unpack_from(payload, offset)
+                        offset += _KEY.size
+                        events.append((payload[offset:offset + length].decode('ascii'), bool(down)))
+                        offset += length
+                    dispatcher.submit(controller._inject_keys, events)
+                elif kind == REC_ZOOM:
+                    dispatcher.submit(controller._inject_zoom, _ZOOM.unpack(payload)[0])
+                elif kind == REC_ABS:
+                    dispatcher.submit(controller._inject_abs, *_ABS.unpack(payload))
+                elif kind == REC_CLIPBOARD:
+                    flags = payload[0]
+                    if flags & CLIP_FIRST:
+                        clipboard = bytearray()
+                    if clipboard is not None:
+                        clipboard += payload[_CLIP.size:]
+                        if flags & CLIP_LAST:
+                            dispatcher.submit(controller._set_clipboard, clipboard.decode('utf-8'))
+                            clipboard = None
+                elif kind == REC_TEXT:
+                    dispatcher.submit_text(controller.handle_text, payload.decode('utf-8'))
+                elif kind == REC_FILTERS:
+                    controller.motion.set_filters(json.loads(payload))
+                elif kind == REC_STOP:
+                    return
+            except Exception as e:
+                controller.log(f"❌ 注入进程记录错误: {e}")
+
+def worker_main(shm_name: str, capacity: int, wakeup, conn, backend: Optional[str],
+                rate_hz: float, filters: FilterSpec, with_metrics: bool, dpi_motion: bool = False):
+    """注入进程入口"""
+    # Ctrl+C 由网络进程处理，注入进程等待 REC_STOP 按顺序退出（先松开按住的键）
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    shm = _attach(shm_name)
+    ring = SharedRing(shm.buf, capacity, wakeup)
+    stats = shm.buf[ring_size(capacity):]
+    send_lock = threading.Lock()
+
+    def log(message: str):
+        with send_lock:
+            try:
+                conn.send(('log', message))
+            except OSError:
+                pass
+
+    try:
+        from input_backend import create_backend
+        from pc_controller import PCController
+        input_backend = create_backend(backend)
+        metrics = Metrics() if with_metrics else None
+        controller = PCController(backend=input_backend, motion_hz=rate_hz, filters=filters,
+                                  metrics=metrics, log_callback=log, udp_port=0,
+                                  jitter_buffer=False, injection_process=False, dpi_motion=dpi_motion)
+        controller.start_input()
+    except Exception as e:
+        conn.send(('error', str(e)))
+        conn.close()
+        ring.release()
+        stats.release()
+        shm.close()
+        return
+    conn.send(('ready', input_backend.name, input_backend.WHEEL_UNITS_PER_CLICK, input_backend.absolute_motion))
+
+    stopped = threading.Event()
+
+    def publisher():
+        while not stopped.wait(STATS_INTERVAL):
+            _publish_stats(stats, controller.motion, metrics)
+
+    thread = threading.Thread(target=publisher, daemon=True)
+    thread.start()
+    try:
+        _consume(ring, controller)
+    finally:
+        controller.stop_server()
+        input_backend.close()
+        stopped.set()
+        thread.join()
+        _publish_stats(stats, controller.motion, metrics)
+        ring.release()
+        stats.release()
+        shm.close()
+        conn.close()
@@ -0,0 +1,839 @@
+#!/usr/bin/env python3
+"""
+AirTouch 输入注入后端
+把鼠标/键盘事件直接交给操作系统，每个事件一次系统调用：
+- Windows: SendInput（相对移动仍按 SetCursorPos 定位，不受系统指针加速影响）
+- Linux X11: XTest 扩展
+- Linux 无显示环境: /dev/uinput 虚拟设备
+- 测试/基准: NullBackend / RecordingBackend
+"""
+
+import ctypes
+import ctypes.util
+import os
+import struct
+import sys
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+class InputBackend:
+    """输入注入后端接口
+
+    按键名称沿用 pyautogui 的命名（'enter'、'ctrl'、'a' 等），
+    鼠标按键为 'left' / 'right' / 'middle'。
+    """
+
+    name = 'base'
+
+    # scroll() 的一个单位对应多少 1/120 格（Windows 原生滚轮增量为 1，按格滚动的平台为 120）
+    WHEEL_UNITS_PER_CLICK = 120
+
+    _wheel_x = 0
+    _wheel_y = 0
+
+    def move_rel(self, dx: int, dy: int):
+        """相对移动鼠标"""
+        raise NotImplementedError
+
+    def move_abs(self, x: int, y: int):
+        """把光标移到虚拟桌面像素坐标（多显示器时可为负数，见 displays.py）"""
+        raise NotImplementedError
+
+    def cursor_position(self) -> Tuple[int, int]:
+        """当前光标的虚拟桌面像素坐标"""
+        raise NotImplementedError
+
+    @property
+    def absolute_motion(self) -> bool:
+        """是否支持 move_abs（平板模式需要；uinput 只能相对移动）"""
+        return type(self).move_abs is not InputBackend.move_abs
+
+    def display_changed(self):
+        """显示器布局变化时调用（缓存了屏幕尺寸的后端在此清除缓存）"""
+        pass
+
+    def mouse_down(self, button: str = 'left'):
+        raise NotImplementedError
+
+    def mouse_up(self, button: str = 'left'):
+        raise NotImplementedError
+
+    def click(self, button: str = 'left', clicks: int = 1):
+        """点击鼠标按键"""
+        for _ in range(clicks):
+            self.mouse_down(button)
+            self.mouse_up(button)
+
+    def scroll(self, clicks: int):
+        """垂直滚动（与 pyautogui.scroll 语义一致，正数向上）"""
+        raise NotImplementedError
+
+    def hscroll(self, clicks: int):
+        """水平滚动（正数向右）"""
+        raise NotImplementedError
+
+    def scroll_hires(self, dx: int, dy: int):
+        """高精度滚动，单位为 1/120 格；不足一个 scroll 单位的部分留到下次"""
+        unit = self.WHEEL_UNITS_PER_CLICK
+        self._wheel_x += dx
+        self._wheel_y += dy
+        steps_y = int(self._wheel_y / unit)
+        steps_x = int(self._wheel_x / unit)
+        if steps_y:
+            self._wheel_y -= steps_y * unit
+            self.scroll(steps_y)
+        if steps_x:
+            self._wheel_x -= steps_x * unit
+            self.hscroll(steps_x)
+
+    def key_down(self, key: str):
+        raise NotImplementedError
+
+    def key_up(self, key: str):
+        raise NotImplementedError
+
+    def press(self, key: str):
+        """按下并松开一个按键"""
+        self.key_down(key)
+        self.key_up(key)
+
+    def hotkey(self, *keys: str):
+        """组合键：依次按下，逆序松开"""
+        for key in keys:
+            self.key_down(key)
+        for key in reversed(keys):
+            self.key_up(key)
+
+    def send_keys(self, events: List[Tuple[str, bool]]):
+        """按顺序发送一串 (按键名, 是否按下) 事件（原生后端一次系统调用完成）"""
+        for key, down in events:
+            if down:
+                self.key_down(key)
+            else:
+                self.key_up(key)
+
+    def type_text(self, text: str):
+        """直接以按键事件输入文本（不经过剪贴板）
+
+        无法输入全部字符时必须在发送任何事件之前抛出 NotImplementedError，
+        调用方会整体回退到剪贴板粘贴。
+        """
+        raise NotImplementedError
+
+    def close(self):
+        """释放后端占用的系统资源"""
+        pass
+
+class NullBackend(InputBackend):
+    """空后端：丢弃所有事件，只计数（用于无头基准测试）"""
+
+    name = 'null'
+
+    def __init__(self):
+        self.event_count = 0
+
+    def move_rel(self, dx: int, dy: int):
+        self.event_count += 1
+
+    def move_abs(self, x: int, y: int):
+        self.event_count += 1
+
+    def mouse_down(self, button: str = 'left'):
+        self.event_count += 1
+
+    def mouse_up(self, button: str = 'left'):
+        self.event_count += 1
+
+    def scroll(self, clicks: int):
+        self.event_count += 1
+
+    def hscroll(self, clicks: int):
+        self.event_count += 1
+
+    def scroll_hires(self, dx: int, dy: int):
+        self.event_count += 1
+
+    def key_down(self, key: str):
+        self.event_count += 1
+
+    def key_up(self, key: str):
+        self.event_count += 1
+
+    def type_text(self, text: str):
+        self.event_count += 1
+
+class RecordingBackend(InputBackend):
+    """记录后端：按顺序保存 (单调时间, 事件名, 参数...)，用于测试断言"""
+
+    name = 'recording'
+
+    def __init__(self):
+        self.events: List[Tuple] = []
+        self._lock = threading.Lock()
+
+    def _record(self, *event):
+        with self._lock:
+            self.events.append((time.perf_counter(),) + event)
+
+    def move_rel(self, dx: int, dy: int):
+        self._record('move', dx, dy)
+
+    def move_abs(self, x: int, y: int):
+        self._record('move_abs', x, y)
+
+    def mouse_down(self, button: str = 'left'):
+        self._record('mouse_down', button)
+
+    def mouse_up(self, button: str = 'left'):
+        self._record('mouse_up', button)
+
+    def scroll(self, clicks: int):
+        self._record('scroll', clicks)
+
+    def hscroll(self, clicks: int):
+        self._record('hscroll', clicks)
+
+    def scroll_hires(self, dx: int, dy: int):
+        self._record('scroll_hires', dx, dy)
+
+    def key_down(self, key: str):
+        self._record('key_down', key)
+
+    def key_up(self, key: str):
+        self._record('key_up', key)
+
+    def type_text(self, text: str):
+        self._record('type', text)
+
+    def total_motion(self) -> Tuple[int, int]:
+        """已记录移动的累计位移"""
+        with self._lock:
+            moves = [e for e in self.events if e[1] == 'move']
+        return sum(e[2] for e in moves), sum(e[3] for e in moves)
+
+class PyAutoGUIBackend(InputBackend):
+    """pyautogui 后端（兼容兜底，moveRel 每次都会先读取光标位置）"""
+
+    name = 'pyautogui'
+
+    WHEEL_UNITS_PER_CLICK = 1 if sys.platform == 'win32' else 120
+
+    def __init__(self):
+        import pyautogui
+        # 配置 PyAutoGUI - 极致性能
+        pyautogui.FAILSAFE = False
+        pyautogui.PAUSE = 0  # 移除延迟，保证鼠标移动丝滑
+        self._gui = pyautogui
+
+    def move_rel(self, dx: int, dy: int):
+        self._gui.moveRel(dx, dy, _pause=False)
+
+    def move_abs(self, x: int, y: int):
+        self._gui.moveTo(x, y, _pause=False)
+
+    def cursor_position(self) -> Tuple[int, int]:
+        x, y = self._gui.position()
+        return x, y
+
+    def mouse_down(self, button: str = 'left'):
+        self._gui.mouseDown(button=button, _pause=False)
+
+    def mouse_up(self, button: str = 'left'):
+        self._gui.mouseUp(button=button, _pause=False)
+
+    def click(self, button: str = 'left', clicks: int = 1):
+        self._gui.click(button=button, clicks=clicks, _pause=False)
+
+    def scroll(self, clicks: int):
+        self._gui.scroll(clicks, _pause=False)
+
+    def hscroll(self, clicks: int):
+        self._gui.hscroll(clicks, _pause=False)
+
+    def key_down(self, key: str):
+        self._gui.keyDown(key, _pause=False)
+
+    def key_up(self, key: str):
+        self._gui.keyUp(key, _pause=False)
+
+    def press(self, key: str):
+        self._gui.press(key, _pause=False)
+
+    def hotkey(self, *keys: str):
+        self._gui.hotkey(*keys, _pause=False)
+
+    def type_text(self, text: str):
+        # pyautogui.write 只支持可见 ASCII 字符
+        if not all(' ' <= c <= '~' or c == '\n' for c in text):
+            raise NotImplementedError
+        self._gui.write(text, _pause=False)
+
+# ==================== Windows: SendInput ====================
+
+if sys.platform == 'win32':
+    from ctypes import wintypes
+
+    _ULONG_PTR = ctypes.c_size_t
+
+    class _MOUSEINPUT(ctypes.Structure):
+        _fields_ = [
+            ('dx', wintypes.LONG),
+            ('dy', wintypes.LONG),
+            ('mouseData', wintypes.DWORD),
+            ('dwFlags', wintypes.DWORD),
+            ('time', wintypes.DWORD),
+            ('dwExtraInfo', _ULONG_PTR),
+        ]
+
+    class _KEYBDINPUT(ctypes.Structure):
+        _fields_ = [
+            ('wVk', wintypes.WORD),
+            ('wScan', wintypes.WORD),
+            ('dwFlags', wintypes.DWORD),
+            ('time', wintypes.DWORD),
+            ('dwExtraInfo', _ULONG_PTR),
+        ]
+
+    class _HARDWAREINPUT(ctypes.Structure):
+        _fields_ = [
+            ('uMsg', wintypes.DWORD),
+            ('wParamL', wintypes.WORD),
+            ('wParamH', wintypes.WORD),
+        ]
+
+    class _INPUTUNION(ctypes.Union):
+        _fields_ = [('mi', _MOUSEINPUT), ('ki', _KEYBDINPUT), ('hi', _HARDWAREINPUT)]
+
+    class _INPUT(ctypes.Structure):
+        _fields_ = [('type', wintypes.DWORD), ('u', _INPUTUNION)]
+
+_INPUT_MOUSE = 0
+_INPUT_KEYBOARD = 1
+_MOUSEEVENTF_MOVE = 0x0001
+_MOUSEEVENTF_VIRTUALDESK = 0x4000
+_MOUSEEVENTF_ABSOLUTE = 0x8000
+# GetSystemMetrics: 虚拟桌面（全部显示器的外接矩形）
+_SM_XVIRTUALSCREEN, _SM_YVIRTUALSCREEN, _SM_CXVIRTUALSCREEN, _SM_CYVIRTUALSCREEN = 76, 77, 78, 79
+_MOUSEEVENTF_WHEEL = 0x0800
+_MOUSEEVENTF_HWHEEL = 0x1000
+_KEYEVENTF_EXTENDEDKEY = 0x0001
+_KEYEVENTF_KEYUP = 0x0002
+_KEYEVENTF_UNICODE = 0x0004
+
+# 鼠标按键 -> (按下标志, 松开标志)
+_WIN_BUTTON_FLAGS = {
+    'left': (0x0002, 0x0004),
+    'right': (0x0008, 0x0010),
+    'middle': (0x0020, 0x0040),
+}
+
+# 按键名称 -> 虚拟键码
+_WIN_VK = {
+    'backspace': 0x08, 'tab': 0x09, 'enter': 0x0D, 'return': 0x0D,
+    'shift': 0x10, 'ctrl': 0x11, 'alt': 0x12, 'esc': 0x1B, 'escape': 0x1B,
+    'space': 0x20, 'pageup': 0x21, 'pagedown': 0x22, 'end': 0x23, 'home': 0x24,
+    'left': 0x25, 'up': 0x26, 'right': 0x27, 'down': 0x28,
+    'insert': 0x2D, 'delete': 0x2E, 'win': 0x5B,
+    'pause': 0x13, 'capslock': 0x14, 'printscreen': 0x2C, 'apps': 0x5D,
+    'numlock': 0x90, 'scrolllock': 0x91,
+    'volumemute': 0xAD, 'volumedown': 0xAE, 'volumeup': 0xAF,
+    'nexttrack': 0xB0, 'prevtrack': 0xB1, 'stop': 0xB2, 'playpause': 0xB3,
+    ';': 0xBA, '=': 0xBB, ',': 0xBC, '-': 0xBD, '.': 0xBE, '/': 0xBF, '`': 0xC0,
+    '[': 0xDB, '\\': 0xDC, ']': 0xDD, "'": 0xDE,
+}
+_WIN_VK.update({chr(c).lower(): c for c in range(ord('A'), ord('Z') + 1)})
+_WIN_VK.update({chr(c): c for c in range(ord('0'), ord('9') + 1)})
+_WIN_VK.update({f'f{i}': 0x6F + i for i in range(1, 25)})
+
+# 需要 KEYEVENTF_EXTENDEDKEY 的按键（否则会被当成小键盘按键）
+_WIN_EXTENDED_VK = {0x21, 0x22, 0x23, 0x24, 0x25, 0x26, 0x27, 0x28, 0x2C, 0x2D, 0x2E, 0x5B, 0x5D, 0x90}
+
+class SendInputBackend(InputBackend):
+    """Windows SendInput 后端：按键与点击批量提交，移动按绝对位置"""
+
+    name = 'sendinput'
+
+    WHEEL_UNITS_PER_CLICK = 1
+
+    def __init__(self):
+        self._user32 = ctypes.windll.user32
+        self._user32.SendInput.argtypes = [wintypes.UINT, ctypes.POINTER(_INPUT), ctypes.c_int]
+        self._user32.SendInput.restype = wintypes.UINT
+        self._size = ctypes.sizeof(_INPUT)
+        # 虚拟桌面矩形（绝对移动用，显示器布局变化时清除）
+        self._desktop: Optional[Tuple[int, int, int, int]] = None
+        try:
+            # 按显示器感知 DPI：多显示器坐标与缩放比例均为物理像素（见 displays.py）
+            if not self._user32.SetProcessDpiAwarenessContext(ctypes.c_void_p(-4)):
+                self._user32.SetProcessDPIAware()
+        except Exception:
+            try:
+                # 与 pyautogui 导入时的行为保持一致，避免 GUI 被系统缩放
+                self._user32.SetProcessDPIAware()
+            except Exception:
+                pass
+
+    def _send(self, *inputs):
+        array = (_INPUT * len(inputs))(*inputs)
+        self._user32.SendInput(len(inputs), array, self._size)
+
+    @staticmethod
+    def _mouse(flags: int, dx: int = 0, dy: int = 0, data: int = 0):
+        inp = _INPUT(type=_INPUT_MOUSE)
+        inp.u.mi = _MOUSEINPUT(dx, dy, data & 0xFFFFFFFF, flags, 0, 0)
+        return inp
+
+    @staticmethod
+    def _key(key: str, up: bool):
+        vk = _WIN_VK.get(key.lower())
+        if vk is None:
+            raise ValueError(f"不支持的按键: {key}")
+        flags = _KEYEVENTF_KEYUP if up else 0
+        if vk in _WIN_EXTENDED_VK:
+            flags |= _KEYEVENTF_EXTENDEDKEY
+        inp = _INPUT(type=_INPUT_KEYBOARD)
+        inp.u.ki = _KEYBDINPUT(vk, 0, flags, 0, 0)
+        return inp
+
+    def move_rel(self, dx: int, dy: int):
+        # 与原先的 pyautogui.moveRel 一样用 SetCursorPos：相对的 MOUSEEVENTF_MOVE 会再经过
+        # "提高指针精确度"加速，手机端的加速曲线叠加后手感会变；代价是只读取原始输入的程序看不到这次移动
+        x, y = self.cursor_position()
+        self._user32.SetCursorPos(x + dx, y + dy)
+
+    def move_abs(self, x: int, y: int):
+        # 绝对坐标按虚拟桌面归一化到 0-65535
+        desktop = self._desktop
+        if desktop is None:
+            metrics = self._user32.GetSystemMetrics
+            desktop = self._desktop = (metrics(_SM_XVIRTUALSCREEN), metrics(_SM_YVIRTUALSCREEN),
+                                       max(metrics(_SM_CXVIRTUALSCREEN), 1), max(metrics(_SM_CYVIRTUALSCREEN), 1))
+        left, top, width, height = desktop
+        nx = min(max(((x - left) * 65536 + width // 2) // width, 0), 65535)
+        ny = min(max(((y - top) * 65536 + height // 2) // height, 0), 65535)
+        self._send(self._mouse(_MOUSEEVENTF_MOVE | _MOUSEEVENTF_ABSOLUTE | _MOUSEEVENTF_VIRTUALDESK, nx, ny))
+
+    def cursor_position(self) -> Tuple[int, int]:
+        point = wintypes.POINT()
+        self._user32.GetCursorPos(ctypes.byref(point))
+        return point.x, point.y
+
+    def display_changed(self):
+        self._desktop = None
+
+    def mouse_down(self, button: str = 'left'):
+        self._send(self._mouse(_WIN_BUTTON_FLAGS[button][0]))
+
+    def mouse_up(self, button: str = 'left'):
+        self._send(self._mouse(_WIN_BUTTON_FLAGS[button][1]))
+
+    def click(self, button: str = 'left', clicks: int = 1):
+        down, up = _WIN_BUTTON_FLAGS[button]
+        self._send(*[self._mouse(flag) for _ in range(clicks) for flag in (down, up)])
+
+    def scroll(self, clicks: int):
+        # 与 pyautogui 一致：直接作为滚轮增量（WHEEL_DELTA=120 为一格）
+        self._send(self._mouse(_MOUSEEVENTF_WHEEL, data=clicks))
+
+    def hscroll(self, clicks: int):
+        self._send(self._mouse(_MOUSEEVENTF_HWHEEL, data=clicks))
+
+    def scroll_hires(self, dx: int, dy: int):
+        # 原生支持 1/120 格增量，两个方向合并为一次 SendInput
+        inputs = []
+        if dy:
+            inputs.append(self._mouse(_MOUSEEVENTF_WHEEL, data=dy))
+        if dx:
+            inputs.append(self._mouse(_MOUSEEVENTF_HWHEEL, data=dx))
+        if inputs:
+            self._send(*inputs)
+
+    def key_down(self, key: str):
+        self._send(self._key(key, up=False))
+
+    def key_up(self, key: str):
+        self._send(self._key(key, up=True))
+
+    def press(self, key: str):
+        self._send(self._key(key, up=False), self._key(key, up=True))
+
+    def hotkey(self, *keys: str):
+        inputs = [self._key(k, up=False) for k in keys]
+        inputs += [self._key(k, up=True) for k in reversed(keys)]
+        self._send(*inputs)
+
+    def send_keys(self, events: List[Tuple[str, bool]]):
+        if events:
+            self._send(*[self._key(key, up=not down) for key, down in events])
+
+    def type_text(self, text: str):
+        # KEYEVENTF_UNICODE 按 UTF-16 码元发送，任意字符（含 emoji）一次 SendInput 完成
+        inputs = []
+        data = text.replace('\n', '\r').encode('utf-16-le')
+        for i in range(0, len(data), 2):
+            unit = data[i] | (data[i + 1] << 8)
+            for flags in (_KEYEVENTF_UNICODE, _KEYEVENTF_UNICODE | _KEYEVENTF_KEYUP):
+                inp = _INPUT(type=_INPUT_KEYBOARD)
+                inp.u.ki = _KEYBDINPUT(0, unit, flags, 0, 0)
+                inputs.append(inp)
+        if inputs:
+            self._send(*inputs)
+
+# ==================== Linux X11: XTest ====================
+
+# 按键名称 -> X keysym 名称
+_X_KEYSYMS = {
+    'backspace': 'BackSpace', 'tab': 'Tab', 'enter': 'Return', 'return': 'Return',
+    'shift': 'Shift_L', 'ctrl': 'Control_L', 'alt': 'Alt_L', 'esc': 'Escape',
+    'escape': 'Escape', 'space': 'space', 'pageup': 'Prior', 'pagedown': 'Next',
+    'end': 'End', 'home': 'Home', 'left': 'Left', 'up': 'Up', 'right': 'Right',
+    'down': 'Down', 'insert': 'Insert', 'delete': 'Delete', 'win': 'Super_L',
+    'capslock': 'Caps_Lock', 'numlock': 'Num_Lock', 'scrolllock': 'Scroll_Lock',
+    'printscreen': 'Print', 'pause': 'Pause', 'apps': 'Menu',
+    'volumeup': 'XF86AudioRaiseVolume', 'volumedown': 'XF86AudioLowerVolume',
+    'volumemute': 'XF86AudioMute', 'playpause': 'XF86AudioPlay', 'nexttrack': 'XF86AudioNext',
+    'prevtrack': 'XF86AudioPrev', 'stop': 'XF86AudioStop',
+    '-': 'minus', '=': 'equal', '[': 'bracketleft', ']': 'bracketright', ';': 'semicolon',
+    "'": 'apostrophe', '`': 'grave', '\\': 'backslash', ',': 'comma', '.': 'period', '/': 'slash',
+}
+_X_KEYSYMS.update({f'f{i}': f'F{i}' for i in range(1, 25)})
+
+_X_BUTTONS = {'left': 1, 'middle': 2, 'right': 3}
+
+class XTestBackend(InputBackend):
+    """X11 XTest 后端：相对移动由 X 服务器完成，每个事件一次 XFlush"""
+
+    name = 'xtest'
+
+    def __init__(self, display_name: Optional[str] = None):
+        x11_path = ctypes.util.find_library('X11')
+        xtst_path = ctypes.util.find_library('Xtst')
+        if not x11_path or not xtst_path:
+            raise RuntimeError("未找到 libX11 / libXtst")
+        self._x11 = ctypes.cdll.LoadLibrary(x11_path)
+        self._xtst = ctypes.cdll.LoadLibrary(xtst_path)
+
+        self._x11.XOpenDisplay.argtypes = [ctypes.c_char_p]
+        self._x11.XOpenDisplay.restype = ctypes.c_void_p
+        self._x11.XFlush.argtypes = [ctypes.c_void_p]
+        self._x11.XCloseDisplay.argtypes = [ctypes.c_void_p]
+        self._x11.XStringToKeysym.argtypes = [ctypes.c_char_p]
+        self._x11.XStringToKeysym.restype = ctypes.c_ulong
+        self._x11.XKeysymToKeycode.argtypes = [ctypes.c_void_p, ctypes.c_ulong]
+        self._x11.XKeysymToKeycode.restype = ctypes.c_ubyte
+        self._x11.XKeycodeToKeysym.argtypes = [ctypes.c_void_p, ctypes.c_ubyte, ctypes.c_int]
+        self._x11.XKeycodeToKeysym.restype = ctypes.c_ulong
+        self._xtst.XTestFakeRelativeMotionEvent.argtypes = [ctypes.c_void_p, ctypes.c_int, ctypes.c_int, ctypes.c_ulong]
+        self._xtst.XTestFakeMotionEvent.argtypes = [ctypes.c_void_p, ctypes.c_int, ctypes.c_int, ctypes.c_int, ctypes.c_ulong]
+        self._x11.XDefaultRootWindow.argtypes = [ctypes.c_void_p]
+        self._x11.XDefaultRootWindow.restype = ctypes.c_ulong
+        self._x11.XQueryPointer.argtypes = [ctypes.c_void_p, ctypes.c_ulong] + [ctypes.c_void_p] * 7
+        self._xtst.XTestFakeButtonEvent.argtypes = [ctypes.c_void_p, ctypes.c_uint, ctypes.c_int, ctypes.c_ulong]
+        self._xtst.XTestFakeKeyEvent.argtypes = [ctypes.c_void_p, ctypes.c_uint, ctypes.c_int, ctypes.c_ulong]
+
+        name = display_name.encode() if display_name else None
+        self._display = self._x11.XOpenDisplay(name)
+        if not self._display:
+            raise RuntimeError("无法连接 X 显示服务器")
+        # Xlib 连接不是线程安全的，插值线程和事件循环线程共用一把锁
+        self._lock = threading.Lock()
+        self._keycodes: Dict[str, int] = {}
+
+    def _keycode(self, key: str) -> int:
+        code = self._keycodes.get(key)
+        if code is None:
+            keysym = self._x11.XStringToKeysym(_X_KEYSYMS.get(key.lower(), key).encode())
+            code = self._x11.XKeysymToKeycode(self._display, keysym) if keysym else 0
+            if not code:
+                raise ValueError(f"不支持的按键: {key}")
+            self._keycodes[key] = code
+        return code
+
+    def _button(self, button: int, down: bool):
+        with self._lock:
+            self._xtst.XTestFakeButtonEvent(self._display, button, down, 0)
+            self._x11.XFlush(self._display)
+
+    def move_rel(self, dx: int, dy: int):
+        with self._lock:
+            self._xtst.XTestFakeRelativeMotionEvent(self._display, dx, dy, 0)
+            self._x11.XFlush(self._display)
+
+    def move_abs(self, x: int, y: int):
+        # screen = -1：当前屏幕的根窗口坐标（RandR 多显示器共用一个根窗口）
+        with self._lock:
+            self._xtst.XTestFakeMotionEvent(self._display, -1, x, y, 0)
+            self._x11.XFlush(self._display)
+
+    def cursor_position(self) -> Tuple[int, int]:
+        root = ctypes.c_ulong()
+        child = ctypes.c_ulong()
+        x, y, win_x, win_y = ctypes.c_int(), ctypes.c_int(), ctypes.c_int(), ctypes.c_int()
+        mask = ctypes.c_uint()
+        with self._lock:
+            self._x11.XQueryPointer(self._display, self._x11.XDefaultRootWindow(self._display),
+                                    ctypes.byref(root), ctypes.byref(child), ctypes.byref(x), ctypes.byref(y),
+                                    ctypes.byref(win_x), ctypes.byref(win_y), ctypes.byref(mask))
+        return x.value, y.value
+
+    def mouse_down(self, button: str = 'left'):
+        self._button(_X_BUTTONS[button], True)
+
+    def mouse_up(self, button: str = 'left'):
+        self._button(_X_BUTTONS[button], False)
+
+    def click(self, button: str = 'left', clicks: int = 1):
+        code = _X_BUTTONS[button]
+        with self._lock:
+            for _ in range(clicks):
+                self._xtst.XTestFakeButtonEvent(self._display, code, True, 0)
+                self._xtst.XTestFakeButtonEvent(self._display, code, False, 0)
+            self._x11.XFlush(self._display)
+
+    def scroll(self, clicks: int):
+        # 与 pyautogui 一致：每个单位为一格滚轮（按键 4 向上 / 5 向下）
+        self._wheel(4 if clicks > 0 else 5, clicks)
+
+    def hscroll(self, clicks: int):
+        # 按键 6 向左 / 7 向右
+        self._wheel(7 if clicks > 0 else 6, clicks)
+
+    def _wheel(self, code: int, clicks: int):
+        with self._lock:
+            for _ in range(abs(int(clicks))):
+                self._xtst.XTestFakeButtonEvent(self._display, code, True, 0)
+                self._xtst.XTestFakeButtonEvent(self._display, code, False, 0)
+            self._x11.XFlush(self._display)
+
+    def _keys(self, events):
+        codes = [(self._keycode(key), down) for key, down in events]
+        with self._lock:
+            for code, down in codes:
+                self._xtst.XTestFakeKeyEvent(self._display, code, down, 0)
+            self._x11.XFlush(self._display)
+
+    def key_down(self, key: str):
+        self._keys([(key, True)])
+
+    def key_up(self, key: str):
+        self._keys([(key, False)])
+
+    def press(self, key: str):
+        self._keys([(key, True), (key, False)])
+
+    def hotkey(self, *keys: str):
+        self._keys([(k, True) for k in keys] + [(k, False) for k in reversed(keys)])
+
+    def send_keys(self, events: List[Tuple[str, bool]]):
+        if events:
+            self._keys(events)
+
+    def type_text(self, text: str):
+        # 只输入当前键盘布局上存在的字符；需要 Shift 的字符自动加 Shift
+        shift = self._keycode('shift')
+        events = []
+        for char in text:
+            if char == '\n':
+                code = self._keycode('enter')
+                events += [(code, True), (code, False)]
+                continue
+            point = ord(char)
+            keysym = point if 0x20 <= point <= 0xFF else 0x01000000 | point
+            code = self._x11.XKeysymToKeycode(self._display, keysym)
+            if not code:
+                raise NotImplementedError
+            if self._x11.XKeycodeToKeysym(self._display, code, 0) == keysym:
+                events += [(code, True), (code, False)]
+            elif self._x11.XKeycodeToKeysym(self._display, code, 1) == keysym:
+                events += [(shift, True), (code, True), (code, False), (shift, False)]
+            else:
+                raise NotImplementedError
+        with self._lock:
+            for code, down in events:
+                self._xtst.XTestFakeKeyEvent(self._display, code, down, 0)
+            self._x11.XFlush(self._display)
+
+    def close(self):
+        with self._lock:
+            if self._display:
+                self._x11.XCloseDisplay(self._display)
+                self._display = None
+
+# ==================== Linux: uinput ====================
+
+_EV_SYN = 0x00
+_EV_KEY = 0x01
+_EV_REL = 0x02
+_SYN_REPORT = 0
+_REL_X = 0x00
+_REL_Y = 0x01
+_REL_HWHEEL = 0x06
+_REL_WHEEL = 0x08
+
+_UI_SET_EVBIT = 0x40045564
+_UI_SET_KEYBIT = 0x40045565
+_UI_SET_RELBIT = 0x40045566
+_UI_DEV_CREATE = 0x5501
+_UI_DEV_DESTROY = 0x5502
+
+# struct input_event { struct timeval time; __u16 type; __u16 code; __s32 value; }
+_INPUT_EVENT = struct.Struct('llHHi')
+
+_UINPUT_BUTTONS = {'left': 0x110, 'right': 0x111, 'middle': 0x112}
+
+# 按键名称 -> Linux KEY_* 键码（美式布局）
+_UINPUT_KEYS = {
+    'esc': 1, 'escape': 1, 'backspace': 14, 'tab': 15, 'enter': 28, 'return': 28,
+    'ctrl': 29, 'shift': 42, 'alt': 56, 'space': 57, 'home': 102, 'up': 103,
+    'pageup': 104, 'left': 105, 'right': 106, 'end': 107, 'down': 108,
+    'pagedown': 109, 'insert': 110, 'delete': 111, 'win': 125,
+    'capslock': 58, 'numlock': 69, 'scrolllock': 70, 'printscreen': 99, 'pause': 119, 'apps': 127,
+    'volumemute': 113, 'volumedown': 114, 'volumeup': 115,
+    'nexttrack': 163, 'playpause': 164, 'prevtrack': 165, 'stop': 166,
+    '-': 12, '=': 13, '[': 26, ']': 27, ';': 39, "'": 40, '`': 41, '\\': 43, ',': 51, '.': 52, '/': 53,
+}
+_UINPUT_KEYS.update({f'f{i}': 58 + i for i in range(1, 11)})
+_UINPUT_KEYS.update({'f11': 87, 'f12': 88})
+_UINPUT_KEYS.update({f'f{i}': 170 + i for i in range(13, 25)})
+_UINPUT_KEYS.update({str(d): 1 + d for d in range(1, 10)})
+_UINPUT_KEYS['0'] = 11
+_UINPUT_KEYS.update(zip('qwertyuiop', range(16, 26)))
+_UINPUT_KEYS.update(zip('asdfghjkl', range(30, 39)))
+_UINPUT_KEYS.update(zip('zxcvbnm', range(44, 51)))
+
+# 可直接输入的字符 -> (键码, 是否需要 Shift)（美式布局）
+_UINPUT_CHARS = {c: (_UINPUT_KEYS[c], False) for c in 'abcdefghijklmnopqrstuvwxyz0123456789'}
+_UINPUT_CHARS.update({c.upper(): (_UINPUT_KEYS[c], True) for c in 'abcdefghijklmnopqrstuvwxyz'})
+_UINPUT_CHARS.update({' ': (57, False), '\n': (28, False), '\t': (15, False)})
+_UINPUT_CHARS.update({c: (code, False) for c, code in zip("-=[];'`\\,./", (12, 13, 26, 27, 39, 40, 41, 43, 51, 52, 53))})
+_UINPUT_CHARS.update({c: (code, True) for c, code in zip('_+{}:"~|<>?', (12, 13, 26, 27, 39, 40, 41, 43, 51, 52, 53))})
+_UINPUT_CHARS.update({c: (code, True) for c, code in zip('!@#$%^&*()', range(2, 12))})
+
+class UinputBackend(InputBackend):
+    """Linux uinput 后端：不依赖显示服务器，一个事件（含 SYN）一次 write"""
+
+    name = 'uinput'
+
+    def __init__(self, device: str = '/dev/uinput'):
+        import fcntl
+        self._fd = os.open(device, os.O_WRONLY | os.O_NONBLOCK)
+        try:
+            for ev in (_EV_KEY, _EV_REL):
+                fcntl.ioctl(self._fd, _UI_SET_EVBIT, ev)
+            for rel in (_REL_X, _REL_Y, _REL_HWHEEL, _REL_WHEEL):
+                fcntl.ioctl(self._fd, _UI_SET_RELBIT, rel)
+            for code in set(_UINPUT_BUTTONS.values()) | set(_UINPUT_KEYS.values()):
+                fcntl.ioctl(self._fd, _UI_SET_KEYBIT, code)
+            # struct uinput_user_dev（旧式接口，兼容老内核）
+            name = b'AirTouch Virtual Input'
+            setup = struct.pack('80sHHHHi', name, 0x03, 0x1234, 0x5678, 1, 0) + b'\x00' * (64 * 4 * 4)
+            os.write(self._fd, setup)
+            fcntl.ioctl(self._fd, _UI_DEV_CREATE)
+        except Exception:
+            os.close(self._fd)
+            raise
+        self._fcntl = fcntl
+
+    def _emit(self, *events):
+        buf = b''.join(_INPUT_EVENT.pack(0, 0, t, c, v) for t, c, v in events)
+        os.write(self._fd, buf + _INPUT_EVENT.pack(0, 0, _EV_SYN, _SYN_REPORT, 0))
+
+    @staticmethod
+    def _code(key: str) -> int:
+        code = _UINPUT_KEYS.get(key.lower())
+        if code is None:
+            raise ValueError(f"不支持的按键: {key}")
+        return code
+
+    def move_rel(self, dx: int, dy: int):
+        self._emit((_EV_REL, _REL_X, dx), (_EV_REL, _REL_Y, dy))
+
+    def mouse_down(self, button: str = 'left'):
+        self._emit((_EV_KEY, _UINPUT_BUTTONS[button], 1))
+
+    def mouse_up(self, button: str = 'left'):
+        self._emit((_EV_KEY, _UINPUT_BUTTONS[button], 0))
+
+    def scroll(self, clicks: int):
+        self._emit((_EV_REL, _REL_WHEEL, int(clicks)))
+
+    def hscroll(self, clicks: int):
+        self._emit((_EV_REL, _REL_HWHEEL, int(clicks)))
+
+    def key_down(self, key: str):
+        self._emit((_EV_KEY, self._code(key), 1))
+
+    def key_up(self, key: str):
+        self._emit((_EV_KEY, self._code(key), 0))
+
+    def send_keys(self, events: List[Tuple[str, bool]]):
+        # 每个按键事件后都需要 SYN，否则同一报告内的按下与松开会被合并
+        codes = [(self._code(key), down) for key, down in events]
+        syn = _INPUT_EVENT.pack(0, 0, _EV_SYN, _SYN_REPORT, 0)
+        if codes:
+            os.write(self._fd, b''.join(_INPUT_EVENT.pack(0, 0, _EV_KEY, code, int(down)) + syn
+                                        for code, down in codes))
+
+    def type_text(self, text: str):
+        try:
+            chars = [_UINPUT_CHARS[c] for c in text]
+        except KeyError:
+            raise NotImplementedError
+        shift = _UINPUT_KEYS['shift']
+        events = []
+        for code, shifted in chars:
+            if shifted:
+                events.append((_EV_KEY, shift, 1))
+            events += [(_EV_KEY, code, 1), (_EV_SYN, _SYN_REPORT, 0), (_EV_KEY, code, 0)]
+            if shifted:
+                events.append((_EV_KEY, shift, 0))
+            events.append((_EV_SYN, _SYN_REPORT, 0))
+        if events:
+            os.write(self._fd, b''.join(_INPUT_EVENT.pack(0, 0, t, c, v) for t, c, v in events))
+
+    def close(self):
+        if self._fd is not None:
+            try:
+                self._fcntl.ioctl(self._fd, _UI_DEV_DESTROY)
+            finally:
+                os.close(self._fd)
+                self._fd = None
+
+# ==================== 工厂 ====================
+
+BACKENDS = {
+    'null': NullBackend,
+    'recording': RecordingBackend,
+    'pyautogui': PyAutoGUIBackend,
+    'sendinput': SendInputBackend,
+    'xtest': XTestBackend,
+    'uinput': UinputBackend,
+}
+
+def create_backend(name: Optional[str] = None) -> InputBackend:
+    """创建输入后端
+
+    name 为空时读取环境变量 AIRTOUCH_BACKEND，默认 'auto'：
+    按平台依次尝试原生后端，全部失败时回退到 pyautogui。
+    """
+    name = (name or os.environ.get('AIRTOUCH_BACKEND') or 'auto').lower()
+    if name != 'auto':
+        if name not in BACKENDS:
+            raise ValueError(f"未知的输入后端: {name}")
+        return BACKENDS[name]()
+
+    if sys.platform == 'win32':
+        candidates = [SendInputBackend]
+    elif sys.platform.startswith('linux'):
+        candidates = [XTestBackend] if os.environ.get('DISPLAY') else []
+        candidates.append(UinputBackend)
+    else:
+        candidates = []
+
+    for backend_cls in candidates:
+        try:
+            return backend_cls()
+        except Exception:
+            continue
+    return PyAutoGUIBackend()
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+AirTouch 输入会话录制与回放
+
+文件格式（大端序，只追加）:
+    文件头:  4s magic 'ATTR' | B version | d 录制开始的 Unix 时间
+    记录:    I 距上一条记录的微秒数 | B 类型 (0 二进制 / 1 文本) | H 长度 | 负载
+             长度 >= 0xFFFF 时 H 写 0xFFFF，随后追加 I 实际长度
+
+读取使用 mmap，按需解析，多小时的录制也不需要整体载入内存。
+
+用法:
+    python input_trace.py info session.attr
+    python input_trace.py replay session.attr [--fast | --speed 2] [--backend null]
+    python input_trace.py gestures session.attr     # 离线识别录制中的原始触摸帧，逐条列出手势动作
+"""
+
+import argparse
+import asyncio
+import mmap
+import os
+import struct
+import time
+from typing import Iterator, Optional, Tuple, Union
+
+MAGIC = b'ATTR'
+VERSION = 1
+
+HEADER = struct.Struct('>4sBd')
+RECORD = struct.Struct('>IBH')
+LONG_LENGTH = struct.Struct('>I')
+
+KIND_BINARY = 0
+KIND_TEXT = 1
+
+MAX_DELTA_US = 0xFFFFFFFF
+# 写缓冲达到该大小时落盘
+FLUSH_BYTES = 64 * 1024
+
+class TraceRecorder:
+    """把入站消息按到达顺序追加写入录制文件"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'ab')
+        if self._file.tell() == 0:
+            self._file.write(HEADER.pack(MAGIC, VERSION, time.time()))
+        self._last_ns = time.perf_counter_ns()
+        self._unflushed = 0
+        self.count = 0
+
+    def record(self, message: Union[bytes, str], recv_ns: Optional[int] = None):
+        """记录一条消息（由事件循环线程调用）"""
+        now = recv_ns if recv_ns is not None else time.perf_counter_ns()
+        delta_us = min(max(now - self._last_ns, 0) // 1000, MAX_DELTA_US)
+        self._last_ns = now
+        if isinstance(message, str):
+            kind, payload = KIND_TEXT, message.encode('utf-8')
+        else:
+            kind, payload = KIND_BINARY, message
+        length = len(payload)
+        if length >= 0xFFFF:
+            head = RECORD.pack(delta_us, kind, 0xFFFF) + LONG_LENGTH.pack(length)
+        else:
+            head = RECORD.pack(delta_us, kind, length)
+        self._file.write(head)
+        self._file.write(payload)
+        self.count += 1
+        self._unflushed += len(head) + length
+        if self._unflushed >= FLUSH_BYTES:
+            self.flush()
+
+    def flush(self):
+        self._file.flush()
+        self._unflushed = 0
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+class TraceReader:
+    """通过 mmap 顺序读取录制文件"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'rb')
+        size = os.fstat(self._file.fileno()).st_size
+        if size < HEADER.size:
+            self._file.close()
+            raise ValueError("录制文件为空或已损坏")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.started = HEADER.unpack_from(self._map)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"不支持的录制文件: {magic!r} v{version}")
+
+    def __iter__(self) -> Iterator[Tuple[int, int, bytes]]:
+        """逐条返回 (相对开始的纳秒, 类型, 负载)，每次只从映射中复制当前记录"""
+        data = self._map
+        offset = HEADER.size
+        end = len(data)
+        t_ns = 0
+        while offset + RECORD.size <= end:
+            delta_us, kind, length = RECORD.unpack_from(data, offset)
+            offset += RECORD.size
+            if length == 0xFFFF:
+                (length,) = LONG_LENGTH.unpack_from(data, offset)
+                offset += LONG_LENGTH.size
+            if offset + length > end:
+                break  # 末尾记录不完整（录制中断）
+            t_ns += delta_us * 1000
+            yield t_ns, kind, data[offset:offset + length]
+            offset += length
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+async def replay(path: str, controller, speed: float = 1.0, fast: bool = False) -> int:
+    """把录制文件送回 controller 的命令处理路径
+
+    fast=True 时不等待，尽快回放；否则按原始时间间隔（除以 speed）回放。
+    """
+    count = 0
+    with TraceReader(path) as reader:
+        start = time.perf_counter()
+        for t_ns, kind, payload in reader:
+            if not fast:
+                delay = start + t_ns / 1e9 / speed - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            if kind == KIND_BINARY:
+                await controller.process_binary_command(payload)
+            else:
+                await controller.process_command(payload.decode('utf-8'))
+            count += 1
+    return count
+
+def print_info(path: str):
+    counts = {KIND_BINARY: 0, KIND_TEXT: 0}
+    total_bytes = 0
+    duration_ns = 0
+    with TraceReader(path) as reader:
+        started = reader.started
+        for t_ns, kind, payload in reader:
+            counts[kind] = counts.get(kind, 0) + 1
+            total_bytes += len(payload)
+            duration_ns = t_ns
+    print(f"📼 {path}")
+    print(f"   开始时间: {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(started))}")
+    print(f"   时长: {duration_ns / 1e9:.2f}s")
+    print(f"   二进制消息: {counts[KIND_BINARY]}  文本消息: {counts[KIND_TEXT]}  负载: {total_bytes} 字节")
+
+def print_gestures(path: str):
+    """不注入输入，只把录制中的触摸帧交给手势识别器并打印识别结果"""
+    import protocol
+    from gestures import GestureRecognizer
+    recognizer = GestureRecognizer()
+    count = 0
+    with TraceReader(path) as reader:
+        for t_ns, kind, payload in reader:
+            if kind != KIND_BINARY or not payload or payload[0] != protocol.MSG_TOUCH:
+                continue
+            for action in recognizer.feed(protocol.decode_touch(payload)):
+                print(f"{t_ns / 1e9:10.3f}s  {action}")
+                count += 1
+    print(f"共识别 {count} 个动作")
+
+def main():
+    parser = argparse.ArgumentParser(description="AirTouch 输入会话录制工具")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    info = sub.add_parser('info', help="查看录制文件概要")
+    info.add_argument('path')
+
+    play = sub.add_parser('replay', help="回放录制文件")
+    play.add_argument('path')
+    play.add_argument('--fast', action='store_true', help="忽略原始时间，尽快回放")
+    play.add_argument('--speed', type=float, default=1.0, help="回放速度倍数")
+    play.add_argument('--backend', default=None, help="输入后端（默认自动选择，null 为不注入）")
+    play.add_argument('--filters', default=None, help="指针滤波预设")
+
+    gestures = sub.add_parser('gestures', help="离线识别录制中的触摸手势")
+    gestures.add_argument('path')
+
+    args = parser.parse_args()
+    if args.command == 'info':
+        print_info(args.path)
+        return
+    if args.command == 'gestures':
+        print_gestures(args.path)
+        return
+
+    from pc_controller import PCController
+
+    async def run():
+        from input_backend import create_backend
+        backend = create_backend(args.backend)
+        controller = PCController(backend=backend, filters=args.filters)
+        controller.start_input()
+        try:
+            start = time.perf_counter()
+            count = await replay(args.path, controller, speed=args.speed, fast=args.fast)
+            elapsed = time.perf_counter() - start
+            # 等待运动引擎输出剩余位移
+            await asyncio.sleep(0.5)
+            print(f"✅ 已回放 {count} 条消息，用时 {elapsed:.2f}s")
+        finally:
+            controller.stop_server()
+            backend.close()
+
+    asyncio.run(run())
+
+if __name__ == '__main__':
+    main()
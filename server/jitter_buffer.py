@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+AirTouch 自适应抖动缓冲
+WiFi 抖动会让移动样本成批到达（先空 30ms 再一次来好几个），直接累加就是光标顿挫。
+抖动缓冲按设备时间戳把样本放回手机上的时间线，再加上一个小的播放延迟后交给运动引擎：
+
+    播放时间 = 设备时间戳 + 基准传输时间 + 播放延迟
+
+- 基准传输时间取最近 BASE_WINDOW_MS 内"到达时间 - 设备时间戳"的最小值（最快路径），
+  不需要两端时钟同步，也能跟随时钟漂移
+- 播放延迟按到达抖动自适应：每个包的传输时间比基准多出的部分即它被网络耽搁的时间，
+  取其峰值（立即跟上、按 SPREAD_TIME_CONSTANT 缓慢回落）再加 MIN_DELAY_MS 余量，不超过 MAX_DELAY_MS。
+  WiFi 突发的到达抖动是"周期性扣住一段"，平均偏差会明显低估，峰值才能盖住整段空档
+- 迟到的样本立即播放，不丢位移
+
+时间单位均为毫秒，服务端时钟为 perf_counter_ns() / 1e6。本类不加锁，由运动引擎在持锁时调用。
+"""
+
+import collections
+from typing import List, Optional, Tuple
+
+MIN_DELAY_MS = 2.0
+MAX_DELAY_MS = 60.0
+# 抖动峰值回落的时间常数（毫秒），需明显长于 WiFi 突发周期
+SPREAD_TIME_CONSTANT = 2000.0
+BASE_WINDOW_MS = 2000.0
+
+class JitterBuffer:
+    """单个设备的移动样本抖动缓冲"""
+
+    def __init__(self, min_delay: float = MIN_DELAY_MS, max_delay: float = MAX_DELAY_MS):
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self._queue = collections.deque()      # (播放时间, dx, dy)
+        self._last_play = float('-inf')
+        # 设备时间戳按 32 位回绕，展开为连续值
+        self._last_ts: Optional[int] = None
+        self._device_ms = 0
+        # 窗口内最小传输时间（单调队列：(到达时间, 传输时间)）
+        self._transits = collections.deque()
+        self.spread = 0.0        # 到达抖动峰值 (ms)
+        self._last_arrival: Optional[float] = None
+        self.delay = min_delay
+        self.count = 0
+        self.late = 0
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    def _unwrap(self, ts: int) -> int:
+        if self._last_ts is None:
+            self._device_ms = ts
+        else:
+            step = (ts - self._last_ts) & 0xFFFFFFFF
+            if step >= 0x80000000:
+                step -= 0x100000000
+            self._device_ms += step
+        self._last_ts = ts
+        return self._device_ms
+
+    def push(self, samples: List[Tuple[int, int, Optional[int]]], arrival_ms: float) -> float:
+        """加入一批样本（同一个网络包），按其设备时间戳安排播放时间
+
+        返回最后一个样本在缓冲中的等待时间（毫秒）。
+        """
+        device = [None if ts is None else self._unwrap(ts) for _, _, ts in samples]
+        last = device[-1]
+        if last is not None:
+            transit = arrival_ms - last
+            transits = self._transits
+            while transits and transits[-1][1] >= transit:
+                transits.pop()
+            transits.append((arrival_ms, transit))
+            while transits[0][0] < arrival_ms - BASE_WINDOW_MS:
+                transits.popleft()
+            base = transits[0][1]
+            excess = transit - base
+            if excess > self.spread:
+                self.spread = excess
+            elif self._last_arrival is not None:
+                decay = min((arrival_ms - self._last_arrival) / SPREAD_TIME_CONSTANT, 1.0)
+                self.spread += (excess - self.spread) * decay
+            self._last_arrival = arrival_ms
+            self.delay = min(self.spread + self.min_delay, self.max_delay)
+            offset = base + self.delay
+        else:
+            offset = None
+
+        queue = self._queue
+        for (dx, dy, _), dev in zip(samples, device):
+            play = arrival_ms if dev is None or offset is None else dev + offset
+            if play < arrival_ms:
+                self.late += 1
+                play = arrival_ms
+            # 播放时间保持单调，延迟缩小时不会越过前面的样本
+            if play < self._last_play:
+                play = self._last_play
+            self._last_play = play
+            queue.append((play, dx, dy))
+        self.count += len(samples)
+        return self._last_play - arrival_ms
+
+    def pop_due(self, now_ms: float) -> Tuple[float, float]:
+        """取出播放时间已到的样本，返回总位移"""
+        queue = self._queue
+        sum_x = sum_y = 0.0
+        while queue and queue[0][0] <= now_ms:
+            _, dx, dy = queue.popleft()
+            sum_x += dx
+            sum_y += dy
+        return sum_x, sum_y
+
+    def flush(self) -> Tuple[float, float]:
+        """立即取出全部样本（离散事件之前调用，保证先到的移动先生效）"""
+        sum_x = sum_y = 0.0
+        for _, dx, dy in self._queue:
+            sum_x += dx
+            sum_y += dy
+        self._queue.clear()
+        return sum_x, sum_y
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+AirTouch 按键表与按键状态
+- KEY_TABLE 在模块加载时一次性构建：客户端发来的按键名（含常见别名；多字符按键名不区分大小写，
+  单个大写字母即 Shift + 字母）-> (规范按键名, 是否需要 Shift)。规范名沿用 pyautogui 命名，各输入后端再映射到本地键码
+- KeyState 记录一个设备当前按住的按键（引用计数），支持单独按下 / 松开、组合键，
+  以及断开连接时一次性松开全部按键
+
+KeyState 只生成 (按键名, 是否按下) 事件列表，由调用方交给注入线程执行，不直接注入。
+"""
+
+import string
+from typing import Dict, List, Sequence, Tuple
+
+MODIFIERS = ('ctrl', 'shift', 'alt', 'win')
+
+# 规范按键名
+_NAMED_KEYS = (
+    'backspace', 'tab', 'enter', 'esc', 'space', 'delete', 'insert',
+    'home', 'end', 'pageup', 'pagedown', 'up', 'down', 'left', 'right',
+    'capslock', 'numlock', 'scrolllock', 'printscreen', 'pause', 'apps',
+    'volumeup', 'volumedown', 'volumemute', 'playpause', 'nexttrack', 'prevtrack', 'stop',
+) + MODIFIERS
+_FUNCTION_KEYS = tuple(f'f{i}' for i in range(1, 25))
+# 可打印字符（美式布局）：基础键与 Shift 后的字符
+PRINTABLE_KEYS = tuple('abcdefghijklmnopqrstuvwxyz0123456789') + tuple("-=[];'`\\,./")
+_SHIFTED = dict(zip('!@#$%^&*()_+{}:"~|<>?', '1234567890-=[];\'`\\,./'))
+_SHIFTED.update({c: c.lower() for c in string.ascii_uppercase})
+
+# 常见别名（客户端习惯的写法）
+_ALIASES = {
+    'return': 'enter', 'escape': 'esc', 'del': 'delete', 'ins': 'insert',
+    'pgup': 'pageup', 'pgdn': 'pagedown', 'page_up': 'pageup', 'page_down': 'pagedown',
+    'arrowup': 'up', 'arrowdown': 'down', 'arrowleft': 'left', 'arrowright': 'right',
+    'control': 'ctrl', 'option': 'alt', 'cmd': 'win', 'command': 'win', 'meta': 'win', 'super': 'win',
+    'prtsc': 'printscreen', 'print': 'printscreen', 'menu': 'apps', 'caps': 'capslock',
+    'volume_up': 'volumeup', 'volume_down': 'volumedown', 'mute': 'volumemute',
+    'play': 'playpause', 'next': 'nexttrack', 'prev': 'prevtrack', 'previous': 'prevtrack',
+    'spacebar': 'space', ' ': 'space', '\t': 'tab', '\n': 'enter',
+}
+
+KEY_TABLE: Dict[str, Tuple[str, bool]] = {}
+KEY_TABLE.update({name: (name, False) for name in _NAMED_KEYS + _FUNCTION_KEYS + PRINTABLE_KEYS})
+KEY_TABLE.update({char: (base, True) for char, base in _SHIFTED.items()})
+KEY_TABLE.update({alias: KEY_TABLE[name] for alias, name in _ALIASES.items()})
+
+def lookup(name: str) -> Tuple[str, bool]:
+    """按键名 -> (规范按键名, 是否需要 Shift)；未知按键抛出 ValueError
+
+    单个字符区分大小写（'A' 需要 Shift），多字符按键名（'Enter'、'F5'）不区分。
+    """
+    entry = KEY_TABLE.get(name)
+    if entry is None and len(name) > 1:
+        entry = KEY_TABLE.get(name.lower())
+    if entry is None:
+        raise ValueError(f"未知按键: {name}")
+    return entry
+
+def parse_chord(keys) -> List[str]:
+    """组合键：列表或 'ctrl+shift+t' 形式的字符串（'ctrl++' 表示 Ctrl 与 + 键）"""
+    if isinstance(keys, str):
+        plus = keys == '+' or keys.endswith('++')
+        body = keys[:-2] if keys.endswith('++') else ('' if plus else keys)
+        keys = (body.split('+') if body else []) + (['+'] if plus else [])
+    names = [str(k).strip() or str(k) for k in keys]
+    if not names or not all(names):
+        raise ValueError(f"无效的组合键: {keys!r}")
+    return names
+
+KeyEvent = Tuple[str, bool]
+
+class KeyState:
+    """单个设备按住的按键（引用计数：同一按键被多个组合共用时，最后一个释放才真正松开）"""
+
+    def __init__(self):
+        self._held: Dict[str, int] = {}                 # 按键 -> 持有数（按按下顺序）
+        self._implied: Dict[str, Tuple[str, ...]] = {}  # 按住的按键 -> 随它一起按下的修饰键
+
+    @property
+    def held(self) -> List[str]:
+        """当前按住的按键（按按下顺序）"""
+        return list(self._held)
+
+    def _press(self, key: str, events: List[KeyEvent]):
+        count = self._held.get(key, 0)
+        if not count:
+            events.append((key, True))
+        self._held[key] = count + 1
+
+    def _release(self, key: str, events: List[KeyEvent]):
+        count = self._held.get(key, 0)
+        if count <= 1:
+            if count:
+                del self._held[key]
+                events.append((key, False))
+        else:
+            self._held[key] = count - 1
+
+    def down(self, key: str, modifiers: Sequence[str] = ()) -> List[KeyEvent]:
+        """按下并保持（modifiers 随该键一起按下，松开该键时一起松开）"""
+        events: List[KeyEvent] = []
+        if key in self._implied or (key in self._held and key not in MODIFIERS):
+            # 已按住的普通键再次按下：系统自动重复，不改变状态
+            events.append((key, True))
+            return events
+        for mod in modifiers:
+            self._press(mod, events)
+        self._press(key, events)
+        self._implied[key] = tuple(modifiers)
+        return events
+
+    def up(self, key: str) -> List[KeyEvent]:
+        """松开按键及随它按下的修饰键；未按住的按键忽略"""
+        events: List[KeyEvent] = []
+        if key not in self._held:
+            return events
+        implied = self._implied.pop(key, ())
+        self._release(key, events)
+        for mod in reversed(implied):
+            self._release(mod, events)
+        return events
+
+    def tap(self, key: str, modifiers: Sequence[str] = ()) -> List[KeyEvent]:
+        """单击（可带修饰键）；已按住的修饰键不会被重复按下或提前松开"""
+        events: List[KeyEvent] = []
+        for mod in modifiers:
+            self._press(mod, events)
+        if key in self._held:
+            events += [(key, False), (key, True)]
+        else:
+            events += [(key, True), (key, False)]
+        for mod in reversed(modifiers):
+            self._release(mod, events)
+        return events
+
+    def release_all(self) -> List[KeyEvent]:
+        """松开全部按键（按按下的逆序），用于断开连接或失去控制权"""
+        events = [(key, False) for key in reversed(list(self._held))]
+        self._held.clear()
+        self._implied.clear()
+        return events
+
+def resolve(names: Sequence[str]) -> Tuple[str, Tuple[str, ...]]:
+    """把组合键名称解析为 (主键, 修饰键)；字符需要 Shift 时自动加入 Shift
+
+    带修饰键的组合中大写字母按字母键处理（习惯写法 'Ctrl+C' 即 Ctrl+C，不是 Ctrl+Shift+C）。
+    """
+    keys = [lookup(name) for name in names]
+    key, shifted = keys[-1]
+    modifiers = [k for k, _ in keys[:-1]]
+    if shifted and modifiers and names[-1] in string.ascii_uppercase:
+        shifted = False
+    if shifted and 'shift' not in modifiers:
+        modifiers.append('shift')
+    return key, tuple(dict.fromkeys(modifiers))
@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+AirTouch 日志缓冲
+服务器线程（事件循环、运动引擎、注入线程）只把日志放进有界环形缓冲，从不阻塞，
+也不直接操作界面；界面线程定时批量取出。缓冲满时丢弃最旧的日志并计数。
+"""
+
+import collections
+from typing import List
+
+DEFAULT_CAPACITY = 1000
+
+class LogSink:
+    """多生产者、单消费者的有界日志缓冲"""
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self._buffer = collections.deque(maxlen=capacity)
+        # 无锁计数，多个线程同时写满时可能略少计
+        self.dropped = 0
+
+    def push(self, message: str):
+        """写入一条日志（任意线程，不阻塞）"""
+        if len(self._buffer) >= self.capacity:
+            self.dropped += 1
+        self._buffer.append(message)
+
+    def drain(self, limit: int = 0) -> List[str]:
+        """取出缓冲中的日志（按写入顺序），limit 为 0 时全部取出"""
+        buffer = self._buffer
+        count = len(buffer)
+        if limit:
+            count = min(count, limit)
+        return [buffer.popleft() for _ in range(count)]
+
+    def __len__(self) -> int:
+        return len(self._buffer)
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+AirTouch 延迟统计
+- 按阶段记录延迟直方图（对数分桶，O(1) 记录，无锁）
+- 消息速率、到达抖动、丢弃计数
+- 可选的本地 HTTP 端点，以 Prometheus 文本格式输出
+
+约定：每个直方图 / 计数器只由一个线程写入（网络线程或运动线程），
+读取方只做快照，因此不需要加锁。未启用时控制器持有 None，热路径只多一次判空。
+运动线程在其他进程中时，由 collectors 在读取统计前把对方的直方图复制过来（见 injection_worker.py）。
+"""
+
+import asyncio
+import time
+from typing import Callable, Dict, List, Optional
+
+# 直方图分桶：第 i 个桶上界为 2**i 微秒（1µs ~ 约 8.4s），超出的计入末尾的溢出桶
+BUCKET_COUNT = 24
+BUCKET_BOUNDS_US = [1 << i for i in range(BUCKET_COUNT)]
+
+# 统计阶段（均从收到消息开始计时，除非另有说明）
+STAGES = (
+    'decode',       # 收到 -> 解码完成
+    'accumulate',   # 收到 -> 累加进运动引擎
+    'inject',       # 收到 -> 运动线程注入（端到端服务器延迟）
+    'handle',       # 收到 -> 命令处理完成（所有消息类型）
+    'tick_jitter',  # 运动线程实际帧间隔与标称间隔之差
+    'arrival_gap',  # 相邻移动消息的到达间隔
+    'network',      # 设备采样 -> 收到（需要时钟同步）
+    'playout',      # 收到 -> 抖动缓冲释放（仅开启抖动缓冲时）
+    'preview',      # 屏幕预览一帧的截图 + 比较 + 编码耗时（不从收到消息计时）
+)
+
+class Histogram:
+    """对数分桶的延迟直方图（单写者）"""
+
+    __slots__ = ('buckets', 'count', 'total_ns')
+
+    def __init__(self):
+        self.buckets = [0] * (BUCKET_COUNT + 1)  # 最后一个是溢出桶，只计入 +Inf
+        self.count = 0
+        self.total_ns = 0
+
+    def observe_ns(self, ns: int):
+        index = (ns // 1000).bit_length()
+        if index > BUCKET_COUNT:
+            index = BUCKET_COUNT
+        self.buckets[index] += 1
+        self.count += 1
+        self.total_ns += ns
+
+    def quantile(self, q: float) -> float:
+        """估算分位数（秒），在桶内线性插值"""
+        buckets = list(self.buckets)
+        count = sum(buckets)
+        if not count:
+            return 0.0
+        rank = q * count
+        seen = 0
+        for i, n in enumerate(buckets[:BUCKET_COUNT]):
+            if n and seen + n >= rank:
+                lower = BUCKET_BOUNDS_US[i - 1] if i else 0
+                upper = BUCKET_BOUNDS_US[i]
+                return (lower + (upper - lower) * (rank - seen) / n) / 1e6
+            seen += n
+        return BUCKET_BOUNDS_US[-1] / 1e6  # 落在溢出桶，只能给出下界
+
+    def mean(self) -> float:
+        return self.total_ns / self.count / 1e9 if self.count else 0.0
+
+class RateMeter:
+    """按秒滚动的事件计数（单写者），rate() 返回上一个完整秒的事件数"""
+
+    __slots__ = ('_second', '_current', '_last')
+
+    def __init__(self):
+        self._second = 0
+        self._current = 0
+        self._last = 0
+
+    def mark(self, now: float, n: int = 1):
+        second = int(now)
+        if second != self._second:
+            self._last = self._current if second == self._second + 1 else 0
+            self._second = second
+            self._current = 0
+        self._current += n
+
+    def rate(self, now: Optional[float] = None) -> int:
+        second = int(time.monotonic() if now is None else now)
+        if second == self._second:
+            return self._last
+        return self._current if second == self._second + 1 else 0
+
+class Metrics:
+    """服务器延迟与吞吐统计"""
+
+    def __init__(self):
+        self.stages: Dict[str, Histogram] = {name: Histogram() for name in STAGES}
+        self.messages: Dict[str, int] = {'binary': 0, 'text': 0, 'udp': 0}
+        self.drops: Dict[str, int] = {}
+        self.message_rate = RateMeter()
+        # 入站缓冲：最近一次取出的帧数、峰值，以及被合并掉的移动帧数
+        self.inbox_depth = 0
+        self.inbox_peak = 0
+        self.coalesced = 0
+        # RFC 3550 风格的到达抖动估计（秒）
+        self.jitter = 0.0
+        self._last_gap_ns: Optional[int] = None
+        self._last_arrival_ns: Optional[int] = None
+        self.started = time.monotonic()
+        # 读取统计前调用的回调（合并其他进程记录的阶段）
+        self.collectors: List[Callable[[], None]] = []
+
+    def collect(self):
+        for collector in self.collectors:
+            collector()
+
+    def observe(self, stage: str, ns: int):
+        self.stages[stage].observe_ns(ns)
+
+    def message(self, kind: str, n: int = 1):
+        """记录入站消息"""
+        self.messages[kind] += n
+        self.message_rate.mark(time.monotonic(), n)
+
+    def inbound(self, depth: int, coalesced: int):
+        """记录一次入站缓冲取出：取出的帧数与合并掉的移动帧数"""
+        self.inbox_depth = depth
+        if depth > self.inbox_peak:
+            self.inbox_peak = depth
+        self.coalesced += coalesced
+
+    def arrival(self, recv_ns: int):
+        """记录一条移动消息的到达时间，更新间隔直方图与抖动估计"""
+        last = self._last_arrival_ns
+        self._last_arrival_ns = recv_ns
+        if last is None:
+            return
+        gap = recv_ns - last
+        self.stages['arrival_gap'].observe_ns(gap)
+        if self._last_gap_ns is not None:
+            self.jitter += (abs(gap - self._last_gap_ns) / 1e9 - self.jitter) / 16
+        self._last_gap_ns = gap
+
+    def drop(self, reason: str, n: int = 1):
+        self.drops[reason] = self.drops.get(reason, 0) + n
+
+    def snapshot(self) -> dict:
+        """当前统计快照（秒为单位）"""
+        self.collect()
+        stages = {}
+        for name, hist in self.stages.items():
+            stages[name] = {
+                'count': hist.count,
+                'mean': hist.mean(),
+                'p50': hist.quantile(0.50),
+                'p95': hist.quantile(0.95),
+                'p99': hist.quantile(0.99),
+            }
+        return {
+            'uptime': time.monotonic() - self.started,
+            'messages': dict(self.messages),
+            'messages_per_second': self.message_rate.rate(),
+            'jitter': self.jitter,
+            'drops': dict(self.drops),
+            'inbox_depth': self.inbox_depth,
+            'inbox_peak': self.inbox_peak,
+            'coalesced': self.coalesced,
+            'stages': stages,
+        }
+
+    def summary_line(self) -> str:
+        """GUI 状态栏用的一行摘要"""
+        self.collect()
+        inject = self.stages['inject']
+        drops = sum(self.drops.values())
+        return (f"{self.message_rate.rate()} msg/s  |  "
+                f"注入延迟 p50 {inject.quantile(0.5) * 1000:.1f}ms / "
+                f"p99 {inject.quantile(0.99) * 1000:.1f}ms  |  "
+                f"抖动 {self.jitter * 1000:.1f}ms  |  丢弃 {drops}")
+
+    def prometheus(self) -> str:
+        """Prometheus 文本格式"""
+        self.collect()
+        lines: List[str] = [
+            '# HELP airtouch_stage_latency_seconds Per-stage latency since frame receipt.',
+            '# TYPE airtouch_stage_latency_seconds histogram',
+        ]
+        for name, hist in self.stages.items():
+            buckets = list(hist.buckets)
+            cumulative = 0
+            for bound, n in zip(BUCKET_BOUNDS_US, buckets):
+                cumulative += n
+                lines.append(f'airtouch_stage_latency_seconds_bucket{{stage="{name}",le="{bound / 1e6:g}"}} {cumulative}')
+            cumulative += buckets[BUCKET_COUNT]
+            lines.append(f'airtouch_stage_latency_seconds_bucket{{stage="{name}",le="+Inf"}} {cumulative}')
+            lines.append(f'airtouch_stage_latency_seconds_sum{{stage="{name}"}} {hist.total_ns / 1e9:.9f}')
+            lines.append(f'airtouch_stage_latency_seconds_count{{stage="{name}"}} {cumulative}')
+
+        lines += [
+            '# HELP airtouch_messages_total Inbound WebSocket messages.',
+            '# TYPE airtouch_messages_total counter',
+        ]
+        for kind, n in self.messages.items():
+            lines.append(f'airtouch_messages_total{{kind="{kind}"}} {n}')
+
+        lines += [
+            '# HELP airtouch_drops_total Dropped or rejected inputs.',
+            '# TYPE airtouch_drops_total counter',
+        ]
+        for reason, n in self.drops.items():
+            lines.append(f'airtouch_drops_total{{reason="{reason}"}} {n}')
+
+        lines += [
+            '# HELP airtouch_messages_per_second Messages received in the last full second.',
+            '# TYPE airtouch_messages_per_second gauge',
+            f'airtouch_messages_per_second {self.message_rate.rate()}',
+            '# HELP airtouch_arrival_jitter_seconds Smoothed inter-arrival jitter of motion frames.',
+            '# TYPE airtouch_arrival_jitter_seconds gauge',
+            f'airtouch_arrival_jitter_seconds {self.jitter:.9f}',
+            '# HELP airtouch_inbox_depth Frames taken from the inbound queue in the last drain.',
+            '# TYPE airtouch_inbox_depth gauge',
+            f'airtouch_inbox_depth {self.inbox_depth}',
+            '# HELP airtouch_inbox_peak_depth Largest inbound drain since start.',
+            '# TYPE airtouch_inbox_peak_depth gauge',
+            f'airtouch_inbox_peak_depth {self.inbox_peak}',
+            '# HELP airtouch_coalesced_frames_total Motion frames merged into an earlier frame.',
+            '# TYPE airtouch_coalesced_frames_total counter',
+            f'airtouch_coalesced_frames_total {self.coalesced}',
+        ]
+        return '\n'.join(lines) + '\n'
+
+async def serve_metrics(metrics: Metrics, host: str = '127.0.0.1', port: int = 9108):
+    """启动只读 HTTP 端点（GET /metrics），默认只监听本机"""
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request = await reader.readline()
+            # 丢弃请求头
+            while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+                pass
+            parts = request.split()
+            if len(parts) >= 2 and parts[0] == b'GET' and parts[1] in (b'/metrics', b'/'):
+                body = metrics.prometheus().encode()
+                status = b'200 OK'
+            else:
+                body = b'not found\n'
+                status = b'404 Not Found'
+            writer.write(b'HTTP/1.0 ' + status + b'\r\n'
+                         b'Content-Type: text/plain; version=0.0.4; charset=utf-8\r\n'
+                         b'Content-Length: ' + str(len(body)).encode() + b'\r\n\r\n' + body)
+            await writer.drain()
+        except Exception:
+            pass
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle, host, port)
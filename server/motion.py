@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+AirTouch 鼠标运动引擎
+生产者（网络线程）累加位移，消费者线程按绝对截止时间以固定频率输出：
+- 无待处理位移时线程挂起在条件变量上，不占用 CPU
+- 按 perf_counter 绝对截止时间调度，避免 sleep 累积漂移
+- 亚像素余量精确保留，小幅移动不再丢失
+- 平滑 / 加速 / 预测由可替换的滤波管线完成（见 filters.py）
+- 滚动由同一循环平滑输出，并在抬手后继续惯性滚动（见 scroll.py）
+- 可选的抖动缓冲按设备时间线在每帧释放到期的样本（见 jitter_buffer.py）
+- 可选的缩放系数按光标所在显示器的 DPI 换算相对移动（见 displays.py）
+"""
+
+import sys
+import threading
+import time
+from typing import Callable, List, Optional, Set, Tuple
+
+from filters import FilterPipeline, FilterSpec, build_pipeline
+from jitter_buffer import JitterBuffer
+from metrics import Metrics
+from scroll import ScrollAccumulator
+
+DEFAULT_RATE_HZ = 100
+MIN_RATE_HZ = 30
+MAX_RATE_HZ = 240
+
+def detect_refresh_rate() -> Optional[int]:
+    """检测主显示器刷新率（仅 Windows，失败返回 None）"""
+    if sys.platform != 'win32':
+        return None
+    try:
+        import ctypes
+        VREFRESH = 116
+        user32 = ctypes.windll.user32
+        hdc = user32.GetDC(0)
+        try:
+            hz = ctypes.windll.gdi32.GetDeviceCaps(hdc, VREFRESH)
+        finally:
+            user32.ReleaseDC(0, hdc)
+        # 0 / 1 表示硬件默认刷新率
+        return hz if hz > 1 else None
+    except Exception:
+        return None
+
+def resolve_rate(rate_hz: Optional[float] = None) -> float:
+    """确定运动输出频率：未指定时跟随显示器刷新率，并限制在合理区间"""
+    if rate_hz is None:
+        rate_hz = detect_refresh_rate() or DEFAULT_RATE_HZ
+    return float(min(max(rate_hz, MIN_RATE_HZ), MAX_RATE_HZ))
+
+class MotionEngine:
+    """事件驱动的鼠标运动引擎（生产者-消费者模式）"""
+
+    def __init__(self, inject: Callable[[int, int], None], rate_hz: Optional[float] = None,
+                 log: Optional[Callable[[str], None]] = None, filters: FilterSpec = None,
+                 metrics: Optional[Metrics] = None,
+                 scroll_inject: Optional[Callable[[int, int], None]] = None, scroll_inertia: bool = True,
+                 motion_scale: Optional[Callable[[], float]] = None):
+        self.inject = inject
+        self.scroll_inject = scroll_inject
+        self.rate_hz = resolve_rate(rate_hz)
+        self.interval = 1.0 / self.rate_hz
+        self.log = log or print
+        self.pipeline: FilterPipeline = build_pipeline(filters)
+        self.metrics = metrics
+        self.scroll = ScrollAccumulator(inertia=scroll_inertia)
+        # 每帧输出前对位移乘以的系数（例如光标所在显示器的缩放比例）
+        self.motion_scale = motion_scale
+
+        self._cond = threading.Condition(threading.Lock())
+        # 保证"取出位移 + 注入"整体有序（运动线程与 sync() 调用方共用，先于 _cond 获取）
+        self._emit_lock = threading.Lock()
+        self._last_tick = time.perf_counter()
+        self.pending_x = 0.0
+        self.pending_y = 0.0
+        # 已输出但未满 1 像素的余量（持有 _emit_lock 时读写）
+        self._carry_x = 0.0
+        self._carry_y = 0.0
+        # 切换管线时旧管线交出的欠账（已经过旧管线的全部阶段，下一帧直接输出）
+        self._owed_x = 0.0
+        self._owed_y = 0.0
+        # 本帧第一个待处理位移的接收时间（perf_counter_ns，仅统计开启时使用）
+        self._batch_ns: Optional[int] = None
+        # 仍有样本待播放的抖动缓冲
+        self._buffers: Set[JitterBuffer] = set()
+
+        self.running = False
+        self.thread: Optional[threading.Thread] = None
+        self.tick_count = 0
+        self.late_ticks = 0
+
+    def add(self, dx: float, dy: float, recv_ns: Optional[int] = None):
+        """累加待移动位移（生产者调用），并唤醒空闲中的引擎"""
+        with self._cond:
+            idle = self.pending_x == 0.0 and self.pending_y == 0.0
+            self.pending_x += dx
+            self.pending_y += dy
+            if recv_ns is not None and self._batch_ns is None:
+                self._batch_ns = recv_ns
+            if idle:
+                self._cond.notify()
+
+    def add_samples(self, buffer: JitterBuffer, samples: List[Tuple[int, int, Optional[int]]],
+                    recv_ns: Optional[int] = None):
+        """把一批带设备时间戳的样本放入抖动缓冲，到播放时间后再累加
+
+        缓冲延迟单独统计（metrics 的 playout 阶段），不计入 inject 阶段。
+        """
+        arrival_ns = time.perf_counter_ns() if recv_ns is None else recv_ns
+        with self._cond:
+            idle = self._idle()
+            hold_ms = buffer.push(samples, arrival_ns / 1e6)
+            if len(buffer):
+                self._buffers.add(buffer)
+            if idle:
+                self._cond.notify()
+        if self.metrics is not None and recv_ns is not None:
+            self.metrics.observe('playout', int(hold_ms * 1e6))
+
+    def _drain_buffers(self, now_ms: Optional[float] = None):
+        """把抖动缓冲中到期的样本（now_ms 为 None 时为全部）并入待移动量（持有 _cond 时调用）"""
+        for buffer in list(self._buffers):
+            dx, dy = buffer.flush() if now_ms is None else buffer.pop_due(now_ms)
+            self.pending_x += dx
+            self.pending_y += dy
+            if not len(buffer):
+                self._buffers.discard(buffer)
+
+    def add_scroll(self, dx: float, dy: float, phase: int = 0):
+        """累加滚动量（1/120 格）；phase 1 表示手指抬起（开始惯性），2 表示停止惯性"""
+        with self._cond:
+            idle = self._idle()
+            if dx or dy:
+                self.scroll.add(dx, dy)
+            if phase == 1:
+                self.scroll.fling()
+            elif phase == 2:
+                self.scroll.stop()
+            if idle:
+                self._cond.notify()
+
+    def set_filters(self, spec: FilterSpec) -> FilterPipeline:
+        """运行时切换滤波管线；旧管线的欠账经过旧管线后续阶段后在下一帧输出，不丢位移"""
+        pipeline = build_pipeline(spec)
+        with self._cond:
+            owed_x, owed_y = self.pipeline.flush(self.interval)
+            self.pipeline = pipeline
+            self._owed_x += owed_x
+            self._owed_y += owed_y
+            self._cond.notify()
+        return pipeline
+
+    def _take_owed(self) -> Tuple[float, float]:
+        """取出切换管线时留下的欠账（持有 _cond 时调用）"""
+        owed = (self._owed_x, self._owed_y)
+        self._owed_x = self._owed_y = 0.0
+        return owed
+
+    def sync(self):
+        """立即输出全部待处理位移（含滤波欠账）
+
+        由注入分发线程在离散事件（点击、按键）之前调用，保证先到的移动先生效。
+        点击或按键同时会停止正在进行的惯性滚动。
+        """
+        with self._emit_lock:
+            with self._cond:
+                if self._idle():
+                    return
+                if self._buffers:
+                    self._drain_buffers()
+                raw_x, raw_y = self.pending_x, self.pending_y
+                self.pending_x = self.pending_y = 0.0
+                now = time.perf_counter()
+                dt = max(now - self._last_tick, 1e-4)
+                move_x, move_y = self.pipeline.process(raw_x, raw_y, dt)
+                owed_x, owed_y = self.pipeline.flush(dt)
+                switched_x, switched_y = self._take_owed()
+                owed_x += switched_x
+                owed_y += switched_y
+                self._last_tick = now
+                self.scroll.stop()
+                scroll_x, scroll_y = self.scroll.flush()
+            self._emit(move_x + owed_x, move_y + owed_y, scroll_x, scroll_y)
+
+    def _idle(self) -> bool:
+        return (self.pending_x == 0.0 and self.pending_y == 0.0 and self.pipeline.settled
+                and self._owed_x == 0.0 and self._owed_y == 0.0
+                and self.scroll.settled and not self._buffers)
+
+    def _emit(self, move_x: float, move_y: float, scroll_x: int = 0, scroll_y: int = 0):
+        """累加到亚像素余量，输出整数像素部分与本帧滚动量"""
+        if self.motion_scale is not None and (move_x or move_y):
+            scale = self.motion_scale()
+            move_x *= scale
+            move_y *= scale
+        self._carry_x += move_x
+        self._carry_y += move_y
+        ix = int(round(self._carry_x))
+        iy = int(round(self._carry_y))
+        if ix or iy:
+            self._carry_x -= ix
+            self._carry_y -= iy
+            self.inject(ix, iy)
+        if (scroll_x or scroll_y) and self.scroll_inject is not None:
+            self.scroll_inject(scroll_x, scroll_y)
+
+    def run(self):
+        """消费者线程主循环"""
+        self.log(f"🎯 鼠标运动引擎已启动 ({self.rate_hz:.0f}Hz)")
+        perf_counter = time.perf_counter
+        interval = self.interval
+        interval_ns = int(interval * 1e9)
+        metrics = self.metrics
+        deadline = perf_counter()
+
+        while self.running:
+            try:
+                with self._cond:
+                    # 空闲时挂起，直到有新位移或引擎停止
+                    if self._idle():
+                        while self.running and self._idle():
+                            self._cond.wait()
+                        # 唤醒后的第一帧按标称间隔计算，避免 dt 过大
+                        deadline = perf_counter()
+                        self._last_tick = deadline - interval
+                    if not self.running:
+                        break
+
+                with self._emit_lock:
+                    with self._cond:
+                        now = perf_counter()
+                        if self._buffers:
+                            self._drain_buffers(now * 1000)
+                        raw_x, raw_y = self.pending_x, self.pending_y
+                        self.pending_x = self.pending_y = 0.0
+                        batch_ns, self._batch_ns = self._batch_ns, None
+                        dt = now - self._last_tick
+                        move_x, move_y = self.pipeline.process(raw_x, raw_y, max(dt, 1e-4))
+                        owed_x, owed_y = self._take_owed()
+                        move_x += owed_x
+                        move_y += owed_y
+                        scroll_x, scroll_y = self.scroll.step(max(dt, 1e-4))
+                        self._last_tick = now
+                        active = not self._idle()
+                    self._emit(move_x, move_y, scroll_x, scroll_y)
+                self.tick_count += 1
+                if metrics is not None:
+                    metrics.observe('tick_jitter', abs(int(dt * 1e9) - interval_ns))
+                    if batch_ns is not None:
+                        metrics.observe('inject', time.perf_counter_ns() - batch_ns)
+                if not active:
+                    continue
+
+                # 绝对截止时间调度；落后超过一帧则重新对齐，不补发
+                deadline += interval
+                delay = deadline - perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                elif delay < -interval:
+                    self.late_ticks += 1
+                    deadline = perf_counter()
+            except Exception as e:
+                self.log(f"❌ 运动引擎错误: {e}")
+                time.sleep(0.1)
+
+        self.log("🛑 鼠标运动引擎已停止")
+
+    def start(self):
+        """启动消费者线程"""
+        if self.running:
+            return
+        self.running = True
+        _set_timer_resolution(True)
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def stop(self, timeout: float = 2):
+        """停止消费者线程"""
+        with self._cond:
+            self.running = False
+            self._cond.notify_all()
+        if self.thread and self.thread.is_alive():
+            self.thread.join(timeout=timeout)
+        _set_timer_resolution(False)
+
+def _set_timer_resolution(enable: bool):
+    """Windows 下把系统计时器精度提高到 1ms，保证 sleep 按截止时间唤醒"""
+    if sys.platform != 'win32':
+        return
+    try:
+        import ctypes
+        winmm = ctypes.windll.winmm
+        if enable:
+            winmm.timeBeginPeriod(1)
+        else:
+            winmm.timeEndPeriod(1)
+    except Exception:
+        pass
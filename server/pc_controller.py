@@ -2,33 +2,79 @@
 """
 AirTouch PC Controller Server
 WebSocket server that receives commands from the mobile app and controls the PC
+
+用法:
+    python pc_controller.py                          # 图形界面
+    python -m pc_controller --headless --port 8765   # 无界面服务模式
+
+服务路径只导入网络与注入所需的模块；tkinter / PIL / qrcode / pyperclip
+在首次使用时才加载（见 gui.py、generate_qrcode、text_input.py）。
 """
 
+import argparse
 import asyncio
 import json
+import multiprocessing
 import os
+import signal
 import socket
-import struct
 import sys
-import threading
-import tkinter as tk
-from tkinter import ttk, scrolledtext, messagebox
+import time
 from typing import Dict, Any, Optional
-from io import StringIO
 import websockets
-import pyautogui
-import pyperclip
-import qrcode
-from PIL import Image, ImageTk
 import ctypes
 
-# 配置 PyAutoGUI - 极致性能
-pyautogui.FAILSAFE = False
-pyautogui.PAUSE = 0  # 移除延迟，保证鼠标移动丝滑
+import protocol
+from clipboard_sync import CLIPBOARD_CHUNK, DEFAULT_CLIPBOARD_MAX, ClipboardError, ClipboardSync, next_transfer_id
+from clock_sync import SYNC_INTERVAL, now_ms
+from displays import DisplayLayout, DpiMotion, TabletMapping
+from file_transfer import DEFAULT_MAX_BYTES, FileReceiver, FileTransferError, default_directory
+from filters import FilterSpec
+from gestures import GestureRecognizer
+from inbound import InboundQueue, MotionRun, coalesce
+from injection_worker import InjectionProcess
+from jitter_buffer import JitterBuffer
+from keys import KeyState, parse_chord, resolve
+from dispatcher import InjectionDispatcher
+from input_trace import TraceRecorder
+from session import DEFAULT_MAX_CLIENTS, Arbiter, ClientSession
+from text_input import TextInjector
+from udp_channel import open_udp_channel
+from metrics import Metrics, serve_metrics
+from motion import MotionEngine
+from input_backend import InputBackend, create_backend
 
 # 日志开关
 ENABLE_LOGGING = True
 
+# JSON 滚动命令的阶段名
+SCROLL_PHASES = {'end': protocol.SCROLL_END, 'cancel': protocol.SCROLL_CANCEL}
+
+# 需要经过多设备仲裁的 JSON 命令（心跳、握手等不受限制）
+INPUT_COMMANDS = frozenset(('click', 'scroll', 'keydown', 'key', 'chord', 'release_keys', 'text'))
+# 不经过仲裁的二进制消息（剪贴板分块中途被拒会破坏整次传输；写入剪贴板本身不是输入）
+UNARBITRATED_BINARY = frozenset((protocol.MSG_PING, protocol.MSG_CLIPBOARD))
+# 文件分块的首字节（读取协程直接识别，不经过处理队列）
+FILE_CHUNK_PREFIX = bytes([protocol.MSG_FILE_CHUNK])
+
+# JSON 按键命令的动作名
+KEY_ACTIONS = {'down': protocol.ACTION_DOWN, 'up': protocol.ACTION_UP, 'press': protocol.ACTION_CLICK}
+
+# 切换虚拟桌面的快捷键（手势方向 1 为右侧桌面，-1 为左侧）
+if sys.platform == 'win32':
+    DESKTOP_SWITCH_KEYS = {1: ('ctrl', 'win', 'right'), -1: ('ctrl', 'win', 'left')}
+elif sys.platform == 'darwin':
+    DESKTOP_SWITCH_KEYS = {1: ('ctrl', 'right'), -1: ('ctrl', 'left')}
+else:
+    DESKTOP_SWITCH_KEYS = {1: ('ctrl', 'alt', 'right'), -1: ('ctrl', 'alt', 'left')}
+
+# 低延迟 WebSocket 参数：不压缩；接收队列与发送缓冲保持很小，积压时尽早触发 TCP 流控
+WS_SERVE_OPTIONS = {
+    'compression': None,
+    'max_queue': 16,
+    'write_limit': 4096,
+}
+
 def get_resource_path(relative_path):
     """获取资源文件的绝对路径（支持打包后的环境）"""
     try:
@@ -39,20 +85,121 @@ def get_resource_path(relative_path):
     return os.path.join(base_path, relative_path)
 
 class PCController:
-    def __init__(self, host='0.0.0.0', port=8765, log_callback=None):
+    def __init__(self, host='0.0.0.0', port=8765, log_callback=None,
+                 backend: Optional[InputBackend] = None, motion_hz: Optional[float] = None,
+                 filters: FilterSpec = None, metrics: Optional[Metrics] = None,
+                 metrics_port: Optional[int] = None, trace_path: Optional[str] = None,
+                 arbitration: Optional[str] = None, max_clients: int = DEFAULT_MAX_CLIENTS,
+                 udp_port: Optional[int] = None, jitter_buffer: Optional[bool] = None,
+                 injection_process: Optional[bool] = None, dpi_motion: Optional[bool] = None,
+                 preview: Optional[bool] = None, clipboard_sync: Optional[bool] = None,
+                 clipboard_max: int = DEFAULT_CLIPBOARD_MAX, file_transfer: Optional[bool] = None,
+                 file_dir: Optional[str] = None, file_max: int = DEFAULT_MAX_BYTES):
         self.host = host
         self.port = port
-        self.current_client: Optional[websockets.WebSocketServerProtocol] = None
         self.log_callback = log_callback
         self.is_running = False
         self.server = None
         
-        # 鼠标移动平滑系统（生产者-消费者模式）
-        self.pending_x = 0.0
-        self.pending_y = 0.0
-        self.motion_lock = threading.Lock()
-        self.motion_thread = None
-        self.motion_running = False
+        # 可选的注入进程：运动引擎与输入后端在独立进程中运行（默认读取 AIRTOUCH_INJECTION_PROCESS）
+        if injection_process is None:
+            injection_process = os.environ.get('AIRTOUCH_INJECTION_PROCESS', '') not in ('', '0')
+        self.worker: Optional[InjectionProcess] = None
+        
+        # 按光标所在显示器的缩放比例换算相对移动（默认读取 AIRTOUCH_DPI_MOTION）
+        if dpi_motion is None:
+            dpi_motion = os.environ.get('AIRTOUCH_DPI_MOTION', '') not in ('', '0')
+        self.dpi_motion = dpi_motion
+        
+        # 输入注入后端（未指定时按平台自动选择；注入进程模式下由注入进程按名称创建）
+        self._owns_backend = backend is None and not injection_process
+        if injection_process:
+            self.worker = InjectionProcess(backend.name if backend is not None else None,
+                                           motion_hz=motion_hz, filters=filters, log=self.log, metrics=metrics,
+                                           dpi_motion=dpi_motion)
+            self.backend = self.worker.backend
+        else:
+            self.backend = backend if backend is not None else create_backend()
+        
+        # 显示器布局：首次使用时查询并缓存，显示器变化事件到达时作废（同时通知后端）
+        self.displays = DisplayLayout(log=self.log)
+        self.displays.listeners.append(self.backend.display_changed)
+        self._default_tablet: Optional[TabletMapping] = None  # 未指定映射时使用主显示器
+        
+        # 鼠标运动引擎（生产者-消费者模式，空闲时挂起）
+        # 延迟统计（None 表示关闭，热路径只做一次判空）
+        self.metrics = metrics
+        self.metrics_port = metrics_port
+        self.metrics_server = None
+        self._recv_ns: Optional[int] = None  # 当前消息的接收时间 (perf_counter_ns)
+        
+        # 可选的输入会话录制（用于复现问题）
+        self.recorder: Optional[TraceRecorder] = TraceRecorder(trace_path) if trace_path else None
+        
+        if self.worker is not None:
+            # 注入进程模式：提交接口把事件写入共享内存环，同时代替运动引擎与分发线程
+            self.motion = self.dispatcher = self.worker
+        else:
+            self.motion = MotionEngine(self.backend.move_rel, rate_hz=motion_hz, log=self.log,
+                                       filters=filters, metrics=metrics,
+                                       scroll_inject=self.backend.scroll_hires,
+                                       motion_scale=DpiMotion(self.displays, self.backend.cursor_position)
+                                       if dpi_motion else None)
+            
+            # 注入分发线程：事件循环只入队，阻塞的注入在独立线程中按顺序执行
+            self.dispatcher = InjectionDispatcher(self.motion, log=self.log, metrics=metrics)
+        
+        # 文本注入：短文本直接输入，长文本粘贴并延迟恢复剪贴板
+        self.text = TextInjector(self.backend, self.dispatcher.submit, log=self.log)
+        
+        # 已连接的客户端会话与多设备输入仲裁
+        self.sessions: Dict[int, ClientSession] = {}
+        self.max_clients = max_clients
+        
+        # 可选的 UDP 移动通道（默认与 WebSocket 使用相同端口号，0 表示关闭）
+        self.udp_port = port if udp_port is None else udp_port
+        self.udp_transport = None
+        self.arbiter = Arbiter(arbitration)
+        
+        # 可选的自适应抖动缓冲：按设备时间线重放移动样本（默认读取 AIRTOUCH_JITTER_BUFFER）
+        if jitter_buffer is None:
+            jitter_buffer = os.environ.get('AIRTOUCH_JITTER_BUFFER', '') not in ('', '0')
+        self.jitter_buffer = jitter_buffer
+        self._session: Optional[ClientSession] = None  # 当前消息所属会话（回放时为 None）
+        self._replay_gestures = GestureRecognizer()    # 回放录制文件时使用的手势识别器
+        self._replay_keys = KeyState()                 # 回放录制文件时的按键状态
+        
+        # 可选的屏幕预览（客户端请求后才截图；默认读取 AIRTOUCH_PREVIEW，关闭时不向任何设备发送屏幕内容）
+        if preview is None:
+            preview = os.environ.get('AIRTOUCH_PREVIEW', '') not in ('', '0')
+        self.preview = preview
+        
+        # 可选的双向剪贴板同步（默认读取 AIRTOUCH_CLIPBOARD_SYNC）；写入剪贴板随时可用（注入进程中同样需要）
+        if clipboard_sync is None:
+            clipboard_sync = os.environ.get('AIRTOUCH_CLIPBOARD_SYNC', '') not in ('', '0')
+        self.clipboard_sync = clipboard_sync
+        self.clipboard = ClipboardSync(clipboard_max, log=self.log)
+        
+        # 可选的文件接收（默认读取 AIRTOUCH_FILE_TRANSFER / AIRTOUCH_FILE_DIR）；分块绕过输入处理队列，由低优先级线程写盘
+        if file_transfer is None:
+            file_transfer = os.environ.get('AIRTOUCH_FILE_TRANSFER', '') not in ('', '0')
+        self.file_transfer = file_transfer
+        self.files = FileReceiver(file_dir or os.environ.get('AIRTOUCH_FILE_DIR') or None, file_max, log=self.log)
+        
+        # 二进制消息分发表（消息类型 -> 处理函数）
+        self._binary_handlers = {
+            protocol.MSG_MOUSE_MOVE: self._on_mouse_move,
+            protocol.MSG_MOTION_BATCH: self._on_motion_batch,
+            protocol.MSG_BUTTON: self._on_button,
+            protocol.MSG_SCROLL: self._on_scroll,
+            protocol.MSG_KEY: self._on_key,
+            protocol.MSG_TEXT: self._on_text,
+            protocol.MSG_PING: self._on_ping,
+            protocol.MSG_UDP_MOTION: self._on_udp_motion,
+            protocol.MSG_TOUCH: self._on_touch,
+            protocol.MSG_ABS_POSITION: self._on_abs_position,
+            protocol.MSG_CLIPBOARD: self._on_clipboard,
+        }
         
     def get_local_ip(self) -> str:
         """获取本机局域网 IP 地址"""
@@ -81,6 +228,7 @@ class PCController:
     
     def generate_qrcode(self, url: str):
         """生成二维码图片"""
+        import qrcode
         qr = qrcode.QRCode(
             version=1,
             error_correction=qrcode.constants.ERROR_CORRECT_L,
@@ -93,198 +241,828 @@ class PCController:
         return img
     
     async def handle_client(self, websocket):
-        """处理客户端连接（仅允许一个客户端）"""
+        """处理客户端连接（每个连接一个会话，多设备输入由仲裁器决定是否生效）"""
         client_ip = websocket.remote_address[0]
         
-        # 如果已有客户端连接，拒绝新连接
-        if self.current_client is not None:
-            self.log(f"⚠️  拒绝连接: {client_ip} (已有客户端连接)")
-            await websocket.close(1008, "Server busy: only one client allowed")
+        # 超过连接数上限时拒绝新连接
+        if len(self.sessions) >= self.max_clients:
+            if self.metrics is not None:
+                self.metrics.drop('rejected_client')
+            self.log(f"⚠️  拒绝连接: {client_ip} (已达到 {self.max_clients} 个客户端上限)")
+            await websocket.close(1008, "Server busy: too many clients")
             return
         
-        self.current_client = websocket
-        self.log(f"✅ 客户端已连接: {client_ip}")
+        session = ClientSession(websocket, client_ip)
+        if self.jitter_buffer:
+            session.jitter = JitterBuffer()
+        self.sessions[session.id] = session
+        self.log(f"✅ 客户端已连接: {session.label} (共 {len(self.sessions)} 个)")
         if self.log_callback:
             self.log_callback(f"CLIENT_CONNECTED:{client_ip}")
         
+        # 关闭 Nagle 算法，小包立即发送
+        sock = websocket.transport.get_extra_info('socket')
+        if sock is not None:
+            try:
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            except OSError:
+                pass
+        
+        # 读取协程只负责收帧入队，处理协程批量取出、合并移动后按序处理
+        metrics = self.metrics
+        recorder = self.recorder
+        inbox = InboundQueue()
+        processor = asyncio.ensure_future(self._process_inbound(inbox, session))
         try:
             async for message in websocket:
-                # 判断消息类型：二进制或文本
-                if isinstance(message, bytes):
-                    await self.process_binary_command(message)
-                else:
-                    await self.process_command(message)
+                if message[:1] == FILE_CHUNK_PREFIX:
+                    # 文件分块不录制、不进入输入队列；超出在途窗口的分块直接拒绝，读取协程不等待磁盘
+                    await self._on_file_chunk(session, message)
+                    continue
+                recv_ns = time.perf_counter_ns() if metrics is not None else None
+                if recorder is not None:
+                    recorder.record(message, recv_ns)
+                await inbox.put((recv_ns, message))
         except websockets.exceptions.ConnectionClosed:
-            self.log(f"🔌 客户端断开: {client_ip}")
+            self.log(f"🔌 客户端断开: {session.label}")
         except Exception as e:
             if ENABLE_LOGGING:
                 self.log(f"❌ 错误: {e}")
         finally:
-            self.current_client = None
-            self.log("📭 等待新客户端连接...")
+            # 处理完断开前已收到的帧（例如松开按键）
+            inbox.close()
+            await processor
+            if session.sync_task is not None:
+                session.sync_task.cancel()
+            if session.preview_task is not None:
+                session.preview_task.cancel()
+            if session.clipboard_task is not None:
+                session.clipboard_task.cancel()
+            del self.sessions[session.id]
+            self.arbiter.release(session)
+            self._release_session(session)
+            if not self.sessions:
+                self.log("📭 等待新客户端连接...")
             if self.log_callback:
-                self.log_callback("CLIENT_DISCONNECTED")
+                self.log_callback(f"CLIENT_DISCONNECTED:{client_ip}")
     
-    async def process_binary_command(self, message: bytes):
-        """处理二进制命令（用于高频鼠标移动）"""
+    async def _process_inbound(self, inbox: InboundQueue, session: ClientSession):
+        """处理协程：一次取走全部就绪帧，连续的移动帧合并为一次累加"""
+        metrics = self.metrics
+        while True:
+            frames = await inbox.drain()
+            if not frames:
+                return
+            items = coalesce(frames) if len(frames) > 1 else frames
+            if metrics is not None:
+                metrics.inbound(len(frames), len(frames) - len(items))
+            for item in items:
+                try:
+                    if isinstance(item, MotionRun):
+                        self._recv_ns = item.recv_ns
+                        session.messages += item.frames
+                        if self._admit(session):
+                            self._session = session
+                            self._apply_motion_samples(item.samples)
+                        kind, count = 'binary', item.frames
+                    else:
+                        self._recv_ns, message = item
+                        # 判断消息类型：二进制或文本
+                        if isinstance(message, bytes):
+                            await self.process_binary_command(message, session)
+                            kind = 'binary'
+                        else:
+                            await self.process_command(message, session)
+                            kind = 'text'
+                        count = 1
+                    if metrics is not None:
+                        metrics.observe('handle', time.perf_counter_ns() - self._recv_ns)
+                        metrics.message(kind, count)
+                except Exception as e:
+                    if ENABLE_LOGGING:
+                        self.log(f"❌ 错误: {e}")
+    
+    def _server_ms(self) -> float:
+        """当前消息的接收时间（毫秒，与 clock_sync.now_ms 同源）"""
+        return self._recv_ns / 1e6 if self._recv_ns is not None else now_ms()
+    
+    async def _clock_sync_loop(self, session: ClientSession):
+        """定时向支持时钟同步的客户端发送同步请求"""
         try:
-            if len(message) == 5:
-                # 解析二进制包: 大端序 (Big-Endian)
-                # Byte 0: 消息类型 (Uint8)
-                # Byte 1-2: X 轴位移 (Int16)
-                # Byte 3-4: Y 轴位移 (Int16)
-                msg_type, dx, dy = struct.unpack('>Bhh', message)
-                
-                if msg_type == 1:  # 鼠标移动
-                    # 累加到待移动队列（生产者）
-                    with self.motion_lock:
-                        self.pending_x += dx
-                        self.pending_y += dy
+            while True:
+                await session.send(json.dumps({'type': 'sync', 't0': now_ms()}))
+                await asyncio.sleep(SYNC_INTERVAL)
+        except (asyncio.CancelledError, websockets.exceptions.ConnectionClosed):
+            pass
+    
+    async def _preview_loop(self, session: ClientSession):
+        """按设定帧率向该设备发送屏幕预览帧；编码或发送赶不上帧率、发送缓冲积压时跳过帧"""
+        loop = asyncio.get_running_loop()
+        transport = session.websocket.transport
+        metrics = self.metrics
+        deadline = loop.time()
+        try:
+            while session.preview is not None:
+                stream = session.preview
+                interval = 1.0 / stream.fps
+                now = loop.time()
+                deadline += interval
+                if deadline < now:
+                    # 上一帧超过一个帧间隔才完成：跳过错过的帧，不连续补发
+                    if metrics is not None:
+                        metrics.drop('preview_late', int((now - deadline) / interval) + 1)
+                    deadline = now
+                await asyncio.sleep(deadline - now)
+                # 上一帧还堆在发送缓冲中：本帧不截图，输入回复与心跳优先
+                if transport is not None and transport.get_write_buffer_size() > WS_SERVE_OPTIONS['write_limit']:
+                    if metrics is not None:
+                        metrics.drop('preview_backlog')
+                    continue
+                frame, elapsed_ns = await loop.run_in_executor(None, stream.next_frame)
+                if metrics is not None:
+                    metrics.observe('preview', elapsed_ns)
+                if frame is not None and session.preview is stream:
+                    await session.send(frame)
+        except (asyncio.CancelledError, websockets.exceptions.ConnectionClosed):
+            pass
         except Exception as e:
+            session.preview = None
+            session.preview_task = None
+            self.log(f"❌ 屏幕预览错误: {e}")
+    
+    def _configure_preview(self, session: ClientSession, data: Dict[str, Any]) -> Dict[str, Any]:
+        """开启 / 调整 / 停止该设备的屏幕预览，返回回复内容"""
+        if not self.preview:
+            return {'type': 'preview', 'error': 'disabled'}
+        if not data.get('enabled', True):
+            if session.preview_task is not None:
+                session.preview_task.cancel()
+            session.preview = session.preview_task = None
+            return {'type': 'preview', 'enabled': False}
+        try:
+            from preview import PreviewStream
+        except ImportError as e:
+            return {'type': 'preview', 'error': f'unavailable: {e}'}
+        stream = session.preview or PreviewStream(self.displays)
+        try:
+            stream.configure(data.get('fps'), data.get('width'), data.get('quality'), data.get('monitor'))
+        except (TypeError, ValueError) as e:
+            return {'type': 'preview', 'error': str(e)}
+        session.preview = stream
+        if data.get('keyframe'):
+            stream.encoder.request_keyframe()
+        if session.preview_task is None:
+            session.preview_task = asyncio.ensure_future(self._preview_loop(session))
+        return {'type': 'preview', 'enabled': True, 'fps': stream.fps,
+                'width': stream.encoder.width, 'quality': stream.encoder.quality}
+    
+    def rtt_summary(self) -> str:
+        """各客户端当前 RTT 的简要描述（界面线程调用）"""
+        rtts = [s.clock.rtt for s in list(self.sessions.values()) if s.clock.rtt is not None]
+        if not rtts:
+            return ""
+        if len(rtts) == 1:
+            return f"RTT {rtts[0]:.1f}ms"
+        return f"RTT {min(rtts):.1f}-{max(rtts):.1f}ms"
+    
+    def _admit(self, session: ClientSession) -> bool:
+        """多设备仲裁：输入不生效时计入丢弃；控制权转移时松开上一个设备按住的鼠标键"""
+        previous = self.arbiter.owner
+        if not self.arbiter.admit(session):
+            if self.metrics is not None:
+                self.metrics.drop('arbitration')
+            return False
+        if previous is not None and previous is not session:
+            self._release_session(previous)
+        return True
+    
+    def _release_session(self, session: ClientSession):
+        """松开该设备按住的鼠标键与键盘按键（断开连接或失去控制权时）"""
+        events = session.keys.release_all()
+        if events:
+            self.dispatcher.submit(self._inject_keys, events)
+        if session.gestures is not None:
+            session.gestures.reset()
+        if session.buttons:
+            buttons, session.buttons = session.buttons, set()
+            for button in buttons:
+                self.dispatcher.submit(self._inject_button, button, protocol.ACTION_UP)
+    
+    async def process_binary_command(self, message: bytes, session: Optional[ClientSession] = None):
+        """处理二进制命令（按首字节查表分发，无需 JSON 解析）"""
+        try:
+            if not message:
+                return
+            handler = self._binary_handlers.get(message[0])
+            if handler is None:
+                if self.metrics is not None:
+                    self.metrics.drop('unknown_type')
+                if ENABLE_LOGGING:
+                    self.log(f"⚠️  未知二进制消息类型: {message[0]}")
+                return
+            if session is not None:
+                session.messages += 1
+                if message[0] not in UNARBITRATED_BINARY and not self._admit(session):
+                    return
+            self._session = session
+            reply = handler(message)
+            if reply is not None and session is not None:
+                await session.send(reply)
+        except Exception as e:
+            if self.metrics is not None:
+                self.metrics.drop('decode_error')
             if ENABLE_LOGGING:
                 self.log(f"❌ 二进制命令错误: {e}")
     
-    async def process_command(self, message: str):
+    def _on_mouse_move(self, message: bytes):
+        """旧版单次移动包: Byte 0 类型 | Byte 1-2 X 位移 (Int16) | Byte 3-4 Y 位移 (Int16)"""
+        if len(message) != protocol.MOUSE_MOVE.size:
+            return
+        _, dx, dy = protocol.MOUSE_MOVE.unpack(message)
+        recv_ns = self._recv_ns
+        if self.metrics is not None:
+            self.metrics.observe('decode', time.perf_counter_ns() - recv_ns)
+            self.metrics.arrival(recv_ns)
+        # 累加到待移动队列（生产者）
+        self.dispatcher.submit_motion(dx, dy, recv_ns)
+        if self._session is not None:
+            self._session.motion_x += dx
+            self._session.motion_y += dy
+        if self.metrics is not None:
+            self.metrics.observe('accumulate', time.perf_counter_ns() - recv_ns)
+    
+    def _on_motion_batch(self, message: bytes):
+        """批量移动帧：一次解析全部样本，一次加锁累加"""
+        self._apply_motion_samples(protocol.decode_motion_batch(message))
+    
+    def _on_udp_motion(self, message: bytes):
+        """录制文件中的 UDP 移动报文（只在回放时经由此路径，WebSocket 上不接受）"""
+        if self._session is not None:
+            if self.metrics is not None:
+                self.metrics.drop('udp_auth')
+            return
+        self._apply_motion_samples(protocol.decode_udp_motion(message)[3])
+    
+    def _apply_motion_samples(self, samples):
+        """累加一批移动样本（WebSocket 批量帧与 UDP 报文共用）"""
+        recv_ns = self._recv_ns
+        if self.metrics is not None:
+            self.metrics.observe('decode', time.perf_counter_ns() - recv_ns)
+            self.metrics.arrival(recv_ns)
+        if samples:
+            sum_x, sum_y = protocol.sum_motion(samples)
+            session = self._session
+            # 带设备时间戳的样本经抖动缓冲按设备时间线播放，其余直接累加
+            if session is not None and session.jitter is not None and samples[-1][2] is not None:
+                self.dispatcher.submit_samples(session.jitter, samples, recv_ns)
+            else:
+                self.dispatcher.submit_motion(sum_x, sum_y, recv_ns)
+            if self.metrics is not None:
+                self.metrics.observe('accumulate', time.perf_counter_ns() - recv_ns)
+            if session is not None:
+                session.motion_x += sum_x
+                session.motion_y += sum_y
+                device_ts = samples[-1][2]
+                if device_ts is not None:
+                    session.last_device_ts = device_ts
+                    # 时钟同步后可得到设备采样到服务端收到的网络延迟
+                    if self.metrics is not None and session.clock.synced:
+                        latency = session.clock.latency_ms(device_ts, recv_ns / 1e6)
+                        self.metrics.observe('network', int(max(latency, 0.0) * 1e6))
+    
+    def process_datagram(self, data: bytes, addr):
+        """处理 UDP 移动报文：校验会话密钥与序号，过时报文直接丢弃"""
+        metrics = self.metrics
+        if metrics is not None:
+            self._recv_ns = time.perf_counter_ns()
+        if self.recorder is not None:
+            self.recorder.record(data, self._recv_ns)
+        try:
+            session_id, key, seq, samples = protocol.decode_udp_motion(data)
+        except protocol.ProtocolError:
+            if metrics is not None:
+                metrics.drop('udp_malformed')
+            return
+        session = self.sessions.get(session_id)
+        if session is None or key != session.udp_key:
+            if metrics is not None:
+                metrics.drop('udp_auth')
+            return
+        if not session.accept_udp_seq(seq):
+            if metrics is not None:
+                metrics.drop('udp_stale')
+            return
+        session.messages += 1
+        if not self._admit(session):
+            return
+        self._session = session
+        self._apply_motion_samples(samples)
+        if metrics is not None:
+            metrics.observe('handle', time.perf_counter_ns() - self._recv_ns)
+            metrics.message('udp')
+    
+    def _on_button(self, message: bytes):
+        """鼠标按键（按下 / 松开 / 单击）"""
+        self._submit_button(*protocol.decode_button(message))
+    
+    def _submit_button(self, button: str, action: int):
+        """提交鼠标按键；记录按住的键，设备断开或失去控制权时自动松开"""
+        session = self._session
+        if session is not None:
+            if action == protocol.ACTION_DOWN:
+                session.buttons.add(button)
+            elif action == protocol.ACTION_UP:
+                session.buttons.discard(button)
+        self.dispatcher.submit(self._inject_button, button, action)
+    
+    def _inject_button(self, button: str, action: int):
+        """在注入线程中执行鼠标按键"""
+        if action == protocol.ACTION_DOWN:
+            self.backend.mouse_down(button)
+        elif action == protocol.ACTION_UP:
+            self.backend.mouse_up(button)
+        else:
+            self.backend.click(button=button)
+    
+    def _on_scroll(self, message: bytes):
+        """高精度滚动（1/120 格，由运动引擎平滑输出，抬手后惯性滚动）"""
+        dx, dy, phase = protocol.decode_scroll(message)
+        self.dispatcher.submit_scroll(dx, dy, phase)
+    
+    def _on_touch(self, message: bytes):
+        """原始触摸帧：由该设备的手势识别器逐帧转换为移动、滚动、点击等动作"""
+        points = protocol.decode_touch(message)
+        session = self._session
+        if session is None:
+            recognizer = self._replay_gestures
+        else:
+            if session.gestures is None:
+                session.gestures = GestureRecognizer()
+            recognizer = session.gestures
+        for action in recognizer.feed(points):
+            kind = action[0]
+            if kind == 'move':
+                self.dispatcher.submit_motion(action[1], action[2], self._recv_ns)
+                if session is not None:
+                    session.motion_x += action[1]
+                    session.motion_y += action[2]
+            elif kind == 'scroll':
+                self.dispatcher.submit_scroll(action[1], action[2], action[3])
+            elif kind == 'button':
+                self._submit_button(action[1], action[2])
+            elif kind == 'zoom':
+                self.dispatcher.submit(self._inject_zoom, action[1])
+            elif kind == 'desktop':
+                state = session.keys if session is not None else self._replay_keys
+                self._submit_key(state, protocol.ACTION_CLICK, list(DESKTOP_SWITCH_KEYS[action[1]]))
+    
+    def _inject_zoom(self, units: int):
+        """在注入线程中执行缩放（Ctrl + 滚轮，1/120 格）"""
+        self.backend.key_down('ctrl')
+        try:
+            self.backend.scroll_hires(0, units)
+        finally:
+            self.backend.key_up('ctrl')
+    
+    def _on_abs_position(self, message: bytes):
+        """绝对位置（平板模式）：按该设备的映射换算为虚拟桌面坐标"""
+        if not self.backend.absolute_motion:
+            if self.metrics is not None:
+                self.metrics.drop('tablet_unsupported')
+            return
+        nx, ny = protocol.decode_abs_position(message)
+        session = self._session
+        mapping = session.tablet if session is not None else None
+        if mapping is None:
+            if self._default_tablet is None:
+                self._default_tablet = TabletMapping(self.displays)
+            mapping = self._default_tablet
+        position = mapping.map(nx, ny)
+        reply = None
+        if mapping.notice and session is not None:
+            # 映射的显示器已拔出，告知一次改用主显示器
+            mapping.notice = False
+            reply = json.dumps({'type': 'tablet', 'error': 'monitor_removed', 'monitor': mapping.monitor,
+                                'target': mapping.target()})
+        if position is None:
+            if self.metrics is not None:
+                self.metrics.drop('no_display')
+            return reply
+        self.dispatcher.submit(self._inject_abs, *position)
+        return reply
+    
+    def _inject_abs(self, x: int, y: int):
+        """在注入线程中把光标移动到虚拟桌面坐标"""
+        self.backend.move_abs(x, y)
+    
+    def _on_key(self, message: bytes):
+        """按键（带修饰键掩码）；按下的键由服务端记录，松开时一并松开随它按下的修饰键"""
+        action, modifiers, key = protocol.decode_key(message)
+        session = self._session
+        state = session.keys if session is not None else self._replay_keys
+        self._submit_key(state, action, [key], protocol.modifier_names(modifiers))
+    
+    def _submit_key(self, state: KeyState, action: int, names, modifiers=()):
+        """解析按键 / 组合键并更新按键状态，生成的事件在注入线程中一次发送"""
+        key, implied = resolve(names)
+        mods = tuple(dict.fromkeys(tuple(modifiers) + implied))
+        if action == protocol.ACTION_CLICK:
+            events = state.tap(key, mods)
+        elif action == protocol.ACTION_DOWN:
+            events = state.down(key, mods)
+        else:
+            events = state.up(key)
+        if events:
+            self.dispatcher.submit(self._inject_keys, events)
+    
+    def _inject_keys(self, events):
+        """在注入线程中发送一串 (按键名, 是否按下) 事件"""
+        self.backend.send_keys(events)
+    
+    def _on_text(self, message: bytes):
+        """UTF-8 文本注入"""
+        content = protocol.decode_text(message)
+        if content:
+            self._submit_text(content)
+    
+    def _submit_text(self, content: str):
+        """提交文本（连续输入合并后一次注入）；可能借用剪贴板粘贴，期间暂停剪贴板同步的检查"""
+        if self.clipboard_sync:
+            self.clipboard.hold()
+        self.dispatcher.submit_text(self.handle_text, content)
+    
+    def _on_clipboard(self, message: bytes):
+        """剪贴板分块：收齐并校验摘要后经注入队列写入剪贴板（与之后的粘贴按键保持顺序）"""
+        session = self._session
+        if not self.clipboard_sync or session is None:
+            if self.metrics is not None:
+                self.metrics.drop('clipboard_disabled')
+            return None
+        transfer_id, total, offset, digest, chunk = protocol.decode_clipboard(message)
+        try:
+            session.clipboard_in, data = self.clipboard.receive(
+                session.clipboard_in, transfer_id, total, offset, digest, chunk)
+        except ClipboardError as e:
+            # 每次传输只回复一次错误，其余分块静默丢弃
+            first = offset == 0 or session.clipboard_in is not None
+            session.clipboard_in = None
+            if self.metrics is not None:
+                self.metrics.drop('clipboard_rejected')
+            return json.dumps({'type': 'clipboard', 'id': transfer_id, 'error': str(e)}) if first else None
+        if session.clipboard_in is None:
+            # 收齐：该设备已有这份内容，之后电脑剪贴板变为同一内容时不再发回
+            session.clipboard_hash = digest
+            if data is not None:
+                self.dispatcher.submit(self._set_clipboard, data)
+        return None
+    
+    def _set_clipboard(self, content: str):
+        """在注入线程中写入剪贴板"""
+        self.clipboard.write(content)
+    
+    def _broadcast_clipboard(self, data: bytes, digest: bytes):
+        """电脑剪贴板变化：发给订阅了剪贴板且还没有这份内容的设备（事件循环中调用）"""
+        for session in list(self.sessions.values()):
+            if 'clipboard' not in session.features or session.clipboard_hash == digest:
+                continue
+            if session.clipboard_task is not None:
+                session.clipboard_task.cancel()   # 上一份内容还没发完，直接被新内容取代
+            session.clipboard_task = asyncio.ensure_future(self._send_clipboard(session, data, digest))
+    
+    async def _send_clipboard(self, session: ClientSession, data: bytes, digest: bytes):
+        """分块发送剪贴板内容；每块发送后让出事件循环，输入帧的处理与回复不会被整段内容挡住"""
+        try:
+            for frame in protocol.encode_clipboard(next_transfer_id(), data, digest, CLIPBOARD_CHUNK):
+                await session.send(frame)
+                await asyncio.sleep(0)
+            session.clipboard_hash = digest
+        except (asyncio.CancelledError, websockets.exceptions.ConnectionClosed):
+            pass
+    
+    async def _on_file_chunk(self, session: ClientSession, message: bytes):
+        """文件分块：校验偏移与在途窗口后交给写入线程；被拒绝时回复一次正确的续传偏移"""
+        files = self.files
+        if not self.file_transfer:
+            if self.metrics is not None:
+                self.metrics.drop('file_disabled')
+            return
+        handle = None
+        try:
+            handle, offset, data = protocol.decode_file_chunk(message)
+            files.accept(handle, offset, data)
+        except (protocol.ProtocolError, FileTransferError) as e:
+            if self.metrics is not None:
+                self.metrics.drop('file_rejected')
+            reply: Dict[str, Any] = {'type': 'file', 'handle': handle, 'error': str(e)}
+            transfer = files.transfer(handle) if handle is not None else None
+            if transfer is not None:
+                reply.update(hash=transfer.digest, offset=transfer.queued)
+            await session.send(json.dumps(reply))
+    
+    async def _begin_file(self, session: ClientSession, data: Dict[str, Any]):
+        """开始或续传文件（续传时可能要重新计算已写入部分的摘要，在线程池中执行，不阻塞输入处理）"""
+        digest = str(data.get('hash', ''))
+        reply: Dict[str, Any] = {'type': 'file', 'hash': digest}
+        try:
+            transfer = await asyncio.get_running_loop().run_in_executor(
+                None, self.files.begin, data.get('name', ''), data.get('size'), digest, session)
+            reply.update(handle=transfer.handle, offset=transfer.queued)
+            if transfer.queued:
+                self.log(f"📥 续传文件: {transfer.name} ({transfer.queued / 1048576:.1f}/{transfer.size / 1048576:.1f}MB)")
+        except (TypeError, ValueError, OSError) as e:
+            reply['error'] = str(e)
+        try:
+            await session.send(json.dumps(reply))
+        except websockets.exceptions.ConnectionClosed:
+            pass
+    
+    async def _cancel_file(self, data: Dict[str, Any]):
+        """放弃传输（写入队列可能已满，在线程池中排队，不阻塞事件循环）"""
+        try:
+            await asyncio.get_running_loop().run_in_executor(
+                None, self.files.cancel, data.get('hash', ''), data.get('size', 0))
+        except (TypeError, ValueError) as e:
+            self.log(f"⚠️  无效的 file_cancel: {e}")
+    
+    def _file_status(self, transfer, status: Dict[str, Any]):
+        """写入线程的进度 / 完成 / 失败通知，发给最近开始该传输的设备（事件循环中调用）"""
+        session = transfer.session
+        if session is None or session.id not in self.sessions:
+            return   # 设备已断开，重新连接后以 file_begin 取得续传偏移
+        reply = {'type': 'file', 'hash': transfer.digest, 'handle': transfer.handle}
+        reply.update(status)
+        asyncio.ensure_future(self._send_quietly(session, json.dumps(reply)))
+    
+    @staticmethod
+    async def _send_quietly(session: ClientSession, message: str):
+        try:
+            await session.send(message)
+        except websockets.exceptions.ConnectionClosed:
+            pass
+    
+    def _on_ping(self, message: bytes) -> bytes:
+        """二进制心跳：原样返回负载"""
+        return bytes([protocol.MSG_PONG]) + message[1:]
+    
+    async def process_command(self, message: str, session: Optional[ClientSession] = None):
         """处理 JSON 文本命令"""
         try:
             data: Dict[str, Any] = json.loads(message)
             cmd_type = data.get('type')
             
+            if session is not None:
+                session.messages += 1
+                if cmd_type in INPUT_COMMANDS and not self._admit(session):
+                    return
+            
             if cmd_type == 'click':
                 button = data.get('button', 'left')
-                pyautogui.click(button=button)
+                self.dispatcher.submit(self._inject_button, button, protocol.ACTION_CLICK)
                 
             elif cmd_type == 'scroll':
-                dy = data.get('dy', 0)
-                pyautogui.scroll(int(dy))
+                # dx / dy 与 pyautogui.scroll 单位相同，可为小数；phase: 'end' 抬手惯性 / 'cancel' 停止惯性
+                unit = self.backend.WHEEL_UNITS_PER_CLICK
+                phase = SCROLL_PHASES.get(data.get('phase'), protocol.SCROLL_MOVE)
+                self.dispatcher.submit_scroll(float(data.get('dx', 0)) * unit,
+                                              float(data.get('dy', 0)) * unit, phase)
                 
             elif cmd_type == 'keydown':
-                # 物理按键模拟（功能键、快捷键）
+                # 物理按键单击（功能键、媒体键、可打印字符，或 "ctrl+c" 形式的组合键）
                 key = data.get('key', '')
                 if key:
-                    self.handle_keydown(key)
+                    self.handle_keydown(key, session)
+                    
+            elif cmd_type in ('key', 'chord'):
+                # 按键按下 / 松开 / 单击: {"type": "key", "key": "alt", "action": "down"}
+                # 组合键: {"type": "chord", "keys": ["ctrl", "shift", "esc"]}（或 "ctrl+shift+esc"）
+                state = session.keys if session is not None else self._replay_keys
+                names = parse_chord(data.get('key') if cmd_type == 'key' else data.get('keys', ''))
+                action = KEY_ACTIONS.get(data.get('action', 'press'), protocol.ACTION_CLICK)
+                self._submit_key(state, action, list(data.get('modifiers', ())) + names)
+                    
+            elif cmd_type == 'release_keys':
+                # 松开该设备按住的全部按键
+                state = session.keys if session is not None else self._replay_keys
+                events = state.release_all()
+                if events:
+                    self.dispatcher.submit(self._inject_keys, events)
                     
             elif cmd_type == 'text':
-                # 文本内容注入（使用剪贴板）
+                # 文本内容注入（连续输入合并后一次注入）
                 content = data.get('content', '')
                 if content:
-                    self.handle_text(content)
+                    self._submit_text(content)
                     
             elif cmd_type == 'ping':
-                # 心跳响应（保持连接活跃）
-                if self.current_client:
-                    await self.current_client.send(json.dumps({'type': 'pong'}))
+                # 心跳响应（保持连接活跃）；带 t 时按 NTP 方式返回服务端收发时间
+                if session is not None:
+                    reply = {'type': 'pong'}
+                    if 't' in data:
+                        reply.update(t0=data['t'], t1=self._server_ms(), t2=now_ms())
+                    await session.send(json.dumps(reply))
+                    
+            elif cmd_type == 'sync':
+                # 时钟同步回复: {"type": "sync", "t0": 服务端发送, "t1": 设备接收, "t2": 设备回复}
+                if session is not None:
+                    session.clock.update(float(data['t0']), float(data['t1']),
+                                         float(data['t2']), self._server_ms())
+                    
+            elif cmd_type == 'set_filters':
+                # 运行时切换指针滤波管线（预设名或阶段配置列表）；参数无效时保留原管线并回复错误
+                try:
+                    pipeline = self.motion.set_filters(data.get('filters'))
+                except (TypeError, ValueError) as e:
+                    self.log(f"⚠️  无效的滤波配置: {e}")
+                    if session is not None:
+                        await session.send(json.dumps({'type': 'filters', 'error': str(e)}))
+                else:
+                    self.log(f"🎚️ 滤波管线: {pipeline.describe()}")
+                    
+            elif cmd_type == 'hello':
+                # 能力握手：记录客户端能力，返回服务端协议版本与能力
+                if session is not None:
+                    session.features = set(data.get('features', []))
+                    features = list(protocol.SERVER_FEATURES)
+                    if self.backend.absolute_motion:
+                        features.append('tablet')
+                    if self.preview:
+                        features.append('preview')
+                    if self.clipboard_sync:
+                        features.append('clipboard')
+                    if self.file_transfer:
+                        features.append('file_transfer')
+                    if 'clock_sync' in session.features and session.sync_task is None:
+                        session.sync_task = asyncio.ensure_future(self._clock_sync_loop(session))
+                    await session.send(json.dumps({
+                        'type': 'welcome',
+                        'protocol': protocol.PROTOCOL_VERSION,
+                        'features': features,
+                        'session': session.id,
+                        'arbitration': self.arbiter.mode,
+                    }))
+                    
+            elif cmd_type == 'udp_open':
+                # 协商 UDP 移动通道：返回端口、会话号与会话密钥
+                if session is not None:
+                    if self.udp_transport is None:
+                        await session.send(json.dumps({'type': 'udp', 'error': 'unavailable'}))
+                    else:
+                        session.udp_seq = None
+                        await session.send(json.dumps({
+                            'type': 'udp',
+                            'port': self.udp_transport.get_extra_info('sockname')[1],
+                            'session': session.id,
+                            'key': f'{session.udp_key:016x}',
+                        }))
+                    
+            elif cmd_type == 'presenter':
+                # 演示者锁定：{"type": "presenter", "action": "claim" | "release"}
+                if session is not None:
+                    granted = False
+                    if data.get('action') == 'release':
+                        self.arbiter.release(session)
+                    elif self.arbiter.mode == 'presenter':
+                        granted = self.arbiter.claim(session)
+                        if granted:
+                            self.log(f"🎤 演示者: {session.label}")
+                    await session.send(json.dumps({'type': 'presenter', 'granted': granted}))
+                    
+            elif cmd_type == 'displays':
+                # 显示器布局: {"type": "displays", "refresh": true} 先作废缓存再重新查询
+                if data.get('refresh'):
+                    self.displays.invalidate()
+                if session is not None:
+                    await session.send(json.dumps({
+                        'type': 'displays',
+                        'monitors': self.displays.to_list(),
+                        'version': self.displays.version,
+                    }))
+                    
+            elif cmd_type == 'preview':
+                # 屏幕预览: {"type": "preview", "fps": 5, "width": 480, "quality": 60, "monitor": 0}
+                # 重发整幅画面 {"keyframe": true}，停止 {"enabled": false}；预览帧为二进制 0x0C
+                if session is not None:
+                    await session.send(json.dumps(self._configure_preview(session, data)))
+                    
+            elif cmd_type == 'file_begin':
+                # 文件传输: {"type": "file_begin", "name": "a.mp4", "size": 123, "hash": "<SHA-256>"}
+                # 回复 {"type": "file", "handle": 1, "offset": 续传偏移}，之后发送二进制 0x0E 分块；
+                # 进度 {"offset": n}、完成 {"done": true, "name": 保存的文件名}、失败 {"error": ...}
+                if session is not None:
+                    if not self.file_transfer:
+                        await session.send(json.dumps({'type': 'file', 'hash': data.get('hash'), 'error': 'disabled'}))
+                    else:
+                        asyncio.ensure_future(self._begin_file(session, data))
+                    
+            elif cmd_type == 'file_cancel':
+                # 放弃传输并删除部分文件: {"type": "file_cancel", "hash": "...", "size": 123}
+                if self.file_transfer:
+                    asyncio.ensure_future(self._cancel_file(data))
+                    
+            elif cmd_type == 'tablet':
+                # 平板模式映射: {"type": "tablet", "monitor": 1} / {"region": [x, y, w, h]} / {"enabled": false}
+                if session is not None:
+                    reply: Dict[str, Any] = {'type': 'tablet'}
+                    try:
+                        if not self.backend.absolute_motion:
+                            reply['error'] = f'unsupported: {self.backend.name}'
+                        elif data.get('enabled', True):
+                            session.tablet = TabletMapping(self.displays, data.get('monitor'), data.get('region'))
+                            reply['target'] = session.tablet.target()
+                        else:
+                            session.tablet = None
+                    except (TypeError, ValueError) as e:
+                        reply['error'] = str(e)
+                    await session.send(json.dumps(reply))
                     
         except Exception as e:
+            if self.metrics is not None:
+                self.metrics.drop('command_error')
             if ENABLE_LOGGING:
                 self.log(f"❌ 错误: {e}")
     
-    def handle_keydown(self, key: str):
-        """处理物理按键（功能键）"""
-        special_keys_map = {
-            'BACKSPACE': 'backspace',
-            'ENTER': 'enter',
-            'ESC': 'esc',
-            'TAB': 'tab',
-            'WIN': 'win',
-            'ALT': 'alt',
-            'CTRL': 'ctrl',
-            'SHIFT': 'shift',
-            'SPACE': 'space',
-            'DELETE': 'delete',
-            'HOME': 'home',
-            'END': 'end',
-            'PAGEUP': 'pageup',
-            'PAGEDOWN': 'pagedown',
-            'UP': 'up',
-            'DOWN': 'down',
-            'LEFT': 'left',
-            'RIGHT': 'right',
-        }
-        
-        key_upper = key.upper()
-        
-        if key_upper in special_keys_map:
-            pyautogui.press(special_keys_map[key_upper])
-        else:
+    def handle_keydown(self, key: str, session: Optional[ClientSession] = None):
+        """处理物理按键单击（按键名查 keys.KEY_TABLE，多字符按键名不区分大小写）"""
+        state = session.keys if session is not None else self._replay_keys
+        try:
+            self._submit_key(state, protocol.ACTION_CLICK, parse_chord(key))
+        except ValueError:
             if ENABLE_LOGGING:
                 self.log(f"⚠️  未知按键: {key}")
     
     def handle_text(self, content: str):
-        """处理文本内容（使用剪贴板粘贴）"""
+        """处理文本内容（直接输入，必要时使用剪贴板粘贴）"""
         try:
-            # 保存当前剪贴板内容
-            old_clipboard = pyperclip.paste()
-            # 将文本复制到剪贴板
-            pyperclip.copy(content)
-            # 模拟 Ctrl+V 粘贴
-            pyautogui.hotkey('ctrl', 'v')
-            # 短暂延迟确保粘贴完成
-            import time
-            time.sleep(0.05)
-            # 恢复剪贴板
-            pyperclip.copy(old_clipboard)
+            self.text.inject(content)
         except Exception as e:
             if ENABLE_LOGGING:
                 self.log(f"❌ 文本输入错误: {e}")
     
-    def motion_interpolation_loop(self):
-        """鼠标移动插值循环（消费者线程）- 100Hz高频平滑"""
-        import time
-        
-        SMOOTH_FACTOR = 0.3  # EMA平滑系数 (0.2-0.4)
-        DEADZONE = 0.5  # 死区阈值，过滤微小抖动
-        LOOP_INTERVAL = 0.01  # 10ms = 100Hz
-        
-        self.log("🎯 鼠标插值线程已启动 (100Hz)")
-        
-        while self.motion_running:
-            try:
-                # 读取待移动距离并计算本次移动量
-                with self.motion_lock:
-                    move_x = self.pending_x * SMOOTH_FACTOR
-                    move_y = self.pending_y * SMOOTH_FACTOR
-                    self.pending_x -= move_x
-                    self.pending_y -= move_y
-                
-                # 死区过滤 + 执行移动
-                if abs(move_x) > DEADZONE or abs(move_y) > DEADZONE:
-                    pyautogui.moveRel(int(round(move_x)), int(round(move_y)), _pause=False)
-                
-                time.sleep(LOOP_INTERVAL)
-            except Exception as e:
-                if ENABLE_LOGGING:
-                    self.log(f"❌ 插值循环错误: {e}")
-                time.sleep(0.1)
-        
-        self.log("🛑 鼠标插值线程已停止")
-    
     async def start_server(self):
         """启动 WebSocket 服务器"""
         ip = self.get_local_ip()
         self.is_running = True
         
-        # 启动鼠标插值线程
-        self.motion_running = True
-        self.motion_thread = threading.Thread(target=self.motion_interpolation_loop, daemon=True)
-        self.motion_thread.start()
+        # 启动鼠标运动引擎与注入分发线程
+        self.start_input()
         
         self.log("=" * 60)
         self.log("  🚀 AirTouch Server (高性能插值模式)")
         self.log("=" * 60)
         self.log(f"  📡 局域网地址: {ip}:{self.port}")
         self.log(f"  🔗 WebSocket: ws://{ip}:{self.port}")
+        self.log(f"  🖱️ 输入后端: {self.backend.name}")
         self.log("=" * 60)
         self.log("  ✅ 服务器运行中，等待客户端连接...")
         self.log("  💡 提示：")
-        self.log("     • 仅允许一个客户端连接")
+        self.log(f"     • 最多 {self.max_clients} 个客户端，仲裁模式: {self.arbiter.mode}")
         self.log("     • 支持二进制协议（低延迟鼠标移动）")
-        self.log("     • 100Hz 插值循环 + EMA 平滑算法")
+        self.log(f"     • {self.motion.rate_hz:.0f}Hz 截止时间调度 + 滤波管线 ({self.motion.pipeline.describe()})")
+        if self.jitter_buffer:
+            self.log("     • 自适应抖动缓冲已开启（按设备时间线播放移动）")
+        if self.dpi_motion:
+            self.log("     • 按显示器缩放比例换算相对移动")
+        if self.preview:
+            self.log("     • 屏幕预览已开启（客户端请求后才截图）")
+        if self.clipboard_sync:
+            self.log(f"     • 剪贴板双向同步（上限 {self.clipboard.max_bytes // 1024}KB）")
+        if self.file_transfer:
+            self.log(f"     • 文件接收已开启，保存到 {self.files.directory}")
+        if self.worker is not None:
+            self.log("     • 注入进程模式（运动引擎在独立进程中运行，事件经共享内存传递）")
         self.log("     • 手机和电脑需在同一局域网")
-        self.log("     • 检查防火墙是否允许端口 8765")
+        self.log(f"     • 检查防火墙是否允许端口 {self.port}")
         self.log("=" * 60)
         
-        self.server = await websockets.serve(self.handle_client, self.host, self.port)
+        self.server = await websockets.serve(self.handle_client, self.host, self.port, **WS_SERVE_OPTIONS)
+        
+        if self.clipboard_sync:
+            loop = asyncio.get_running_loop()
+            self.clipboard.start(lambda data, digest: loop.call_soon_threadsafe(
+                self._broadcast_clipboard, data, digest))
+        
+        if self.file_transfer:
+            loop = asyncio.get_running_loop()
+            self.files.notify = lambda transfer, status: loop.call_soon_threadsafe(
+                self._file_status, transfer, status)
+        
+        if self.udp_port:
+            try:
+                self.udp_transport = await open_udp_channel(self, self.host, self.udp_port)
+                self.log(f"📶 UDP 移动通道: {self.udp_port}")
+            except OSError as e:
+                self.log(f"⚠️  UDP 移动通道启动失败: {e}")
+        
+        if self.recorder is not None:
+            self.log(f"📼 正在录制输入会话: {self.recorder.path}")
+        
+        # 可选的本地统计端点（Prometheus 文本格式）
+        if self.metrics is not None and self.metrics_port:
+            try:
+                self.metrics_server = await serve_metrics(self.metrics, port=self.metrics_port)
+                self.log(f"📊 统计端点: http://127.0.0.1:{self.metrics_port}/metrics")
+            except OSError as e:
+                self.log(f"❌ 统计端点启动失败: {e}")
         
         try:
             while self.is_running:
@@ -295,439 +1073,54 @@ class PCController:
             try:
                 self.server.close()
                 await self.server.wait_closed()
+                if self.udp_transport:
+                    self.udp_transport.close()
+                    self.udp_transport = None
+                if self.metrics_server:
+                    self.metrics_server.close()
+                    await self.metrics_server.wait_closed()
             except:
                 pass  # 忽略关闭时的错误
     
+    def start_input(self):
+        """启动运动引擎与注入分发线程（回放工具等不启动网络服务时单独调用）
+
+        注入进程模式下两者是同一个 InjectionProcess，启动注入进程并等待其就绪。
+        """
+        self.motion.start()
+        self.dispatcher.start()
+        self.displays.start()
+    
     def stop_server(self):
         """停止服务器"""
         self.is_running = False
         
-        # 停止鼠标插值线程
-        self.motion_running = False
-        if self.motion_thread and self.motion_thread.is_alive():
-            self.motion_thread.join(timeout=2)
-
-class AirTouchGUI:
-    def __init__(self):
-        self.root = tk.Tk()
-        self.root.title("AirTouch PC Controller")
-        self.root.geometry("700x750")
-        self.root.resizable(False, False)
-        
-        # 设置窗口图标
-        try:
-            icon_path = get_resource_path('icon.ico')
-            icon_img = Image.open(icon_path)
-            icon_photo = ImageTk.PhotoImage(icon_img)
-            self.root.iconphoto(True, icon_photo)
-        except Exception as e:
-            pass  # 如果图标加载失败，继续运行
-        
-        self.controller = None
-        self.server_thread = None
-        self.loop = None
-        self.client_connected = False
-        
-        # 配置样式
-        self.setup_styles()
-        self.setup_ui()
-        
-    def setup_styles(self):
-        """配置样式"""
-        style = ttk.Style()
-        style.theme_use('clam')
-        
-    def setup_ui(self):
-        """设置UI界面"""
-        # 标题栏
-        title_frame = tk.Frame(self.root, bg="#1976D2", height=70)
-        title_frame.pack(fill=tk.X)
-        title_frame.pack_propagate(False)
-        
-        title_label = tk.Label(
-            title_frame, 
-            text="🚀 AirTouch PC Controller", 
-            font=("Segoe UI", 20, "bold"),
-            bg="#1976D2",
-            fg="white"
-        ) 
-        title_label.pack(pady=18)
-        
-        # 主容器
-        main_frame = tk.Frame(self.root, padx=25, pady=20, bg="#f8f9fa")
-        main_frame.pack(fill=tk.BOTH, expand=True)
-        self.root.configure(bg="#f8f9fa")
-        
-        # 服务器信息卡片（单行显示）
-        info_card = tk.Frame(main_frame, bg="white", relief=tk.FLAT, bd=0)
-        info_card.pack(fill=tk.X, pady=(0, 15))
-        
-        info_inner = tk.Frame(info_card, bg="white", padx=20, pady=12)
-        info_inner.pack(fill=tk.BOTH, expand=True)
-        
-        # 单行状态显示
-        status_row = tk.Frame(info_inner, bg="white")
-        status_row.pack(fill=tk.X)
-        
-        # IP地址
-        tk.Label(
-            status_row, 
-            text="📡 IP:", 
-            font=("Segoe UI", 10),
-            bg="white",
-            fg="#666"
-        ).pack(side=tk.LEFT, padx=(0, 5))
-        
-        self.ip_label = tk.Label(
-            status_row, 
-            text="未启动", 
-            font=("Segoe UI", 10, "bold"),
-            bg="white",
-            fg="#333"
-        )
-        self.ip_label.pack(side=tk.LEFT, padx=(0, 20))
-        
-        # 分隔符
-        tk.Label(
-            status_row, 
-            text="|", 
-            font=("Segoe UI", 10),
-            bg="white",
-            fg="#ddd"
-        ).pack(side=tk.LEFT, padx=(0, 20))
-        
-        # 状态
-        tk.Label(
-            status_row, 
-            text="状态:", 
-            font=("Segoe UI", 10),
-            bg="white",
-            fg="#666"
-        ).pack(side=tk.LEFT, padx=(0, 5))
-        
-        self.status_label = tk.Label(
-            status_row, 
-            text="● 未运行", 
-            font=("Segoe UI", 10, "bold"),
-            bg="white",
-            fg="#dc3545"
-        )
-        self.status_label.pack(side=tk.LEFT, padx=(0, 20))
-        
-        # 分隔符
-        tk.Label(
-            status_row, 
-            text="|", 
-            font=("Segoe UI", 10),
-            bg="white",
-            fg="#ddd"
-        ).pack(side=tk.LEFT, padx=(0, 20))
-        
-        # 客户端连接状态
-        tk.Label(
-            status_row, 
-            text="客户端:", 
-            font=("Segoe UI", 10),
-            bg="white",
-            fg="#666"
-        ).pack(side=tk.LEFT, padx=(0, 5))
-        
-        self.client_label = tk.Label(
-            status_row, 
-            text="未连接", 
-            font=("Segoe UI", 10),
-            bg="white",
-            fg="#999"
-        )
-        self.client_label.pack(side=tk.LEFT)
-        
-        # 二维码和按钮组合区域
-        qr_button_card = tk.Frame(main_frame, bg="white", relief=tk.FLAT, bd=0)
-        qr_button_card.pack(fill=tk.X, pady=(0, 15))
+        # 连接处理协程可能在注入线程停止之后才结束，先松开各设备按住的按键与鼠标键
+        for session in list(self.sessions.values()):
+            self._release_session(session)
         
-        qr_button_inner = tk.Frame(qr_button_card, bg="white", padx=20, pady=15)
-        qr_button_inner.pack(fill=tk.BOTH, expand=True)
+        # 先执行完已排队的注入，再停止鼠标运动引擎
+        self.dispatcher.stop()
+        self.motion.stop()
+        self.displays.stop()
+        self.clipboard.stop()
         
-        # 左侧：二维码区域
-        qr_left = tk.Frame(qr_button_inner, bg="white")
-        qr_left.pack(side=tk.LEFT, padx=(0, 20))
+        # 写完已收到的文件分块，记录续传位置
+        self.files.stop()
         
-        qr_title = tk.Label(
-            qr_left, 
-            text="📱 扫描连接", 
-            font=("Segoe UI", 11, "bold"),
-            bg="white",
-            fg="#333"
-        )
-        qr_title.pack(anchor=tk.W, pady=(0, 10))
-        
-        # 二维码容器（带边框）
-        qr_container = tk.Frame(qr_left, bg="white", relief=tk.SOLID, bd=1, highlightbackground="#e0e0e0", highlightthickness=1)
-        qr_container.pack()
-        
-        self.qr_label = tk.Label(
-            qr_container, 
-            text="启动服务器后\n显示二维码", 
-            font=("Segoe UI", 9),
-            fg="#999",
-            bg="white",
-            width=24,
-            height=12,
-            justify=tk.CENTER
-        )
-        self.qr_label.pack(padx=15, pady=15)
-        
-        # 右侧：控制按钮和提示
-        qr_right = tk.Frame(qr_button_inner, bg="white")
-        qr_right.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        
-        # 控制按钮标题
-        btn_title = tk.Label(
-            qr_right, 
-            text="⚙️ 服务器控制", 
-            font=("Segoe UI", 11, "bold"),
-            bg="white",
-            fg="#333"
-        )
-        btn_title.pack(anchor=tk.W, pady=(0, 10))
-        
-        # 启动按钮
-        self.start_button = tk.Button(
-            qr_right,
-            text="▶  启动服务器",
-            command=self.start_server,
-            bg="#28a745",
-            fg="white",
-            font=("Segoe UI", 11, "bold"),
-            height=2,
-            cursor="hand2",
-            relief=tk.FLAT,
-            activebackground="#218838",
-            activeforeground="white",
-            bd=0
-        )
-        self.start_button.pack(fill=tk.X, pady=(0, 10))
-        
-        # 停止按钮
-        self.stop_button = tk.Button(
-            qr_right,
-            text="⏹  停止服务器",
-            command=self.stop_server,
-            bg="#dc3545",
-            fg="white",
-            font=("Segoe UI", 11, "bold"),
-            height=2,
-            state=tk.DISABLED,
-            cursor="hand2",
-            relief=tk.FLAT,
-            activebackground="#c82333",
-            activeforeground="white",
-            bd=0
-        )
-        self.stop_button.pack(fill=tk.X, pady=(0, 15))
-        
-        # 使用提示
-        tips_frame = tk.Frame(qr_right, bg="#f0f8ff", relief=tk.FLAT, bd=0)
-        tips_frame.pack(fill=tk.X)
-        
-        tips_inner = tk.Frame(tips_frame, bg="#f0f8ff", padx=12, pady=10)
-        tips_inner.pack(fill=tk.X)
-        
-        tk.Label(
-            tips_inner,
-            text="💡 使用提示",
-            font=("Segoe UI", 9, "bold"),
-            bg="#f0f8ff",
-            fg="#0066cc"
-        ).pack(anchor=tk.W)
-        
-        tips_text = [
-            "• 手机和电脑需在同一WiFi",
-            "• 使用手机扫描二维码连接",
-            "• 仅支持一个客户端连接"
-        ]
-        
-        for tip in tips_text:
-            tk.Label(
-                tips_inner,
-                text=tip,
-                font=("Segoe UI", 8),
-                bg="#f0f8ff",
-                fg="#555",
-                anchor=tk.W
-            ).pack(anchor=tk.W, pady=1)
-        
-
+        # 恢复被文本粘贴占用的剪贴板
+        self.text.close()
         
-        # 日志卡片
-        log_card = tk.Frame(main_frame, bg="white", relief=tk.FLAT, bd=0)
-        log_card.pack(fill=tk.BOTH, expand=True)
+        # 结束录制
+        if self.recorder is not None:
+            self.recorder.close()
         
-        log_inner = tk.Frame(log_card, bg="white", padx=20, pady=15)
-        log_inner.pack(fill=tk.BOTH, expand=True)
-        
-        log_title = tk.Label(
-            log_inner, 
-            text="📋 运行日志", 
-            font=("Segoe UI", 11, "bold"),
-            bg="white",
-            fg="#333"
-        )
-        log_title.pack(anchor=tk.W, pady=(0, 10))
-        
-        self.log_text = scrolledtext.ScrolledText(
-            log_inner,
-            height=16,
-            font=("Consolas", 9),
-            bg="#f8f9fa",
-            fg="#333",
-            wrap=tk.WORD,
-            relief=tk.FLAT,
-            bd=1,
-            padx=10,
-            pady=10
-        )
-        self.log_text.pack(fill=tk.BOTH, expand=True)
-        
-        # 底部信息
-        footer_frame = tk.Frame(self.root, bg="#f8f9fa", height=35)
-        footer_frame.pack(fill=tk.X)
-        footer_frame.pack_propagate(False)
-        
-        footer = tk.Label(
-            footer_frame,
-            text="AirTouch v1.0  |  确保手机和电脑在同一局域网  |  默认端口: 8765",
-            font=("Segoe UI", 8),
-            fg="#999",
-            bg="#f8f9fa"
-        )
-        footer.pack(pady=10)
-        
-        self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
-    
-    def log(self, message: str):
-        """添加日志"""
-        # 处理特殊消息（客户端连接状态）
-        if message.startswith("CLIENT_CONNECTED:"):
-            ip = message.split(":")[1]
-            self.client_label.config(text=f"✓ 已连接 ({ip})", fg="#28a745")
-            self.client_connected = True
-            return
-        elif message == "CLIENT_DISCONNECTED":
-            self.client_label.config(text="未连接", fg="#999")
-            self.client_connected = False
-            return
-        
-        # 正常日志输出
-        self.log_text.insert(tk.END, message + "\n")
-        self.log_text.see(tk.END)
-        self.root.update()
-    
-    def start_server(self):
-        """启动服务器"""
-        self.start_button.config(state=tk.DISABLED, bg="#6c757d")
-        self.stop_button.config(state=tk.NORMAL, bg="#dc3545")
-        self.status_label.config(text="● 运行中", fg="#28a745")
-        
-        # 创建控制器
-        self.controller = PCController(log_callback=self.log)
-        ip = self.controller.get_local_ip()
-        self.ip_label.config(text=f"{ip}:8765")
-        
-        # 生成并显示二维码
-        try:
-            qr_img = self.controller.generate_qrcode(ip)
-            qr_img = qr_img.resize((200, 200), Image.Resampling.LANCZOS)
-            qr_photo = ImageTk.PhotoImage(qr_img)
-            self.qr_label.config(
-                image=qr_photo, 
-                text="",
-                bg="white",
-                width=200,
-                height=200
-            )
-            self.qr_label.image = qr_photo
-        except Exception as e:
-            self.log(f"❌ 二维码生成失败: {e}")
-        
-        # 清空日志
-        self.log_text.delete(1.0, tk.END)
-        
-        # 在新线程中启动服务器
-        self.server_thread = threading.Thread(target=self.run_server, daemon=True)
-        self.server_thread.start()
-    
-    def run_server(self):
-        """在线程中运行服务器"""
-        try:
-            self.loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(self.loop)
-            self.loop.run_until_complete(self.controller.start_server())
-        except asyncio.CancelledError:
-            pass  # 正常取消，不报错
-        except Exception as e:
-            # 忽略事件循环停止的错误
-            if "Event loop stopped" not in str(e):
-                self.log(f"❌ 服务器错误: {e}")
-        finally:
-            # 清理所有待处理的任务
+        # 释放自行创建的输入后端
+        if self._owns_backend:
             try:
-                if not self.loop.is_closed():
-                    pending = asyncio.all_tasks(self.loop)
-                    for task in pending:
-                        task.cancel()
-                    if pending:
-                        self.loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
-                    self.loop.close()
-            except:
+                self.backend.close()
+            except Exception:
                 pass
-    
-    def stop_server(self):
-        """停止服务器"""
-        # 先停止控制器
-        if self.controller:
-            self.controller.stop_server()
-        
-        # 停止事件循环
-        if self.loop and not self.loop.is_closed():
-            try:
-                # 使用线程安全的方式停止循环
-                if self.loop.is_running():
-                    self.loop.call_soon_threadsafe(self.loop.stop)
-            except:
-                pass
-        
-        # 等待服务器线程结束
-        if self.server_thread and self.server_thread.is_alive():
-            self.server_thread.join(timeout=3)
-        
-        # 更新UI状态
-        self.start_button.config(state=tk.NORMAL, bg="#28a745")
-        self.stop_button.config(state=tk.DISABLED, bg="#6c757d")
-        self.status_label.config(text="● 已停止", fg="#dc3545")
-        self.client_label.config(text="未连接", fg="#999")
-        self.ip_label.config(text="未启动")
-        
-        # 清除二维码
-        self.qr_label.config(
-            image="",
-            text="启动服务器后\n显示二维码",
-            bg="white",
-            width=24,
-            height=12
-        )
-        
-        self.log("👋 服务器已停止")
-    
-    def on_closing(self):
-        """关闭窗口"""
-        if self.stop_button['state'] == tk.NORMAL:
-            self.stop_server()
-        self.root.destroy()
-    
-    def run(self):
-        """运行GUI"""
-        self.root.mainloop()
 
 def is_admin():
     """检查是否以管理员权限运行"""
@@ -754,8 +1147,105 @@ def request_admin():
             return False
     return False
 
-def main():
+def run_headless(args: argparse.Namespace):
+    """无界面服务模式：日志输出到标准输出，Ctrl+C / SIGTERM 退出"""
+    metrics_port = args.metrics_port
+    backend = create_backend(args.backend)
+    controller = PCController(
+        host=args.host,
+        port=args.port,
+        backend=backend,
+        motion_hz=args.motion_hz,
+        filters=args.filters,
+        metrics=Metrics() if metrics_port else None,
+        metrics_port=metrics_port,
+        trace_path=args.trace,
+        arbitration=args.arbitration,
+        max_clients=args.max_clients,
+        udp_port=args.udp_port,
+        jitter_buffer=args.jitter_buffer,
+        injection_process=args.injection_process,
+        dpi_motion=args.dpi_motion,
+        preview=args.preview,
+        clipboard_sync=args.clipboard_sync,
+        clipboard_max=args.clipboard_max_kb * 1024,
+        file_transfer=args.file_transfer,
+        file_dir=args.file_dir,
+        file_max=args.file_max_mb * 1024 * 1024,
+    )
+    
+    async def serve():
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, setattr, controller, 'is_running', False)
+            except (NotImplementedError, RuntimeError):
+                pass  # Windows 不支持，依赖 KeyboardInterrupt
+        await controller.start_server()
+    
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        controller.stop_server()
+        backend.close()
+        print("👋 服务器已停止")
+
+def parse_args(argv=None) -> argparse.Namespace:
+    env = os.environ.get
+    parser = argparse.ArgumentParser(description="AirTouch PC Controller")
+    parser.add_argument('--headless', action='store_true', help="无界面服务模式（不加载 tkinter / 二维码）")
+    parser.add_argument('--host', default='0.0.0.0', help="监听地址")
+    parser.add_argument('--port', type=int, default=8765, help="WebSocket 端口")
+    parser.add_argument('--backend', default=None, help="输入后端（默认读取 AIRTOUCH_BACKEND 或自动选择）")
+    parser.add_argument('--filters', default=None, help="指针滤波预设（默认读取 AIRTOUCH_FILTERS）")
+    parser.add_argument('--motion-hz', type=float, default=None, help="运动引擎频率（默认跟随显示器刷新率）")
+    parser.add_argument('--arbitration', default=None, help="多设备仲裁模式（默认读取 AIRTOUCH_ARBITRATION）")
+    parser.add_argument('--max-clients', type=int, default=DEFAULT_MAX_CLIENTS, help="最大客户端数")
+    parser.add_argument('--udp-port', type=int, default=None, help="UDP 移动通道端口（默认同 --port，0 关闭）")
+    parser.add_argument('--jitter-buffer', action='store_true',
+                        default=env('AIRTOUCH_JITTER_BUFFER', '') not in ('', '0'),
+                        help="开启自适应抖动缓冲（默认读取 AIRTOUCH_JITTER_BUFFER）")
+    parser.add_argument('--injection-process', action='store_true',
+                        default=env('AIRTOUCH_INJECTION_PROCESS', '') not in ('', '0'),
+                        help="在独立进程中运行运动引擎与输入注入（默认读取 AIRTOUCH_INJECTION_PROCESS）")
+    parser.add_argument('--dpi-motion', action='store_true',
+                        default=env('AIRTOUCH_DPI_MOTION', '') not in ('', '0'),
+                        help="按光标所在显示器的缩放比例换算相对移动（默认读取 AIRTOUCH_DPI_MOTION）")
+    parser.add_argument('--preview', action='store_true',
+                        default=env('AIRTOUCH_PREVIEW', '') not in ('', '0'),
+                        help="允许客户端请求屏幕预览（默认读取 AIRTOUCH_PREVIEW）")
+    parser.add_argument('--clipboard-sync', action='store_true',
+                        default=env('AIRTOUCH_CLIPBOARD_SYNC', '') not in ('', '0'),
+                        help="手机与电脑双向同步剪贴板（默认读取 AIRTOUCH_CLIPBOARD_SYNC）")
+    parser.add_argument('--clipboard-max-kb', type=int,
+                        default=int(env('AIRTOUCH_CLIPBOARD_MAX_KB') or DEFAULT_CLIPBOARD_MAX // 1024),
+                        help="同步的剪贴板内容上限（KB）")
+    parser.add_argument('--file-transfer', action='store_true',
+                        default=env('AIRTOUCH_FILE_TRANSFER', '') not in ('', '0'),
+                        help="接收手机发送的文件（默认读取 AIRTOUCH_FILE_TRANSFER）")
+    parser.add_argument('--file-dir', default=env('AIRTOUCH_FILE_DIR') or None,
+                        help=f"文件保存目录（默认 {default_directory()}）")
+    parser.add_argument('--file-max-mb', type=int,
+                        default=int(env('AIRTOUCH_FILE_MAX_MB') or DEFAULT_MAX_BYTES // 1048576),
+                        help="单个文件的大小上限（MB）")
+    parser.add_argument('--metrics-port', type=int, default=int(env('AIRTOUCH_METRICS_PORT') or 0) or None,
+                        help="本地统计端点端口")
+    parser.add_argument('--trace', default=env('AIRTOUCH_TRACE') or None, help="录制输入会话到文件")
+    return parser.parse_args(argv)
+
+def main(argv=None):
     """主函数"""
+    args = parse_args(argv)
+    if args.headless:
+        run_headless(args)
+        return
+    
+    import tkinter as tk
+    from tkinter import messagebox
+    from gui import AirTouchGUI
+    
     # 检查管理员权限
     if not is_admin():
         root = tk.Tk()
@@ -779,8 +1269,10 @@ def main():
                 # 请求失败，继续以普通权限运行
                 pass
     
-    app = AirTouchGUI()
+    app = AirTouchGUI(PCController, get_resource_path)
     app.run()
 
 if __name__ == '__main__':
+    # 打包后的 exe 启动注入进程时需要
+    multiprocessing.freeze_support()
     main()
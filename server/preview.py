@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+AirTouch 屏幕预览
+把屏幕缩略图以低帧率发回手机，只发送变化的区域：
+- 截图缩放到预览宽度后按 TILE 像素分块，与上一次发出的画面比较（NumPy 向量化，一次比较整帧）
+- 变化的块按行合并为连续区段，上下行区段相同时再纵向合并为矩形，每个矩形单独编码为 JPEG
+- 画面没有变化时不发送；第一帧、尺寸变化或客户端请求时发送关键帧（整幅画面）
+- 比较基准始终是最近一次发出的画面，跳过的帧不会让客户端画面出错
+
+截图、比较和编码在线程池中执行（NumPy 与 Pillow 的主要运算会释放 GIL），发送节奏与背压由
+控制器的预览协程负责（见 pc_controller.py）。本模块依赖 numpy 与 Pillow，只在客户端请求预览时导入。
+"""
+
+import io
+import time
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+import protocol
+from displays import DisplayLayout
+
+TILE = 32
+DEFAULT_FPS = 5.0
+MAX_FPS = 15.0
+DEFAULT_WIDTH = 480
+MIN_WIDTH = 160
+MAX_WIDTH = 1280
+DEFAULT_QUALITY = 60
+
+Rect = Tuple[int, int, int, int]   # (x, y, 宽, 高)
+
+def grab_screen(bbox: Optional[Rect] = None) -> Image.Image:
+    """截取虚拟桌面上的区域（bbox 为 None 时截取全部显示器）"""
+    from PIL import ImageGrab
+    box = None
+    if bbox is not None:
+        x, y, width, height = bbox
+        box = (x, y, x + width, y + height)
+    return ImageGrab.grab(bbox=box, all_screens=True)
+
+def changed_tiles(frame: np.ndarray, previous: np.ndarray, tile: int = TILE) -> np.ndarray:
+    """逐块比较两帧，返回 (行数, 列数) 的布尔数组（边缘不足一块的部分算作一块）
+
+    按字节比较（每像素 3 字节视为一行中的连续元素），避免沿颜色轴再做一次归约。
+    """
+    height, width = frame.shape[:2]
+    rows = -(-height // tile)
+    cols = -(-width // tile)
+    diff = frame.reshape(height, width * 3) != previous.reshape(height, width * 3)
+    if rows * tile != height or cols * tile != width:
+        padded = np.zeros((rows * tile, cols * tile * 3), dtype=bool)
+        padded[:height, :width * 3] = diff
+        diff = padded
+    return diff.reshape(rows, tile, cols, tile * 3).any(axis=(1, 3))
+
+def dirty_rects(tiles: np.ndarray) -> List[Rect]:
+    """把变化块合并为矩形（块为单位）：先按行合并连续区段，区段相同的相邻行再纵向合并"""
+    rects: List[Rect] = []
+    open_spans = {}   # (起始列, 结束列) -> 起始行
+    rows = tiles.shape[0]
+    for row in range(rows + 1):
+        spans = []
+        if row < rows and tiles[row].any():
+            edges = np.flatnonzero(np.diff(np.concatenate(([False], tiles[row], [False])).astype(np.int8)))
+            spans = list(zip(edges[::2].tolist(), edges[1::2].tolist()))
+        current = {}
+        for span in spans:
+            current[span] = open_spans.pop(span, row)
+        for (start, end), first in open_spans.items():
+            rects.append((start, first, end - start, row - first))
+        open_spans = current
+    return rects
+
+class PreviewEncoder:
+    """单个客户端的预览编码器：记住最近一次发出的画面，只编码变化的矩形"""
+
+    def __init__(self, width: int = DEFAULT_WIDTH, quality: int = DEFAULT_QUALITY, tile: int = TILE):
+        self.width = width
+        self.quality = quality
+        self.tile = tile
+        self.seq = 0
+        self._previous: Optional[np.ndarray] = None
+        self._keyframe = True
+        # 最近一帧的矩形数与字节数（状态显示与基准测试用）
+        self.last_rects = 0
+        self.last_bytes = 0
+
+    def request_keyframe(self):
+        """下一帧发送整幅画面（客户端丢失画面或刚切换显示器时）"""
+        self._keyframe = True
+
+    def scale(self, image: Image.Image) -> np.ndarray:
+        """缩放到预览宽度（不放大），返回 (高, 宽, 3) 的 uint8 数组"""
+        if image.width > self.width:
+            height = max(1, round(image.height * self.width / image.width))
+            # reducing_gap=1.0: 先按整数倍盒式缩小（很快），只剩不足一倍的部分做插值
+            image = image.resize((self.width, height), Image.BILINEAR, reducing_gap=1.0)
+        if image.mode != 'RGB':
+            image = image.convert('RGB')
+        return np.asarray(image)
+
+    def encode(self, image: Image.Image) -> Optional[bytes]:
+        """编码一帧；画面没有变化时返回 None"""
+        frame = self.scale(image)
+        height, width = frame.shape[:2]
+        previous = self._previous
+        keyframe = self._keyframe or previous is None or previous.shape != frame.shape
+        tile = self.tile
+        if keyframe:
+            rects = [(0, 0, width, height)]
+        else:
+            tiles = changed_tiles(frame, previous, tile)
+            if not tiles.any():
+                return None
+            rects = []
+            for col, row, cols, rows in dirty_rects(tiles):
+                x, y = col * tile, row * tile
+                rects.append((x, y, min(cols * tile, width - x), min(rows * tile, height - y)))
+        parts = []
+        for x, y, w, h in rects:
+            buf = io.BytesIO()
+            Image.fromarray(frame[y:y + h, x:x + w]).save(buf, 'JPEG', quality=self.quality)
+            parts.append((x, y, w, h, buf.getvalue()))
+        self._previous = frame
+        self._keyframe = False
+        self.seq += 1
+        message = protocol.encode_preview(self.seq, width, height,
+                                          protocol.PREVIEW_KEYFRAME if keyframe else 0, parts)
+        self.last_rects = len(parts)
+        self.last_bytes = len(message)
+        return message
+
+class PreviewStream:
+    """单个客户端的预览设置与编码状态（设置在事件循环中修改，编码在线程池中执行）"""
+
+    def __init__(self, layout: Optional[DisplayLayout] = None, capture: Callable[[Optional[Rect]], Image.Image] = grab_screen):
+        self.layout = layout          # 为 None 时截取全部显示器
+        self.capture = capture
+        self.monitor: Optional[int] = None   # 显示器序号，None 为主显示器
+        self.encoder = PreviewEncoder()
+        self.fps = DEFAULT_FPS
+
+    def configure(self, fps: Optional[float] = None, width: Optional[int] = None,
+                  quality: Optional[int] = None, monitor: Optional[int] = None):
+        """更新设置（数值限制在合理区间，显示器序号无效时抛出 ValueError）；宽度或显示器变化后下一帧为关键帧"""
+        encoder = self.encoder
+        if monitor is not None:
+            monitor = int(monitor)
+            if self.layout is not None:
+                self.layout.monitor(monitor)
+            self.monitor = monitor
+            encoder.request_keyframe()
+        if fps is not None:
+            self.fps = min(max(float(fps), 0.5), MAX_FPS)
+        if width is not None:
+            encoder.width = min(max(int(width), MIN_WIDTH), MAX_WIDTH)
+        if quality is not None:
+            encoder.quality = min(max(int(quality), 10), 95)
+
+    def bbox(self) -> Optional[Rect]:
+        """当前截图区域（布局缓存变化后自动跟随）"""
+        layout = self.layout
+        if layout is None:
+            return None
+        monitor = layout.monitor(self.monitor) if self.monitor is not None else layout.primary
+        return monitor.rect if monitor is not None else None
+
+    def next_frame(self) -> Tuple[Optional[bytes], int]:
+        """截图并编码一帧，返回 (预览帧或 None, 耗时纳秒)"""
+        start = time.perf_counter_ns()
+        message = self.encoder.encode(self.capture(self.bbox()))
+        return message, time.perf_counter_ns() - start
@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""
+AirTouch 二进制协议
+所有字段均为大端序 (Big-Endian)，第 1 个字节为消息类型。
+"""
+
+import struct
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+# ==================== 消息类型 ====================
+
+MSG_MOUSE_MOVE = 0x01     # 旧版单次移动:  B type | h dx | h dy
+MSG_MOTION_BATCH = 0x02   # 批量移动帧:    B type | B version | H count | count × (h dx | h dy | I ts_ms)
+MSG_BUTTON = 0x03         # 鼠标按键:      B type | B button | B action
+MSG_SCROLL = 0x04         # 高精度滚动:    B type | h dx | h dy [| B phase] （120 = 一格滚轮，正数向右/向上）
+MSG_KEY = 0x05            # 按键:          B type | B action | B modifiers | UTF-8 按键名
+MSG_TEXT = 0x06           # 文本:          B type | UTF-8 文本
+MSG_PING = 0x07           # 心跳:          B type | 任意负载（原样返回）
+MSG_PONG = 0x08           # 心跳响应:      B type | 与 PING 相同的负载
+MSG_UDP_MOTION = 0x09     # UDP 移动报文:  B type | I 会话号 | Q 会话密钥 | I 序号 | H count | count × (h dx | h dy | I ts_ms)
+MSG_TOUCH = 0x0A          # 原始触摸帧:    B type | B count | count × (B 触点号 | B phase | h x | h y | I ts_ms)
+MSG_ABS_POSITION = 0x0B   # 绝对位置:      B type | H x | H y （触摸区归一化坐标 0-65535，平板模式）
+MSG_PREVIEW = 0x0C        # 屏幕预览帧（服务端 -> 客户端）:
+                          #                B type | H seq | H width | H height | B flags | H count
+                          #                count × (H x | H y | H w | H h | I len | len 字节 JPEG)
+MSG_CLIPBOARD = 0x0D      # 剪贴板分块（双向）:
+                          #                B type | I 传输号 | I 总长度 | I 偏移 | 16s BLAKE2b 摘要 | UTF-8 分块
+MSG_FILE_CHUNK = 0x0E     # 文件分块（客户端 -> 服务端）:
+                          #                B type | I 传输句柄 | Q 偏移 | 文件数据
+
+MOTION_BATCH_VERSION = 1
+
+# 协议版本与服务端能力（通过 JSON hello / welcome 握手交换）
+PROTOCOL_VERSION = 2
+SERVER_FEATURES = [
+    'motion_batch',
+    'binary_button',
+    'binary_scroll',
+    'binary_key',
+    'binary_text',
+    'binary_ping',
+    'filters',
+    'scroll_phase',
+    'multi_client',
+    'udp_motion',
+    'clock_sync',
+    'raw_touch',
+    'key_state',
+]
+
+MOUSE_MOVE = struct.Struct('>Bhh')
+MOTION_BATCH_HEADER = struct.Struct('>BBH')
+MOTION_SAMPLE = struct.Struct('>hhI')
+BUTTON = struct.Struct('>BBB')
+SCROLL = struct.Struct('>Bhh')
+SCROLL_PHASED = struct.Struct('>BhhB')
+KEY_HEADER = struct.Struct('>BBB')
+UDP_MOTION_HEADER = struct.Struct('>BIQIH')
+TOUCH_HEADER = struct.Struct('>BB')
+TOUCH_POINT = struct.Struct('>BBhhI')
+ABS_POSITION = struct.Struct('>BHH')
+PREVIEW_HEADER = struct.Struct('>BHHHBH')
+PREVIEW_RECT = struct.Struct('>HHHHI')
+CLIPBOARD_HEADER = struct.Struct('>BIII16s')
+FILE_CHUNK_HEADER = struct.Struct('>BIQ')
+
+# UDP 报文上限（保持在常见 MTU 以内，避免 IP 分片）
+MAX_DATAGRAM = 1200
+MAX_DATAGRAM_SAMPLES = (MAX_DATAGRAM - UDP_MOTION_HEADER.size) // MOTION_SAMPLE.size
+
+# 按键动作
+ACTION_UP = 0
+ACTION_DOWN = 1
+ACTION_CLICK = 2  # 鼠标为单击，键盘为按下并松开
+
+BUTTONS = ('left', 'right', 'middle')
+
+# 滚动阶段（可选字段，旧版客户端不发送时为 SCROLL_MOVE）
+SCROLL_MOVE = 0     # 手指滚动中
+SCROLL_END = 1      # 手指抬起，服务端按抬手速度继续惯性滚动
+SCROLL_CANCEL = 2   # 手指重新按下，立即停止惯性
+
+# 触摸阶段（坐标为触摸板区域内的设备逻辑像素 dp，一帧只携带状态有变化的触点）
+TOUCH_DOWN = 0
+TOUCH_MOVE = 1
+TOUCH_UP = 2
+TOUCH_CANCEL = 3
+# 单帧触点数上限
+MAX_TOUCH_POINTS = 10
+
+# 预览帧标志：关键帧（全部区域都在本帧中，客户端丢弃旧画面）
+PREVIEW_KEYFRAME = 0x01
+
+# 修饰键位掩码（按按下顺序排列）
+MOD_CTRL = 0x01
+MOD_SHIFT = 0x02
+MOD_ALT = 0x04
+MOD_WIN = 0x08
+MODIFIER_KEYS = ((MOD_CTRL, 'ctrl'), (MOD_SHIFT, 'shift'), (MOD_ALT, 'alt'), (MOD_WIN, 'win'))
+
+# 单帧样本数上限（H 字段的取值范围）
+MAX_BATCH_SAMPLES = 0xFFFF
+
+class ProtocolError(ValueError):
+    """二进制帧格式错误"""
+
+def decode_motion_batch(message: bytes) -> List[Tuple[int, int, int]]:
+    """解析批量移动帧，返回 [(dx, dy, 设备时间戳 ms), ...]"""
+    if len(message) < MOTION_BATCH_HEADER.size:
+        raise ProtocolError("批量帧长度不足")
+    _, version, count = MOTION_BATCH_HEADER.unpack_from(message)
+    if version != MOTION_BATCH_VERSION:
+        raise ProtocolError(f"不支持的批量帧版本: {version}")
+    expected = MOTION_BATCH_HEADER.size + count * MOTION_SAMPLE.size
+    if len(message) != expected:
+        raise ProtocolError(f"批量帧长度错误: {len(message)} != {expected}")
+    # iter_unpack 在 C 层一次性切分全部样本，避免逐个 unpack_from
+    return list(MOTION_SAMPLE.iter_unpack(memoryview(message)[MOTION_BATCH_HEADER.size:]))
+
+def decode_udp_motion(message: bytes) -> Tuple[int, int, int, List[Tuple[int, int, int]]]:
+    """解析 UDP 移动报文，返回 (会话号, 会话密钥, 序号, 样本列表)"""
+    if len(message) < UDP_MOTION_HEADER.size:
+        raise ProtocolError("UDP 报文长度不足")
+    msg_type, session_id, key, seq, count = UDP_MOTION_HEADER.unpack_from(message)
+    if msg_type != MSG_UDP_MOTION:
+        raise ProtocolError(f"未知的 UDP 报文类型: {msg_type}")
+    expected = UDP_MOTION_HEADER.size + count * MOTION_SAMPLE.size
+    if len(message) != expected:
+        raise ProtocolError(f"UDP 报文长度错误: {len(message)} != {expected}")
+    samples = list(MOTION_SAMPLE.iter_unpack(memoryview(message)[UDP_MOTION_HEADER.size:]))
+    return session_id, key, seq, samples
+
+def seq_newer(seq: int, last: int) -> bool:
+    """32 位回绕序号比较：seq 是否比 last 新"""
+    return 0 < ((seq - last) & 0xFFFFFFFF) < 0x80000000
+
+def decode_touch(message: bytes) -> List[Tuple[int, int, int, int, int]]:
+    """解析原始触摸帧，返回 [(触点号, 阶段, x, y, 设备时间戳 ms), ...]"""
+    if len(message) < TOUCH_HEADER.size:
+        raise ProtocolError("触摸帧长度不足")
+    _, count = TOUCH_HEADER.unpack_from(message)
+    if count > MAX_TOUCH_POINTS:
+        raise ProtocolError(f"触摸帧触点过多: {count}")
+    expected = TOUCH_HEADER.size + count * TOUCH_POINT.size
+    if len(message) != expected:
+        raise ProtocolError(f"触摸帧长度错误: {len(message)} != {expected}")
+    points = list(TOUCH_POINT.iter_unpack(memoryview(message)[TOUCH_HEADER.size:]))
+    for point in points:
+        if point[1] > TOUCH_CANCEL:
+            raise ProtocolError(f"未知的触摸阶段: {point[1]}")
+    return points
+
+def decode_abs_position(message: bytes) -> Tuple[int, int]:
+    """解析绝对位置帧，返回归一化坐标 (x, y)"""
+    if len(message) != ABS_POSITION.size:
+        raise ProtocolError("绝对位置帧长度错误")
+    _, x, y = ABS_POSITION.unpack(message)
+    return x, y
+
+def decode_preview(message: bytes) -> Tuple[int, int, int, int, List[Tuple[int, int, int, int, bytes]]]:
+    """解析屏幕预览帧，返回 (序号, 宽, 高, 标志, [(x, y, w, h, JPEG), ...])"""
+    if len(message) < PREVIEW_HEADER.size:
+        raise ProtocolError("预览帧长度不足")
+    _, seq, width, height, flags, count = PREVIEW_HEADER.unpack_from(message)
+    view = memoryview(message)
+    offset = PREVIEW_HEADER.size
+    rects = []
+    for _ in range(count):
+        if offset + PREVIEW_RECT.size > len(message):
+            raise ProtocolError("预览帧长度不足")
+        x, y, w, h, length = PREVIEW_RECT.unpack_from(message, offset)
+        offset += PREVIEW_RECT.size
+        if offset + length > len(message):
+            raise ProtocolError("预览帧长度不足")
+        rects.append((x, y, w, h, bytes(view[offset:offset + length])))
+        offset += length
+    if offset != len(message):
+        raise ProtocolError(f"预览帧长度错误: {len(message)} != {offset}")
+    return seq, width, height, flags, rects
+
+def decode_clipboard(message: bytes) -> Tuple[int, int, int, bytes, bytes]:
+    """解析剪贴板分块，返回 (传输号, 总长度, 偏移, 摘要, 分块)"""
+    if len(message) < CLIPBOARD_HEADER.size:
+        raise ProtocolError("剪贴板帧长度不足")
+    _, transfer_id, total, offset, digest = CLIPBOARD_HEADER.unpack_from(message)
+    return transfer_id, total, offset, digest, message[CLIPBOARD_HEADER.size:]
+
+def decode_file_chunk(message: bytes) -> Tuple[int, int, memoryview]:
+    """解析文件分块，返回 (传输句柄, 偏移, 数据)；数据是消息的 memoryview 切片，不复制"""
+    if len(message) < FILE_CHUNK_HEADER.size:
+        raise ProtocolError("文件分块帧长度不足")
+    _, handle, offset = FILE_CHUNK_HEADER.unpack_from(message)
+    return handle, offset, memoryview(message)[FILE_CHUNK_HEADER.size:]
+
+def decode_button(message: bytes) -> Tuple[str, int]:
+    """解析鼠标按键帧，返回 (按键名, 动作)"""
+    if len(message) != BUTTON.size:
+        raise ProtocolError("按键帧长度错误")
+    _, button, action = BUTTON.unpack(message)
+    if button >= len(BUTTONS) or action > ACTION_CLICK:
+        raise ProtocolError(f"无效的鼠标按键帧: {button}/{action}")
+    return BUTTONS[button], action
+
+def decode_scroll(message: bytes) -> Tuple[int, int, int]:
+    """解析滚动帧，返回 (dx, dy, phase)，单位为 1/120 格"""
+    if len(message) == SCROLL.size:
+        _, dx, dy = SCROLL.unpack(message)
+        return dx, dy, SCROLL_MOVE
+    if len(message) != SCROLL_PHASED.size:
+        raise ProtocolError("滚动帧长度错误")
+    _, dx, dy, phase = SCROLL_PHASED.unpack(message)
+    if phase > SCROLL_CANCEL:
+        raise ProtocolError(f"未知的滚动阶段: {phase}")
+    return dx, dy, phase
+
+def decode_key(message: bytes) -> Tuple[int, int, str]:
+    """解析按键帧，返回 (动作, 修饰键掩码, 按键名)"""
+    if len(message) <= KEY_HEADER.size:
+        raise ProtocolError("按键帧长度错误")
+    _, action, modifiers = KEY_HEADER.unpack_from(message)
+    if action > ACTION_CLICK:
+        raise ProtocolError(f"无效的按键动作: {action}")
+    return action, modifiers, bytes(message[KEY_HEADER.size:]).decode('utf-8')
+
+def decode_text(message: bytes) -> str:
+    """解析文本帧"""
+    return bytes(message[1:]).decode('utf-8')
+
+def modifier_names(modifiers: int) -> List[str]:
+    """把修饰键掩码展开为按键名列表"""
+    return [name for bit, name in MODIFIER_KEYS if modifiers & bit]
+
+def sum_motion(samples: Iterable[Tuple[int, int, int]]) -> Tuple[int, int]:
+    """累计一批样本的总位移"""
+    sum_x = sum_y = 0
+    for dx, dy, _ in samples:
+        sum_x += dx
+        sum_y += dy
+    return sum_x, sum_y
+
+def encode_mouse_move(dx: int, dy: int) -> bytes:
+    """编码旧版单次移动包"""
+    return MOUSE_MOVE.pack(MSG_MOUSE_MOVE, dx, dy)
+
+def encode_motion_batch(samples: Iterable[Tuple[int, int, int]]) -> bytes:
+    """编码批量移动帧（时间戳按 32 位回绕）"""
+    samples = list(samples)
+    if len(samples) > MAX_BATCH_SAMPLES:
+        raise ProtocolError(f"批量帧样本过多: {len(samples)}")
+    parts = [MOTION_BATCH_HEADER.pack(MSG_MOTION_BATCH, MOTION_BATCH_VERSION, len(samples))]
+    parts.extend(MOTION_SAMPLE.pack(dx, dy, ts & 0xFFFFFFFF) for dx, dy, ts in samples)
+    return b''.join(parts)
+
+def encode_udp_motion(session_id: int, key: int, seq: int, samples: Iterable[Tuple[int, int, int]]) -> bytes:
+    """编码 UDP 移动报文（序号与时间戳按 32 位回绕）"""
+    samples = list(samples)
+    if len(samples) > MAX_DATAGRAM_SAMPLES:
+        raise ProtocolError(f"UDP 报文样本过多: {len(samples)}")
+    parts = [UDP_MOTION_HEADER.pack(MSG_UDP_MOTION, session_id, key, seq & 0xFFFFFFFF, len(samples))]
+    parts.extend(MOTION_SAMPLE.pack(dx, dy, ts & 0xFFFFFFFF) for dx, dy, ts in samples)
+    return b''.join(parts)
+
+def encode_touch(points: Iterable[Tuple[int, int, int, int, int]]) -> bytes:
+    """编码原始触摸帧（时间戳按 32 位回绕）"""
+    points = list(points)
+    if len(points) > MAX_TOUCH_POINTS:
+        raise ProtocolError(f"触摸帧触点过多: {len(points)}")
+    parts = [TOUCH_HEADER.pack(MSG_TOUCH, len(points))]
+    parts.extend(TOUCH_POINT.pack(pid, phase, x, y, ts & 0xFFFFFFFF) for pid, phase, x, y, ts in points)
+    return b''.join(parts)
+
+def encode_abs_position(x: int, y: int) -> bytes:
+    """编码绝对位置帧"""
+    return ABS_POSITION.pack(MSG_ABS_POSITION, x, y)
+
+def encode_preview(seq: int, width: int, height: int, flags: int,
+                   rects: Iterable[Tuple[int, int, int, int, bytes]]) -> bytes:
+    """编码屏幕预览帧（序号按 16 位回绕）"""
+    rects = list(rects)
+    parts = [PREVIEW_HEADER.pack(MSG_PREVIEW, seq & 0xFFFF, width, height, flags, len(rects))]
+    for x, y, w, h, data in rects:
+        parts.append(PREVIEW_RECT.pack(x, y, w, h, len(data)))
+        parts.append(data)
+    return b''.join(parts)
+
+def encode_clipboard(transfer_id: int, data: bytes, digest: bytes, chunk_size: int) -> Iterator[bytes]:
+    """把一次剪贴板内容编码为若干分块帧（空内容也发送一块）"""
+    view = memoryview(data)
+    total = len(data)
+    offset = 0
+    while True:
+        chunk = view[offset:offset + chunk_size]
+        yield CLIPBOARD_HEADER.pack(MSG_CLIPBOARD, transfer_id, total, offset, digest) + chunk
+        offset += len(chunk)
+        if offset >= total:
+            return
+
+def encode_file_chunk(handle: int, offset: int, data: bytes) -> bytes:
+    """编码文件分块帧"""
+    return FILE_CHUNK_HEADER.pack(MSG_FILE_CHUNK, handle, offset) + data
+
+def encode_button(button: str, action: int) -> bytes:
+    """编码鼠标按键帧"""
+    return BUTTON.pack(MSG_BUTTON, BUTTONS.index(button), action)
+
+def encode_scroll(dx: int, dy: int, phase: Optional[int] = None) -> bytes:
+    """编码高精度滚动帧（phase 为 None 时使用旧版格式）"""
+    if phase is None:
+        return SCROLL.pack(MSG_SCROLL, dx, dy)
+    return SCROLL_PHASED.pack(MSG_SCROLL, dx, dy, phase)
+
+def encode_key(key: str, action: int = ACTION_CLICK, modifiers: int = 0) -> bytes:
+    """编码按键帧"""
+    return KEY_HEADER.pack(MSG_KEY, action, modifiers) + key.encode('utf-8')
+
+def encode_text(content: str) -> bytes:
+    """编码文本帧"""
+    return bytes([MSG_TEXT]) + content.encode('utf-8')
+
+def encode_ping(payload: bytes = b'') -> bytes:
+    """编码心跳帧"""
+    return bytes([MSG_PING]) + payload
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+AirTouch 平滑滚动
+由运动引擎每帧调用一次，单位为 1/120 格（高精度滚轮增量）：
+- 稀疏的滚动样本按欠账方式平滑分摊到后续各帧，不足一格的部分保留到下次
+- 手指抬起时按最近的输入速度继续惯性滚动，速度按指数衰减直到停止
+- 新的滚动输入或点击、按键会立即停止惯性
+
+本类不加锁，所有方法都在持有运动引擎的锁时调用。
+"""
+
+import collections
+import math
+import time
+from typing import Optional, Tuple
+
+# 平滑系数（以 100Hz 为基准按 dt 换算），越大越跟手
+SMOOTHING = 0.35
+# 欠账低于该值（1/120 格）时一次性结算
+SETTLE_UNITS = 2.0
+# 估算抬手速度时使用的最近输入窗口（秒）
+VELOCITY_WINDOW = 0.1
+# 惯性速度衰减的时间常数（秒），约 1 秒后基本停止
+INERTIA_TIME_CONSTANT = 0.325
+# 抬手速度低于该值（格/秒）时不产生惯性；惯性速度低于 STOP 时停止
+MIN_FLING_SPEED = 2.0 * 120
+STOP_SPEED = 0.5 * 120
+MAX_FLING_SPEED = 60.0 * 120
+
+class ScrollAccumulator:
+    """高精度滚动累加器（平滑 + 惯性）"""
+
+    def __init__(self, inertia: bool = True):
+        self.inertia = inertia
+        self.owed_x = 0.0
+        self.owed_y = 0.0
+        self.vx = 0.0   # 惯性速度（1/120 格每秒），0 表示未在惯性滚动
+        self.vy = 0.0
+        self._samples = collections.deque()   # 最近的 (时间, dx, dy) 输入
+        self._carry_x = 0.0
+        self._carry_y = 0.0
+
+    def add(self, dx: float, dy: float, now: Optional[float] = None):
+        """累加一次滚动输入（停止正在进行的惯性）"""
+        now = time.perf_counter() if now is None else now
+        self.owed_x += dx
+        self.owed_y += dy
+        self.vx = self.vy = 0.0
+        samples = self._samples
+        samples.append((now, dx, dy))
+        while samples and now - samples[0][0] > VELOCITY_WINDOW:
+            samples.popleft()
+
+    def fling(self, now: Optional[float] = None) -> bool:
+        """手指抬起：按最近输入速度开始惯性滚动，返回是否产生惯性"""
+        now = time.perf_counter() if now is None else now
+        samples = self._samples
+        while samples and now - samples[0][0] > VELOCITY_WINDOW:
+            samples.popleft()
+        if not self.inertia or len(samples) < 2:
+            samples.clear()
+            return False
+        # 速度 = 窗口内总位移 / 窗口跨度（第一个样本之前的间隔不计）
+        first = samples.popleft()
+        span = max(samples[-1][0] - first[0], 1e-3)
+        vx = sum(s[1] for s in samples) / span
+        vy = sum(s[2] for s in samples) / span
+        samples.clear()
+        speed = math.hypot(vx, vy)
+        if speed < MIN_FLING_SPEED:
+            return False
+        if speed > MAX_FLING_SPEED:
+            vx *= MAX_FLING_SPEED / speed
+            vy *= MAX_FLING_SPEED / speed
+        self.vx, self.vy = vx, vy
+        return True
+
+    def stop(self):
+        """停止惯性（已输入的滚动量仍会输出）"""
+        self.vx = self.vy = 0.0
+        self._samples.clear()
+
+    @property
+    def settled(self) -> bool:
+        return self.owed_x == 0.0 and self.owed_y == 0.0 and self.vx == 0.0 and self.vy == 0.0
+
+    def step(self, dt: float) -> Tuple[int, int]:
+        """推进一帧，返回本帧要输出的整数滚动量"""
+        if self.vx or self.vy:
+            self.owed_x += self.vx * dt
+            self.owed_y += self.vy * dt
+            decay = math.exp(-dt / INERTIA_TIME_CONSTANT)
+            self.vx *= decay
+            self.vy *= decay
+            if math.hypot(self.vx, self.vy) < STOP_SPEED:
+                self.vx = self.vy = 0.0
+
+        alpha = 1.0 - (1.0 - SMOOTHING) ** (dt * 100)
+        out_x = self.owed_x * alpha
+        out_y = self.owed_y * alpha
+        if abs(self.owed_x - out_x) < SETTLE_UNITS and abs(self.owed_y - out_y) < SETTLE_UNITS:
+            out_x, out_y = self.owed_x, self.owed_y
+        self.owed_x -= out_x
+        self.owed_y -= out_y
+        return self._round(out_x, out_y)
+
+    def flush(self) -> Tuple[int, int]:
+        """立即交出全部欠账（不含惯性）"""
+        out = self._round(self.owed_x, self.owed_y)
+        self.owed_x = self.owed_y = 0.0
+        return out
+
+    def _round(self, out_x: float, out_y: float) -> Tuple[int, int]:
+        self._carry_x += out_x
+        self._carry_y += out_y
+        ix = int(round(self._carry_x))
+        iy = int(round(self._carry_y))
+        self._carry_x -= ix
+        self._carry_y -= iy
+        return ix, iy
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+AirTouch 多客户端会话与输入仲裁
+每个 WebSocket 连接对应一个 ClientSession，保存该设备自己的状态
+（能力、设备时间戳、累计位移、按住的鼠标键等）。仲裁器在消息进入注入队列之前
+决定是否放行，每条消息只做常数次比较，与连接数无关：
+
+- last_active: 正在操作的设备持有控制权，停止操作 HANDOFF_IDLE 秒后由下一个操作的设备接管
+- merge:       所有设备的输入直接合并
+- presenter:   演示者锁定，只有演示者的输入生效；未锁定时第一个操作的设备自动成为演示者
+"""
+
+import itertools
+import os
+import secrets
+import time
+from typing import Any, Optional, Set
+
+import protocol
+from clipboard_sync import InboundClipboard
+from clock_sync import ClockSync
+from displays import TabletMapping
+from gestures import GestureRecognizer
+from jitter_buffer import JitterBuffer
+from keys import KeyState
+
+ARBITRATION_MODES = ('last_active', 'merge', 'presenter')
+DEFAULT_ARBITRATION = 'last_active'
+# last_active 模式下控制权空闲多久后可被接管（秒）
+HANDOFF_IDLE = 0.3
+DEFAULT_MAX_CLIENTS = 8
+
+_session_ids = itertools.count(1)
+
+class ClientSession:
+    """单个客户端连接的状态"""
+
+    def __init__(self, websocket: Any, ip: str):
+        self.id = next(_session_ids)
+        self.websocket = websocket
+        self.ip = ip
+        self.features: Set[str] = set()          # 通过 hello 声明的能力
+        self.last_device_ts: Optional[int] = None  # 最近一个批量样本的设备时间戳 (ms)
+        self.last_input = 0.0                     # 最近一次被放行的输入 (monotonic)
+        self.buttons: Set[str] = set()            # 当前按住的鼠标键
+        self.keys = KeyState()                    # 当前按住的键盘按键（含修饰键）
+        # 本设备累计被放行 / 被仲裁拒绝的位移与消息数
+        self.motion_x = 0.0
+        self.motion_y = 0.0
+        self.messages = 0
+        self.denied = 0
+        # UDP 移动通道：会话密钥与最近接受的报文序号
+        self.udp_key = secrets.randbits(64)
+        self.udp_seq: Optional[int] = None
+        # 时钟同步（RTT 与设备时钟偏移），以及定时发送同步请求的任务
+        self.clock = ClockSync()
+        self.sync_task: Optional[Any] = None
+        # 可选的抖动缓冲（服务端开启时创建）
+        self.jitter: Optional[JitterBuffer] = None
+        # 原始触摸帧的手势识别器（收到第一个触摸帧时创建）
+        self.gestures: Optional[GestureRecognizer] = None
+        # 平板模式的绝对位置映射（未设置时映射到主显示器）
+        self.tablet: Optional[TabletMapping] = None
+        # 屏幕预览（客户端请求后创建，见 preview.py）与发送预览帧的任务
+        self.preview: Optional[Any] = None
+        self.preview_task: Optional[Any] = None
+        # 剪贴板同步：正在接收的分块、该设备已有内容的摘要、正在发送的任务
+        self.clipboard_in: Optional[InboundClipboard] = None
+        self.clipboard_hash: Optional[bytes] = None
+        self.clipboard_task: Optional[Any] = None
+
+    @property
+    def label(self) -> str:
+        return f"#{self.id} {self.ip}"
+
+    def accept_udp_seq(self, seq: int) -> bool:
+        """只接受比上一个报文更新的序号（乱序、重复、迟到的报文丢弃）"""
+        if self.udp_seq is not None and not protocol.seq_newer(seq, self.udp_seq):
+            return False
+        self.udp_seq = seq
+        return True
+
+    async def send(self, data):
+        await self.websocket.send(data)
+
+class Arbiter:
+    """多设备输入仲裁"""
+
+    def __init__(self, mode: Optional[str] = None, handoff_idle: float = HANDOFF_IDLE):
+        if mode is None:
+            mode = os.environ.get('AIRTOUCH_ARBITRATION') or DEFAULT_ARBITRATION
+        if mode not in ARBITRATION_MODES:
+            raise ValueError(f"未知的仲裁模式: {mode}")
+        self.mode = mode
+        self.handoff_idle = handoff_idle
+        self.owner: Optional[ClientSession] = None   # 当前持有控制权的设备（merge 模式不使用）
+
+    def admit(self, session: ClientSession, now: Optional[float] = None) -> bool:
+        """判断该设备的输入是否生效"""
+        now = time.monotonic() if now is None else now
+        owner = self.owner
+        if self.mode == 'merge' or owner is session:
+            pass
+        elif owner is None:
+            self.owner = session
+        elif self.mode == 'last_active' and now - owner.last_input >= self.handoff_idle:
+            self.owner = session
+        else:
+            session.denied += 1
+            return False
+        session.last_input = now
+        return True
+
+    def claim(self, session: ClientSession) -> bool:
+        """演示者模式下申请锁定（已被其他设备锁定时失败）"""
+        if self.owner is None or self.owner is session:
+            self.owner = session
+            return True
+        return False
+
+    def release(self, session: ClientSession):
+        """设备释放控制权或断开连接"""
+        if self.owner is session:
+            self.owner = None
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+AirTouch 共享内存环形缓冲
+单生产者 / 单消费者的字节环，用于网络进程向注入进程传递已解码的输入事件：
+- 记录为定长头部 `<HH`（类型、负载长度）+ 负载，负载由调用方用 struct 编码，不经过 pickle
+- 读写位置是单调递增的 64 位字节计数，各自只由一方写入，不需要跨进程锁
+- 记录不跨越缓冲末尾：剩余空间放不下时写入回绕标记，从头开始
+- 消费者空闲时挂起在 multiprocessing.Event 上；生产者只在环从空变为非空时唤醒
+
+内存布局（字节）：
+    0    写位置 (Q)
+    64   读位置 (Q)          两个位置分处不同缓存行，避免伪共享
+    128  数据区 capacity 字节
+"""
+
+import struct
+from typing import List, Optional, Tuple
+
+HEADER_SIZE = 128
+_WRITE_OFFSET = 0
+_READ_OFFSET = 64
+_INDEX = struct.Struct('<Q')
+
+RECORD = struct.Struct('<HH')
+# 回绕标记：本圈剩余空间作废，下一条记录从数据区开头开始
+REC_WRAP = 0xFFFF
+MAX_PAYLOAD = 0xFFFF
+
+def ring_size(capacity: int) -> int:
+    """容量为 capacity 的环需要的共享内存字节数"""
+    return HEADER_SIZE + capacity
+
+class SharedRing:
+    """共享内存上的单生产者 / 单消费者记录环"""
+
+    def __init__(self, buf: memoryview, capacity: int, wakeup=None):
+        if capacity < RECORD.size * 2 or len(buf) < ring_size(capacity):
+            raise ValueError(f"环形缓冲容量无效: {capacity}")
+        self._buf = buf
+        self._data = buf[HEADER_SIZE:HEADER_SIZE + capacity]
+        self.capacity = capacity
+        self.wakeup = wakeup
+
+    def _load(self, offset: int) -> int:
+        return _INDEX.unpack_from(self._buf, offset)[0]
+
+    def _store(self, offset: int, value: int):
+        _INDEX.pack_into(self._buf, offset, value)
+
+    def __len__(self) -> int:
+        """待读取的字节数（含回绕空隙）"""
+        return self._load(_WRITE_OFFSET) - self._load(_READ_OFFSET)
+
+    # ==================== 生产者 ====================
+
+    def put(self, kind: int, payload: bytes = b'') -> bool:
+        """写入一条记录；空间不足时返回 False（不阻塞）"""
+        return self.put_struct(kind, None, payload)
+
+    def put_struct(self, kind: int, fmt: Optional[struct.Struct], *values) -> bool:
+        """写入一条记录，负载用 fmt 直接打包进共享内存（fmt 为 None 时 values[0] 为原始字节）"""
+        length = fmt.size if fmt is not None else len(values[0])
+        if length > MAX_PAYLOAD:
+            raise ValueError(f"记录过长: {length}")
+        size = RECORD.size + length
+        capacity = self.capacity
+        write = self._load(_WRITE_OFFSET)
+        read = self._load(_READ_OFFSET)
+        pos = write % capacity
+        skip = capacity - pos if capacity - pos < size else 0
+        if write + skip + size - read > capacity:
+            return False
+        data = self._data
+        if skip:
+            if skip >= RECORD.size:
+                RECORD.pack_into(data, pos, REC_WRAP, 0)
+            pos = 0
+        RECORD.pack_into(data, pos, kind, length)
+        if fmt is not None:
+            fmt.pack_into(data, pos + RECORD.size, *values)
+        else:
+            data[pos + RECORD.size:pos + size] = values[0]
+        # 记录写完后再发布写位置；发布后重新读取读位置，消费者已读完旧数据则唤醒
+        self._store(_WRITE_OFFSET, write + skip + size)
+        if self.wakeup is not None and self._load(_READ_OFFSET) == write:
+            self.wakeup.set()
+        return True
+
+    # ==================== 消费者 ====================
+
+    def read(self) -> List[Tuple[int, bytes]]:
+        """取出当前全部记录 [(类型, 负载)]，一次推进读位置"""
+        write = self._load(_WRITE_OFFSET)
+        read = self._load(_READ_OFFSET)
+        records: List[Tuple[int, bytes]] = []
+        capacity = self.capacity
+        data = self._data
+        while read < write:
+            pos = read % capacity
+            if capacity - pos < RECORD.size:
+                read += capacity - pos
+                continue
+            kind, length = RECORD.unpack_from(data, pos)
+            if kind == REC_WRAP:
+                read += capacity - pos
+                continue
+            start = pos + RECORD.size
+            records.append((kind, bytes(data[start:start + length])))
+            read += RECORD.size + length
+        self._store(_READ_OFFSET, read)
+        return records
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """环为空时挂起，直到生产者写入或超时；返回是否有数据"""
+        if len(self):
+            return True
+        if self.wakeup is None:
+            return False
+        # 先清除再复查，生产者在两步之间写入也不会丢失唤醒
+        self.wakeup.clear()
+        if len(self):
+            return True
+        self.wakeup.wait(timeout)
+        return len(self) > 0
+
+    def release(self):
+        """释放对共享内存的引用（关闭 SharedMemory 之前调用）"""
+        self._data.release()
+        self._buf.release()
@@ -0,0 +1,6 @@
+"""测试从 server/ 目录导入各模块（与 python pc_controller.py 的运行方式一致）"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,48 @@
+"""剪贴板分块组装：偏移、摘要、UTF-8 与去重"""
+
+import pytest
+
+import protocol
+from clipboard_sync import ClipboardError, ClipboardSync, content_hash
+
+def receive_all(sync: ClipboardSync, data: bytes, chunk: int = 4, transfer_id: int = 1):
+    pending, result = None, None
+    for frame in protocol.encode_clipboard(transfer_id, data, content_hash(data), chunk):
+        pending, result = sync.receive(pending, *protocol.decode_clipboard(frame))
+    assert pending is None
+    return result
+
+def test_chunked_content_is_decoded():
+    sync = ClipboardSync(log=lambda message: None)
+    text = '剪贴板 clipboard'
+    assert receive_all(sync, text.encode('utf-8')) == text
+    assert sync.written == content_hash(text.encode('utf-8'))
+
+def test_content_already_on_pc_is_skipped():
+    sync = ClipboardSync(log=lambda message: None)
+    data = b'same content'
+    sync.current = content_hash(data)
+    assert receive_all(sync, data) is None
+
+def test_out_of_order_chunk_rejected():
+    sync = ClipboardSync(log=lambda message: None)
+    data = b'0123456789'
+    digest = content_hash(data)
+    pending, _ = sync.receive(None, 1, len(data), 0, digest, data[:4])
+    with pytest.raises(ClipboardError):
+        sync.receive(pending, 1, len(data), 8, digest, data[8:])
+    with pytest.raises(ClipboardError):
+        sync.receive(None, 2, len(data), 4, digest, data[4:8])
+
+def test_size_cap_and_digest_mismatch():
+    sync = ClipboardSync(max_bytes=8, log=lambda message: None)
+    with pytest.raises(ClipboardError):
+        sync.receive(None, 1, 9, 0, b'\0' * 16, b'123456789')
+    with pytest.raises(ClipboardError):
+        sync.receive(None, 2, 3, 0, b'\0' * 16, b'abc')
+
+def test_invalid_utf8_rejected_without_marking_written():
+    sync = ClipboardSync(log=lambda message: None)
+    with pytest.raises(ClipboardError):
+        receive_all(sync, b'ok\xff\xfe')
+    assert sync.written is None
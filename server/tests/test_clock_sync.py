@@ -0,0 +1,52 @@
+"""时钟同步：合成的四时间戳交换下的 RTT 与时钟偏移估计"""
+
+import pytest
+
+from clock_sync import MAX_OUTLIER_RUN, WINDOW, ClockSync
+
+def exchange(clock: ClockSync, t0: float, offset: float, up: float, down: float, hold: float = 1.0) -> float:
+    """服务端 t0 发出，单程 up / down 毫秒，设备处理 hold 毫秒；设备时钟 = 服务端时钟 + offset"""
+    t1 = t0 + up + offset
+    t2 = t1 + hold
+    t3 = t0 + up + hold + down
+    return clock.update(t0, t1, t2, t3)
+
+def test_symmetric_path_gives_exact_offset_and_rtt():
+    clock = ClockSync()
+    assert not clock.synced and clock.latency_ms(0, 0.0) is None
+    assert exchange(clock, 1000.0, offset=-5000.0, up=4.0, down=4.0) == 8.0
+    assert clock.synced and clock.offset == -5000.0 and clock.rtt == 8.0
+
+def test_offset_follows_minimum_rtt_sample():
+    clock = ClockSync()
+    exchange(clock, 0.0, offset=250.0, up=3.0, down=3.0)
+    # 排队延迟只出现在上行方向，按对称假设会把偏移估偏 20ms，不应采用
+    exchange(clock, 100.0, offset=250.0, up=43.0, down=3.0)
+    assert clock.offset == 250.0
+    # 窗口滑过后使用窗口内最好的样本
+    for i in range(WINDOW):
+        exchange(clock, 200.0 + i * 100, offset=250.0, up=6.0 + i, down=4.0)
+    assert clock.offset == pytest.approx(251.0)
+
+def test_rtt_outliers_ignored_until_network_changes():
+    clock = ClockSync()
+    for i in range(10):
+        exchange(clock, i * 100.0, offset=0.0, up=5.0, down=5.0)
+    srtt = clock.rtt
+    exchange(clock, 1000.0, offset=0.0, up=200.0, down=5.0)
+    assert clock.rtt == srtt and clock.outliers == 1
+    exchange(clock, 1100.0, offset=0.0, up=5.0, down=5.0)
+    # 连续 MAX_OUTLIER_RUN 次异常说明网络状况已改变，下一个样本成为新起点
+    for i in range(MAX_OUTLIER_RUN):
+        exchange(clock, 2000.0 + i * 100, offset=0.0, up=100.0, down=100.0)
+    assert clock.rtt == srtt
+    exchange(clock, 3000.0, offset=0.0, up=100.0, down=100.0)
+    assert clock.rtt == 200.0
+
+def test_latency_of_device_timestamp_wraps():
+    clock = ClockSync()
+    # 服务端 1020ms 时设备时钟刚回绕到 10ms
+    exchange(clock, 1000.0, offset=2 ** 32 - 1010.0, up=2.0, down=2.0)
+    assert clock.latency_ms(5, 1020.0) == pytest.approx(5.0)
+    assert clock.latency_ms(0xFFFFFFFE, 1020.0) == pytest.approx(12.0)
+    assert clock.latency_ms(15, 1020.0) == pytest.approx(-5.0)
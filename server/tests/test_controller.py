@@ -0,0 +1,111 @@
+"""控制器：断开 / 停止时松开按键、平板映射、剪贴板错误回复与文件分块窗口"""
+
+import asyncio
+import hashlib
+import json
+import threading
+
+import pytest
+
+import file_transfer
+import protocol
+from clipboard_sync import content_hash
+from displays import DisplayLayout, Monitor, TabletMapping
+from input_backend import InputBackend, NullBackend, RecordingBackend
+from metrics import Metrics
+from pc_controller import PCController
+from session import ClientSession
+
+def make_controller(backend=None, **options) -> PCController:
+    return PCController(backend=backend or RecordingBackend(), udp_port=0, filters='raw',
+                        log_callback=lambda message: None, **options)
+
+@pytest.fixture
+def monitors():
+    return [Monitor(0, 0, 0, 1920, 1080, primary=True), Monitor(1, 1920, 0, 1280, 1024)]
+
+def test_stop_server_releases_held_keys_and_buttons():
+    controller = make_controller()
+    controller.start_input()
+    session = ClientSession(None, '127.0.0.1')
+    controller.sessions[session.id] = session
+    controller._submit_key(session.keys, protocol.ACTION_DOWN, ['alt'])
+    session.buttons.add('left')
+    controller.dispatcher.submit(controller._inject_button, 'left', protocol.ACTION_DOWN)
+    controller.stop_server()
+    # 连接处理协程在停止之后才执行的释放不会重复松开
+    controller._release_session(session)
+    events = [event[1:] for event in controller.backend.events]
+    assert events == [('key_down', 'alt'), ('mouse_down', 'left'), ('key_up', 'alt'), ('mouse_up', 'left')]
+
+def test_tablet_falls_back_when_monitor_unplugged(monitors):
+    layout = DisplayLayout(query=lambda: list(monitors), log=lambda message: None)
+    controller = make_controller()
+    controller.displays = layout
+    session = ClientSession(None, '127.0.0.1')
+    session.tablet = TabletMapping(layout, 1)
+    controller._session = session
+    assert controller._on_abs_position(protocol.encode_abs_position(0, 0)) is None
+
+    monitors.pop()
+    layout.invalidate()
+    reply = json.loads(controller._on_abs_position(protocol.encode_abs_position(65535, 65535)))
+    assert reply['error'] == 'monitor_removed' and reply['target'] == [0, 0, 1920, 1080]
+    assert controller._on_abs_position(protocol.encode_abs_position(0, 0)) is None   # 只提示一次
+
+    monitors.append(Monitor(1, 1920, 0, 1280, 1024))
+    layout.invalidate()
+    assert session.tablet.target() == (1920, 0, 1280, 1024)
+    with pytest.raises(ValueError):
+        TabletMapping(layout, 5)
+
+def test_tablet_requires_absolute_backend():
+    class RelativeOnly(NullBackend):
+        move_abs = InputBackend.move_abs
+
+    assert NullBackend().absolute_motion and not RelativeOnly().absolute_motion
+    controller = make_controller(RelativeOnly(), metrics=Metrics())
+    controller._on_abs_position(protocol.encode_abs_position(100, 100))
+    assert controller.metrics.snapshot()['drops'] == {'tablet_unsupported': 1}
+
+def test_invalid_utf8_clipboard_gets_error_reply():
+    controller = make_controller(clipboard_sync=True)
+    session = ClientSession(None, '127.0.0.1')
+    controller._session = session
+    data = b'ok\xff\xfe'
+    replies = [controller._on_clipboard(frame)
+               for frame in protocol.encode_clipboard(1, data, content_hash(data), 2)]
+    assert replies[0] is None and json.loads(replies[1])['type'] == 'clipboard'
+    assert session.clipboard_hash is None
+
+class FakeWebSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, data):
+        self.sent.append(data)
+
+def test_file_chunk_beyond_window_rejected_while_disk_stalls(tmp_path, monkeypatch):
+    controller = make_controller(file_transfer=True, file_dir=str(tmp_path))
+    session = ClientSession(FakeWebSocket(), '127.0.0.1')
+    data = bytes(2 * file_transfer.WINDOW)
+    transfer = controller.files.begin('a.bin', len(data), hashlib.sha256(data).hexdigest(), session)
+    gate = threading.Event()
+    write = controller.files._write
+    monkeypatch.setattr(controller.files, '_write', lambda t, chunk: (gate.wait(5), write(t, chunk)))
+    chunk = file_transfer.MAX_CHUNK
+
+    async def main():
+        # 磁盘停住时读取协程也不等待：窗口内的分块排队，之后的拒绝并回复正确偏移
+        for offset in range(0, len(data), chunk):
+            await controller._on_file_chunk(
+                session, protocol.encode_file_chunk(transfer.handle, offset, data[offset:offset + chunk]))
+
+    try:
+        asyncio.run(asyncio.wait_for(main(), 1))
+        replies = [json.loads(message) for message in session.websocket.sent]
+        assert len(replies) == 1
+        assert replies[0]['handle'] == transfer.handle and replies[0]['offset'] == file_transfer.WINDOW
+    finally:
+        gate.set()
+        controller.files.stop()
@@ -0,0 +1,54 @@
+"""注入分发线程：离散事件之前先输出已到达的移动"""
+
+import threading
+import time
+
+from dispatcher import InjectionDispatcher
+from input_backend import RecordingBackend
+from motion import MotionEngine
+
+def make_dispatcher():
+    backend = RecordingBackend()
+    motion = MotionEngine(backend.move_rel, rate_hz=60, log=lambda message: None, filters='raw')
+    dispatcher = InjectionDispatcher(motion, log=lambda message: None)
+    dispatcher.start()
+    return backend, dispatcher
+
+def test_motion_before_click_is_injected_first():
+    backend, dispatcher = make_dispatcher()
+    gate = threading.Event()
+    dispatcher.submit(gate.wait)            # 让后续事件排队
+    dispatcher.submit_motion(40, -10)
+    dispatcher.submit_motion(2, 0)          # 与队尾移动合并
+    dispatcher.submit(backend.mouse_down, 'left')
+    dispatcher.submit_motion(5, 5)
+    dispatcher.submit(backend.mouse_up, 'left')
+    gate.set()
+    dispatcher.stop()
+    names = [event[1:] for event in backend.events]
+    assert names == [('move', 42, -10), ('mouse_down', 'left'), ('move', 5, 5), ('mouse_up', 'left')]
+
+def test_text_is_coalesced_and_ordered():
+    backend, dispatcher = make_dispatcher()
+    gate = threading.Event()
+    dispatcher.submit(gate.wait)
+    dispatcher.submit_text(backend.type_text, 'he')
+    dispatcher.submit_text(backend.type_text, 'llo')
+    dispatcher.submit(backend.key_down, 'enter')
+    gate.set()
+    dispatcher.stop()
+    assert [event[1:] for event in backend.events] == [('type', 'hello'), ('key_down', 'enter')]
+
+def test_full_queue_drops():
+    backend, dispatcher = make_dispatcher()
+    dispatcher.max_events = 2
+    gate = threading.Event()
+    dispatcher.submit(gate.wait)
+    while dispatcher.depth:                 # 等分发线程取走第一项
+        time.sleep(0.001)
+    assert dispatcher.submit(backend.key_down, 'a')
+    assert dispatcher.submit(backend.key_down, 'b')
+    assert not dispatcher.submit(backend.key_down, 'c')
+    gate.set()
+    dispatcher.stop()
+    assert dispatcher.dropped == 1
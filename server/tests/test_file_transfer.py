@@ -0,0 +1,158 @@
+"""文件接收：偏移校验、续传、摘要校验与磁盘空间检查"""
+
+import collections
+import hashlib
+import os
+import shutil
+import threading
+import time
+
+import pytest
+
+import file_transfer
+from file_transfer import FileReceiver, FileTransferError, safe_name, unique_path
+
+DATA = bytes(range(256)) * 4000
+
+def digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+def send(receiver: FileReceiver, transfer, data: bytes, start: int, end: int, chunk: int = 100_000):
+    for offset in range(start, end, chunk):
+        assert receiver.accept(transfer.handle, offset, memoryview(data)[offset:min(offset + chunk, end)])
+
+def wait_for(events: list, key: str):
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        for event in events:
+            if key in event:
+                return event
+        time.sleep(0.01)
+    raise AssertionError(f"没有收到 {key}: {events}")
+
+@pytest.fixture
+def receiver(tmp_path):
+    events = []
+    receiver = FileReceiver(str(tmp_path), notify=lambda transfer, status: events.append(status),
+                            log=lambda message: None)
+    receiver.events = events
+    yield receiver
+    receiver.stop()
+
+def test_complete_transfer_is_verified_and_renamed(receiver, tmp_path):
+    (tmp_path / 'a.bin').write_bytes(b'existing')
+    transfer = receiver.begin('a.bin', len(DATA), digest(DATA))
+    send(receiver, transfer, DATA, 0, len(DATA))
+    assert wait_for(receiver.events, 'done')['name'] == 'a (1).bin'
+    assert (tmp_path / 'a (1).bin').read_bytes() == DATA
+    assert sorted(os.listdir(tmp_path)) == ['a (1).bin', 'a.bin']
+
+def test_offset_mismatch_reported_once(receiver):
+    transfer = receiver.begin('a.bin', len(DATA), digest(DATA))
+    chunk = memoryview(DATA)[:10]
+    with pytest.raises(FileTransferError):
+        receiver.accept(transfer.handle, 10, chunk)
+    # 已告知正确偏移，在途的错误分块静默丢弃
+    assert not receiver.accept(transfer.handle, 20, chunk)
+    assert receiver.accept(transfer.handle, 0, chunk)
+    with pytest.raises(FileTransferError):
+        receiver.accept(12345, 0, chunk)
+
+def test_chunks_beyond_credit_window_rejected_without_blocking(receiver, monkeypatch):
+    big = bytes(3 * file_transfer.WINDOW)
+    transfer = receiver.begin('big.bin', len(big), digest(big))
+    # 写入线程停在第一个分块上：已接受的数据都还在途
+    gate = threading.Event()
+    write = receiver._write
+    monkeypatch.setattr(receiver, '_write', lambda t, data: (gate.wait(5), write(t, data)))
+    chunk = file_transfer.MAX_CHUNK
+    view = memoryview(big)
+    window_chunks = file_transfer.WINDOW // chunk
+    for i in range(window_chunks):
+        assert receiver.accept(transfer.handle, i * chunk, view[i * chunk:(i + 1) * chunk])
+    offset = window_chunks * chunk
+    with pytest.raises(FileTransferError):
+        receiver.accept(transfer.handle, offset, view[offset:offset + chunk])
+    assert transfer.queued == offset
+    assert not receiver.accept(transfer.handle, offset + chunk, view[offset + chunk:offset + 2 * chunk])
+    # 写入追上之后从回复的偏移重发即可
+    gate.set()
+    wait_for(receiver.events, 'offset')
+    deadline = time.monotonic() + 5
+    while transfer.written < offset and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert receiver.accept(transfer.handle, offset, view[offset:offset + chunk])
+
+def test_full_write_queue_rejects_chunk(tmp_path, monkeypatch):
+    monkeypatch.setattr(file_transfer, 'QUEUE_CHUNKS', 1)
+    small = FileReceiver(str(tmp_path), log=lambda message: None)
+    monkeypatch.setattr(small, 'start', lambda: None)   # 没有写入线程消费队列
+    try:
+        transfer = small.begin('a.bin', len(DATA), digest(DATA))
+        assert small.accept(transfer.handle, 0, memoryview(DATA)[:10])
+        with pytest.raises(FileTransferError):
+            small.accept(transfer.handle, 10, memoryview(DATA)[10:20])
+        assert transfer.queued == 10
+    finally:
+        small.stop()
+
+def test_hash_mismatch_deletes_part(receiver, tmp_path):
+    transfer = receiver.begin('bad.bin', len(DATA), '0' * 64)
+    send(receiver, transfer, DATA, 0, len(DATA))
+    assert wait_for(receiver.events, 'error')['error'] == 'hash_mismatch'
+    assert os.listdir(tmp_path) == []
+
+def test_resume_after_restart(tmp_path):
+    first = FileReceiver(str(tmp_path), log=lambda message: None)
+    transfer = first.begin('a.bin', len(DATA), digest(DATA))
+    send(first, transfer, DATA, 0, 300_000)
+    first.stop()
+
+    events = []
+    second = FileReceiver(str(tmp_path), notify=lambda transfer, status: events.append(status),
+                          log=lambda message: None)
+    try:
+        transfer = second.begin('a.bin', len(DATA), digest(DATA))
+        assert transfer.queued == 300_000
+        send(second, transfer, DATA, 300_000, len(DATA))
+        assert wait_for(events, 'done')['name'] == 'a.bin'
+        assert (tmp_path / 'a.bin').read_bytes() == DATA
+    finally:
+        second.stop()
+
+def test_cancel_removes_part_and_drops_chunks(receiver, tmp_path):
+    transfer = receiver.begin('a.bin', len(DATA), digest(DATA))
+    send(receiver, transfer, DATA, 0, 200_000)
+    receiver.cancel(digest(DATA), len(DATA))
+    assert not receiver.accept(transfer.handle, 200_000, memoryview(DATA)[200_000:200_010])
+    receiver.stop()
+    assert os.listdir(tmp_path) == []
+
+def test_disk_check_counts_existing_part(tmp_path, monkeypatch):
+    first = FileReceiver(str(tmp_path), log=lambda message: None)
+    transfer = first.begin('a.bin', len(DATA), digest(DATA))
+    send(first, transfer, DATA, 0, 100_000)
+    first.stop()
+    usage = collections.namedtuple('usage', 'total used free')
+    monkeypatch.setattr(shutil, 'disk_usage', lambda path: usage(0, 0, 1000))
+    resumed = FileReceiver(str(tmp_path), log=lambda message: None)
+    try:
+        assert resumed.begin('a.bin', len(DATA), digest(DATA)).queued == 100_000
+        with pytest.raises(FileTransferError):
+            resumed.begin('b.bin', 5000, digest(b'other'))
+    finally:
+        resumed.stop()
+
+def test_begin_validates_request(receiver):
+    with pytest.raises(FileTransferError):
+        receiver.begin('a.bin', 10, 'not-a-hash')
+    with pytest.raises(FileTransferError):
+        receiver.begin('a.bin', file_transfer.DEFAULT_MAX_BYTES + 1, '0' * 64)
+
+def test_safe_name_and_unique_path(tmp_path):
+    assert safe_name('../../etc/passwd') == 'passwd'
+    assert safe_name('C:\\Users\\x\\photo?.jpg') == 'photo_.jpg'
+    assert safe_name('CON.txt') == 'file_CON.txt'
+    assert safe_name('') == 'file'
+    (tmp_path / 'a.txt').write_text('x')
+    assert unique_path(str(tmp_path), 'a.txt') == str(tmp_path / 'a (1).txt')
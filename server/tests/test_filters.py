@@ -0,0 +1,80 @@
+"""指针滤波管线：参数校验、欠账结算与运行时切换"""
+
+import asyncio
+import json
+
+import pytest
+
+from filters import AccelStage, EmaStage, FilterPipeline, OneEuroStage, build_pipeline
+from input_backend import RecordingBackend
+from motion import MotionEngine
+from pc_controller import PCController
+from session import ClientSession
+
+class FakeWebSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, data):
+        self.sent.append(data)
+
+@pytest.mark.parametrize('spec', [
+    [{'type': 'one_euro', 'min_cutoff': 0}],
+    [{'type': 'one_euro', 'd_cutoff': -1}],
+    [{'type': 'accel', 'curve': 'power', 'threshold': 0}],
+    [{'type': 'ema', 'factor': 0}],
+    [{'type': 'ema', 'factor': 1.5}],
+    [{'type': 'predict', 'horizon': -0.01}],
+    [{'type': 'predict', 'smoothing': 0}],
+])
+def test_invalid_parameters_rejected(spec):
+    with pytest.raises(ValueError):
+        build_pipeline(spec)
+
+def test_unknown_parameter_is_type_error():
+    with pytest.raises(TypeError):
+        build_pipeline([{'type': 'accel', 'gain': 2}])
+
+def test_flush_passes_owed_motion_through_later_stages():
+    pipeline = FilterPipeline([EmaStage(factor=0.3), AccelStage(curve='flat', sensitivity=2.0)])
+    out_x, out_y = pipeline.process(100.0, -50.0, 0.01)
+    assert not pipeline.settled
+    owed_x, owed_y = pipeline.flush(0.01)
+    assert (out_x + owed_x, out_y + owed_y) == pytest.approx((200.0, -100.0))
+    assert pipeline.settled
+
+def test_one_euro_settles_to_input():
+    pipeline = FilterPipeline([OneEuroStage()])
+    total = pipeline.process(30.0, 0.0, 0.01)[0]
+    while not pipeline.settled:
+        total += pipeline.process(0.0, 0.0, 0.01)[0]
+    assert total == pytest.approx(30.0)
+
+def test_switching_filters_keeps_accel_gain_on_owed_motion():
+    backend = RecordingBackend()
+    engine = MotionEngine(backend.move_rel, rate_hz=100, log=lambda message: None,
+                          filters=[{'type': 'ema'}, {'type': 'accel', 'curve': 'flat', 'sensitivity': 2.0}])
+    engine.add(100, 0)
+    engine.sync()
+    engine.add(60, 0)
+    with engine._cond:
+        # 模拟运动线程已输出一帧、仍有欠账时切换
+        engine._emit(*engine.pipeline.process(engine.pending_x, 0.0, 0.01))
+        engine.pending_x = 0.0
+    engine.set_filters('raw')
+    engine.sync()
+    assert backend.total_motion() == (320, 0)
+
+def test_set_filters_error_keeps_pipeline_and_replies():
+    controller = PCController(backend=RecordingBackend(), udp_port=0, filters='ema',
+                              log_callback=lambda message: None)
+    session = ClientSession(FakeWebSocket(), '127.0.0.1')
+    pipeline = controller.motion.pipeline
+    message = json.dumps({'type': 'set_filters', 'filters': [{'type': 'one_euro', 'min_cutoff': 0}]})
+    asyncio.run(controller.process_command(message, session))
+    assert controller.motion.pipeline is pipeline
+    reply = json.loads(session.websocket.sent[-1])
+    assert reply['type'] == 'filters' and 'error' in reply
+
+    asyncio.run(controller.process_command(json.dumps({'type': 'set_filters', 'filters': 'one_euro'}), session))
+    assert controller.motion.pipeline.describe() == 'one_euro'
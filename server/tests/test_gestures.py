@@ -0,0 +1,71 @@
+"""手势识别：录制的触摸帧离线重放后断言输出动作"""
+
+import protocol
+from gestures import DOUBLE_TAP_WINDOW, GestureRecognizer, recognize
+
+DOWN, MOVE, UP = protocol.TOUCH_DOWN, protocol.TOUCH_MOVE, protocol.TOUCH_UP
+
+def replay(frames, recognizer=None):
+    """与录制回放相同：逐帧编码为 0x0A 消息再解析后交给识别器"""
+    return recognize([protocol.decode_touch(protocol.encode_touch(frame)) for frame in frames], recognizer)
+
+def tap(pid=0, x=100, y=100, ts=0):
+    return [[(pid, DOWN, x, y, ts)], [(pid, MOVE, x + 1, y, ts + 40)], [(pid, UP, x + 1, y, ts + 80)]]
+
+def swipe(pid, x, y, dx, dy, ts, steps=5, interval=16):
+    return [[(pid, MOVE, x + dx * i // steps, y + dy * i // steps, ts + i * interval)] for i in range(1, steps + 1)]
+
+def test_tap_is_left_click():
+    assert replay(tap()) == [('button', 'left', protocol.ACTION_CLICK)]
+
+def test_double_tap_clicks_twice():
+    frames = tap(ts=0) + tap(ts=150)
+    assert replay(frames) == [('button', 'left', protocol.ACTION_CLICK),
+                              ('button', 'left', protocol.ACTION_DOWN),
+                              ('button', 'left', protocol.ACTION_UP)]
+
+def test_second_tap_after_window_is_a_new_click():
+    frames = tap(ts=0) + tap(ts=80 + DOUBLE_TAP_WINDOW + 1)
+    assert replay(frames) == [('button', 'left', protocol.ACTION_CLICK)] * 2
+
+def test_tap_then_press_drags():
+    frames = tap(ts=0) + [[(0, DOWN, 100, 100, 150)]] + swipe(0, 100, 100, 50, 0, 150) + [[(0, UP, 150, 100, 300)]]
+    actions = replay(frames, GestureRecognizer(drag_lock=False))
+    assert actions[:2] == [('button', 'left', protocol.ACTION_CLICK), ('button', 'left', protocol.ACTION_DOWN)]
+    assert actions[-1] == ('button', 'left', protocol.ACTION_UP)
+    moves = actions[2:-1]
+    assert moves and all(action[0] == 'move' for action in moves)
+    assert sum(action[1] for action in moves) == 50 and sum(action[2] for action in moves) == 0
+
+def test_drag_lock_releases_on_next_tap():
+    recognizer = GestureRecognizer(drag_lock=True)
+    frames = tap(ts=0) + [[(0, DOWN, 100, 100, 150)]] + swipe(0, 100, 100, 50, 0, 150) + [[(0, UP, 150, 100, 300)]]
+    actions = replay(frames, recognizer)
+    assert ('button', 'left', protocol.ACTION_UP) not in actions and recognizer.dragging
+    assert replay(tap(ts=1000), recognizer) == [('button', 'left', protocol.ACTION_UP)]
+    assert not recognizer.dragging
+
+def test_two_finger_pan_scrolls_and_ends():
+    frames = [[(0, DOWN, 100, 300, 0), (1, DOWN, 200, 300, 0)]]
+    frames += [[(0, MOVE, 100, 300 - 10 * i, 16 * i), (1, MOVE, 200, 300 - 10 * i, 16 * i)] for i in range(1, 6)]
+    frames += [[(0, UP, 100, 250, 100), (1, UP, 200, 250, 100)]]
+    actions = replay(frames)
+    assert actions[-1] == ('scroll', 0, 0, protocol.SCROLL_END)
+    scrolls = actions[:-1]
+    assert scrolls and all(action[0] == 'scroll' and action[3] == protocol.SCROLL_MOVE for action in scrolls)
+    # 自然滚动：手指上移 50dp，向下滚动
+    assert sum(action[2] for action in scrolls) < 0 and sum(action[1] for action in scrolls) == 0
+
+def test_touch_during_inertia_stops_without_clicking():
+    frames = [[(0, DOWN, 100, 300, 0), (1, DOWN, 200, 300, 0)]]
+    frames += [[(0, MOVE, 100, 300 - 10 * i, 16 * i), (1, MOVE, 200, 300 - 10 * i, 16 * i)] for i in range(1, 6)]
+    frames += [[(0, UP, 100, 250, 100), (1, UP, 200, 250, 100)]]
+    recognizer = GestureRecognizer()
+    replay(frames, recognizer)
+    assert replay(tap(ts=300), recognizer) == [('scroll', 0, 0, protocol.SCROLL_CANCEL)]
+
+def test_two_finger_tap_is_right_click():
+    frames = [[(0, DOWN, 100, 100, 0)], [(1, DOWN, 160, 100, 20)],
+              [(0, MOVE, 101, 100, 60), (1, MOVE, 161, 100, 60)],
+              [(0, UP, 101, 100, 110)], [(1, UP, 161, 100, 120)]]
+    assert replay(frames) == [('button', 'right', protocol.ACTION_CLICK)]
@@ -0,0 +1,70 @@
+"""入站缓冲与移动合并：连续移动合并为一次累加，离散事件保持顺序且从不合并"""
+
+import asyncio
+
+import protocol
+from inbound import InboundQueue, MotionRun, coalesce
+from input_backend import RecordingBackend
+from pc_controller import PCController
+from session import ClientSession
+
+def motion(*samples):
+    return protocol.encode_motion_batch(list(samples))
+
+def test_adjacent_motion_merged_discrete_events_kept_in_order():
+    click = protocol.encode_button('left', protocol.ACTION_CLICK)
+    key = protocol.encode_key('a')
+    frames = [(1, motion((1, 0, 10))), (2, motion((2, 0, 11), (3, 0, 12))),
+              (3, click), (4, click),
+              (5, protocol.MOUSE_MOVE.pack(protocol.MSG_MOUSE_MOVE, 4, -4)),
+              (6, '{"type": "keydown", "key": "enter"}'), (7, key), (8, motion((5, 5, 13)))]
+    out = coalesce(frames)
+    assert [type(item).__name__ if isinstance(item, MotionRun) else item[0] for item in out] == \
+        ['MotionRun', 3, 4, 'MotionRun', 6, 7, 'MotionRun']
+    first, second, third = (item for item in out if isinstance(item, MotionRun))
+    assert first.samples == [(1, 0, 10), (2, 0, 11), (3, 0, 12)]
+    assert (first.recv_ns, first.frames) == (1, 2)
+    assert second.samples == [(4, -4, None)] and third.samples == [(5, 5, 13)]
+    # 离散事件原样保留，相同的两次点击不会合并
+    assert out[1] == (3, click) and out[2] == (4, click)
+
+def test_malformed_motion_is_left_for_the_normal_path():
+    bad = motion((1, 1, 0))[:-1]
+    out = coalesce([(1, motion((1, 1, 0))), (2, bad), (3, motion((2, 2, 1)))])
+    assert isinstance(out[0], MotionRun) and out[1] == (2, bad) and isinstance(out[2], MotionRun)
+
+def test_queue_drains_everything_and_applies_backpressure():
+    async def main():
+        inbox = InboundQueue(limit=2)
+        await inbox.put((1, b'a'))
+        await inbox.put((2, b'b'))
+        blocked = asyncio.ensure_future(inbox.put((3, b'c')))
+        await asyncio.sleep(0)
+        assert not blocked.done() and len(inbox) == 2
+        assert await inbox.drain() == [(1, b'a'), (2, b'b')]
+        await blocked
+        assert await inbox.drain() == [(3, b'c')]
+        inbox.close()
+        assert await inbox.drain() == []
+
+    asyncio.run(main())
+
+def test_backlog_is_injected_in_arrival_order():
+    controller = PCController(backend=RecordingBackend(), udp_port=0, filters='raw',
+                              log_callback=lambda message: None)
+    controller.start_input()
+    session = ClientSession(None, '127.0.0.1')
+    click = protocol.encode_button('left', protocol.ACTION_CLICK)
+
+    async def main():
+        inbox = InboundQueue()
+        for message in (motion((1, 0, 0)), motion((2, 0, 1)), click, motion((0, 4, 2)), click):
+            await inbox.put((None, message))
+        inbox.close()
+        await controller._process_inbound(inbox, session)
+
+    asyncio.run(main())
+    controller.stop_server()
+    events = [event[1:] for event in controller.backend.events]
+    assert events == [('move', 3, 0), ('mouse_down', 'left'), ('mouse_up', 'left'),
+                      ('move', 0, 4), ('mouse_down', 'left'), ('mouse_up', 'left')]
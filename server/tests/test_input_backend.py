@@ -0,0 +1,57 @@
+"""注入后端：RecordingBackend 按顺序记录事件，基类由按下 / 松开组合出点击与组合键"""
+
+import sys
+
+import pytest
+
+from input_backend import NullBackend, RecordingBackend, create_backend
+
+def test_recording_backend_keeps_order():
+    backend = RecordingBackend()
+    backend.move_rel(3, -2)
+    backend.click('right', clicks=2)
+    backend.scroll(-3)
+    backend.move_rel(-1, 5)
+    names = [event[1:] for event in backend.events]
+    assert names == [('move', 3, -2), ('mouse_down', 'right'), ('mouse_up', 'right'),
+                     ('mouse_down', 'right'), ('mouse_up', 'right'), ('scroll', -3), ('move', -1, 5)]
+    assert backend.total_motion() == (2, 3)
+    times = [event[0] for event in backend.events]
+    assert times == sorted(times)
+
+def test_hotkey_releases_in_reverse_order():
+    backend = RecordingBackend()
+    backend.hotkey('ctrl', 'shift', 't')
+    backend.press('enter')
+    assert [event[1:] for event in backend.events] == [
+        ('key_down', 'ctrl'), ('key_down', 'shift'), ('key_down', 't'),
+        ('key_up', 't'), ('key_up', 'shift'), ('key_up', 'ctrl'),
+        ('key_down', 'enter'), ('key_up', 'enter')]
+
+def test_create_backend_by_name(monkeypatch):
+    assert isinstance(create_backend('recording'), RecordingBackend)
+    monkeypatch.setenv('AIRTOUCH_BACKEND', 'null')
+    backend = create_backend()
+    assert isinstance(backend, NullBackend)
+    backend.click()
+    assert backend.event_count == 2
+    with pytest.raises(ValueError):
+        create_backend('nosuchbackend')
+
+@pytest.mark.skipif(sys.platform != 'win32', reason='SendInput 仅在 Windows 上可用')
+def test_sendinput_relative_move_sets_absolute_position():
+    import input_backend
+
+    class FakeUser32:
+        def __init__(self):
+            self.calls = []
+
+        def SetCursorPos(self, x, y):
+            self.calls.append((x, y))
+
+    backend = object.__new__(input_backend.SendInputBackend)
+    backend._user32 = FakeUser32()
+    backend._send = lambda *inputs: pytest.fail('相对移动不应走 SendInput（会被指针加速）')
+    backend.cursor_position = lambda: (100, 200)
+    backend.move_rel(7, -3)
+    assert backend._user32.calls == [(107, 197)]
@@ -0,0 +1,75 @@
+"""输入录制：写入后经 mmap 读回，以及按原路径回放"""
+
+import asyncio
+
+import pytest
+
+import input_trace
+import protocol
+from input_backend import RecordingBackend
+from input_trace import KIND_BINARY, KIND_TEXT, TraceReader, TraceRecorder
+from pc_controller import PCController
+
+def test_write_then_mmap_read_roundtrip(tmp_path):
+    path = str(tmp_path / 'session.attr')
+    big = bytes(range(256)) * 300          # 超过 0xFFFF 字节，使用扩展长度
+    recorder = TraceRecorder(path)
+    recorder.record(protocol.encode_motion_batch([(1, 2, 3)]), recv_ns=1_000_000)
+    recorder.record('{"type": "text", "content": "你好"}', recv_ns=3_500_000)
+    recorder.record(big, recv_ns=3_500_000)
+    recorder.record(b'', recv_ns=10_000_000)
+    recorder.close()
+    assert recorder.count == 4
+
+    with TraceReader(path) as reader:
+        records = [(t_ns, kind, bytes(payload)) for t_ns, kind, payload in reader]
+    assert [kind for _, kind, _ in records] == [KIND_BINARY, KIND_TEXT, KIND_BINARY, KIND_BINARY]
+    assert records[1][2].decode('utf-8') == '{"type": "text", "content": "你好"}'
+    assert records[2][2] == big and records[3][2] == b''
+    # 相邻记录的时间差按微秒保存
+    times = [t_ns for t_ns, _, _ in records]
+    assert [b - a for a, b in zip(times, times[1:])] == [2_500_000, 0, 6_500_000]
+
+def test_truncated_tail_and_bad_header(tmp_path):
+    path = tmp_path / 'session.attr'
+    recorder = TraceRecorder(str(path))
+    recorder.record(b'\x01abc')
+    recorder.record(b'\x01defgh')
+    recorder.close()
+    path.write_bytes(path.read_bytes()[:-2])  # 录制中断，最后一条不完整
+    with TraceReader(str(path)) as reader:
+        assert [bytes(payload) for _, _, payload in reader] == [b'\x01abc']
+
+    bad = tmp_path / 'bad.attr'
+    bad.write_bytes(b'XXXX' + bytes(input_trace.HEADER.size))
+    with pytest.raises(ValueError):
+        TraceReader(str(bad))
+    (tmp_path / 'empty.attr').write_bytes(b'')
+    with pytest.raises(ValueError):
+        TraceReader(str(tmp_path / 'empty.attr'))
+
+def test_recorder_appends_to_existing_file(tmp_path):
+    path = str(tmp_path / 'session.attr')
+    for payload in (b'\x01a', b'\x01b'):
+        recorder = TraceRecorder(path)
+        recorder.record(payload)
+        recorder.close()
+    with TraceReader(path) as reader:
+        assert [bytes(payload) for _, _, payload in reader] == [b'\x01a', b'\x01b']
+
+def test_replay_drives_the_command_path(tmp_path):
+    path = str(tmp_path / 'session.attr')
+    recorder = TraceRecorder(path)
+    recorder.record(protocol.encode_motion_batch([(5, -3, 0), (1, 1, 8)]))
+    recorder.record(protocol.encode_button('left', protocol.ACTION_CLICK))
+    recorder.record('{"type": "keydown", "key": "enter"}')
+    recorder.close()
+
+    controller = PCController(backend=RecordingBackend(), udp_port=0, filters='raw',
+                              log_callback=lambda message: None)
+    controller.start_input()
+    assert asyncio.run(input_trace.replay(path, controller, fast=True)) == 3
+    controller.stop_server()
+    events = [event[1:] for event in controller.backend.events]
+    assert events == [('move', 6, -2), ('mouse_down', 'left'), ('mouse_up', 'left'),
+                      ('key_down', 'enter'), ('key_up', 'enter')]
@@ -0,0 +1,74 @@
+"""抖动缓冲：按设备时间线播放、迟到与乱序的样本，以及分发队列中保留每批的到达时间"""
+
+import threading
+
+import pytest
+
+from dispatcher import InjectionDispatcher
+from jitter_buffer import MIN_DELAY_MS, JitterBuffer
+
+def steady(buffer: JitterBuffer, count: int = 10, transit: float = 5.0):
+    """每 10ms 一个包、传输时间恒定"""
+    for i in range(count):
+        buffer.push([(1, 0, i * 10)], i * 10 + transit)
+
+def test_steady_arrivals_use_minimum_delay():
+    buffer = JitterBuffer()
+    steady(buffer)
+    assert buffer.delay == MIN_DELAY_MS and buffer.late == 0
+    assert buffer.pop_due(96.9) == (9, 0)
+    assert buffer.pop_due(97.0) == (1, 0)
+
+def test_late_packet_raises_delay_for_following_packets():
+    buffer = JitterBuffer()
+    steady(buffer)
+    # 设备时间 100 的包晚到 30ms：不丢位移，播放延迟扩大到能盖住这段空档
+    hold = buffer.push([(1, 0, 100)], 135.0)
+    assert hold >= 0 and buffer.delay >= 30
+    # 之后准时到达的包按扩大后的延迟播放
+    assert buffer.push([(1, 0, 140)], 145.0) == pytest.approx(buffer.delay)
+    assert buffer.flush() == (12, 0)
+
+def test_reordered_packet_plays_in_arrival_order():
+    buffer = JitterBuffer()
+    buffer.push([(1, 0, 0)], 5.0)
+    buffer.push([(2, 0, 20)], 25.0)
+    buffer.push([(4, 0, 10)], 27.0)     # 比上一个包早的设备时间戳
+    plays = [play for play, _, _ in buffer._queue]
+    assert plays == sorted(plays) and plays[-1] >= 27.0
+    assert buffer.pop_due(plays[1]) == (3, 0)
+    assert buffer.pop_due(plays[-1]) == (4, 0)
+
+def test_timestamps_unwrap_across_32_bits():
+    buffer = JitterBuffer()
+    buffer.push([(1, 0, 0xFFFFFFF0)], 1000.0)
+    buffer.push([(1, 0, 0x10)], 1032.0)     # 回绕后 32ms
+    plays = [play for play, _, _ in buffer._queue]
+    assert plays[1] - plays[0] == 32.0
+
+class _RecordingMotion:
+    """只记录抖动缓冲调用的运动引擎替身"""
+
+    def __init__(self):
+        self.batches = []
+
+    def add_samples(self, buffer, samples, recv_ns=None):
+        self.batches.append((list(samples), recv_ns))
+
+    def sync(self):
+        pass
+
+def test_queued_batches_keep_their_own_arrival_time():
+    motion = _RecordingMotion()
+    dispatcher = InjectionDispatcher(motion, log=lambda message: None)
+    dispatcher.start()
+    buffer = JitterBuffer()
+    gate = threading.Event()
+    dispatcher.submit(gate.wait)
+    dispatcher.submit_samples(buffer, [(1, 0, 0)], 1_000)
+    dispatcher.submit_samples(buffer, [(2, 0, 8)], 9_000)
+    dispatcher.submit_samples(buffer, [(3, 0, 9)], 9_000)     # 同一个包拆分的后续部分
+    assert dispatcher.depth == 2
+    gate.set()
+    dispatcher.stop()
+    assert motion.batches == [([(1, 0, 0)], 1_000), ([(2, 0, 8), (3, 0, 9)], 9_000)]
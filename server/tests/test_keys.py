@@ -0,0 +1,50 @@
+"""按键表与按键状态（引用计数）"""
+
+import pytest
+
+from keys import KeyState, lookup, parse_chord, resolve
+
+def test_resolve_adds_shift_for_shifted_characters():
+    assert resolve(['!']) == ('1', ('shift',))
+    assert resolve(['A']) == ('a', ('shift',))
+    assert resolve(['a']) == ('a', ())
+
+def test_uppercase_letter_in_chord_is_the_letter_key():
+    assert resolve(parse_chord('Ctrl+C')) == ('c', ('ctrl',))
+    assert resolve(parse_chord('ctrl+shift+T')) == ('t', ('ctrl', 'shift'))
+
+def test_multi_character_names_are_case_insensitive():
+    assert lookup('Enter') == ('enter', False)
+    assert lookup('F5') == ('f5', False)
+    assert lookup('Escape') == ('esc', False)
+    with pytest.raises(ValueError):
+        lookup('nosuchkey')
+
+def test_parse_chord_plus_key():
+    assert parse_chord('ctrl++') == ['ctrl', '+']
+    assert parse_chord('+') == ['+']
+    with pytest.raises(ValueError):
+        parse_chord('ctrl+')
+
+def test_shared_modifier_released_by_last_holder():
+    state = KeyState()
+    assert state.down('a', ('ctrl',)) == [('ctrl', True), ('a', True)]
+    assert state.down('b', ('ctrl',)) == [('b', True)]
+    assert state.up('a') == [('a', False)]
+    assert state.held == ['ctrl', 'b']
+    assert state.up('b') == [('b', False), ('ctrl', False)]
+    assert state.held == []
+
+def test_tap_keeps_held_modifier():
+    state = KeyState()
+    state.down('shift')
+    assert state.tap('a', ('shift',)) == [('a', True), ('a', False)]
+    assert state.held == ['shift']
+
+def test_release_all_and_unknown_up():
+    state = KeyState()
+    assert state.up('x') == []
+    state.down('a', ('alt',))
+    state.down('ctrl')
+    assert state.release_all() == [('ctrl', False), ('a', False), ('alt', False)]
+    assert state.held == [] and state.release_all() == []
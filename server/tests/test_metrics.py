@@ -0,0 +1,26 @@
+"""延迟统计：对数分桶、分位数估算与 Prometheus 导出"""
+
+import pytest
+
+from metrics import BUCKET_BOUNDS_US, Histogram, Metrics
+
+def test_bucket_bounds_and_quantile():
+    hist = Histogram()
+    for us in (0, 1, 3, 4, 1000):
+        hist.observe_ns(us * 1000)
+    # 第 i 个桶收 [2**(i-1), 2**i) 微秒
+    assert hist.buckets[:4] == [1, 1, 1, 1] and hist.buckets[10] == 1
+    assert hist.count == 5 and hist.mean() == pytest.approx(1008 / 5 / 1e6)
+    assert 512e-6 < hist.quantile(1.0) <= 1024e-6
+
+def test_overflow_only_counted_in_inf():
+    metrics = Metrics()
+    hist = metrics.stages['inject']
+    hist.observe_ns((BUCKET_BOUNDS_US[-1] - 1) * 1000)       # 最后一个有限桶
+    hist.observe_ns(BUCKET_BOUNDS_US[-1] * 1000 * 4)         # 超出所有有限桶
+    assert hist.count == 2 and sum(hist.buckets) == 2
+    assert hist.quantile(1.0) == BUCKET_BOUNDS_US[-1] / 1e6
+    text = metrics.prometheus()
+    assert 'airtouch_stage_latency_seconds_bucket{stage="inject",le="8.38861"} 1' in text
+    assert 'airtouch_stage_latency_seconds_bucket{stage="inject",le="+Inf"} 2' in text
+    assert 'airtouch_stage_latency_seconds_count{stage="inject"} 2' in text
@@ -0,0 +1,52 @@
+"""二进制协议编解码"""
+
+import pytest
+
+import protocol
+
+def test_motion_batch_roundtrip_wraps_timestamps():
+    samples = [(3, -2, 10), (-32768, 32767, 2 ** 32 + 5)]
+    decoded = protocol.decode_motion_batch(protocol.encode_motion_batch(samples))
+    assert decoded == [(3, -2, 10), (-32768, 32767, 5)]
+
+def test_invalid_motion_batch_raises_protocol_error():
+    message = protocol.encode_motion_batch([(1, 1, 0)])
+    with pytest.raises(protocol.ProtocolError):
+        protocol.decode_motion_batch(message[:-1])
+    with pytest.raises(protocol.ProtocolError):
+        protocol.decode_motion_batch(message[:1])
+
+def test_button_scroll_key_roundtrip():
+    assert protocol.decode_button(protocol.encode_button('right', protocol.ACTION_DOWN)) == ('right', protocol.ACTION_DOWN)
+    assert protocol.decode_scroll(protocol.encode_scroll(0, -360)) == (0, -360, protocol.SCROLL_MOVE)
+    assert protocol.decode_scroll(protocol.encode_scroll(120, 0, protocol.SCROLL_END)) == (120, 0, protocol.SCROLL_END)
+    action, modifiers, key = protocol.decode_key(protocol.encode_key('t', protocol.ACTION_CLICK, 0b11))
+    assert (action, key) == (protocol.ACTION_CLICK, 't')
+    assert protocol.modifier_names(modifiers) == ['ctrl', 'shift']
+
+def test_invalid_button_raises_protocol_error():
+    with pytest.raises(protocol.ProtocolError):
+        protocol.decode_button(b'\x03\x09\x00')
+
+def test_abs_position_roundtrip():
+    assert protocol.decode_abs_position(protocol.encode_abs_position(0, 65535)) == (0, 65535)
+
+def test_clipboard_chunks_cover_content():
+    data = bytes(range(256)) * 5
+    frames = list(protocol.encode_clipboard(7, data, b'd' * 16, 300))
+    parts = [protocol.decode_clipboard(frame) for frame in frames]
+    assert [offset for _, _, offset, _, _ in parts] == [0, 300, 600, 900, 1200]
+    assert b''.join(chunk for *_, chunk in parts) == data
+    assert {(tid, total) for tid, total, *_ in parts} == {(7, len(data))}
+    # 空内容也发送一块
+    assert len(list(protocol.encode_clipboard(8, b'', b'd' * 16, 300))) == 1
+    with pytest.raises(protocol.ProtocolError):
+        protocol.decode_clipboard(b'\x0d\x00')
+
+def test_file_chunk_is_a_view():
+    message = protocol.encode_file_chunk(3, 2 ** 40, b'payload')
+    handle, offset, data = protocol.decode_file_chunk(message)
+    assert (handle, offset) == (3, 2 ** 40)
+    assert isinstance(data, memoryview) and bytes(data) == b'payload'
+    with pytest.raises(protocol.ProtocolError):
+        protocol.decode_file_chunk(b'\x0e\x00\x00')
@@ -0,0 +1,79 @@
+"""平滑滚动：欠账分摊、抬手惯性与 SCROLL_END / SCROLL_CANCEL"""
+
+import time
+
+import protocol
+from input_backend import RecordingBackend
+from motion import MotionEngine
+from scroll import MAX_FLING_SPEED, ScrollAccumulator
+
+def run_until_settled(scroll: ScrollAccumulator, dt: float = 0.01, limit: int = 1000):
+    steps = []
+    while not scroll.settled and len(steps) < limit:
+        steps.append(scroll.step(dt))
+    return steps
+
+def swipe(scroll: ScrollAccumulator, dy: float, count: int = 5, interval: float = 0.01, start: float = 0.0) -> float:
+    """每 interval 秒一次输入，返回最后一次输入的时间"""
+    for i in range(count):
+        scroll.add(0, dy, now=start + i * interval)
+    return start + (count - 1) * interval
+
+def test_sparse_input_is_smoothed_without_loss():
+    scroll = ScrollAccumulator()
+    scroll.add(0, 360, now=0.0)
+    steps = run_until_settled(scroll)
+    assert len(steps) > 1 and steps[0][1] < 360
+    assert sum(dy for _, dy in steps) == 360
+
+def test_sub_notch_remainder_is_kept():
+    scroll = ScrollAccumulator()
+    total = 0
+    for _ in range(10):
+        scroll.add(0, 12, now=0.0)      # 每次 1/10 格
+        total += sum(dy for _, dy in run_until_settled(scroll))
+    assert total == 120
+
+def test_fling_continues_in_the_same_direction_and_decays():
+    scroll = ScrollAccumulator()
+    last = swipe(scroll, -120)
+    assert scroll.fling(now=last + 0.005)
+    assert scroll.vy < 0 and abs(scroll.vy) <= MAX_FLING_SPEED
+    steps = run_until_settled(scroll)
+    total = sum(dy for _, dy in steps)
+    assert total < -600                      # 惯性让滚动量超过输入的 5 × 120
+    tail = [dy for _, dy in steps[-20:]]
+    assert all(dy <= 0 for dy in tail) and scroll.settled
+
+def test_slow_or_stale_input_does_not_fling():
+    scroll = ScrollAccumulator()
+    last = swipe(scroll, -1)
+    assert not scroll.fling(now=last + 0.005)
+    last = swipe(scroll, -120, start=1.0)
+    assert not scroll.fling(now=last + 0.5)   # 抬手前已停顿，窗口内没有样本
+    disabled = ScrollAccumulator(inertia=False)
+    assert not disabled.fling(now=swipe(disabled, -120) + 0.005)
+
+def test_new_input_or_stop_cancels_inertia():
+    scroll = ScrollAccumulator()
+    assert scroll.fling(now=swipe(scroll, 120) + 0.005)
+    scroll.step(0.01)
+    scroll.stop()
+    assert scroll.vy == 0.0
+    assert scroll.fling(now=swipe(scroll, 120, start=2.0) + 0.005)
+    scroll.add(0, 1, now=2.1)
+    assert scroll.vy == 0.0
+
+def test_engine_flings_on_scroll_end_and_cancels():
+    backend = RecordingBackend()
+    engine = MotionEngine(backend.move_rel, rate_hz=100, log=lambda message: None, filters='raw',
+                          scroll_inject=lambda dx, dy: backend.scroll(dy))
+    for _ in range(4):
+        engine.add_scroll(0, 120, protocol.SCROLL_MOVE)
+        time.sleep(0.01)
+    engine.add_scroll(0, 0, protocol.SCROLL_END)
+    assert engine.scroll.vy > 0
+    engine.add_scroll(0, 0, protocol.SCROLL_CANCEL)
+    assert engine.scroll.vy == 0.0
+    engine.sync()
+    assert sum(event[2] for event in backend.events if event[1] == 'scroll') == 480
@@ -0,0 +1,61 @@
+"""多设备输入仲裁：放行、接管与演示者锁定"""
+
+import pytest
+
+import protocol
+from input_backend import RecordingBackend
+from pc_controller import PCController
+from session import HANDOFF_IDLE, Arbiter, ClientSession
+
+@pytest.fixture
+def phones():
+    return ClientSession(None, '10.0.0.2'), ClientSession(None, '10.0.0.3')
+
+def test_last_active_hands_off_after_idle(phones):
+    a, b = phones
+    arbiter = Arbiter('last_active')
+    assert arbiter.admit(a, now=0.0) and arbiter.owner is a
+    assert not arbiter.admit(b, now=HANDOFF_IDLE / 2)
+    assert arbiter.admit(a, now=HANDOFF_IDLE / 2)            # 持续操作保持控制权
+    assert not arbiter.admit(b, now=HANDOFF_IDLE)
+    assert arbiter.admit(b, now=HANDOFF_IDLE * 2.5) and arbiter.owner is b
+    assert not arbiter.admit(a, now=HANDOFF_IDLE * 2.6)
+    assert (a.denied, b.denied) == (1, 2)
+
+def test_merge_admits_everyone(phones):
+    a, b = phones
+    arbiter = Arbiter('merge')
+    assert all(arbiter.admit(session, now=0.0) for session in (a, b, a))
+    assert a.denied == b.denied == 0
+
+def test_presenter_lock_and_release(phones):
+    a, b = phones
+    arbiter = Arbiter('presenter')
+    assert arbiter.claim(b) and not arbiter.claim(a)
+    assert not arbiter.admit(a, now=100.0)                   # 空闲多久也不接管
+    assert arbiter.admit(b, now=100.0)
+    arbiter.release(a)
+    assert arbiter.owner is b
+    arbiter.release(b)
+    assert arbiter.admit(a, now=101.0) and arbiter.owner is a
+
+def test_unknown_mode_rejected(monkeypatch):
+    with pytest.raises(ValueError):
+        Arbiter('round_robin')
+    monkeypatch.setenv('AIRTOUCH_ARBITRATION', 'merge')
+    assert Arbiter().mode == 'merge'
+
+def test_preemption_releases_previous_owners_buttons(phones):
+    a, b = phones
+    controller = PCController(backend=RecordingBackend(), udp_port=0, filters='raw',
+                              log_callback=lambda message: None, arbitration='last_active')
+    controller.start_input()
+    controller.arbiter.handoff_idle = 0.0
+    assert controller._admit(a)
+    controller._session = a
+    controller._submit_button('left', protocol.ACTION_DOWN)
+    assert controller._admit(b)
+    controller.stop_server()
+    events = [event[1:] for event in controller.backend.events]
+    assert events == [('mouse_down', 'left'), ('mouse_up', 'left')]
+    assert a.buttons == set()
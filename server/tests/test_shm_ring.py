@@ -0,0 +1,38 @@
+"""共享内存环形缓冲（单进程内用 bytearray 代替共享内存）"""
+
+import struct
+
+import pytest
+
+from shm_ring import RECORD, SharedRing, ring_size
+
+def make_ring(capacity: int) -> SharedRing:
+    return SharedRing(memoryview(bytearray(ring_size(capacity))), capacity)
+
+def test_put_read_in_order():
+    ring = make_ring(256)
+    assert ring.put(1, b'abc')
+    assert ring.put_struct(2, struct.Struct('<ii'), -5, 7)
+    assert ring.read() == [(1, b'abc'), (2, struct.pack('<ii', -5, 7))]
+    assert len(ring) == 0 and ring.read() == []
+
+def test_records_wrap_without_splitting():
+    ring = make_ring(64)
+    payload = bytes(range(20))   # 每条记录 24 字节
+    for round_ in range(10):
+        assert ring.put(round_, payload)
+        assert ring.put(round_ + 100, payload[:round_])
+        assert ring.read() == [(round_, payload), (round_ + 100, payload[:round_])]
+
+def test_full_ring_rejects_until_read():
+    ring = make_ring(64)
+    record = bytes(64 // 2 - RECORD.size)
+    assert ring.put(1, record) and ring.put(2, record)
+    assert not ring.put(3, b'')
+    assert [kind for kind, _ in ring.read()] == [1, 2]
+    assert ring.put(3, b'')
+
+def test_oversized_record_raises():
+    ring = make_ring(1 << 17)
+    with pytest.raises(ValueError):
+        ring.put(1, bytes(0x10000))
@@ -0,0 +1,41 @@
+"""UDP 移动通道：32 位回绕序号、重放 / 乱序丢弃与会话密钥校验"""
+
+import protocol
+from input_backend import RecordingBackend
+from metrics import Metrics
+from pc_controller import PCController
+from session import ClientSession
+
+def test_seq_newer_wraps_around():
+    assert protocol.seq_newer(1, 0)
+    assert not protocol.seq_newer(0, 0)
+    assert not protocol.seq_newer(0, 1)
+    assert protocol.seq_newer(0, 0xFFFFFFFF)              # 回绕后仍是更新的
+    assert protocol.seq_newer(5, 0xFFFFFFF0)
+    assert not protocol.seq_newer(0xFFFFFFF0, 5)
+    assert protocol.seq_newer(0x7FFFFFFF, 0) and not protocol.seq_newer(0x80000000, 0)
+
+def test_accept_udp_seq_drops_replayed_and_reordered():
+    session = ClientSession(None, '127.0.0.1')
+    assert session.accept_udp_seq(0xFFFFFFFE)
+    assert session.accept_udp_seq(0xFFFFFFFF)
+    assert not session.accept_udp_seq(0xFFFFFFFF)          # 重复
+    assert session.accept_udp_seq(1)                       # 回绕，跳过的 0 视为丢包
+    assert not session.accept_udp_seq(0)                   # 迟到
+    assert not session.accept_udp_seq(0xFFFFFFFE)          # 重放旧报文
+    assert session.udp_seq == 1
+
+def test_datagrams_checked_before_injection():
+    controller = PCController(backend=RecordingBackend(), udp_port=0, filters='raw',
+                              log_callback=lambda message: None, metrics=Metrics())
+    session = ClientSession(None, '127.0.0.1')
+    controller.sessions[session.id] = session
+    addr = ('127.0.0.1', 50000)
+    controller.process_datagram(protocol.encode_udp_motion(session.id, session.udp_key, 7, [(5, 0, 0)]), addr)
+    controller.process_datagram(protocol.encode_udp_motion(session.id, session.udp_key, 7, [(5, 0, 0)]), addr)
+    controller.process_datagram(protocol.encode_udp_motion(session.id, session.udp_key ^ 1, 8, [(5, 0, 0)]), addr)
+    controller.process_datagram(protocol.encode_udp_motion(session.id, session.udp_key, 9, [(0, 3, 0)]), addr)
+    controller.process_datagram(b'\x00', addr)
+    controller.motion.sync()
+    assert controller.backend.total_motion() == (5, 3)
+    assert controller.metrics.snapshot()['drops'] == {'udp_stale': 1, 'udp_auth': 1, 'udp_malformed': 1}
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+AirTouch 文本注入
+- 短文本直接以 Unicode 按键事件输入，不经过剪贴板
+- 后端无法直接输入时回退为剪贴板粘贴：一次连续输入只保存一次原剪贴板，
+  输入停止一段时间后再恢复，而不是每条消息都保存 / 复制 / 粘贴 / 恢复
+- 所有方法都在注入分发线程中执行（恢复剪贴板也通过分发队列排队），
+  与按键、点击保持严格顺序
+"""
+
+import threading
+import time
+from typing import Callable, Optional
+
+from input_backend import InputBackend
+
+# 不超过该长度的文本优先走直接输入
+DIRECT_MAX_CHARS = 64
+# 连续两次粘贴之间的最小间隔（给目标程序读取剪贴板的时间）
+PASTE_SETTLE = 0.03
+# 最后一次粘贴后空闲多久恢复剪贴板
+RESTORE_DELAY = 0.3
+
+class TextInjector:
+    """文本注入器（直接输入优先，剪贴板粘贴兜底）"""
+
+    def __init__(self, backend: InputBackend, schedule: Callable[..., bool],
+                 log: Optional[Callable[[str], None]] = None, direct_max: int = DIRECT_MAX_CHARS):
+        self.backend = backend
+        self.schedule = schedule   # 把函数放进注入队列执行（InjectionDispatcher.submit）
+        self.log = log or print
+        self.direct_max = direct_max
+
+        self._clipboard = None
+        self._saved: Optional[str] = None     # 本轮输入前的剪贴板内容
+        self._pasted: Optional[str] = None    # 最近一次写入剪贴板的内容
+        self._last_paste = 0.0
+        self._generation = 0
+        self._timer: Optional[threading.Timer] = None
+        self.direct_count = 0
+        self.paste_count = 0
+
+    def inject(self, content: str):
+        """输入一段文本"""
+        if len(content) <= self.direct_max:
+            try:
+                self.backend.type_text(content)
+                self.direct_count += 1
+                return
+            except NotImplementedError:
+                pass
+        self._paste(content)
+
+    def _paste(self, content: str):
+        clipboard = self._clipboard
+        if clipboard is None:
+            import pyperclip
+            clipboard = self._clipboard = pyperclip
+
+        if self._saved is None:
+            self._saved = clipboard.paste()
+        else:
+            # 上一次粘贴可能还没被目标程序读取
+            wait = self._last_paste + PASTE_SETTLE - time.perf_counter()
+            if wait > 0:
+                time.sleep(wait)
+
+        clipboard.copy(content)
+        self.backend.hotkey('ctrl', 'v')
+        self._pasted = content
+        self._last_paste = time.perf_counter()
+        self.paste_count += 1
+        self._schedule_restore()
+
+    def _schedule_restore(self):
+        self._generation += 1
+        generation = self._generation
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = threading.Timer(RESTORE_DELAY, self.schedule, (self._restore, generation))
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _restore(self, generation: Optional[int] = None):
+        """恢复剪贴板（期间又有粘贴时跳过，由下一次定时器负责）"""
+        if self._saved is None or (generation is not None and generation != self._generation):
+            return
+        saved, self._saved = self._saved, None
+        try:
+            # 用户在此期间自己复制了内容时不覆盖
+            if self._clipboard.paste() == self._pasted:
+                self._clipboard.copy(saved)
+        except Exception as e:
+            self.log(f"❌ 剪贴板恢复错误: {e}")
+
+    def close(self):
+        """立即恢复剪贴板（分发线程停止后调用）"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self._restore()
@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+"""
+AirTouch UDP 移动通道
+客户端通过 WebSocket 发送 {"type": "udp_open"} 协商，服务端回复端口、会话号与会话密钥，
+之后移动样本可以改走 UDP（报文格式见 protocol.MSG_UDP_MOTION）：
+- 每个报文独立生效，丢包不会阻塞后续报文（没有 TCP 的队头阻塞）
+- 序号不比已接受报文新的（乱序、重复、迟到）直接丢弃，过时的位移没有意义
+- 会话号 + 64 位会话密钥不匹配的报文丢弃
+按键、文本等离散事件仍走 WebSocket，保证可靠有序。
+"""
+
+import asyncio
+from typing import Tuple
+
+class MotionDatagramProtocol(asyncio.DatagramProtocol):
+    """把收到的报文交给控制器处理（运行在事件循环线程）"""
+
+    def __init__(self, controller):
+        self.controller = controller
+
+    def datagram_received(self, data: bytes, addr: Tuple):
+        self.controller.process_datagram(data, addr)
+
+    def error_received(self, exc: Exception):
+        # Windows 上对端关闭时会收到 ICMP 端口不可达，忽略即可
+        pass
+
+async def open_udp_channel(controller, host: str, port: int) -> asyncio.DatagramTransport:
+    """在 host:port 上打开 UDP 移动通道"""
+    loop = asyncio.get_running_loop()
+    transport, _ = await loop.create_datagram_endpoint(
+        lambda: MotionDatagramProtocol(controller), local_addr=(host, port))
+    return transport